@@ -15,6 +15,14 @@ from __future__ import print_function
 import math
 import sys
 
+try:
+    import numpy
+except ImportError:
+    # NumPy is optional here, it just makes things faster
+    numpy = None
+
+from Bio._py3k import _as_bytes, _bytes_to_string
+
 from Bio import Alphabet
 from Bio.Alphabet import IUPAC
 from Bio.Seq import Seq
@@ -39,9 +47,94 @@ class SummaryInfo(object):
         """Initialize with the alignment to calculate information on.
 
         ic_vector attribute. A list of ic content for each column number.
+
+        The letters in each column of the alignment are counted once (when
+        first needed) and cached, so create a new SummaryInfo object if you
+        change the alignment.
         """
         self.alignment = alignment
         self.ic_vector = []
+        self._column_counts = None
+
+    def _letter_array(self):
+        """Return the letters as a NumPy array of bytes, and the weights (PRIVATE).
+
+        This uses the array of an ArrayAlignment directly. Otherwise any
+        sequences shorter than the alignment are padded with null bytes,
+        which are not counted as letters. The weights are taken from the
+        'weight' annotation of each record, defaulting to 1.0.
+        """
+        array = getattr(self.alignment, "array", None)
+        weights = []
+        if array is None:
+            seqs = []
+            for record in self.alignment:
+                seqs.append(str(record.seq))
+                weights.append(record.annotations.get('weight', 1.0))
+            length = max(len(seq) for seq in seqs) if seqs else 0
+            data = _as_bytes("".join(seq + "\0" * (length - len(seq))
+                                     for seq in seqs))
+            array = numpy.frombuffer(data, dtype=numpy.uint8).reshape(
+                (len(seqs), length))
+        else:
+            weights = [record.annotations.get('weight', 1.0)
+                       for record in self.alignment]
+        return array, numpy.array(weights, dtype=float)
+
+    def _get_column_counts(self):
+        """Count the letters in each column of the alignment (PRIVATE).
+
+        Returns a string of all the letters seen (sorted), and two lists
+        with an entry for each column, giving the count for each of those
+        letters and the counts weighted by the sequence weights. These are
+        calculated on the first call and then cached.
+        """
+        if self._column_counts is not None:
+            return self._column_counts
+        if numpy is None:
+            seqs = []
+            weights = []
+            for record in self.alignment:
+                seqs.append(str(record.seq))
+                weights.append(record.annotations.get('weight', 1.0))
+            letters = "".join(sorted(set().union(*seqs)))
+            index = dict((letter, i) for i, letter in enumerate(letters))
+            length = max(len(seq) for seq in seqs) if seqs else 0
+            counts = [[0] * len(letters) for n in range(length)]
+            weighted = [[0.0] * len(letters) for n in range(length)]
+            for seq, weight in zip(seqs, weights):
+                for n, letter in enumerate(seq):
+                    counts[n][index[letter]] += 1
+                    weighted[n][index[letter]] += weight
+            self._column_counts = letters, counts, weighted
+            return self._column_counts
+
+        array, weights = self._letter_array()
+        rows, length = array.shape
+        seen = numpy.bincount(array.ravel(), minlength=256)
+        seen[0] = 0  # padding
+        codes = numpy.flatnonzero(seen)
+        letters = _bytes_to_string(codes.astype(numpy.uint8).tobytes())
+        uniform = bool((weights == 1.0).all())
+        counts = numpy.zeros((length, len(codes)), dtype=int)
+        weighted = numpy.zeros((length, len(codes)), dtype=float)
+        # Count a block of columns at a time with a single bincount call,
+        # by giving each column its own range of 256 values
+        step = max(1, 2 ** 20 // max(1, rows))
+        for start in range(0, length, step):
+            block = array[:, start:start + step]
+            width = block.shape[1]
+            values = (block + 256 * numpy.arange(width)).ravel()
+            counts[start:start + width] = numpy.bincount(
+                values, minlength=256 * width).reshape(width, 256)[:, codes]
+            if not uniform:
+                weighted[start:start + width] = numpy.bincount(
+                    values, numpy.repeat(weights, width),
+                    minlength=256 * width).reshape(width, 256)[:, codes]
+        if uniform:
+            weighted = counts.astype(float)
+        self._column_counts = letters, counts.tolist(), weighted.tolist()
+        return self._column_counts
 
     def dumb_consensus(self, threshold=.7, ambiguous="X",
                        consensus_alpha=None, require_multiple=0):
@@ -69,52 +162,8 @@ class SummaryInfo(object):
               not just 1 sequence and gaps).
         """
         # Iddo Friedberg, 1-JUL-2004: changed ambiguous default to "X"
-        consensus = ''
-
-        # find the length of the consensus we are creating
-        con_len = self.alignment.get_alignment_length()
-
-        # go through each seq item
-        for n in range(con_len):
-            # keep track of the counts of the different atoms we get
-            atom_dict = {}
-            num_atoms = 0
-
-            for record in self.alignment:
-                # make sure we haven't run past the end of any sequences
-                # if they are of different lengths
-                if n < len(record.seq):
-                    if record.seq[n] != '-' and record.seq[n] != '.':
-                        if record.seq[n] not in atom_dict:
-                            atom_dict[record.seq[n]] = 1
-                        else:
-                            atom_dict[record.seq[n]] += 1
-
-                        num_atoms = num_atoms + 1
-
-            max_atoms = []
-            max_size = 0
-
-            for atom in atom_dict:
-                if atom_dict[atom] > max_size:
-                    max_atoms = [atom]
-                    max_size = atom_dict[atom]
-                elif atom_dict[atom] == max_size:
-                    max_atoms.append(atom)
-
-            if require_multiple and num_atoms == 1:
-                consensus += ambiguous
-            elif (len(max_atoms) == 1) and ((float(max_size) /
-                                             float(num_atoms)) >= threshold):
-                consensus += max_atoms[0]
-            else:
-                consensus += ambiguous
-
-        # we need to guess a consensus alphabet if one isn't specified
-        if consensus_alpha is None:
-            consensus_alpha = self._guess_consensus_alphabet(ambiguous)
-
-        return Seq(consensus, consensus_alpha)
+        return self._consensus(threshold, ambiguous, consensus_alpha,
+                               require_multiple, ignore="-.")
 
     def gap_consensus(self, threshold=.7, ambiguous="X",
                       consensus_alpha=None, require_multiple=0):
@@ -127,52 +176,47 @@ class SummaryInfo(object):
               it takes the same as input.
         """
         # Iddo Friedberg, 1-JUL-2004: changed ambiguous default to "X"
-        consensus = ''
+        # TODO - Should we make the guessed alphabet a Gapped alphabet?
+        return self._consensus(threshold, ambiguous, consensus_alpha,
+                               require_multiple, ignore="")
 
-        # find the length of the consensus we are creating
-        con_len = self.alignment.get_alignment_length()
-
-        # go through each seq item
-        for n in range(con_len):
-            # keep track of the counts of the different atoms we get
-            atom_dict = {}
-            num_atoms = 0
-
-            for record in self.alignment:
-                # make sure we haven't run past the end of any sequences
-                # if they are of different lengths
-                if n < len(record.seq):
-                    if record.seq[n] not in atom_dict:
-                        atom_dict[record.seq[n]] = 1
-                    else:
-                        atom_dict[record.seq[n]] += 1
-
-                    num_atoms += 1
+    def _consensus(self, threshold, ambiguous, consensus_alpha,
+                   require_multiple, ignore):
+        """Build a consensus from the column counts (PRIVATE).
 
+        Used by dumb_consensus and gap_consensus, the ignore argument is
+        a string of the letters not counted (e.g. gaps).
+        """
+        letters, counts, weighted = self._get_column_counts()
+        consensus = []
+        for column in counts:
+            # keep track of the most common atoms in this column
             max_atoms = []
             max_size = 0
-
-            for atom in atom_dict:
-                if atom_dict[atom] > max_size:
+            num_atoms = 0
+            for atom, count in zip(letters, column):
+                if not count or atom in ignore:
+                    continue
+                num_atoms += count
+                if count > max_size:
                     max_atoms = [atom]
-                    max_size = atom_dict[atom]
-                elif atom_dict[atom] == max_size:
+                    max_size = count
+                elif count == max_size:
                     max_atoms.append(atom)
 
             if require_multiple and num_atoms == 1:
-                consensus += ambiguous
+                consensus.append(ambiguous)
             elif (len(max_atoms) == 1) and ((float(max_size) /
                                              float(num_atoms)) >= threshold):
-                consensus += max_atoms[0]
+                consensus.append(max_atoms[0])
             else:
-                consensus += ambiguous
+                consensus.append(ambiguous)
 
         # we need to guess a consensus alphabet if one isn't specified
         if consensus_alpha is None:
-            # TODO - Should we make this into a Gapped alphabet?
             consensus_alpha = self._guess_consensus_alphabet(ambiguous)
 
-        return Seq(consensus, consensus_alpha)
+        return Seq("".join(consensus), consensus_alpha)
 
     def _guess_consensus_alphabet(self, ambiguous):
         """Pick an (ungapped) alphabet for an alignment consesus sequence.
@@ -255,6 +299,9 @@ class SummaryInfo(object):
         # get a starting dictionary based on the alphabet of the alignment
         rep_dict, skip_items = self._get_base_replacements(skip_chars)
 
+        if numpy is not None:
+            return self._array_replacement(rep_dict, skip_items)
+
         # iterate through each record
         for rec_num1 in range(len(self.alignment)):
             # iterate through each record from one beyond the current record
@@ -271,6 +318,51 @@ class SummaryInfo(object):
 
         return rep_dict
 
+    def _array_replacement(self, rep_dict, skip_items):
+        """Fill in the replacement dictionary using NumPy (PRIVATE).
+
+        Rather than comparing each pair of records, this goes through the
+        records once, keeping the weighted letter counts for each column in
+        the records so far. Each letter in the current record is then paired
+        with those counts (as the second letter of each replacement).
+        """
+        array, weights = self._letter_array()
+        letters = sorted(set(first for first, second in rep_dict))
+        unknown = len(letters)
+        # Map each byte to an index into letters (or to unknown), using -1
+        # for letters to skip and padding
+        lookup = numpy.empty(256, dtype=int)
+        lookup.fill(unknown)
+        lookup[0] = -1
+        for char in skip_items:
+            if len(char) == 1 and ord(char) < 256:
+                lookup[ord(char)] = -1
+        for i, letter in enumerate(letters):
+            lookup[ord(letter)] = i
+        # totals[second, first] is the weighted count of replacements
+        totals = numpy.zeros((unknown + 1, unknown + 1))
+        previous = numpy.zeros((array.shape[1], unknown + 1))
+        columns = numpy.arange(array.shape[1])
+        for row, weight in zip(array, weights):
+            index = lookup[row]
+            wanted = index >= 0
+            index = index[wanted]
+            cols = columns[wanted]
+            numpy.add.at(totals, index, previous[cols] * weight)
+            previous[cols, index] += weight
+        if totals[unknown].any() or totals[:, unknown].any():
+            seen = numpy.flatnonzero(numpy.bincount(array.ravel(),
+                                                    minlength=256))
+            residues = [chr(code) for code in seen if lookup[code] == unknown]
+            raise ValueError("Residues %s not found in alphabet %s"
+                             % (", ".join(residues), self.alignment._alphabet))
+        totals = totals.tolist()
+        for i, first in enumerate(letters):
+            for j, second in enumerate(letters):
+                if totals[j][i]:
+                    rep_dict[(first, second)] += totals[j][i]
+        return rep_dict
+
     def _pair_replacement(self, seq1, seq2, weight1, weight2,
                           start_dict, ignore_chars):
         """Compare two sequences and generate info on the replacements seen.
@@ -320,15 +412,9 @@ class SummaryInfo(object):
                 (isinstance(self.alignment._alphabet, Alphabet.Gapped) and
                  all_letters == self.alignment._alphabet.gap_char):
             # We are dealing with a generic alphabet class where the
-            # letters are not defined!  We must build a list of the
-            # letters used...
-            set_letters = set()
-            for record in self.alignment:
-                # Note the built in set does not have a union_update
-                # which was provided by the sets module's Set
-                set_letters = set_letters.union(record.seq)
-            list_letters = sorted(set_letters)
-            all_letters = "".join(list_letters)
+            # letters are not defined!  We must use the letters seen
+            # (these are sorted)...
+            all_letters = self._get_column_counts()[0]
         return all_letters
 
     def _get_base_replacements(self, skip_items=None):
@@ -408,20 +494,15 @@ class SummaryInfo(object):
         else:
             left_seq = self.dumb_consensus()
 
+        letters, counts, weighted = self._get_column_counts()
         pssm_info = []
-        # now start looping through all of the sequences and getting info
+        # now start looping through all of the columns and getting info
         for residue_num in range(len(left_seq)):
             score_dict = self._get_base_letters(all_letters)
-            for record in self.alignment:
-                try:
-                    this_residue = record.seq[residue_num]
-                # if we hit an index error we've run out of sequence and
-                # should not add new residues
-                except IndexError:
-                    this_residue = None
-
-                if this_residue and this_residue not in chars_to_ignore:
-                    weight = record.annotations.get('weight', 1.0)
+            for this_residue, count, weight in zip(letters,
+                                                   counts[residue_num],
+                                                   weighted[residue_num]):
+                if count and this_residue not in chars_to_ignore:
                     try:
                         score_dict[this_residue] += weight
                     # if we get a KeyError then we have an alphabet problem
@@ -519,7 +600,6 @@ class SummaryInfo(object):
         info_content = {}
         for residue_num in range(start, end):
             freq_dict = self._get_letter_freqs(residue_num,
-                                               self.alignment,
                                                all_letters,
                                                chars_to_ignore,
                                                pseudo_count,
@@ -540,14 +620,13 @@ class SummaryInfo(object):
             self.ic_vector.append(info_content[i + start])
         return total_info
 
-    def _get_letter_freqs(self, residue_num, all_records, letters, to_ignore,
+    def _get_letter_freqs(self, residue_num, letters, to_ignore,
                           pseudo_count=0, e_freq_table=None, random_expected=None):
         """Determine the frequency of specific letters in the alignment.
 
         Arguments:
             - residue_num - The number of the column we are getting frequencies
               from.
-            - all_records - All of the SeqRecords in the alignment.
             - letters - The letters we are interested in getting the frequency
               for.
             - to_ignore - Letters we are specifically supposed to ignore.
@@ -573,18 +652,18 @@ class SummaryInfo(object):
             raise ValueError("Positive value required for "
                              "pseudo_count, %s provided" % (pseudo_count))
 
-        # collect the count info into the dictionary for all the records
-        for record in all_records:
-            try:
-                if record.seq[residue_num] not in to_ignore:
-                    weight = record.annotations.get('weight', 1.0)
-                    freq_info[record.seq[residue_num]] += weight
+        # collect the count info into the dictionary from the column counts
+        column_letters, counts, weighted = self._get_column_counts()
+        for letter, count, weight in zip(column_letters, counts[residue_num],
+                                         weighted[residue_num]):
+            if count and letter not in to_ignore:
+                try:
+                    freq_info[letter] += weight
                     total_count += weight
-            # getting a key error means we've got a problem with the alphabet
-            except KeyError:
-                raise ValueError("Residue %s not found in alphabet %s"
-                                 % (record.seq[residue_num],
-                                    self.alignment._alphabet))
+                # getting a key error means we've got a problem with the alphabet
+                except KeyError:
+                    raise ValueError("Residue %s not found in alphabet %s"
+                                     % (letter, self.alignment._alphabet))
 
         if e_freq_table:
             if not isinstance(e_freq_table, FreqTable.FreqTable):
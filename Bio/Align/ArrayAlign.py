@@ -0,0 +1,257 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+"""Multiple sequence alignments held as a NumPy array of letters.
+
+The MultipleSeqAlignment class in Bio.Align holds a list of SeqRecord
+objects, which is flexible but slow for large alignments, especially when
+working with columns. The ArrayAlignment class defined here instead holds
+the letters in a two dimensional NumPy array of unsigned bytes (one row per
+sequence, one column per alignment column), plus the per-record metadata.
+
+>>> from Bio import AlignIO
+>>> from Bio.Align.ArrayAlign import ArrayAlignment
+>>> align = ArrayAlignment(AlignIO.read("Clustalw/opuntia.aln", "clustal"))
+>>> print(align)
+SingleLetterAlphabet() alignment with 7 rows and 156 columns
+TATACATTAAAGAAGGGGGATGCGGATAAATGGAAAGGCGAAAG...AGA gi|6273285|gb|AF191659.1|AF191
+TATACATTAAAGAAGGGGGATGCGGATAAATGGAAAGGCGAAAG...AGA gi|6273284|gb|AF191658.1|AF191
+TATACATTAAAGAAGGGGGATGCGGATAAATGGAAAGGCGAAAG...AGA gi|6273287|gb|AF191661.1|AF191
+TATACATAAAAGAAGGGGGATGCGGATAAATGGAAAGGCGAAAG...AGA gi|6273286|gb|AF191660.1|AF191
+TATACATTAAAGGAGGGGGATGCGGATAAATGGAAAGGCGAAAG...AGA gi|6273290|gb|AF191664.1|AF191
+TATACATTAAAGGAGGGGGATGCGGATAAATGGAAAGGCGAAAG...AGA gi|6273289|gb|AF191663.1|AF191
+TATACATTAAAGGAGGGGGATGCGGATAAATGGAAAGGCGAAAG...AGA gi|6273291|gb|AF191665.1|AF191
+
+Indexing follows the MultipleSeqAlignment class, but taking a sub-alignment
+by slicing rows and/or columns does not copy the letters, the new object
+uses a view of the same NumPy array:
+
+>>> sub_align = align[2:5, 10:20]
+>>> print(sub_align)
+SingleLetterAlphabet() alignment with 3 rows and 10 columns
+AGAAGGGGGA gi|6273287|gb|AF191661.1|AF191
+AGAAGGGGGA gi|6273286|gb|AF191660.1|AF191
+AGGAGGGGGA gi|6273290|gb|AF191664.1|AF191
+>>> print(align[:, 12])
+AAAAGGG
+
+The array itself is available for vectorised calculations:
+
+>>> align.array.shape
+(7, 156)
+>>> int((align.array == ord("G")).sum())
+163
+
+Use the to_alignment method to get a MultipleSeqAlignment again (e.g. to
+save it to a file with Bio.AlignIO).
+"""
+
+from __future__ import print_function
+
+from numbers import Integral
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.Align.ArrayAlign.")
+
+from Bio._py3k import _as_bytes, _bytes_to_string
+
+from Bio import Alphabet
+from Bio.Align import MultipleSeqAlignment
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+
+def _slice_letter_annotations(letter_annotations, col_index):
+    """Apply a column slice to a per-letter-annotation dict (PRIVATE)."""
+    if not letter_annotations:
+        return letter_annotations
+    return dict((key, value[col_index])
+                for key, value in letter_annotations.items())
+
+
+class ArrayAlignment(object):
+    """Multiple sequence alignment held as a NumPy array of letters.
+
+    The array attribute holds the letters as a two dimensional NumPy array
+    of unsigned bytes (uint8), with one row per record. For each row the
+    record's id, name, description, dbxrefs, annotations and per-letter
+    annotations are kept (but not any features), so that the rows can
+    be turned back into SeqRecord objects (using the alignment's alphabet).
+    """
+
+    def __init__(self, records, alphabet=None, annotations=None):
+        """Initialize a new ArrayAlignment object.
+
+        Arguments:
+         - records - A MultipleSeqAlignment, or a list (or iterator) of
+                     SeqRecord objects whose sequences are all the same
+                     length.
+         - alphabet - The alphabet for the whole alignment, by default taken
+                      from the MultipleSeqAlignment or as a consensus of the
+                      record alphabets.
+         - annotations - Information about the whole alignment (dictionary),
+                         by default taken from the MultipleSeqAlignment.
+        """
+        if isinstance(records, MultipleSeqAlignment):
+            if alphabet is None:
+                alphabet = records._alphabet
+            if annotations is None:
+                annotations = dict(records.annotations)
+        records = list(records)
+        if alphabet is None:
+            if records:
+                alphabet = Alphabet._consensus_alphabet(rec.seq.alphabet
+                                                        for rec in records)
+            else:
+                alphabet = Alphabet.single_letter_alphabet
+        if annotations is None:
+            annotations = {}
+        elif not isinstance(annotations, dict):
+            raise TypeError("annotations argument should be a dict")
+        seqs = [str(rec.seq) for rec in records]
+        length = len(seqs[0]) if seqs else 0
+        for seq in seqs:
+            if len(seq) != length:
+                raise ValueError("Sequences must all be the same length")
+        # One copy of all the letters, as a writeable buffer
+        data = bytearray(_as_bytes("".join(seqs)))
+        del seqs
+        self.array = numpy.frombuffer(data, dtype=numpy.uint8).reshape(
+            (len(records), length))
+        self._rows = [(rec.id, rec.name, rec.description, rec.dbxrefs,
+                       rec.annotations, dict(rec.letter_annotations))
+                      for rec in records]
+        self._alphabet = alphabet
+        self.annotations = annotations
+
+    @classmethod
+    def _from_parts(cls, array, rows, alphabet, annotations):
+        """Create a new object without copying the array (PRIVATE)."""
+        obj = cls.__new__(cls)
+        obj.array = array
+        obj._rows = rows
+        obj._alphabet = alphabet
+        obj.annotations = annotations
+        return obj
+
+    def _record(self, row, col_index=None):
+        """Build a SeqRecord for the given row (PRIVATE)."""
+        letters = self.array[row]
+        if col_index is not None:
+            letters = letters[col_index]
+        id, name, description, dbxrefs, annotations, letter_annotations = \
+            self._rows[row]
+        if col_index is not None:
+            letter_annotations = _slice_letter_annotations(letter_annotations,
+                                                           col_index)
+        return SeqRecord(Seq(_bytes_to_string(letters.tobytes()),
+                             self._alphabet),
+                         id=id, name=name, description=description,
+                         dbxrefs=list(dbxrefs), annotations=dict(annotations),
+                         letter_annotations=dict(letter_annotations))
+
+    def to_alignment(self):
+        """Return the alignment as a MultipleSeqAlignment object."""
+        return MultipleSeqAlignment((self._record(i) for i in range(len(self))),
+                                    self._alphabet,
+                                    annotations=dict(self.annotations))
+
+    def __len__(self):
+        """Return the number of sequences (rows) in the alignment."""
+        return self.array.shape[0]
+
+    def get_alignment_length(self):
+        """Return the number of columns in the alignment."""
+        return self.array.shape[1]
+
+    def __iter__(self):
+        """Iterate over alignment rows as SeqRecord objects."""
+        for i in range(len(self)):
+            yield self._record(i)
+
+    def __getitem__(self, index):
+        """Access part of the alignment.
+
+        As in the MultipleSeqAlignment class, align[r] gives a row as a
+        SeqRecord, align[r, c] a single letter, align[:, c] a column as a
+        string, and slicing the rows and/or columns gives a sub-alignment.
+        Sub-alignments share the underlying array (no copy is made).
+        Any integer type (including NumPy integers) can be used as an index.
+        """
+        if isinstance(index, Integral):
+            return self._record(index)
+        elif isinstance(index, slice):
+            return self._from_parts(self.array[index], self._rows[index],
+                                    self._alphabet, self.annotations)
+        elif len(index) != 2:
+            raise TypeError("Invalid index type.")
+
+        row_index, col_index = index
+        if isinstance(row_index, Integral):
+            if isinstance(col_index, Integral):
+                return chr(self.array[row_index, col_index])
+            return self._record(row_index, col_index)
+        elif isinstance(col_index, Integral):
+            return _bytes_to_string(self.array[row_index, col_index].tobytes())
+        else:
+            rows = [(id, name, description, dbxrefs, annotations,
+                     _slice_letter_annotations(letter_annotations, col_index))
+                    for (id, name, description, dbxrefs, annotations,
+                         letter_annotations) in self._rows[row_index]]
+            return self._from_parts(self.array[row_index, col_index], rows,
+                                    self._alphabet, self.annotations)
+
+    def _str_line(self, row, length=50):
+        """Returns a truncated string representation of a row (PRIVATE)."""
+        letters = self.array[row]
+        if len(letters) > length:
+            letters = numpy.concatenate((letters[:length - 6], [46, 46, 46],
+                                         letters[-3:])).astype(numpy.uint8)
+        return "%s %s" % (_bytes_to_string(letters.tobytes()),
+                          self._rows[row][0])
+
+    def __str__(self):
+        """Returns a multi-line string summary of the alignment.
+
+        This matches the MultipleSeqAlignment class, showing at most 20
+        rows and 50 columns.
+        """
+        rows = len(self)
+        lines = ["%s alignment with %i rows and %i columns"
+                 % (str(self._alphabet), rows, self.get_alignment_length())]
+        if rows <= 20:
+            lines.extend(self._str_line(i) for i in range(rows))
+        else:
+            lines.extend(self._str_line(i) for i in range(18))
+            lines.append("...")
+            lines.append(self._str_line(rows - 1))
+        return "\n".join(lines)
+
+    def __repr__(self):
+        """Returns a representation of the object for debugging."""
+        return "<%s instance (%i records of length %i, %s) at %x>" % \
+            (self.__class__, len(self), self.get_alignment_length(),
+             repr(self._alphabet), id(self))
+
+    def format(self, format):
+        """Returns the alignment as a string in the specified file format.
+
+        This converts the alignment to a MultipleSeqAlignment first.
+        """
+        return self.__format__(format)
+
+    def __format__(self, format_spec):
+        """Returns the alignment as a string in the specified file format."""
+        if format_spec:
+            return self.to_alignment().format(format_spec)
+        else:
+            return str(self)
+
+
+if __name__ == "__main__":
+    from Bio._utils import run_doctest
+    run_doctest()
@@ -0,0 +1,253 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+"""Vectorised Smith-Waterman local alignment scores using NumPy.
+
+When screening a large set of sequences for local similarity to a query,
+usually only the few good hits need a full alignment. The local_scores
+function defined here calculates just the best local alignment score of a
+query against each of many targets, with affine gap penalties (Gotoh), and
+where the best alignment ends. It uses the same scoring conventions as the
+local alignment functions of Bio.pairwise2 (e.g. localds), and gives the
+same scores.
+
+Instead of filling in the score matrix one cell at a time, each column
+(target residue) is calculated in one go for the whole query, and for a
+batch of targets at once, using NumPy arrays. The match scores of the query
+against every possible residue are looked up once (a query profile). Gaps
+in the target (running along the column) depend on the cells above in the
+same column, which is handled with a running maximum over the column; this
+is the idea behind the "striped" algorithm of Farrar (2007), where any
+extension penalty is at most the opening penalty.
+
+>>> from Bio.Align.LocalScores import local_scores
+>>> from Bio.SubsMat.MatrixInfo import blosum62
+>>> scores, query_ends, target_ends = local_scores(
+...     "KEVLAHHW", ["EVLWWH", "PPPP", "KEVLA"], blosum62, -10, -1)
+>>> print(scores.tolist())
+[16.0, 0.0, 22.0]
+>>> print(query_ends.tolist())
+[7, 0, 5]
+>>> print(target_ends.tolist())
+[6, 0, 5]
+
+The ends are given as for Python slices, so the best local alignment with
+the first target ends with the last letter of "KEVLAHH" in the query and of
+"EVLWWH" in the target. Use align_hits to get the full alignments (from Bio.pairwise2) of
+just the targets scoring at least some threshold:
+
+>>> from Bio.Align.LocalScores import align_hits
+>>> from Bio import pairwise2
+>>> for index, alignments in align_hits(
+...         "KEVLAHHW", ["EVLWWH", "PPPP", "KEVLA"], blosum62, -10, -1,
+...         threshold=20):
+...     print(index)
+...     print(pairwise2.format_alignment(*alignments[0]))
+2
+KEVLAHHW
+|||||
+KEVLA---
+  Score=22
+<BLANKLINE>
+
+"""
+
+from __future__ import print_function
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.Align.LocalScores.")
+
+from Bio._py3k import _as_bytes
+
+from Bio import pairwise2
+
+
+def _check_scoring(match, open, extend, penalize_extend_when_opening):
+    """Return the match function and the affine gap function (PRIVATE).
+
+    match can be a substitution matrix as a dictionary (e.g. from
+    Bio.SubsMat.MatrixInfo) or a match function as used by Bio.pairwise2.
+    The gap penalties are checked as in Bio.pairwise2, which raises a
+    ValueError if they are positive or if extending a gap would cost more
+    than opening it.
+    """
+    if isinstance(match, dict):
+        match = pairwise2.dictionary_match(match)
+    gap_fn = pairwise2.affine_penalty(open, extend,
+                                      penalize_extend_when_opening)
+    return match, gap_fn
+
+
+def local_scores(query, targets, match, open, extend,
+                 penalize_extend_when_opening=False, batch_size=64):
+    """Return the best local alignment score of a query against each target.
+
+    Arguments:
+     - query - The query sequence (a string or Seq object).
+     - targets - An iterable of target sequences (strings or Seq objects).
+     - match - A substitution matrix as a dictionary of residue pairs (e.g.
+       from Bio.SubsMat.MatrixInfo, looked up both ways round), or a match
+       function from Bio.pairwise2 such as identity_match(2, -1).
+     - open, extend - The (non-positive) gap opening and extension scores,
+       as for the localds and localms functions of Bio.pairwise2.
+     - penalize_extend_when_opening - As in Bio.pairwise2, also apply the
+       extension score to the first residue of a gap.
+     - batch_size - The number of targets calculated together.  Targets
+       of similar length are put in the same batch.
+
+    Returns three NumPy arrays in the order of the targets: the scores (as
+    floats), and the end of the best local alignment in the query and in
+    the target (counting as for Python slices).  If there is more than one
+    best local alignment, the ends are those of the first found taking the
+    target residues in order.  If the score is zero, the ends are zero too,
+    and if the query or a target is empty, its score is NaN.
+
+    The sequences should be ASCII strings.  If a target residue cannot be
+    scored against the query (e.g. a letter missing from the substitution
+    matrix), a KeyError is raised.
+    """
+    match_fn = _check_scoring(match, open, extend,
+                              penalize_extend_when_opening)[0]
+    first_gap = -pairwise2.calc_affine_penalty(1, open, extend,
+                                               penalize_extend_when_opening)
+    next_gap = -extend
+
+    query = str(query)
+    targets = [str(target) for target in targets]
+    scores = numpy.empty(len(targets))
+    scores.fill(numpy.nan)
+    query_ends = numpy.zeros(len(targets), int)
+    target_ends = numpy.zeros(len(targets), int)
+    if not query:
+        return scores, query_ends, target_ends
+
+    # The match score of each query residue against every ASCII residue,
+    # plus a last row used to pad the shorter targets in a batch.
+    profile = numpy.empty((129, len(query)))
+    profile[:128] = numpy.frombuffer(
+        pairwise2._make_query_profile(query, match_fn)).reshape(
+        128, len(query))
+    missing = numpy.isnan(profile[:, 0])
+    missing[128] = False
+    profile[missing] = 0
+    # Whole number scores (as in the usual substitution matrices) are
+    # exact and quicker using integers, if they cannot overflow.
+    known = profile[:128][~missing[:128]]
+    if known.size and (known == numpy.round(known)).all() and \
+       first_gap == int(first_gap) and next_gap == int(next_gap) and \
+       len(query) * (abs(known).max() + first_gap + next_gap) < 2 ** 29:
+        profile[128] = -2 ** 30
+        profile = profile.astype(numpy.int32)
+        first_gap, next_gap = int(first_gap), int(next_gap)
+    else:
+        profile[128] = -numpy.inf
+
+    # Sort the targets by length, so each batch needs little padding
+    order = sorted((index for index, target in enumerate(targets) if target),
+                   key=lambda index: len(targets[index]))
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        codes = numpy.empty((len(batch), len(targets[batch[-1]])), int)
+        codes.fill(128)
+        for row, index in enumerate(batch):
+            target = numpy.frombuffer(_as_bytes(targets[index]), numpy.uint8)
+            if target.max() > 127:
+                raise ValueError("Only ASCII sequences are supported")
+            codes[row, :len(target)] = target
+        unknown = missing[codes]
+        if unknown.any():
+            row, col = numpy.argwhere(unknown)[0]
+            raise KeyError(targets[batch[row]][col])
+        best, best_rows, best_cols = _score_batch(profile, codes,
+                                                  first_gap, next_gap)
+        scores[batch] = best
+        query_ends[batch] = best_rows
+        target_ends[batch] = best_cols
+    return scores, query_ends, target_ends
+
+
+def _score_batch(profile, codes, first_gap, next_gap):
+    """Calculate the local scores of a batch of targets (PRIVATE).
+
+    codes holds the target residues (as indices into the rows of the query
+    profile), one target per row, where the last row of the profile is
+    used for padding and also stands for minus infinity.  Returns the best
+    scores and the (one-based) query and target positions where they were
+    first found.
+    """
+    count, width = codes.shape
+    length = profile.shape[1]
+    dtype = profile.dtype
+    # The score matrix columns, and the best scores ending with a gap in
+    # the query (coming from the previous column), for the whole batch.
+    scores = numpy.zeros((count, length), dtype)
+    gap_scores = numpy.empty((count, length), dtype)
+    gap_scores.fill(profile[-1, 0])
+    diagonal = numpy.empty((count, length), dtype)
+    match_scores = numpy.empty((count, length), dtype)
+    running = numpy.empty((count, length), dtype)
+    # The penalty of extending a gap in the target down to each query row,
+    # relative to the first row, used for the running maximum
+    offsets = (numpy.arange(length) * next_gap).astype(dtype)
+    open_offsets = (offsets[:-1] + first_gap).astype(dtype)
+    first_gap, next_gap, zero = dtype.type(first_gap), \
+        dtype.type(next_gap), dtype.type(0)
+
+    best = numpy.zeros(count, dtype)
+    best_rows = numpy.zeros(count, int)
+    best_cols = numpy.zeros(count, int)
+    for col in range(width):
+        # Match or mismatch, from the previous column one row up
+        numpy.take(profile, codes[:, col], axis=0, out=match_scores)
+        numpy.add(scores[:, :-1], match_scores[:, 1:], out=diagonal[:, 1:])
+        diagonal[:, 0] = match_scores[:, 0]
+        # Open or extend a gap in the query
+        numpy.subtract(gap_scores, next_gap, out=gap_scores)
+        numpy.subtract(scores, first_gap, out=scores)
+        numpy.maximum(gap_scores, scores, out=gap_scores)
+        numpy.maximum(diagonal, gap_scores, out=scores)
+        numpy.maximum(scores, zero, out=scores)
+        # Open or extend a gap in the target. The best gap reaching row i
+        # opens after the row k < i maximising scores[k] + offsets[k]. As
+        # opening a gap costs at least as much as extending one, a gap in
+        # the target never needs to start from the end of another one, so
+        # the scores without these gaps can be used.
+        numpy.add(scores, offsets, out=running)
+        numpy.maximum.accumulate(running, axis=1, out=running)
+        numpy.subtract(running[:, :-1], open_offsets, out=running[:, :-1])
+        numpy.maximum(scores[:, 1:], running[:, :-1], out=scores[:, 1:])
+
+        column_best = scores.max(axis=1)
+        better = column_best > best
+        if better.any():
+            best[better] = column_best[better]
+            best_rows[better] = scores[better].argmax(axis=1) + 1
+            best_cols[better] = col + 1
+    return best, best_rows, best_cols
+
+
+def align_hits(query, targets, match, open, extend, threshold,
+               penalize_extend_when_opening=False, one_alignment_only=False,
+               batch_size=64):
+    """Locally align a query with the targets scoring at least a threshold.
+
+    The scores are calculated with local_scores (see there for the
+    arguments), and only the targets with a score of at least threshold
+    are aligned with Bio.pairwise2 (the equivalent of its localds or
+    localms functions). This yields a tuple of the index of the target and
+    the list of its alignments, in the order of the targets.
+    """
+    targets = list(targets)
+    match_fn, gap_fn = _check_scoring(match, open, extend,
+                                      penalize_extend_when_opening)
+    scores = local_scores(query, targets, match_fn, open, extend,
+                          penalize_extend_when_opening, batch_size)[0]
+    for index in numpy.flatnonzero(scores >= threshold):
+        yield int(index), pairwise2.align.localcc(
+            query, targets[index], match_fn, gap_fn, gap_fn,
+            penalize_extend_when_opening=penalize_extend_when_opening,
+            one_alignment_only=one_alignment_only)
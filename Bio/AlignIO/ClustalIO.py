@@ -49,6 +49,19 @@ class ClustalWriter(SequentialAlignmentWriter):
         if max_length <= 0:
             raise ValueError("Non-empty sequences are required")
 
+        # Make sure we don't get any spaces in the record identifier when
+        # output in the file by replacing them with underscores. We do a nice
+        # 80 column output, although this may result in truncation of the ids.
+        rows = [(record.id[0:30].replace(" ", "_").ljust(36), str(record.seq))
+                for record in alignment]
+
+        # This was stored by Bio.Clustalw using a ._star_info property.
+        star_info = getattr(alignment, "_star_info", "")
+
+        # Build the whole alignment as a list of strings, and write it in
+        # one go (much faster than many small writes)
+        lines = [output]
+
         # keep displaying sequences until we reach the end
         while cur_char != max_length:
             # calculate the number of sequences to show, which will
@@ -59,27 +72,20 @@ class ClustalWriter(SequentialAlignmentWriter):
                 show_num = 50
 
             # go through all of the records and print out the sequences
-            # when we output, we do a nice 80 column output, although this
-            # may result in truncation of the ids.
-            for record in alignment:
-                # Make sure we don't get any spaces in the record
-                # identifier when output in the file by replacing
-                # them with underscores:
-                line = record.id[0:30].replace(" ", "_").ljust(36)
-                line += str(record.seq[cur_char:(cur_char + show_num)])
-                output += line + "\n"
+            for name, sequence in rows:
+                lines.append(name + sequence[cur_char:(cur_char + show_num)] + "\n")
 
             # now we need to print out the star info, if we've got it
-            # This was stored by Bio.Clustalw using a ._star_info property.
-            if hasattr(alignment, "_star_info") and alignment._star_info != '':
-                output += (" " * 36) + \
-                    alignment._star_info[cur_char:(cur_char + show_num)] + "\n"
+            if star_info:
+                lines.append((" " * 36) +
+                             star_info[cur_char:(cur_char + show_num)] + "\n")
 
-            output += "\n"
+            lines.append("\n")
             cur_char += show_num
 
         # Want a trailing blank new line in case the output is concatenated
-        self.handle.write(output + "\n")
+        lines.append("\n")
+        self.handle.write("".join(lines))
 
 
 class ClustalIterator(AlignmentIterator):
@@ -69,7 +69,8 @@ If we want an inclusive end coordinate, we need to use end = start + size - 1:
 a 1-column wide alignment would have start == end.
 """
 import os
-from itertools import islice
+from bisect import bisect_right
+from collections import OrderedDict
 
 try:
     from sqlite3 import dbapi2 as _sqlite
@@ -92,11 +93,11 @@ class MafWriter(SequentialAlignmentWriter):
     """Accepts a MultipleSeqAlignment object, writes a MAF file"""
     def write_header(self):
         """Writes the MAF header"""
-        self.handle.write("##maf version=1 scoring=none\n")
-        self.handle.write("# generated by Biopython\n\n")
+        self.handle.write("##maf version=1 scoring=none\n"
+                          "# generated by Biopython\n\n")
 
-    def _write_record(self, record):
-        """Writes a single SeqRecord object to an 's' line in a MAF block"""
+    def _write_record(self, record, lines):
+        """Adds a single SeqRecord object as an 's' line to the list (PRIVATE)."""
         # convert biopython-style 1/-1 strand to MAF-style +/- strand
         if record.annotations.get("strand") == 1:
             strand = "+"
@@ -106,15 +107,18 @@ class MafWriter(SequentialAlignmentWriter):
             # TODO: issue warning?
             strand = "+"
 
-        fields = ["s",
-                  # In the MAF file format, spaces are not allowed in the id
-                  "%-40s" % record.id.replace(" ", "_"),
-                  "%15s" % record.annotations.get("start", 0),
-                  "%5s" % record.annotations.get("size", len(str(record.seq).replace("-", ""))),
-                  strand,
-                  "%15s" % record.annotations.get("srcSize", 0),
-                  str(record.seq)]
-        self.handle.write("%s\n" % " ".join(fields))
+        sequence = str(record.seq)
+        if "size" in record.annotations:
+            size = record.annotations["size"]
+        else:
+            size = len(sequence) - sequence.count("-")
+        lines.append("s %-40s %15s %5s %s %15s %s\n"
+                     % (record.id.replace(" ", "_"),
+                        record.annotations.get("start", 0),
+                        size,
+                        strand,
+                        record.annotations.get("srcSize", 0),
+                        sequence))
 
     def write_alignment(self, alignment):
         """
@@ -139,16 +143,19 @@ class MafWriter(SequentialAlignmentWriter):
         except AttributeError:
             anno = "score=0.00"
 
-        self.handle.write("a %s\n" % (anno,))
+        # Build the whole block as a list of strings, and write it in
+        # one go (much faster than many small writes)
+        lines = ["a %s\n" % (anno,)]
 
         recs_out = 0
 
         for record in alignment:
-            self._write_record(record)
+            self._write_record(record, lines)
 
             recs_out += 1
 
-        self.handle.write("\n")
+        lines.append("\n")
+        self.handle.write("".join(lines))
 
         return recs_out
 
@@ -274,10 +281,21 @@ class MafIndex(object):
     The index is a sqlite3 database that is built upon creation of the object
     if necessary, and queried when methods *search* or *get_spliced* are
     used."""
-    def __init__(self, sqlite_file, maf_file, target_seqname):
-        """Indexes or loads the index of a MAF file"""
+    def __init__(self, sqlite_file, maf_file, target_seqname, max_cache=100):
+        """Indexes or loads the index of a MAF file.
+
+        Parsed alignment blocks are cached (up to max_cache of them, the
+        least recently used being dropped first), so that overlapping or
+        repeated queries do not parse the same block twice. These cached
+        MultipleSeqAlignment objects are shared, and should not be modified.
+        Use max_cache=0 to disable this.
+        """
+        if max_cache < 0:
+            raise ValueError("Use max_cache with a minimum of 0")
         self._target_seqname = target_seqname
         self._maf_file = maf_file
+        self._max_cache = max_cache
+        self._cache = OrderedDict()
 
         self._maf_fp = open(self._maf_file, "r")
 
@@ -341,23 +359,16 @@ class MafIndex(object):
                           (self._maf_file,))
         self._con.execute("CREATE TABLE offset_data (bin INTEGER, start INTEGER, end INTEGER, offset INTEGER);")
 
-        insert_count = 0
-
-        # iterate over the entire file and insert in batches
-        mafindex_func = self.__maf_indexer()
-
-        while True:
-            batch = list(islice(mafindex_func, 100))
-            if not batch:
-                break
-
-            # batch is made from self.__maf_indexer(),
-            self._con.executemany(
-                "INSERT INTO offset_data (bin, start, end, offset) VALUES (?,?,?,?);", batch)
-            self._con.commit()
-            insert_count += len(batch)
+        # iterate over the entire file, inserting all the rows in a single
+        # transaction (committing every few rows is what makes this slow)
+        self._con.executemany(
+            "INSERT INTO offset_data (bin, start, end, offset) VALUES (?,?,?,?);",
+            self.__maf_indexer())
+        insert_count = self._con.execute(
+            "SELECT COUNT(*) FROM offset_data").fetchone()[0]
 
-        # then make indexes on the relevant fields
+        # then make indexes on the relevant fields, which is quicker once
+        # all the data is loaded than updating them on every insert
         self._con.execute("CREATE INDEX IF NOT EXISTS bin_index ON offset_data(bin);")
         self._con.execute("CREATE INDEX IF NOT EXISTS start_index ON offset_data(start);")
         self._con.execute("CREATE INDEX IF NOT EXISTS end_index ON offset_data(end);")
@@ -454,14 +465,34 @@ class MafIndex(object):
 
     def _get_record(self, offset):
         """Retrieves a single MAF record located at the offset provided."""
-        self._maf_fp.seek(offset)
-        return next(self._mafiter)
+        cache = self._cache
+        try:
+            # Re-inserting moves it to the end (most recently used)
+            record = cache.pop(offset)
+        except KeyError:
+            self._maf_fp.seek(offset)
+            record = next(self._mafiter)
+            if not self._max_cache:
+                return record
+            if len(cache) >= self._max_cache:
+                cache.popitem(last=False)
+        cache[offset] = record
+        return record
+
+    def _search_rows(self, queries, chunk_size=200):
+        """Runs the exon queries in chunks, returning the rows in order (PRIVATE)."""
+        for i in range(0, len(queries), chunk_size):
+            sql = " UNION ALL ".join(queries[i:i + chunk_size])
+            rows = self._con.execute(sql + " ORDER BY 1, 2, 3, 4;")
+            for idx, rec_start, rec_end, offset in rows:
+                yield rec_start, rec_end, offset
 
     def search(self, starts, ends):
         """Searches index database for MAF records overlapping ranges provided.
 
-        Returns *MultipleSeqAlignment* results in order by start, then end, then
-        internal offset field.
+        Returns *MultipleSeqAlignment* results for each exon in turn, in order
+        by start, then end, then internal offset field (each block is returned
+        only once, for the first exon it overlaps).
 
         *starts* should be a list of 0-based start coordinates of segments in the reference.
         *ends* should be the list of the corresponding segment ends
@@ -475,14 +506,13 @@ class MafIndex(object):
         for exonstart, exonend in zip(starts, ends):
             if exonstart >= exonend:
                 raise ValueError("Exon coordinates invalid (%s >= %s)" % (exonstart, exonend))
-        con = self._con
 
-        # Keep track of what blocks have already been yielded
-        # in order to avoid duplicating them
-        # (see https://github.com/biopython/biopython/issues/1083)
-        yielded_rec_coords = set([])
-        # search for every exon
-        for exonstart, exonend in zip(starts, ends):
+        # Rather than one query per exon, look up the exons in chunks, each
+        # as a single compound query (SQLite allows at most 500 terms in a
+        # compound SELECT). Tagging each row with the index of its exon keeps
+        # the rows in exon order, then by start, end and offset.
+        queries = []
+        for idx, (exonstart, exonend) in enumerate(zip(starts, ends)):
             try:
                 possible_bins = ", ".join(map(str, self._region2bin(exonstart, exonend)))
             except TypeError:
@@ -500,37 +530,38 @@ class MafIndex(object):
             # precedence as operators == and != and LIKE and groups left to
             # right.
             # -----
+            queries.append("SELECT DISTINCT %i, start, end, offset FROM "
+                           "offset_data WHERE bin IN (%s) AND (end BETWEEN %i "
+                           "AND %i OR %i BETWEEN start AND end)"
+                           % (idx, possible_bins, exonstart, exonend, exonend))
 
-            result = con.execute("SELECT DISTINCT start, end, offset FROM "
-                                 "offset_data WHERE bin IN (%s) AND (end BETWEEN %s AND %s "
-                                 "OR %s BETWEEN start AND end) ORDER BY start, end, "
-                                 "offset ASC;"
-                                 % (possible_bins, exonstart, exonend, exonend))
-
-            rows = result.fetchall()
+        # Keep track of what blocks have already been yielded
+        # in order to avoid duplicating them
+        # (see https://github.com/biopython/biopython/issues/1083)
+        yielded_rec_coords = set([])
 
-            for rec_start, rec_end, offset in rows:
-                # Avoid yielding multiple time the same block
-                if (rec_start, rec_end) in yielded_rec_coords:
-                    continue
-                else:
-                    yielded_rec_coords.add((rec_start, rec_end))
-                # Iterate through hits, fetching alignments from the MAF file
-                # and checking to be sure we've retrieved the expected record.
+        for rec_start, rec_end, offset in self._search_rows(queries):
+            # Avoid yielding multiple time the same block
+            if (rec_start, rec_end) in yielded_rec_coords:
+                continue
+            else:
+                yielded_rec_coords.add((rec_start, rec_end))
+            # Iterate through hits, fetching alignments from the MAF file
+            # and checking to be sure we've retrieved the expected record.
 
-                fetched = self._get_record(int(offset))
+            fetched = self._get_record(int(offset))
 
-                for record in fetched:
-                    if record.id == self._target_seqname:
-                        # start and size come from the maf lines
-                        start = record.annotations["start"]
-                        end = record.annotations["start"] + record.annotations["size"]
+            for record in fetched:
+                if record.id == self._target_seqname:
+                    # start and size come from the maf lines
+                    start = record.annotations["start"]
+                    end = record.annotations["start"] + record.annotations["size"]
 
-                        if not (start == rec_start and end == rec_end):
-                            raise ValueError("Expected %s-%s @ offset %s, found %s-%s" %
-                                             (rec_start, rec_end, offset, start, end))
+                    if not (start == rec_start and end == rec_end):
+                        raise ValueError("Expected %s-%s @ offset %s, found %s-%s" %
+                                         (rec_start, rec_end, offset, start, end))
 
-                yield fetched
+            yield fetched
 
     def get_spliced(self, starts, ends, strand=1):
         """Returns a multiple alignment of the exact sequence range provided.
@@ -565,21 +596,19 @@ class MafIndex(object):
             return MultipleSeqAlignment([SeqRecord(Seq("N" * expected_letters),
                                                    id=self._target_seqname)])
 
-        # find the union of all IDs in these alignments
-        all_seqnames = set(
-            [sequence.id for multiseq in fetched for sequence in multiseq])
-
-        # split every record by base position
-        # key: sequence name
-        # value: dictionary
-        #        key: position in the reference sequence
-        #        value: letter(s) (including letters
-        #               aligned to the "-" preceding the letter
-        #               at the position in the reference, if any)
-        split_by_position = dict([(seq_name, {}) for seq_name in all_seqnames])
+        # find the union of all IDs in these alignments (in order of appearance)
+        all_seqnames = []
+        for multiseq in fetched:
+            for seqrec in multiseq:
+                if seqrec.id not in all_seqnames:
+                    all_seqnames.append(seqrec.id)
 
-        # keep track of what the total number of (unspliced) letters should be
-        total_rec_length = 0
+        # For each block, note the target coordinates, the sequences, and the
+        # column boundaries of each target position. Position rec_start + k
+        # spans columns cuts[k] to cuts[k + 1], which includes any columns
+        # where the target has a "-" preceding the letter at that position
+        # (and for the last position, any trailing "-" as well).
+        blocks = []
 
         # track first strand encountered on the target seqname
         ref_first_strand = None
@@ -602,80 +631,71 @@ class MafIndex(object):
                     except KeyError:
                         raise ValueError("No strand information for target seqname (%s)" %
                                          self._target_seqname)
-                    # length including gaps (i.e. alignment length)
-                    rec_length = len(seqrec)
                     rec_start = seqrec.annotations["start"]
                     rec_end = seqrec.annotations["start"] + seqrec.annotations["size"]
-
-                    total_rec_length += rec_end - rec_start
-
-                    # blank out these positions for every seqname
-                    for seqrec in multiseq:
-                        for pos in range(rec_start, rec_end):
-                            split_by_position[seqrec.id][pos] = ""
-
+                    target = str(seqrec.seq)
                     break
             else:
                 raise ValueError("Did not find %s in alignment bundle" % (self._target_seqname,))
 
-            # the true, chromosome/contig/etc position in the target seqname
-            real_pos = rec_start
-
-            # loop over the alignment to fill split_by_position
-            for gapped_pos in range(0, rec_length):
-                for seqrec in multiseq:
-                    # keep track of this position's value for the target seqname
-                    if seqrec.id == self._target_seqname:
-                        track_val = seqrec.seq[gapped_pos]
-
-                    # Here, a real_pos that corresponds to just after a series of "-"
-                    # in the reference will "accumulate" the letters found in other sequences
-                    # in front of the "-"s
-                    split_by_position[seqrec.id][real_pos] += seqrec.seq[gapped_pos]
-
-                # increment the real_pos counter only when non-gaps are found in
-                # the target_seqname, and we haven't reached the end of the record
-                if track_val != "-" and real_pos < rec_end - 1:
-                    real_pos += 1
-
-        # make sure the number of bp entries equals the sum of the record lengths
-        if len(split_by_position[self._target_seqname]) != total_rec_length:
-            raise ValueError("Target seqname (%s) has %s records, expected %s" %
-                             (self._target_seqname,
-                              len(split_by_position[self._target_seqname]),
-                              total_rec_length))
-
-        # translates a position in the target_seqname sequence to its gapped length
-        realpos_to_len = dict([(x, len(y))
-                               for x, y in split_by_position[self._target_seqname].items()
-                               if len(y) > 1])
-
-        # splice together the exons
-        subseq = {}
-
-        for seqid in all_seqnames:
-            seq_split = split_by_position[seqid]
-            seq_splice = []
-
-            filler_char = "N" if seqid == self._target_seqname else "-"
+            cuts = [0]
+            cuts.extend(i + 1 for i, letter in enumerate(target) if letter != "-")
+            cuts[-1] = len(target)
 
-            # iterate from start to end, taking bases from split_by_position when
-            # they exist, using N or - for gaps when there is no alignment.
-            append = seq_splice.append
-
-            for exonstart, exonend in zip(starts, ends):
-                for real_pos in range(exonstart, exonend):
-                    # if this seqname has this position, add it
-                    if real_pos in seq_split:
-                        append(seq_split[real_pos])
-                    # if not, but it's in the target_seqname, add length-matched filler
-                    elif real_pos in realpos_to_len:
-                        append(filler_char * realpos_to_len[real_pos])
-                    # it's not in either, so add a single filler character
-                    else:
-                        append(filler_char)
+            sequences = {}
+            for seqrec in multiseq:
+                if seqrec.id in sequences:
+                    raise ValueError("Found %s twice in alignment bundle" % seqrec.id)
+                sequences[seqrec.id] = str(seqrec.seq)
+
+            blocks.append((rec_start, rec_end, cuts, sequences))
+
+        # the blocks must not overlap on the target seqname
+        blocks.sort(key=lambda block: block[:2])
+        for previous, block in zip(blocks, blocks[1:]):
+            if block[0] < previous[1]:
+                raise ValueError("Alignment bundles overlap on target seqname "
+                                 "(%s): %s-%s and %s-%s"
+                                 % (self._target_seqname, previous[0],
+                                    previous[1], block[0], block[1]))
+
+        # splice together the exons, taking slices of the block sequences
+        # where they exist, using N or - for gaps when there is no alignment.
+        seq_splice = dict((seqid, []) for seqid in all_seqnames)
+        filler_chars = dict((seqid, "N" if seqid == self._target_seqname else "-")
+                            for seqid in all_seqnames)
+        block_starts = [block[0] for block in blocks]
 
-            subseq[seqid] = "".join(seq_splice)
+        for exonstart, exonend in zip(starts, ends):
+            pos = exonstart
+            # the last block starting at or before this position
+            index = max(0, bisect_right(block_starts, pos) - 1)
+            while pos < exonend:
+                if index < len(blocks) and blocks[index][1] <= pos:
+                    # this block ends before the current position
+                    index += 1
+                elif index == len(blocks) or pos < blocks[index][0]:
+                    # no alignment, so add a filler character per position
+                    stop = exonend
+                    if index < len(blocks):
+                        stop = min(stop, blocks[index][0])
+                    for seqid, pieces in seq_splice.items():
+                        pieces.append(filler_chars[seqid] * (stop - pos))
+                    pos = stop
+                else:
+                    rec_start, rec_end, cuts, sequences = blocks[index]
+                    stop = min(exonend, rec_end)
+                    col_start = cuts[pos - rec_start]
+                    col_end = cuts[stop - rec_start]
+                    for seqid, pieces in seq_splice.items():
+                        if seqid in sequences:
+                            pieces.append(sequences[seqid][col_start:col_end])
+                        else:
+                            # length-matched filler
+                            pieces.append(filler_chars[seqid] * (col_end - col_start))
+                    pos = stop
+
+        subseq = dict((seqid, "".join(pieces)) for seqid, pieces in seq_splice.items())
 
         # make sure we're returning the right number of letters
         if len(subseq[self._target_seqname].replace("-", "")) != expected_letters:
@@ -694,8 +714,8 @@ class MafIndex(object):
         # finally, build a MultipleSeqAlignment object for our final sequences
         result_multiseq = []
 
-        for seqid, seq in subseq.items():
-            seq = Seq(seq)
+        for seqid in all_seqnames:
+            seq = Seq(subseq[seqid])
 
             seq = seq if strand == ref_first_strand else seq.reverse_complement()
 
@@ -122,17 +122,19 @@ class PhylipWriter(SequentialAlignmentWriter):
         # defined in the PHYLIP documentation, simply "These are in free
         # format, separated by blanks".  We'll use spaces to keep EMBOSS
         # happy.
-        handle.write(" %i %s\n" % (len(alignment), length_of_seqs))
+        # Build the whole alignment as a list of strings, and write it in
+        # one go (much faster than many small writes)
+        lines = [" %i %s\n" % (len(alignment), length_of_seqs)]
         block = 0
         while True:
             for name, sequence in zip(names, seqs):
                 if block == 0:
                     # Write name (truncated/padded to id_width characters)
                     # Now truncate and right pad to expected length.
-                    handle.write(name[:id_width].ljust(id_width))
+                    line = [name[:id_width].ljust(id_width)]
                 else:
                     # write indent
-                    handle.write(" " * id_width)
+                    line = [" " * id_width]
                 # Write five chunks of ten letters per line...
                 for chunk in range(0, 5):
                     i = block * 50 + chunk * 10
@@ -140,14 +142,16 @@ class PhylipWriter(SequentialAlignmentWriter):
                     # TODO - Force any gaps to be '-' character?  Look at the
                     # alphabet...
                     # TODO - How to cope with '?' or '.' in the sequence?
-                    handle.write(" %s" % seq_segment)
+                    line.append(seq_segment)
                     if i + 10 > length_of_seqs:
                         break
-                handle.write("\n")
+                lines.append(" ".join(line))
+                lines.append("\n")
             block += 1
             if block * 50 > length_of_seqs:
                 break
-            handle.write("\n")
+            lines.append("\n")
+        handle.write("".join(lines))
 
 
 class PhylipIterator(AlignmentIterator):
@@ -350,16 +354,17 @@ class SequentialPhylipWriter(SequentialAlignmentWriter):
         # defined in the PHYLIP documentation, simply "These are in free
         # format, separated by blanks".  We'll use spaces to keep EMBOSS
         # happy.
-        handle.write(" %i %s\n" % (len(alignment), length_of_seqs))
+        lines = [" %i %s\n" % (len(alignment), length_of_seqs)]
         for name, record in zip(names, alignment):
             sequence = str(record.seq)
             if "." in sequence:
                 raise ValueError(_NO_DOTS)
-            handle.write(name[:id_width].ljust(id_width))
+            lines.append(name[:id_width].ljust(id_width))
             # Write the entire sequence to one line (see sequential format
             # notes in the SequentialPhylipIterator docstring
-            handle.write(sequence)
-            handle.write("\n")
+            lines.append(sequence)
+            lines.append("\n")
+        handle.write("".join(lines))
 
 
 class SequentialPhylipIterator(PhylipIterator):
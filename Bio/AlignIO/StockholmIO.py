@@ -135,6 +135,7 @@ from __future__ import print_function
 
 from collections import OrderedDict
 
+from Bio.Alphabet import single_letter_alphabet
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 from Bio.Align import MultipleSeqAlignment
@@ -168,7 +169,7 @@ class StockholmWriter(SequentialAlignmentWriter):
         count = len(alignment)
 
         self._length_of_sequences = alignment.get_alignment_length()
-        self._ids_written = []
+        self._ids_written = set()
 
         # NOTE - For now, the alignment object does not hold any per column
         # or per alignment annotation - only per sequence.
@@ -178,14 +179,16 @@ class StockholmWriter(SequentialAlignmentWriter):
         if self._length_of_sequences == 0:
             raise ValueError("Non-empty sequences are required")
 
-        self.handle.write("# STOCKHOLM 1.0\n")
-        self.handle.write("#=GF SQ %i\n" % count)
+        # Build the whole alignment as a list of strings, and write it in
+        # one go (much faster than many small writes)
+        lines = ["# STOCKHOLM 1.0\n", "#=GF SQ %i\n" % count]
         for record in alignment:
-            self._write_record(record)
-        self.handle.write("//\n")
+            self._write_record(record, lines)
+        lines.append("//\n")
+        self.handle.write("".join(lines))
 
-    def _write_record(self, record):
-        """Write a single SeqRecord to the file"""
+    def _write_record(self, record, lines):
+        """Add the lines for a single SeqRecord to the list (PRIVATE)."""
         if self._length_of_sequences != len(record.seq):
             raise ValueError("Sequences must all be the same length")
 
@@ -211,8 +214,8 @@ class StockholmWriter(SequentialAlignmentWriter):
 
         if seq_name in self._ids_written:
             raise ValueError("Duplicate record identifier: %s" % seq_name)
-        self._ids_written.append(seq_name)
-        self.handle.write("%s %s\n" % (seq_name, str(record.seq)))
+        self._ids_written.add(seq_name)
+        lines.append("%s %s\n" % (seq_name, str(record.seq)))
 
         # The recommended placement for GS lines (per sequence annotation)
         # is above the alignment (as a header block) or just below the
@@ -227,20 +230,20 @@ class StockholmWriter(SequentialAlignmentWriter):
 
         # AC = Accession
         if "accession" in record.annotations:
-            self.handle.write("#=GS %s AC %s\n" % (
+            lines.append("#=GS %s AC %s\n" % (
                 seq_name, self.clean(record.annotations["accession"])))
         elif record.id:
-            self.handle.write("#=GS %s AC %s\n" % (
+            lines.append("#=GS %s AC %s\n" % (
                 seq_name, self.clean(record.id)))
 
         # DE = description
         if record.description:
-            self.handle.write("#=GS %s DE %s\n" % (
+            lines.append("#=GS %s DE %s\n" % (
                 seq_name, self.clean(record.description)))
 
         # DE = database links
         for xref in record.dbxrefs:
-            self.handle.write("#=GS %s DR %s\n" % (
+            lines.append("#=GS %s DR %s\n" % (
                 seq_name, self.clean(xref)))
 
         # GS = other per sequence annotation
@@ -248,10 +251,10 @@ class StockholmWriter(SequentialAlignmentWriter):
             if key in self.pfam_gs_mapping:
                 data = self.clean(str(value))
                 if data:
-                    self.handle.write("#=GS %s %s %s\n"
-                                      % (seq_name,
-                                         self.clean(self.pfam_gs_mapping[key]),
-                                         data))
+                    lines.append("#=GS %s %s %s\n"
+                                 % (seq_name,
+                                    self.clean(self.pfam_gs_mapping[key]),
+                                    data))
             else:
                 # It doesn't follow the PFAM standards, but should we record
                 # this data anyway?
@@ -262,10 +265,10 @@ class StockholmWriter(SequentialAlignmentWriter):
             if key in self.pfam_gr_mapping and len(str(value)) == len(record.seq):
                 data = self.clean(str(value))
                 if data:
-                    self.handle.write("#=GR %s %s %s\n"
-                                      % (seq_name,
-                                         self.clean(self.pfam_gr_mapping[key]),
-                                         data))
+                    lines.append("#=GR %s %s %s\n"
+                                 % (seq_name,
+                                    self.clean(self.pfam_gr_mapping[key]),
+                                    data))
             else:
                 # It doesn't follow the PFAM standards, but should we record
                 # this data anyway?
@@ -300,6 +303,18 @@ class StockholmIterator(AlignmentIterator):
 
     For consistency with BioPerl and EMBOSS we call this the "stockholm"
     format.
+
+    Very large alignments (e.g. from Pfam-A.full) use a lot of memory, much
+    of it for the per-column GR annotation. If you do not need this, use
+    letter_annotations=False to skip these lines (the GS per-sequence
+    annotation is still recorded). This is also accepted by the functions
+    Bio.AlignIO.parse, read, index and index_db for the "stockholm"
+    format::
+
+        from Bio import AlignIO
+        for alignment in AlignIO.parse("Pfam-A.full", "stockholm",
+                                       letter_annotations=False):
+            ...
     """
 
     # These dictionaries should be kept in sync with those
@@ -318,11 +333,26 @@ class StockholmIterator(AlignmentIterator):
 
     _header = None  # for caching lines between __next__ calls
 
+    def __init__(self, handle, seq_count=None,
+                 alphabet=single_letter_alphabet, letter_annotations=True):
+        """Create a StockholmIterator object.
+
+        Arguments:
+         - handle, seq_count, alphabet - as for the AlignmentIterator.
+         - letter_annotations - Record the per-column GR lines as the
+           letter_annotations of each SeqRecord (default). Set this to
+           False to skip them, saving time and memory.
+        """
+        AlignmentIterator.__init__(self, handle, seq_count, alphabet)
+        self.letter_annotations = letter_annotations
+
     def __next__(self):
         handle = self.handle
+        readline = handle.readline
+        letter_annotations = self.letter_annotations
 
         if self._header is None:
-            line = handle.readline()
+            line = readline()
         else:
             # Header we saved from when we were parsing
             # the previous alignment.
@@ -347,7 +377,7 @@ class StockholmIterator(AlignmentIterator):
         gf = {}
         passed_end_alignment = False
         while True:
-            line = handle.readline()
+            line = readline()
             if not line:
                 break  # end of file
             line = line.strip()  # remove trailing \n
@@ -372,10 +402,13 @@ class StockholmIterator(AlignmentIterator):
                         "Could not split line into identifier "
                         "and sequence:\n" + line)
                 seq_id, seq = parts
-                if seq_id not in ids:
+                # Collect the pieces of interlaced sequences in a list
+                # (joined at the end) to avoid repeated string addition
+                try:
+                    seqs[seq_id].append(seq)
+                except KeyError:
                     ids[seq_id] = True
-                seqs.setdefault(seq_id, '')
-                seqs[seq_id] += seq.replace(".", "-")
+                    seqs[seq_id] = [seq]
             elif len(line) >= 5:
                 # Comment line or meta-data
                 if line[:5] == "#=GF ":
@@ -404,7 +437,7 @@ class StockholmIterator(AlignmentIterator):
                         gs[seq_id][feature] = [text]
                     else:
                         gs[seq_id][feature].append(text)
-                elif line[:5] == "#=GR ":
+                elif line[:5] == "#=GR " and letter_annotations:
                     # Generic per-Sequence AND per-Column markup
                     # Format: "#=GR <seqname> <feature> <exactly 1 char per column>"
                     seq_id, feature, text = line[5:].strip().split(None, 2)
@@ -413,8 +446,8 @@ class StockholmIterator(AlignmentIterator):
                     if seq_id not in gr:
                         gr[seq_id] = {}
                     if feature not in gr[seq_id]:
-                        gr[seq_id][feature] = ""
-                    gr[seq_id][feature] += text.strip()  # append to any previous entry
+                        gr[seq_id][feature] = []
+                    gr[seq_id][feature].append(text.strip())  # joined later
                     # TODO - Should we check the length matches the alignment length?
                     #       For iterlaced sequences the GR data can be split over
                     #       multiple lines
@@ -424,6 +457,12 @@ class StockholmIterator(AlignmentIterator):
         # assert len(gs)   <= len(ids)
         # assert len(gr)   <= len(ids)
 
+        for seq_id in seqs:
+            seqs[seq_id] = "".join(seqs[seq_id]).replace(".", "-")
+        for seq_id in gr:
+            for feature in gr[seq_id]:
+                gr[seq_id][feature] = "".join(gr[seq_id][feature])
+
         self.ids = ids.keys()
         self.sequences = seqs
         self.seq_annotation = gs
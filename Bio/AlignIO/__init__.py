@@ -55,6 +55,11 @@ different multiple sequence alignments as possible.  One common example
 is the output of the tool seqboot in the PHLYIP suite.  Sometimes there
 can be a file header and footer, as seen in the EMBOSS alignment output.
 
+For large files holding many alignments (e.g. PHYLIP bootstrap replicates,
+or the Pfam-A.full file in Stockholm format), the functions
+Bio.AlignIO.index(...) and Bio.AlignIO.index_db(...) give dictionary like
+random access to the alignments, without loading them all into memory.
+
 Output
 ------
 Use the function Bio.AlignIO.write(...), which takes a complete set of
@@ -87,6 +92,10 @@ The Bio.AlignIO.convert(...) function allows an easy interface for simple
 alignment file format conversions. Additionally, it may use file format
 specific optimisations so this should be the fastest way too.
 
+To convert many files at once (e.g. thousands of gene alignments), use the
+Bio.AlignIO.convert_many(...) function which can share the work between
+several processes.
+
 In general however, you can combine the Bio.AlignIO.parse(...) function with
 the Bio.AlignIO.write(...) function for sequence file conversion. Using
 generator expressions provides a memory efficient way to perform filtering or
@@ -296,7 +305,7 @@ def _force_alphabet(alignment_iterator, alphabet):
         yield align
 
 
-def parse(handle, format, seq_count=None, alphabet=None):
+def parse(handle, format, seq_count=None, alphabet=None, **kwargs):
     """Iterate over an alignment file as MultipleSeqAlignment objects.
 
     Arguments:
@@ -308,6 +317,8 @@ def parse(handle, format, seq_count=None, alphabet=None):
         (e.g. fasta, phylip, clustal)
       - seq_count - Optional integer, number of sequences expected in each
         alignment.  Recommended for fasta format files.
+      - kwargs    - Optional format specific keyword arguments, passed on
+        to the parser (e.g. letter_annotations for "stockholm").
 
     If you have the file name in a string 'filename', use:
 
@@ -350,17 +361,22 @@ def parse(handle, format, seq_count=None, alphabet=None):
         if format in _FormatToIterator:
             iterator_generator = _FormatToIterator[format]
             if alphabet is None:
-                i = iterator_generator(fp, seq_count)
+                i = iterator_generator(fp, seq_count, **kwargs)
             else:
                 try:
                     # Initially assume the optional alphabet argument is supported
-                    i = iterator_generator(fp, seq_count, alphabet=alphabet)
+                    i = iterator_generator(fp, seq_count, alphabet=alphabet,
+                                           **kwargs)
                 except TypeError:
                     # It isn't supported.
-                    i = _force_alphabet(iterator_generator(fp, seq_count),
+                    i = _force_alphabet(iterator_generator(fp, seq_count,
+                                                           **kwargs),
                                         alphabet)
 
         elif format in SeqIO._FormatToIterator:
+            if kwargs:
+                raise TypeError("Format '%s' takes no keyword arguments (%s)"
+                                % (format, ", ".join(sorted(kwargs))))
             # Exploit the existing SeqIO parser to the dirty work!
             i = _SeqIO_to_alignment_iterator(fp, format,
                                                 alphabet=alphabet,
@@ -373,7 +389,7 @@ def parse(handle, format, seq_count=None, alphabet=None):
             yield a
 
 
-def read(handle, format, seq_count=None, alphabet=None):
+def read(handle, format, seq_count=None, alphabet=None, **kwargs):
     """Turns an alignment file into a single MultipleSeqAlignment object.
 
     Arguments:
@@ -385,6 +401,8 @@ def read(handle, format, seq_count=None, alphabet=None):
         (e.g. fasta, phylip, clustal)
       - seq_count - Optional integer, number of sequences expected in each
         alignment.  Recommended for fasta format files.
+      - kwargs    - Optional format specific keyword arguments, as for
+        Bio.AlignIO.parse().
 
     If the handle contains no alignments, or more than one alignment,
     an exception is raised.  For example, using a PFAM/Stockholm file
@@ -420,7 +438,7 @@ def read(handle, format, seq_count=None, alphabet=None):
     You must use the Bio.AlignIO.parse() function if you want to read multiple
     records from the handle.
     """
-    iterator = parse(handle, format, seq_count, alphabet)
+    iterator = parse(handle, format, seq_count, alphabet, **kwargs)
     try:
         first = next(iterator)
     except StopIteration:
@@ -438,6 +456,204 @@ def read(handle, format, seq_count=None, alphabet=None):
     return first
 
 
+def index(filename, format, seq_count=None, alphabet=None,
+          key_function=None, **kwargs):
+    """Indexes an alignment file and returns a dictionary like object.
+
+    Arguments:
+      - filename - string giving name of file to be indexed
+      - format   - lower case string describing the file format
+      - seq_count - Optional integer, number of sequences expected in each
+        alignment. Required to index a FASTA file of several alignments.
+      - alphabet - optional Alphabet object, useful when the sequence type
+        cannot be automatically inferred from the file itself
+      - key_function - Optional callback function which when given an
+        alignment's key string should return a unique key for the
+        dictionary.
+      - kwargs - Optional format specific keyword arguments, used when
+        parsing each alignment as for Bio.AlignIO.parse().
+
+    This scans through the file once, noting the location of each alignment,
+    and returns a dictionary like object giving MultipleSeqAlignment objects
+    as values. An alignment is only parsed when you access it.
+
+    The supported formats are "clustal", "fasta", "nexus", "phylip" (and
+    the "phylip-relaxed" and "phylip-sequential" variants) and "stockholm".
+    For the "stockholm" format (e.g. Pfam) the keys are the family
+    accessions (from the "#=GF AC" lines):
+
+    >>> from Bio import AlignIO
+    >>> families = AlignIO.index("Stockholm/pfam_families.sth", "stockholm")
+    >>> len(families)
+    3
+    >>> sorted(families)
+    ['DemoC', 'PF99991.2', 'PF99992.1']
+    >>> print(families["PF99992.1"])
+    SingleLetterAlphabet() alignment with 2 rows and 16 columns
+    ACDEFGHIKLMNPQRS SEQD_ARATH/10-25
+    ACDE--HIKLMNPQRS SEQE_ORYSA/12-25
+    >>> families.close()
+
+    Here the last family has no accession, so its "#=GF ID" is used instead
+    (and failing that, the number of the alignment in the file as a string).
+    For the other formats, the keys are always the alignment number as a
+    string (counting from zero), for example with a PHYLIP file of three
+    bootstrap replicates:
+
+    >>> alignments = AlignIO.index("Phylip/bootstrap3.phy", "phylip")
+    >>> len(alignments)
+    3
+    >>> print(alignments["2"])
+    SingleLetterAlphabet() alignment with 3 rows and 12 columns
+    ACGTTGCAACGT Alpha
+    ACGTTGCAACGA Beta
+    ACCTTGCAACGA Gamma
+    >>> alignments.close()
+
+    You can use the key_function to change the keys, for example to remove
+    the version suffix from the Pfam accessions:
+
+    >>> families = AlignIO.index("Stockholm/pfam_families.sth", "stockholm",
+    ...                          key_function=lambda key: key.split(".")[0])
+    >>> sorted(families)
+    ['DemoC', 'PF99991', 'PF99992']
+    >>> families.close()
+
+    Format specific keyword arguments are used when parsing each alignment,
+    for example to skip the per-column "#=GR" annotation of a large family:
+
+    >>> families = AlignIO.index("Stockholm/pfam_families.sth", "stockholm",
+    ...                          letter_annotations=False)
+    >>> print(families["PF99991.2"][0].letter_annotations)
+    {}
+    >>> families.close()
+
+    To avoid scanning a large file like Pfam-A.full every time, use the
+    Bio.AlignIO.index_db() function which keeps the index in a file.
+    """
+    # Try and give helpful error messages:
+    if not isinstance(filename, basestring):
+        raise TypeError("Need a filename (not a handle)")
+    if not isinstance(format, basestring):
+        raise TypeError("Need a string for the file format (lower case)")
+    if not format:
+        raise ValueError("Format required (lower case string)")
+    if format != format.lower():
+        raise ValueError("Format string '%s' should be lower case" % format)
+    if seq_count is not None and not isinstance(seq_count, int):
+        raise TypeError("Need integer for seq_count (sequences per alignment)")
+    if alphabet is not None and not (isinstance(alphabet, Alphabet) or
+                                     isinstance(alphabet, AlphabetEncoder)):
+        raise ValueError("Invalid alphabet, %r" % alphabet)
+
+    # Map the file format to a random access proxy:
+    from ._index import _FormatToRandomAccess  # Lazy import
+    from ._index import _IndexedAlignmentFileDict
+    try:
+        proxy_class = _FormatToRandomAccess[format]
+    except KeyError:
+        raise ValueError("Unsupported format %r" % format)
+    repr = "AlignIO.index(%r, %r, seq_count=%r, alphabet=%r, " \
+           "key_function=%r)" % (filename, format, seq_count, alphabet,
+                                 key_function)
+    return _IndexedAlignmentFileDict(proxy_class(filename, format, alphabet,
+                                                 seq_count, **kwargs),
+                                     key_function, repr, "MultipleSeqAlignment")
+
+
+def index_db(index_filename, filenames=None, format=None, seq_count=None,
+             alphabet=None, key_function=None, **kwargs):
+    """Index several alignment files and return a dictionary like object.
+
+    The index is stored in an SQLite database rather than in memory (as in
+    the Bio.AlignIO.index(...) function), and can be reused later.
+
+    Arguments:
+      - index_filename - Where to store the SQLite index
+      - filenames - list of strings specifying file(s) to be indexed, or when
+        indexing a single file this can be given as a string.
+        (optional if reloading an existing index, but must match)
+      - format   - lower case string describing the file format
+        (optional if reloading an existing index, but must match)
+      - seq_count - Optional integer, number of sequences expected in each
+        alignment. Required to index a FASTA file of several alignments.
+      - alphabet - optional Alphabet object, useful when the sequence type
+        cannot be automatically inferred from the file itself
+      - key_function - Optional callback function which when given an
+        alignment's key string should return a unique key for the
+        dictionary.
+      - kwargs - Optional format specific keyword arguments, used when
+        parsing each alignment as for Bio.AlignIO.parse(). These are not
+        stored in the index, so give them again when reloading it.
+
+    For example, you can build an index of the Pfam-A.full file once, and
+    then load it again later to pull out single families without scanning
+    the whole file::
+
+        from Bio import AlignIO
+        families = AlignIO.index_db("Pfam-A.full.idx", "Pfam-A.full",
+                                    "stockholm")
+        ...
+        families = AlignIO.index_db("Pfam-A.full.idx")
+        alignment = families["PF00001.23"]
+
+    Here we use an in memory SQLite database instead:
+
+    >>> from Bio import AlignIO
+    >>> families = AlignIO.index_db(":memory:", "Stockholm/pfam_families.sth",
+    ...                             "stockholm")
+    >>> len(families)
+    3
+    >>> print(families["PF99991.2"][2].seq)
+    MR-LAAGI-GILAAHH-EWQ
+    >>> families.close()
+
+    Note that where the keys are the alignment numbers (e.g. for PHYLIP
+    files), you can only index one file as otherwise the keys clash.
+
+    BGZF compressed files are supported, and detected automatically. Ordinary
+    GZIP compressed files are not supported.
+    """
+    # Try and give helpful error messages:
+    if not isinstance(index_filename, basestring):
+        raise TypeError("Need a string for the index filename")
+    if isinstance(filenames, basestring):
+        # Make the API a little more friendly, and more similar
+        # to Bio.AlignIO.index(...) for indexing just one file.
+        filenames = [filenames]
+    if filenames is not None and not isinstance(filenames, list):
+        raise TypeError(
+            "Need a list of filenames (as strings), or one filename")
+    if format is not None and not isinstance(format, basestring):
+        raise TypeError("Need a string for the file format (lower case)")
+    if format and format != format.lower():
+        raise ValueError("Format string '%s' should be lower case" % format)
+    if seq_count is not None and not isinstance(seq_count, int):
+        raise TypeError("Need integer for seq_count (sequences per alignment)")
+    if alphabet is not None and not (isinstance(alphabet, Alphabet) or
+                                     isinstance(alphabet, AlphabetEncoder)):
+        raise ValueError("Invalid alphabet, %r" % alphabet)
+
+    # Map the file format to a random access proxy:
+    from ._index import _FormatToRandomAccess  # Lazy import
+    from ._index import _SQLiteManyAlignmentFilesDict
+    repr = "AlignIO.index_db(%r, filenames=%r, format=%r, seq_count=%r, " \
+           "alphabet=%r, key_function=%r)" % (index_filename, filenames, format,
+                                              seq_count, alphabet, key_function)
+
+    def proxy_factory(format, filename=None):
+        """Given a filename returns proxy object, else boolean if format OK."""
+        if filename:
+            return _FormatToRandomAccess[format](filename, format, alphabet,
+                                                 seq_count, **kwargs)
+        else:
+            return format in _FormatToRandomAccess
+
+    return _SQLiteManyAlignmentFilesDict(index_filename, filenames,
+                                         proxy_factory, format,
+                                         key_function, repr)
+
+
 def convert(in_file, in_format, out_file, out_format, alphabet=None):
     """Convert between two alignment files, returns number of alignments.
 
@@ -465,6 +681,84 @@ def convert(in_file, in_format, out_file, out_format, alphabet=None):
     return count
 
 
+def _convert_job(args):
+    """Convert a single pair of files for convert_many (PRIVATE).
+
+    This is a top level function so that it can be used by worker processes.
+    """
+    in_file, in_format, out_file, out_format, alphabet = args
+    return convert(in_file, in_format, out_file, out_format, alphabet)
+
+
+def convert_many(in_files, in_format, out_files, out_format, alphabet=None,
+                 processes=None):
+    """Convert many alignment files, returns a list of alignment counts.
+
+        - in_files - a list of input filenames
+        - in_format - input file format, lower case string
+        - out_files - a list of output filenames (same length as in_files)
+        - out_format - output file format, lower case string
+        - alphabet - optional alphabet to assume
+        - processes - number of worker processes to use (default is the
+          number of CPUs), or 1 to do all the conversions in this process
+
+    Each input file is converted to the matching output file as with the
+    Bio.AlignIO.convert(...) function, using a pool of processes from the
+    multiprocessing library. If any conversion fails, the exception is
+    raised here (but other output files may already have been written).
+
+    As with any use of multiprocessing, on Windows (or other platforms not
+    using fork to start new processes) your script should call this from
+    within an ``if __name__ == "__main__":`` block.
+    """
+    from Bio import SeqIO
+
+    # Check the arguments here, rather than in each worker process:
+    for format in (in_format, out_format):
+        if not isinstance(format, basestring):
+            raise TypeError("Need a string for the file format (lower case)")
+        if not format:
+            raise ValueError("Format required (lower case string)")
+        if format != format.lower():
+            raise ValueError("Format string '%s' should be lower case" % format)
+    if in_format not in _FormatToIterator \
+            and in_format not in SeqIO._FormatToIterator:
+        raise ValueError("Unknown format '%s'" % in_format)
+    if out_format not in _FormatToWriter \
+            and out_format not in SeqIO._FormatToWriter:
+        raise ValueError("Unknown or read only format '%s'" % out_format)
+    in_files = list(in_files)
+    out_files = list(out_files)
+    if len(in_files) != len(out_files):
+        raise ValueError("Need one output filename for each input filename")
+    for filename in in_files + out_files:
+        if not isinstance(filename, basestring):
+            raise TypeError("Need filenames (not handles) for convert_many")
+
+    jobs = [(in_file, in_format, out_file, out_format, alphabet)
+            for in_file, out_file in zip(in_files, out_files)]
+    if processes == 1 or len(jobs) < 2:
+        return [_convert_job(job) for job in jobs]
+
+    from multiprocessing import Pool, cpu_count
+    if processes is None:
+        processes = cpu_count()
+    pool = Pool(processes)
+    # Send the jobs in chunks to reduce the overhead for small files
+    chunksize = max(1, len(jobs) // (4 * processes))
+    try:
+        counts = pool.map(_convert_job, jobs, chunksize)
+    except BaseException:
+        # e.g. a failed conversion, or KeyboardInterrupt
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+    return counts
+
+
 if __name__ == "__main__":
     from Bio._utils import run_doctest
     run_doctest()
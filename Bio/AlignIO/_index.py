@@ -0,0 +1,294 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+"""Dictionary like indexing of alignment files (PRIVATE).
+
+You are not expected to access this module, or any of its code, directly.
+This is all handled internally by the Bio.AlignIO.index(...) and
+Bio.AlignIO.index_db(...) functions which are the public interface for
+this functionality.
+
+As in Bio.SeqIO, we scan over the file looking for the start of each
+alignment, and record its file offset against a key (e.g. the accession
+of a Pfam family). Full parsing is on demand, when an alignment is
+accessed.
+"""
+
+from __future__ import print_function
+
+from Bio._py3k import StringIO
+from Bio._py3k import _bytes_to_string
+
+from Bio import AlignIO
+from Bio.File import _IndexedSeqFileProxy, _open_for_random_access
+from Bio.File import _IndexedSeqFileDict, _SQLiteManySeqFilesDict
+
+
+class AlignmentFileRandomAccess(_IndexedSeqFileProxy):
+    """Base class for random access to the alignments in a file (PRIVATE)."""
+
+    def __init__(self, filename, format, alphabet, seq_count=None, **kwargs):
+        self._handle = _open_for_random_access(filename)
+        self._format = format
+        self._alphabet = alphabet
+        self._seq_count = seq_count
+        self._kwargs = kwargs
+
+    def get(self, offset):
+        """Returns MultipleSeqAlignment."""
+        return self._parse(self.get_raw(offset))
+
+    def _parse(self, raw):
+        """Parse the raw alignment (bytes string) (PRIVATE)."""
+        return AlignIO.read(StringIO(_bytes_to_string(raw)), self._format,
+                            seq_count=self._seq_count,
+                            alphabet=self._alphabet, **self._kwargs)
+
+
+class SequentialAlignmentRandomAccess(AlignmentFileRandomAccess):
+    """Random access to a file of concatenated alignments (PRIVATE).
+
+    Each alignment must start with a header line, as recognised by the
+    _is_header method of the subclass. The keys are the number of the
+    alignment in the file (counting from zero) as a string.
+    """
+
+    def _is_header(self, line):
+        """Does this line start a new alignment? (PRIVATE)."""
+        raise NotImplementedError("Subclass should implement this")
+
+    def _header_lines(self, line):
+        """How many lines after this header cannot be a header (PRIVATE)."""
+        return 0
+
+    def __iter__(self):
+        """Returns (key, offset, length) tuples."""
+        is_header = self._is_header
+        handle = self._handle
+        handle.seek(0)
+        # Skip any text before the first alignment
+        while True:
+            start_offset = handle.tell()
+            line = handle.readline()
+            if not line or is_header(line):
+                break
+        number = 0
+        while line:
+            length = len(line)
+            for i in range(self._header_lines(line)):
+                # Track this explicitly as can't do file offset difference on BGZF
+                length += len(handle.readline())
+            while True:
+                end_offset = handle.tell()
+                line = handle.readline()
+                if not line or is_header(line):
+                    break
+                length += len(line)
+            yield str(number), start_offset, length
+            start_offset = end_offset
+            number += 1
+
+    def get_raw(self, offset):
+        """Return the raw alignment from the file as a bytes string."""
+        is_header = self._is_header
+        handle = self._handle
+        handle.seek(offset)
+        line = handle.readline()
+        lines = [line]
+        for i in range(self._header_lines(line)):
+            lines.append(handle.readline())
+        while True:
+            line = handle.readline()
+            if not line or is_header(line):
+                break
+            lines.append(line)
+        return b"".join(lines)
+
+
+class ClustalRandomAccess(SequentialAlignmentRandomAccess):
+    """Indexed dictionary like access to a Clustal file."""
+
+    # These should match the headers accepted by the ClustalIterator
+    _known_headers = (b"CLUSTAL", b"PROBCONS", b"MUSCLE", b"MSAPROBS",
+                      b"Kalign")
+
+    def _is_header(self, line):
+        return line[:1] in b"CPMK" and \
+            line.split(None, 1)[0] in self._known_headers
+
+
+class NexusRandomAccess(SequentialAlignmentRandomAccess):
+    """Indexed dictionary like access to concatenated Nexus files."""
+
+    def _is_header(self, line):
+        return line[:6].upper() == b"#NEXUS"
+
+
+class PhylipRandomAccess(SequentialAlignmentRandomAccess):
+    """Indexed dictionary like access to a PHYLIP file (e.g. from seqboot).
+
+    This covers the interlaced, sequential and relaxed PHYLIP variants.
+    """
+
+    def _is_header(self, line):
+        parts = line.split()
+        return len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit()
+
+    def _header_lines(self, line):
+        # Skip the first block of sequence lines, in case an identifier
+        # and sequence look like two numbers (e.g. the relaxed variant)
+        return int(line.split()[0])
+
+
+class StockholmRandomAccess(SequentialAlignmentRandomAccess):
+    """Indexed dictionary like access to a Stockholm file (e.g. from Pfam)."""
+
+    def _is_header(self, line):
+        return line.startswith(b"# STOCKHOLM ")
+
+    def __iter__(self):
+        """Returns (key, offset, length) tuples.
+
+        The key is the accession from the "#=GF AC" line, or if there is
+        none the identifier from the "#=GF ID" line, or failing that the
+        number of the alignment in the file (counting from zero) as a
+        string.
+        """
+        is_header = self._is_header
+        handle = self._handle
+        handle.seek(0)
+        number = 0
+        end_offset = handle.tell()
+        line = handle.readline()
+        while line:
+            if not is_header(line):
+                raise ValueError("Did not find STOCKHOLM header")
+            start_offset = end_offset
+            length = len(line)
+            accession = identifier = None
+            while True:
+                end_offset = handle.tell()
+                line = handle.readline()
+                if not line or is_header(line):
+                    break
+                # Track this explicitly as can't do file offset difference on BGZF
+                length += len(line)
+                if line[:5] == b"#=GF ":
+                    parts = line[5:].split(None, 1)
+                    if len(parts) < 2:
+                        continue
+                    if parts[0] == b"AC" and accession is None:
+                        accession = _bytes_to_string(parts[1].strip())
+                    elif parts[0] == b"ID" and identifier is None:
+                        identifier = _bytes_to_string(parts[1].strip())
+            yield accession or identifier or str(number), start_offset, length
+            number += 1
+
+
+class FastaRandomAccess(AlignmentFileRandomAccess):
+    """Indexed dictionary like access to a FASTA file of alignments.
+
+    As in Bio.AlignIO.parse, each alignment is assumed to be seq_count
+    records, or the whole file if this is not given. The keys are the
+    number of the alignment in the file (counting from zero) as a string.
+    """
+
+    def __iter__(self):
+        """Returns (key, offset, length) tuples."""
+        seq_count = self._seq_count
+        handle = self._handle
+        handle.seek(0)
+        # Skip any text before the first record
+        while True:
+            start_offset = handle.tell()
+            line = handle.readline()
+            if not line or line[:1] == b">":
+                break
+        number = 0
+        while line:
+            length = 0
+            records = 0
+            while line:
+                if line[:1] == b">":
+                    if records == seq_count:
+                        break
+                    records += 1
+                length += len(line)
+                end_offset = handle.tell()
+                line = handle.readline()
+            yield str(number), start_offset, length
+            start_offset = end_offset
+            number += 1
+
+    def get_raw(self, offset):
+        """Return the raw alignment from the file as a bytes string."""
+        seq_count = self._seq_count
+        handle = self._handle
+        handle.seek(offset)
+        lines = []
+        records = 0
+        while True:
+            line = handle.readline()
+            if not line:
+                break
+            if line[:1] == b">":
+                if records == seq_count:
+                    break
+                records += 1
+            lines.append(line)
+        return b"".join(lines)
+
+
+class _IndexedAlignmentFileDict(_IndexedSeqFileDict):
+    """Read only dictionary interface to the alignments in a file (PRIVATE).
+
+    Unlike a SeqRecord, a MultipleSeqAlignment has no identifier to
+    check against the key, so this just parses the alignment.
+    """
+
+    def __getitem__(self, key):
+        """x.__getitem__(y) <==> x[y]"""
+        return self._proxy.get(self._offsets[key])
+
+
+class _SQLiteManyAlignmentFilesDict(_SQLiteManySeqFilesDict):
+    """Read only dictionary interface to the alignments in many files (PRIVATE).
+
+    As for _IndexedAlignmentFileDict, there is no identifier to check.
+    The stored length of each alignment is used to read it, so that
+    (for example) the seq_count used to index a FASTA file is not needed
+    when reloading the index.
+    """
+
+    def __getitem__(self, key):
+        """x.__getitem__(y) <==> x[y]"""
+        row = self._con.execute(
+            "SELECT file_number, offset, length FROM offset_data WHERE key=?;",
+            (key,)).fetchone()
+        if not row:
+            raise KeyError(key)
+        file_number, offset, length = row
+        proxies = self._proxies
+        if file_number not in proxies:
+            if len(proxies) >= self._max_open:
+                # Close an old handle...
+                proxies.popitem()[1]._handle.close()
+            # Open a new handle...
+            proxies[file_number] = self._proxy_factory(
+                self._format, self._filenames[file_number])
+        proxy = proxies[file_number]
+        if not length:
+            return proxy.get(offset)
+        handle = proxy._handle
+        handle.seek(offset)
+        return proxy._parse(handle.read(length))
+
+
+_FormatToRandomAccess = {"clustal": ClustalRandomAccess,
+                         "fasta": FastaRandomAccess,
+                         "nexus": NexusRandomAccess,
+                         "phylip": PhylipRandomAccess,
+                         "phylip-relaxed": PhylipRandomAccess,
+                         "phylip-sequential": PhylipRandomAccess,
+                         "stockholm": StockholmRandomAccess,
+                         }
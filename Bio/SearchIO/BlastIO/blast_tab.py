@@ -198,6 +198,25 @@ def _augment_blast_hsp(hsp, attr):
         setattr(hsp, attr, value)
 
 
+def _prep_fields(fields):
+    """Validates and formats the given fields for use by the parsers."""
+    # cast into list if fields is a space-separated string
+    if isinstance(fields, basestring):
+        fields = fields.strip().split(' ')
+    # blast allows 'std' as a proxy for the standard default lists
+    # we want to transform 'std' to its proper column names
+    if 'std' in fields:
+        idx = fields.index('std')
+        fields = fields[:idx] + _DEFAULT_FIELDS + fields[idx + 1:]
+    # if set(fields) has a null intersection with minimum required
+    # fields for hit and query, raise an exception
+    if not set(fields).intersection(_MIN_QUERY_FIELDS) or \
+            not set(fields).intersection(_MIN_HIT_FIELDS):
+        raise ValueError("Required query and/or hit ID field not found.")
+
+    return fields
+
+
 class BlastTabParser(object):
 
     """Parser for the BLAST tabular format."""
@@ -223,21 +242,7 @@ class BlastTabParser(object):
 
     def _prep_fields(self, fields):
         """Validates and formats the given fields for use by the parser."""
-        # cast into list if fields is a space-separated string
-        if isinstance(fields, basestring):
-            fields = fields.strip().split(' ')
-        # blast allows 'std' as a proxy for the standard default lists
-        # we want to transform 'std' to its proper column names
-        if 'std' in fields:
-            idx = fields.index('std')
-            fields = fields[:idx] + _DEFAULT_FIELDS + fields[idx + 1:]
-        # if set(fields) has a null intersection with minimum required
-        # fields for hit and query, raise an exception
-        if not set(fields).intersection(_MIN_QUERY_FIELDS) or \
-                not set(fields).intersection(_MIN_HIT_FIELDS):
-            raise ValueError("Required query and/or hit ID field not found.")
-
-        return fields
+        return _prep_fields(fields)
 
     def _parse_commented_qresult(self):
         """Iterator returning `QueryResult` objects from a commented file."""
@@ -0,0 +1,168 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Columnar reader for BLAST+ tab output, using NumPy record arrays.
+
+The Bio.SearchIO "blast-tab" parser builds QueryResult, Hit, HSP and
+HSPFragment objects for every line, which is flexible but slow for very
+large outputs. When only some of the columns are needed (for example to
+filter or summarise many millions of hits), this module reads the tabular
+text in chunks into NumPy record arrays instead, with one typed array per
+column (named by the BLAST field name, e.g. qseqid, pident or evalue):
+
+>>> from Bio.SearchIO.BlastIO.blast_tab_columns import read_columns
+>>> records = read_columns("Blast/tab_2226_tblastn_001.txt")
+>>> len(records)
+12
+>>> print(records.evalue[:5].tolist())
+[1e-05, 0.0001, 0.0001, 2e-67, 4e-05]
+>>> print(records.sseqid[0])
+gi|145479850|ref|XM_001425911.1|
+
+The same fields arguments and comment lines (BLAST output format 7) as the
+"blast-tab" parser are supported. Integer and floating point columns use
+the types from Bio.SearchIO, and the others (including lists, such as
+sallseqid) are kept as text. The values are as in the file, so for
+example the coordinates are not converted to Python ranges.
+
+The rows of each query follow one another, so they can be grouped using
+the offsets where each query starts, as returned by query_offsets:
+
+>>> from Bio.SearchIO.BlastIO.blast_tab_columns import query_offsets
+>>> query_ids, offsets = query_offsets(records)
+>>> print(offsets.tolist())
+[0, 3, 12]
+>>> for qid, start, end in zip(query_ids, offsets[:-1], offsets[1:]):
+...     print("%s %i" % (qid, end - start))
+gi|16080617|ref|NP_391444.1| 3
+gi|11464971:4-101 9
+
+A filter function can be applied to each chunk during parsing, taking the
+record array and returning a boolean array of the rows to keep:
+
+>>> records = read_columns("Blast/tab_2226_tblastn_001.txt",
+...                        filter=lambda r: r.evalue < 1e-60)
+>>> print(records.bitscore.tolist())
+[199.0, 202.0, 202.0, 202.0]
+
+For files too large to hold in memory, parse_columns yields the record
+arrays of each chunk in turn, where each chunk holds whole queries.
+"""
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SearchIO.BlastIO.blast_tab_columns.")
+
+from Bio.File import as_handle
+
+from Bio.SearchIO._columns import parse_chunks, join_chunks
+from Bio.SearchIO._columns import query_offsets as _query_offsets
+from Bio.SearchIO.BlastIO.blast_tab import _COLUMN_QRESULT, _COLUMN_HIT, \
+    _COLUMN_HSP, _COLUMN_FRAG, _DEFAULT_FIELDS, _LONG_SHORT_MAP, _prep_fields
+
+
+__all__ = ('parse_columns', 'read_columns', 'query_offsets')
+
+
+# column to NumPy type map, based on the casters of the blast-tab parser;
+# any other column is kept as text
+_COLUMN_TYPES = {}
+for _mapping in (_COLUMN_QRESULT, _COLUMN_HIT, _COLUMN_HSP, _COLUMN_FRAG):
+    for _column, (_attr, _caster) in _mapping.items():
+        if _caster is int:
+            _COLUMN_TYPES[_column] = numpy.int64
+        elif _caster is float:
+            _COLUMN_TYPES[_column] = numpy.float64
+del _mapping, _column, _attr, _caster
+
+
+def _query_field(fields):
+    """Returns the field used as the query ID, as for the blast-tab index."""
+    for field in ('qseqid', 'qacc', 'qaccver'):
+        if field in fields:
+            return field
+
+
+def _columns(fields):
+    """Returns the (name, NumPy type) of each of the fields."""
+    return tuple((field, _COLUMN_TYPES.get(field, str)) for field in fields)
+
+
+def _iter_rows(handle, comments, fields):
+    """Iterates over the rows of the file, for parse_chunks."""
+    fields = _prep_fields(fields)
+    columns = _columns(fields)
+    query_idx = fields.index(_query_field(fields))
+
+    with as_handle(handle, 'rU') as source:
+        for line in source:
+            if line.startswith('#'):
+                if comments and line.startswith('# Fields: '):
+                    new_fields = _prep_fields([
+                        _LONG_SHORT_MAP[long_name] for long_name in
+                        line[len('# Fields: '):].strip().split(', ')])
+                    if new_fields != fields:
+                        fields = new_fields
+                        columns = _columns(fields)
+                        query_idx = fields.index(_query_field(fields))
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            row = line.split('\t')
+            if len(row) != len(fields):
+                raise ValueError("Expected %i columns, found: %i"
+                                 % (len(fields), len(row)))
+            yield columns, query_idx, row
+
+
+def parse_columns(handle, comments=False, fields=_DEFAULT_FIELDS,
+                  filter=None, chunk_size=100000):
+    """Iterates over a BLAST+ tab file, returning record arrays of its rows.
+
+    Arguments:
+     - handle - Handle to the file, or the filename as a string.
+     - comments - Whether the file has comment lines (output format 7),
+       which give the fields of its columns.
+     - fields - The fields of the columns (for files without comments),
+       as a list or a space-separated string, as for the "blast-tab"
+       format of Bio.SearchIO.
+     - filter - Optional function taking the record array of a chunk and
+       returning a boolean array of the rows to keep.
+     - chunk_size - The number of rows to read in each chunk. A chunk is
+       extended to the end of its last query.
+
+    Each record array holds the (filtered) rows of one or more whole
+    queries, in the order of the file. Empty chunks are skipped.
+    """
+    return parse_chunks(_iter_rows(handle, comments, fields), filter,
+                        chunk_size)
+
+
+def read_columns(handle, comments=False, fields=_DEFAULT_FIELDS,
+                 filter=None, chunk_size=100000):
+    """Returns one record array of all the rows of a BLAST+ tab file.
+
+    The arguments are as for parse_columns, whose chunks are joined. If
+    no rows are found (or kept by the filter) the array is empty. A
+    ValueError is raised if the fields of a commented file change.
+    """
+    return join_chunks(parse_columns(handle, comments, fields, filter,
+                                     chunk_size),
+                       _columns(_prep_fields(fields)))
+
+
+def query_offsets(records):
+    """Returns the query IDs of the records and the offsets of their rows.
+
+    The rows of the i-th query (in the order of the records) run from
+    offsets[i] to offsets[i + 1], so there is one more offset than query
+    ID. As in the "blast-tab" parser, the query ID is taken from the
+    qseqid, qacc or qaccver field, and the rows of a query are assumed to
+    follow one another.
+    """
+    return _query_offsets(records[_query_field(records.dtype.names)])
@@ -26,11 +26,12 @@ except ImportError:
     from xml.etree import ElementTree as ElementTree
 
 
-from Bio.Alphabet import generic_dna, generic_protein
-from Bio.SearchIO._index import SearchIndexer
+from Bio.Alphabet import generic_dna, generic_protein, single_letter_alphabet
+from Bio.SearchIO._index import SearchIndexer, _LazyHitDict
 from Bio.SearchIO._model import QueryResult, Hit, HSP, HSPFragment
 
 from Bio._py3k import _as_bytes, _bytes_to_string, unicode
+from Bio._py3k import StringIO
 _empty_bytes_string = _as_bytes("")
 
 __all__ = ('BlastXmlParser', 'BlastXmlIndexer', 'BlastXmlWriter')
@@ -76,6 +77,14 @@ _ELEM_FRAG = {
     'Hsp_hseq': ('hit', str),
     'Hsp_qseq': ('query', str),
 }
+# the fragment coordinates as (start, end, start element, end element),
+# adjusted to Python ranges after parsing, and the other fragment elements
+_FRAG_COORDS = tuple((coord_type + '_start', coord_type + '_end',
+                      'Hsp_%s-from' % coord_type, 'Hsp_%s-to' % coord_type)
+                     for coord_type in ('query', 'hit', 'pattern'))
+_ELEM_FRAG_NONCOORD = tuple((key, val_info) for key, val_info in
+                            _ELEM_FRAG.items() if not
+                            (key.endswith('-from') or key.endswith('-to')))
 # dictionary for mapping tag name and meta key name
 _ELEM_META = {
     'BlastOutput_db': ('target', str),
@@ -203,11 +212,62 @@ def _extract_ids_and_descs(concat_str):
     return [pair for pair in map(add_descs, id_desc_pairs)]
 
 
+def _split_hit_id_desc(hit_id, hit_desc):
+    # Given the Hit_id and Hit_def text, return the list of ID and
+    # description pairs (the first being the hit's own), and the
+    # BLAST-generated hit ID (or an empty string)
+
+    # handle blast searches against databases with Blast's IDs
+    if hit_id.startswith('gnl|BL_ORD_ID|'):
+        blast_hit_id = hit_id
+        id_desc = hit_desc.split(' ', 1)
+        hit_id = id_desc[0]
+        try:
+            hit_desc = id_desc[1]
+        except IndexError:
+            hit_desc = ''
+    else:
+        blast_hit_id = ''
+
+    # combine primary ID and defline first before splitting
+    full_id_desc = hit_id + ' ' + hit_desc
+    return _extract_ids_and_descs(full_id_desc), blast_hit_id
+
+
+def _use_blast_hit_id(hit):
+    # Switch a hit whose ID is already present in the query result over to
+    # its BLAST-generated ID, restoring the ID in the description
+    hit.description = '%s %s' % (hit.id, hit.description)
+    hit.id = hit._blast_id
+    # and change the hit_id of the HSPs contained
+    for hsp in hit:
+        hsp.hit_id = hit._blast_id
+
+
+def _xml_text(raw):
+    # Return the text of a simple XML element, given its raw content
+    # (bytes) without the start and end tags
+    if _as_bytes('&') in raw or _as_bytes('<') in raw:
+        return ElementTree.fromstring(
+            '<x>%s</x>' % _bytes_to_string(raw)).text or ''
+    return _bytes_to_string(raw)
+
+
+def _duplicate_hit_warning(blast_hit_id, hit_id, query_id):
+    warnings.warn("Adding hit with BLAST-generated ID "
+            "%r since hit ID %r is already present "
+            "in query %r. Your BLAST database may contain "
+            "duplicate entries." %
+            (blast_hit_id, hit_id, query_id), BiopythonParserWarning)
+
+
 class BlastXmlParser(object):
     """Parser for the BLAST XML format"""
 
     def __init__(self, handle):
         self.xml_iter = iter(ElementTree.iterparse(handle, events=('start', 'end')))
+        # parent of the Iteration elements, which are removed once parsed
+        self._iterations_elem = None
         self._meta, self._fallback = self._parse_preamble()
 
     def __iter__(self):
@@ -249,8 +309,11 @@ class BlastXmlParser(object):
                 elem.clear()
                 continue
 
-            if event == 'start' and elem.tag == 'Iteration':
-                break
+            if event == 'start':
+                if elem.tag == 'Iteration':
+                    break
+                elif elem.tag == 'BlastOutput_iterations':
+                    self._iterations_elem = elem
 
         # we only want the version number, sans the program name or date
         if meta.get('version') is not None:
@@ -305,26 +368,19 @@ class BlastXmlParser(object):
                 else:
                     blast_query_id = ''
 
-                hit_list, key_list = [], []
+                hit_list, key_list = [], set()
                 for hit in self._parse_hit(qresult_elem.find('Iteration_hits'),
                         query_id):
                     if hit:
                         # need to keep track of hit IDs, since there could be duplicates,
                         if hit.id in key_list:
-                            warnings.warn("Adding hit with BLAST-generated ID "
-                                    "%r since hit ID %r is already present "
-                                    "in query %r. Your BLAST database may contain "
-                                    "duplicate entries." %
-                                    (hit._blast_id, hit.id, query_id), BiopythonParserWarning)
+                            _duplicate_hit_warning(hit._blast_id, hit.id,
+                                                   query_id)
                             # fallback to Blast-generated IDs, if the ID is already present
                             # and restore the desc, too
-                            hit.description = '%s %s' % (hit.id, hit.description)
-                            hit.id = hit._blast_id
-                            # and change the hit_id of the HSPs contained
-                            for hsp in hit:
-                                hsp.hit_id = hit._blast_id
+                            _use_blast_hit_id(hit)
                         else:
-                            key_list.append(hit.id)
+                            key_list.add(hit.id)
 
                         hit_list.append(hit)
 
@@ -360,8 +416,11 @@ class BlastXmlParser(object):
                                 value = caster(value)
                             setattr(qresult, val_info[0], value)
 
-                # delete element after we finish parsing it
+                # delete element after we finish parsing it, and drop it
+                # from the tree so only one query is held in memory
                 qresult_elem.clear()
+                if self._iterations_elem is not None:
+                    self._iterations_elem.remove(qresult_elem)
                 yield qresult
 
     def _parse_hit(self, root_hit_elem, query_id):
@@ -391,23 +450,8 @@ class BlastXmlParser(object):
         for hit_elem in root_hit_elem:
 
             # create empty hit object
-            hit_id = hit_elem.findtext('Hit_id')
-            hit_desc = hit_elem.findtext('Hit_def')
-            # handle blast searches against databases with Blast's IDs
-            if hit_id.startswith('gnl|BL_ORD_ID|'):
-                blast_hit_id = hit_id
-                id_desc = hit_desc.split(' ', 1)
-                hit_id = id_desc[0]
-                try:
-                    hit_desc = id_desc[1]
-                except IndexError:
-                    hit_desc = ''
-            else:
-                blast_hit_id = ''
-
-            # combine primary ID and defline first before splitting
-            full_id_desc = hit_id + ' ' + hit_desc
-            id_descs = _extract_ids_and_descs(full_id_desc)
+            id_descs, blast_hit_id = _split_hit_id_desc(
+                hit_elem.findtext('Hit_id'), hit_elem.findtext('Hit_def'))
             hit_id, hit_desc = id_descs[0]
 
             hsps = [hsp for hsp in
@@ -472,38 +516,40 @@ class BlastXmlParser(object):
         if root_hsp_frag_elem is None:
             root_hsp_frag_elem = []
 
-        for hsp_frag_elem in root_hsp_frag_elem:
-            coords = {}  # temporary container for coordinates
-            frag = HSPFragment(hit_id, query_id)
-            for key, val_info in _ELEM_FRAG.items():
-                value = hsp_frag_elem.findtext(key)
-                caster = val_info[1]
+        # set alphabet, based on program
+        prog = self._meta.get('program')
+        if prog == 'blastn':
+            alphabet = generic_dna
+        elif prog in ['blastp', 'blastx', 'tblastn', 'tblastx']:
+            alphabet = generic_protein
+        else:
+            alphabet = single_letter_alphabet
 
-                # adjust 'from' and 'to' coordinates to 0-based ones
+        for hsp_frag_elem in root_hsp_frag_elem:
+            # get the text of all the elements in one go, rather than
+            # searching the children for each one
+            texts = dict((elem.tag, elem.text or '') for elem in hsp_frag_elem)
+            frag = HSPFragment(hit_id, query_id, alphabet=alphabet)
+            for key, val_info in _ELEM_FRAG_NONCOORD:
+                value = texts.get(key)
                 if value is not None:
-                    if key.endswith('-from') or key.endswith('-to'):
-                        # store coordinates for further processing
-                        coords[val_info[0]] = caster(value)
-                        continue
+                    caster = val_info[1]
                     # recast only if value is not intended to be str
-                    elif caster is not str:
+                    if caster is not str:
                         value = caster(value)
                     setattr(frag, val_info[0], value)
 
             # set the similarity characters into aln_annotation dict
-            frag.aln_annotation['similarity'] = \
-                    hsp_frag_elem.findtext('Hsp_midline')
+            frag.aln_annotation['similarity'] = texts.get('Hsp_midline')
 
             # process coordinates
             # since 'x-from' could be bigger than 'x-to', we need to figure
             # out which one is smaller/bigger since 'x_start' is always smaller
             # than 'x_end'
-            for coord_type in ('query', 'hit', 'pattern'):
-                start_type = coord_type + '_start'
-                end_type = coord_type + '_end'
+            for start_type, end_type, start_key, end_key in _FRAG_COORDS:
                 try:
-                    start = coords[start_type]
-                    end = coords[end_type]
+                    start = int(texts[start_key])
+                    end = int(texts[end_key])
                 except KeyError:
                     continue
                 else:
@@ -511,16 +557,9 @@ class BlastXmlParser(object):
                     setattr(frag, start_type, min(start, end) - 1)
                     setattr(frag, end_type, max(start, end))
 
-            # set alphabet, based on program
-            prog = self._meta.get('program')
-            if prog == 'blastn':
-                frag.alphabet = generic_dna
-            elif prog in ['blastp', 'blastx', 'tblastn', 'tblastx']:
-                frag.alphabet = generic_protein
-
             hsp = HSP([frag])
             for key, val_info in _ELEM_HSP.items():
-                value = hsp_frag_elem.findtext(key)
+                value = texts.get(key)
                 caster = val_info[1]
                 if value is not None:
                     if caster is not str:
@@ -537,7 +576,15 @@ class BlastXmlIndexer(SearchIndexer):
     _parser = BlastXmlParser
     qstart_mark = _as_bytes('<Iteration>')
     qend_mark = _as_bytes('</Iteration>')
+    hits_start_mark = _as_bytes('<Iteration_hits>')
+    hits_end_mark = _as_bytes('</Iteration_hits>')
+    hsp_mark = _as_bytes('<Hsp>')
     block_size = 16384
+    # for finding the hits and their IDs in a raw query result
+    _re_hit = re.compile(_as_bytes(r'<Hit>.*?</Hit>'), re.DOTALL)
+    _re_hit_id = re.compile(_as_bytes(r'<Hit_id>(.*?)</Hit_id>'), re.DOTALL)
+    _re_hit_def = re.compile(_as_bytes(r'<Hit_def>(.*?)</Hit_def>|<Hit_def/>'),
+                             re.DOTALL)
 
     def __init__(self, filename):
         SearchIndexer.__init__(self, filename)
@@ -601,10 +648,80 @@ class BlastXmlIndexer(SearchIndexer):
     def _parse(self, handle):
         # overwrites SearchIndexer._parse, since we need to set the meta and
         # fallback dictionaries to the parser
-        generator = self._parser(handle, **self._kwargs)
-        generator._meta = self._meta
-        generator._fallback = self._fallback
-        return next(iter(generator))
+        return next(iter(self._make_parser(handle)))
+
+    def _make_parser(self, handle):
+        parser = self._parser(handle, **self._kwargs)
+        parser._meta = self._meta
+        parser._fallback = self._fallback
+        return parser
+
+    def get(self, offset):
+        """Return the QueryResult at the given offset.
+
+        Only the query itself is parsed here. Its hits are located in the
+        raw record, but each Hit is only parsed when it is first accessed,
+        so for example getting the first of hundreds of hits is quick.
+        """
+        raw = self.get_raw(offset)
+        hits_start = raw.find(self.hits_start_mark)
+        hits_end = raw.find(self.hits_end_mark)
+        if hits_start < 0 or hits_end < 0:
+            return self._parse(StringIO(_bytes_to_string(raw)))
+        hits_start += len(self.hits_start_mark)
+
+        # parse the query result with an empty Iteration_hits element
+        parser = self._make_parser(StringIO(_bytes_to_string(
+            raw[:hits_start] + raw[hits_end:])))
+        qresult = next(iter(parser))
+        query_id = qresult.id
+
+        def parse_hit(hit_key, value):
+            start, end, use_blast_id = value
+            hit_elem = ElementTree.fromstring(
+                _bytes_to_string(raw[start:end]))
+            hit = next(parser._parse_hit([hit_elem], query_id))
+            if use_blast_id:
+                _use_blast_hit_id(hit)
+            hit.query_description = qresult._description
+            return hit
+
+        # find the hit keys as in BlastXmlParser._parse_qresult and
+        # QueryResult.__setitem__, without parsing the hits
+        items = _LazyHitDict(parse_hit)
+        alt_hit_ids = {}
+        hit_alt_ids = {}
+        key_list = set()
+        for match in self._re_hit.finditer(raw, hits_start, hits_end):
+            hit_raw = match.group()
+            # hits without HSPs are skipped by the parser
+            if self.hsp_mark not in hit_raw:
+                continue
+            hit_id = self._re_hit_id.search(hit_raw)
+            hit_desc = self._re_hit_def.search(hit_raw)
+            if hit_id is None or hit_desc is None:
+                # not as expected, leave it to the parser
+                return self._parse(StringIO(_bytes_to_string(raw)))
+            id_descs, blast_hit_id = _split_hit_id_desc(
+                _xml_text(hit_id.group(1)), _xml_text(hit_desc.group(1) or
+                                                      _empty_bytes_string))
+            hit_key = id_descs[0][0]
+            use_blast_id = hit_key in key_list
+            if use_blast_id:
+                _duplicate_hit_warning(blast_hit_id, hit_key, query_id)
+                hit_key = blast_hit_id
+            else:
+                key_list.add(hit_key)
+            if hit_key in items:
+                for alt_key in hit_alt_ids[hit_key]:
+                    del alt_hit_ids[alt_key]
+            alt_hit_ids.pop(hit_key, None)
+            items[hit_key] = (match.start(), match.end(), use_blast_id)
+            hit_alt_ids[hit_key] = [x[0] for x in id_descs[1:]]
+            for alt_id in hit_alt_ids[hit_key]:
+                alt_hit_ids[alt_id] = hit_key
+        qresult._set_hits(items, alt_hit_ids)
+        return qresult
 
     def get_raw(self, offset):
         """Return the raw record from the file as a bytes string."""
@@ -612,10 +729,15 @@ class BlastXmlIndexer(SearchIndexer):
         handle = self._handle
         handle.seek(offset)
 
-        qresult_raw = handle.readline()
-        assert qresult_raw.lstrip().startswith(self.qstart_mark)
-        while qend_mark not in qresult_raw:
-            qresult_raw += handle.readline()
+        line = handle.readline()
+        assert line.lstrip().startswith(self.qstart_mark)
+        # Only check each new line for the end, rather than the whole
+        # (growing) record, which would take quadratic time
+        lines = [line]
+        while line and qend_mark not in line:
+            line = handle.readline()
+            lines.append(line)
+        qresult_raw = _empty_bytes_string.join(lines)
         assert qresult_raw.rstrip().endswith(qend_mark)
         assert qresult_raw.count(qend_mark) == 1
         # Note this will include any leading and trailing whitespace, in
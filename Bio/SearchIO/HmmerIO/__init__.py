@@ -56,6 +56,30 @@ Also note that when using the domain table format writers, it will use HMMER's
 naming convention ('hmm' and 'ali') so the files you write will be similar to
 files written by a real HMMER program.
 
+Queries with many hits (e.g. a profile searched against a large sequence
+database) can take a lot of memory. The hmmer3-text, hmmer3-tab and
+hmmer3-domtab parsers accept a 'max_hits' keyword argument, which splits the
+hits of such queries into several QueryResult objects, one after another
+with the same ID and attributes, each with at most that many hits:
+
+    >>> from Bio import SearchIO
+    >>> for qresult in SearchIO.parse('Hmmer/text_30_hmmsearch_005.out',
+    ...                               'hmmer3-text', max_hits=3):
+    ...     print("%s %i" % (qresult.id, len(qresult)))
+    globins4 0
+    Pkinase 3
+    Pkinase 3
+    Pkinase 1
+
+The 'max_hits' argument is only for parsing. It cannot be used with
+Bio.SearchIO.read, index or index_db, which need each query as a single
+QueryResult, and to_dict raises a ValueError for the repeated query IDs.
+
+For the plain text output, all the rows of the hit table of a query are still
+read first, as they come before the domains in the file. If only the values
+in the domain table output are needed, Bio.SearchIO.HmmerIO.hmmer3_domtab_columns
+reads them into NumPy arrays, which is much quicker and uses less memory.
+
 
 hmmer2-text and hmmer3-text
 ===========================
@@ -137,8 +137,10 @@ class Hmmer3DomtabParser(Hmmer3TabParser):
                     hit_list.append(hit)
                     hsp_list = []
 
-                # create qresult and yield if we're at a new qresult or EOF
-                if qres_state == state_QRES_NEW or file_state == state_EOF:
+                # create qresult and yield if we're at a new qresult or EOF,
+                # or if it has the maximum number of hits
+                if qres_state == state_QRES_NEW or file_state == state_EOF or \
+                        len(hit_list) == self.max_hits:
                     qresult = QueryResult(hit_list, prev_qid)
                     for attr, value in prev['qresult'].items():
                         setattr(qresult, attr, value)
@@ -0,0 +1,136 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Columnar reader for HMMER 3.0 domain table output, using NumPy.
+
+This reads the domain table output of hmmscan, hmmsearch or phmmer into
+NumPy record arrays, with one typed array per column, instead of building
+the Bio.SearchIO objects for every domain. It works like the reader of
+BLAST+ tabular output in Bio.SearchIO.BlastIO.blast_tab_columns (see there
+for the details of reading in chunks, filtering and query offsets):
+
+>>> from Bio.SearchIO.HmmerIO.hmmer3_domtab_columns import read_columns
+>>> records = read_columns("Hmmer/domtab_30_hmmscan_001.out")
+>>> len(records)
+13
+>>> print(records.target_name[0])
+Globin
+>>> print(records.domain_bitscore[:3].tolist())
+[74.0, 37.6, 23.4]
+>>> records = read_columns("Hmmer/domtab_30_hmmscan_001.out",
+...                        filter=lambda r: r.domain_evalue < 1e-10)
+>>> print(records.target_name.tolist())
+['Globin', 'Xpo1', 'Pou', 'Homeobox']
+
+The columns are named as below, in the order of the file:
+
+    target_name, target_accession, target_len, query_name,
+    query_accession, query_len, evalue, bitscore, bias, domain_index,
+    domain_num, domain_evalue_cond, domain_evalue, domain_bitscore,
+    domain_bias, hmm_from, hmm_to, ali_from, ali_to, env_from, env_to,
+    acc_avg, description
+
+Unlike the "hmmer3-domtab" parsers of Bio.SearchIO, the same columns are
+used whichever HMMER program wrote the file, with the values as in the
+file (so the coordinates are not converted to Python ranges).
+"""
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SearchIO.HmmerIO.hmmer3_domtab_columns.")
+
+from Bio.File import as_handle
+
+from Bio.SearchIO._columns import parse_chunks, join_chunks
+from Bio.SearchIO._columns import query_offsets as _query_offsets
+
+
+__all__ = ('parse_columns', 'read_columns', 'query_offsets')
+
+
+# names and NumPy types of the domain table columns
+_COLUMNS = (
+    ('target_name', str),
+    ('target_accession', str),
+    ('target_len', numpy.int64),
+    ('query_name', str),
+    ('query_accession', str),
+    ('query_len', numpy.int64),
+    ('evalue', numpy.float64),
+    ('bitscore', numpy.float64),
+    ('bias', numpy.float64),
+    ('domain_index', numpy.int64),
+    ('domain_num', numpy.int64),
+    ('domain_evalue_cond', numpy.float64),
+    ('domain_evalue', numpy.float64),
+    ('domain_bitscore', numpy.float64),
+    ('domain_bias', numpy.float64),
+    ('hmm_from', numpy.int64),
+    ('hmm_to', numpy.int64),
+    ('ali_from', numpy.int64),
+    ('ali_to', numpy.int64),
+    ('env_from', numpy.int64),
+    ('env_to', numpy.int64),
+    ('acc_avg', numpy.float64),
+    ('description', str),
+)
+_QUERY_IDX = [name for name, dtype in _COLUMNS].index('query_name')
+
+
+def _iter_rows(handle):
+    """Iterates over the rows of the file, for parse_chunks."""
+    with as_handle(handle, 'rU') as source:
+        for line in source:
+            if line.startswith('#'):
+                continue
+            # the description may contain spaces (or be missing)
+            row = line.split(None, len(_COLUMNS) - 1)
+            if not row:
+                continue
+            if len(row) == len(_COLUMNS) - 1:
+                row.append('')
+            elif len(row) != len(_COLUMNS):
+                raise ValueError("Expected %i columns, found: %i"
+                                 % (len(_COLUMNS), len(row)))
+            row[-1] = row[-1].strip()
+            yield _COLUMNS, _QUERY_IDX, row
+
+
+def parse_columns(handle, filter=None, chunk_size=100000):
+    """Iterates over a HMMER 3.0 domain table, returning record arrays.
+
+    Arguments:
+     - handle - Handle to the file, or the filename as a string.
+     - filter - Optional function taking the record array of a chunk and
+       returning a boolean array of the rows to keep.
+     - chunk_size - The number of rows to read in each chunk. A chunk is
+       extended to the end of its last query.
+
+    Each record array holds the (filtered) rows of one or more whole
+    queries, in the order of the file. Empty chunks are skipped.
+    """
+    return parse_chunks(_iter_rows(handle), filter, chunk_size)
+
+
+def read_columns(handle, filter=None, chunk_size=100000):
+    """Returns one record array of all the rows of a HMMER 3.0 domain table.
+
+    The arguments are as for parse_columns, whose chunks are joined. If
+    no rows are found (or kept by the filter) the array is empty.
+    """
+    return join_chunks(parse_columns(handle, filter, chunk_size), _COLUMNS)
+
+
+def query_offsets(records):
+    """Returns the query names of the records and the offsets of their rows.
+
+    The rows of the i-th query (in the order of the records) run from
+    offsets[i] to offsets[i + 1], so there is one more offset than query
+    name. As in the "hmmer3-domtab" parsers, the rows of a query are
+    assumed to follow one another.
+    """
+    return _query_offsets(records.query_name)
@@ -19,8 +19,13 @@ __all__ = ('Hmmer3TabParser', 'Hmmer3TabIndexer', 'Hmmer3TabWriter')
 class Hmmer3TabParser(object):
     """Parser for the HMMER table format."""
 
-    def __init__(self, handle):
+    def __init__(self, handle, max_hits=None):
         self.handle = handle
+        # if set, query results with more hits are split into several
+        # QueryResult objects, so huge queries need not be held in memory
+        if max_hits is not None and max_hits < 1:
+            raise ValueError("max_hits must be at least 1, not %r" % max_hits)
+        self.max_hits = max_hits
         self.line = self.handle.readline()
 
     def __iter__(self):
@@ -131,8 +136,10 @@ class Hmmer3TabParser(object):
                     setattr(hit, attr, value)
                 hit_list.append(hit)
 
-                # create qresult and yield if we're at a new qresult or at EOF
-                if qres_state == state_QRES_NEW or file_state == state_EOF:
+                # create qresult and yield if we're at a new qresult or at EOF,
+                # or if it has the maximum number of hits
+                if qres_state == state_QRES_NEW or file_state == state_EOF or \
+                        len(hit_list) == self.max_hits:
                     qresult = QueryResult(hit_list, prev_qid)
                     for attr, value in prev['qresult'].items():
                         setattr(qresult, attr, value)
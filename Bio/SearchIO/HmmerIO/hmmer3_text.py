@@ -6,6 +6,7 @@
 """Bio.SearchIO parser for HMMER plain text output format."""
 
 import re
+from collections import deque
 
 from Bio._py3k import _as_bytes, _bytes_to_string
 from Bio._utils import read_forward
@@ -38,8 +39,13 @@ class Hmmer3TextParser(object):
 
     """Parser for the HMMER 3.0 text output."""
 
-    def __init__(self, handle):
+    def __init__(self, handle, max_hits=None):
         self.handle = handle
+        # if set, query results with more hits are split into several
+        # QueryResult objects, so huge queries need not be held in memory
+        if max_hits is not None and max_hits < 1:
+            raise ValueError("max_hits must be at least 1, not %r" % max_hits)
+        self.max_hits = max_hits
         self.line = read_forward(self.handle)
         self._meta = self._parse_preamble()
 
@@ -126,22 +132,26 @@ class Hmmer3TextParser(object):
                     qdesc = self.line.strip().split(' ', 1)[1].strip()
                     qresult_attrs['description'] = qdesc
 
-            # parse the query hits
+            # parse the query hits, yielding them early in a qresult of
+            # their own if there are max_hits of them
+            hit_list = []
+            is_split = False
             while self.line and '//' not in self.line:
-                hit_list = self._parse_hit(qid, qdesc)
+                for hit in self._parse_hit(qid, qdesc):
+                    hit_list.append(hit)
+                    if len(hit_list) == self.max_hits:
+                        yield self._create_qresult(qid, hit_list,
+                                                   qresult_attrs)
+                        hit_list = []
+                        is_split = True
                 # read through the statistics summary
                 # TODO: parse and store this information?
                 if self.line.startswith('Internal pipeline'):
                     while self.line and '//' not in self.line:
                         self.line = read_forward(self.handle)
 
-            # create qresult, set its attributes and yield
-            # not initializing hit_list directly to handle empty hits
-            # (i.e. need to set its query description manually)
-            qresult = QueryResult(id=qid, hits=hit_list)
-            for attr, value in qresult_attrs.items():
-                setattr(qresult, attr, value)
-            yield qresult
+            if hit_list or not is_split:
+                yield self._create_qresult(qid, hit_list, qresult_attrs)
             self.line = read_forward(self.handle)
 
             # Skip line beginning with '# Alignment of', which are output
@@ -154,8 +164,23 @@ class Hmmer3TextParser(object):
             if '[ok]' in self.line:
                 break
 
+    def _create_qresult(self, qid, hit_list, qresult_attrs):
+        """Returns a QueryResult of the given hits, with its attributes set."""
+        # create qresult, set its attributes and yield
+        # not initializing hit_list directly to handle empty hits
+        # (i.e. need to set its query description manually)
+        qresult = QueryResult(id=qid, hits=hit_list)
+        for attr, value in qresult_attrs.items():
+            setattr(qresult, attr, value)
+        return qresult
+
     def _parse_hit(self, qid, qdesc):
-        """Parses a HMMER3 hit block, beginning with the hit table."""
+        """Parses a HMMER3 hit block, beginning with the hit table.
+
+        This is a generator, returning each Hit once its domains have been
+        parsed. The rows of the hit table are read first (as they come
+        before the domains in the file), but only as simple values.
+        """
         # get to the end of the hit table delimiter and read one more line
         self._read_until(lambda line:
                 line.startswith('    ------- ------ -----'))
@@ -166,10 +191,10 @@ class Hmmer3TextParser(object):
         is_included = True
 
         # parse the hit table
-        hit_attr_list = []
+        hit_attr_list = deque()
         while True:
             if not self.line:
-                return []
+                return
             elif self.line.startswith('  ------ inclusion'):
                 is_included = False
                 self.line = read_forward(self.handle)
@@ -181,10 +206,11 @@ class Hmmer3TextParser(object):
                     self.line = read_forward(self.handle)
                     if self.line.startswith('Internal pipeline'):
                         assert len(hit_attr_list) == 0
-                        return []
+                        return
             elif self.line.startswith('Domain annotation for each '):
-                hit_list = self._create_hits(hit_attr_list, qid, qdesc)
-                return hit_list
+                for hit in self._create_hits(hit_attr_list, qid, qdesc):
+                    yield hit
+                return
             # entering hit results row
             # parse the columns into a list
             row = [x for x in self.line.strip().split(' ') if x]
@@ -214,18 +240,20 @@ class Hmmer3TextParser(object):
             self.line = read_forward(self.handle)
 
     def _create_hits(self, hit_attrs, qid, qdesc):
-        """Parses a HMMER3 hsp block, beginning with the hsp table."""
+        """Parses a HMMER3 hsp block, beginning with the hsp table.
+
+        This is a generator, returning each Hit in turn.
+        """
         # read through until the beginning of the hsp block
         self._read_until(lambda line: line.startswith('Internal pipeline') or
                          line.startswith('>>'))
 
         # start parsing the hsp block
-        hit_list = []
         while True:
             if self.line.startswith('Internal pipeline'):
                 # by this time we should've emptied the hit attr list
                 assert len(hit_attrs) == 0
-                return hit_list
+                return
             assert self.line.startswith('>>')
             hid, hdesc = self.line[len('>> '):].split('  ', 1)
             hdesc = hdesc.strip()
@@ -247,7 +275,7 @@ class Hmmer3TextParser(object):
                    self.line.startswith('  Alignments for each domain:') or \
                    self.line.startswith('>>'):
 
-                    hit_attr = hit_attrs.pop(0)
+                    hit_attr = hit_attrs.popleft()
                     hit = Hit(hsp_list)
                     for attr, value in hit_attr.items():
                         if attr == "description":
@@ -257,7 +285,6 @@ class Hmmer3TextParser(object):
                         setattr(hit, attr, value)
                     if not hit:
                         hit.query_description = qdesc
-                    hit_list.append(hit)
                     break
 
                 parsed = [x for x in self.line.strip().split(' ') if x]
@@ -319,6 +346,7 @@ class Hmmer3TextParser(object):
             # parse the hsp alignments
             if self.line.startswith('  Alignments for each domain:'):
                 self._parse_aln_block(hid, hit.hsps)
+            yield hit
 
     def _parse_aln_block(self, hid, hsp_list):
         """Parses a HMMER3 HSP alignment block."""
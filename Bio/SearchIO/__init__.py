@@ -8,7 +8,7 @@
 The SearchIO submodule provides parsers, indexers, and writers for outputs from
 various sequence search programs. It provides an API similar to SeqIO and
 AlignIO, with the following main functions: `parse`, `read`, `to_dict`, `index`,
-`index_db`, `write`, and `convert`.
+`index_db`, `write`, and `convert`, plus `parse_many` for parsing many files.
 
 SearchIO parses a search output file's contents into a hierarchy of four nested
 objects: QueryResult, Hit, HSP, and HSPFragment. Each of them models a part of
@@ -66,6 +66,11 @@ functions Bio.SearchIO.index(...) or Bio.SearchIO.index_db(...). They have a
 similar interface to their counterparts in SeqIO and AlignIO, with the addition
 of optional, format-specific keyword arguments.
 
+For the many output files of a search split into several jobs (e.g. over
+parts of the queries or of the database), Bio.SearchIO.parse_many(...) parses
+the files in a pool of worker processes. It can merge the results for the same
+query from different files, and sort their hits by e-value or bit score.
+
 
 Output
 ======
@@ -199,6 +204,8 @@ from Bio._py3k import basestring
 
 import sys
 import warnings
+from collections import OrderedDict
+from itertools import chain
 
 from Bio import BiopythonExperimentalWarning
 from Bio.File import as_handle
@@ -211,7 +218,8 @@ warnings.warn('Bio.SearchIO is an experimental submodule which may undergo '
         BiopythonExperimentalWarning)
 
 
-__all__ = ('read', 'parse', 'to_dict', 'index', 'index_db', 'write', 'convert')
+__all__ = ('read', 'parse', 'parse_many', 'to_dict', 'index', 'index_db',
+           'write', 'convert')
 
 
 # dictionary of supported formats for parse() and read()
@@ -348,9 +356,12 @@ def read(handle, format=None, **kwargs):
     ValueError: More than one query results found in handle
 
     Like `parse`, `read` may also accept keyword argument(s) depending on the
-    search output file format.
+    search output file format. The 'max_hits' argument of some parsers is not
+    accepted, as it could split the query into more than one QueryResult.
 
     """
+    if 'max_hits' in kwargs:
+        raise ValueError("The max_hits argument cannot be used with read")
     generator = parse(handle, format, **kwargs)
 
     try:
@@ -369,6 +380,168 @@ def read(handle, format=None, **kwargs):
     return first
 
 
+# hit sort orders of parse_many, and whether the best values are the highest
+_HIT_SORT_ORDERS = {'evalue': False, 'bitscore': True}
+
+
+def _parse_job(args):
+    """Parses a single file for parse_many, returns a list (PRIVATE).
+
+    This is a top level function so that it can be used by worker processes.
+    """
+    filename, format, kwargs = args
+    return list(parse(filename, format, **kwargs))
+
+
+def _merge_qresult(merged, qresult):
+    """Adds the hits of a QueryResult to another with the same ID (PRIVATE).
+
+    A hit found in both, by its ID or any of its alternative IDs, has the
+    HSPs of the new one added to the existing hit.
+    """
+    for hit in qresult.hits:
+        keys = [key for key in hit.id_all if key in merged]
+        if not keys:
+            merged.append(hit)
+            continue
+        existing = merged[keys[0]]
+        for hsp in hit.hsps:
+            if hsp.hit_id != existing.id:
+                # Same hit listed under another of its IDs in this file
+                hsp.hit_id = existing.id
+                hsp.hit_description = existing.description
+            existing.append(hsp)
+
+
+def _sort_hits(qresult, sort):
+    """Sorts the hits of a QueryResult in place, best first (PRIVATE).
+
+    Hits are sorted by their own value of the sort attribute if they have one
+    (e.g. the full sequence values in HMMER output), or otherwise by the best
+    value of their HSPs.
+    """
+    reverse = _HIT_SORT_ORDERS[sort]
+    best = max if reverse else min
+
+    def key(hit):
+        try:
+            return getattr(hit, sort)
+        except AttributeError:
+            return best(getattr(hsp, sort) for hsp in hit.hsps)
+
+    qresult.sort(key=key, reverse=reverse)
+
+
+def parse_many(filenames, format=None, merge=False, sort=None,
+               processes=None, **kwargs):
+    """Parses many search output files, returning a generator of QueryResults.
+
+     - filenames - List of the filenames (not handles) to parse.
+     - format - Lower case string denoting one of the supported formats.
+     - merge - Whether to merge the query results with the same ID from
+       different files into one (default False).
+     - sort - Optional hit order of each query result, either 'evalue'
+       (lowest first) or 'bitscore' (highest first).
+     - processes - Number of worker processes to use (default is the number
+       of CPUs), or 1 to parse all the files in this process.
+     - kwargs - Format-specific keyword arguments, as for `parse`.
+
+    This is intended for searches split into many jobs, such as a large set
+    of queries run in batches, or a search against a database split into
+    several parts. Each file is parsed as with `parse`, using a pool of
+    processes from the multiprocessing library, and the query results are
+    returned in the order of the files:
+
+    >>> from Bio import SearchIO
+    >>> filenames = ['Hmmer/tab_30_hmmscan_001.out',
+    ...              'Hmmer/tab_30_hmmscan_004.out']
+    >>> for qresult in SearchIO.parse_many(filenames, 'hmmer3-tab'):
+    ...     print("%s %i" % (qresult.id, len(qresult)))
+    ...
+    gi|4885477|ref|NP_005359.1| 1
+    gi|126362951:116-221 2
+    gi|22748937|ref|NP_065801.1| 2
+    gi|125490392|ref|NP_038661.2| 5
+    gi|126362951:116-221 2
+
+    The worker processes return all the query results of a file at once, so
+    when using more than one process the files should each fit in memory
+    (see also the 'max_hits' argument of some parsers).
+
+    With merge=True, the hits of each query from all the files are combined
+    in one QueryResult, which keeps the attributes of the first one found.
+    A hit found in several files has the HSPs of each. This needs all the
+    files to be parsed before the first query result is returned, which are
+    then in the order each query was first found:
+
+    >>> for qresult in SearchIO.parse_many(filenames, 'hmmer3-tab',
+    ...                                    merge=True, sort='evalue'):
+    ...     print("%s %i %i" % (qresult.id, len(qresult), len(qresult.hsps)))
+    ...
+    gi|4885477|ref|NP_005359.1| 1 1
+    gi|126362951:116-221 2 4
+    gi|22748937|ref|NP_065801.1| 2 2
+    gi|125490392|ref|NP_038661.2| 5 5
+
+    Note that e-values depend on the size of the database searched, so when
+    merging searches against parts of a database, the programs should be told
+    the size of the whole database (e.g. the BLAST+ -dbsize option or the
+    HMMER -Z option) for the e-values to be comparable.
+
+    As with any use of multiprocessing, on Windows (or other platforms not
+    using fork to start new processes) your script should call this from
+    within an ``if __name__ == "__main__":`` block.
+    """
+    # check the arguments here, rather than in each worker process
+    get_processor(format, _ITERATOR_MAP)
+    if sort is not None and sort not in _HIT_SORT_ORDERS:
+        raise ValueError("Hits can only be sorted by %s, not %r"
+                         % (" or ".join(sorted(_HIT_SORT_ORDERS)), sort))
+    filenames = list(filenames)
+    for filename in filenames:
+        if not isinstance(filename, basestring):
+            raise TypeError("Need filenames (not handles) for parse_many")
+
+    pool = None
+    if processes == 1 or len(filenames) < 2:
+        results = (parse(filename, format, **kwargs) for filename in filenames)
+    else:
+        from multiprocessing import Pool, cpu_count
+        if processes is None:
+            processes = cpu_count()
+        pool = Pool(processes)
+        results = pool.imap(_parse_job, [(filename, format, kwargs)
+                                         for filename in filenames])
+
+    try:
+        if merge:
+            merged = OrderedDict()
+            for qresult in chain.from_iterable(results):
+                if qresult.id in merged:
+                    _merge_qresult(merged[qresult.id], qresult)
+                else:
+                    merged[qresult.id] = qresult
+            qresults = merged.values()
+        else:
+            qresults = chain.from_iterable(results)
+
+        for qresult in qresults:
+            if sort is not None:
+                _sort_hits(qresult, sort)
+            yield qresult
+    except BaseException:
+        # e.g. a parsing error, KeyboardInterrupt, or the generator closed
+        if pool is not None:
+            pool.terminate()
+        raise
+    else:
+        if pool is not None:
+            pool.close()
+    finally:
+        if pool is not None:
+            pool.join()
+
+
 def to_dict(qresults, key_function=lambda rec: rec.id):
     """Turns a QueryResult iterator or list into a dictionary.
 
@@ -409,11 +582,15 @@ def to_dict(qresults, key_function=lambda rec: rec.id):
     unsuitable for dealing with files containing many queries. In that case, it
     is recommended that you use either `index` or `index_db`.
 
+    The keys must be unique, so query results split by the 'max_hits' argument
+    of some parsers cannot be used here (a ValueError is raised).
+
     """
     qdict = {}
     for qresult in qresults:
         key = key_function(qresult)
         if key in qdict:
+            # e.g. a query split by the max_hits argument of some parsers
             raise ValueError("Duplicate key %r" % key)
         qdict[key] = qresult
     return qdict
@@ -0,0 +1,100 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Common code for the columnar (NumPy record array) readers of tables.
+
+The format specific modules (e.g. Bio.SearchIO.BlastIO.blast_tab_columns)
+split the lines of a table into rows of column strings, and use these
+functions to turn them into NumPy record arrays of whole queries.
+"""
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use the columnar readers of Bio.SearchIO.")
+
+
+def make_records(rows, columns, filter=None):
+    """Returns a record array of the given rows (lists of column strings).
+
+    columns is a tuple of the (name, NumPy type) of each column, and filter
+    an optional function taking the record array and returning a boolean
+    array of the rows to keep.
+    """
+    arrays = []
+    for idx, (name, dtype) in enumerate(columns):
+        arrays.append(numpy.array([row[idx] for row in rows], dtype))
+    records = numpy.rec.fromarrays(arrays,
+                                   names=[name for name, dtype in columns])
+    if filter is not None:
+        records = records[numpy.asarray(filter(records), bool)]
+    return records
+
+
+def parse_chunks(rows, filter, chunk_size):
+    """Iterates over record arrays of chunks of whole queries.
+
+    rows is an iterable of (columns, query_idx, row) tuples, where row is
+    the list of column strings of a line of the table, columns is as for
+    make_records and query_idx is the index of the query ID column. A new
+    chunk is started whenever the columns object changes. Empty chunks
+    (e.g. after filtering) are skipped.
+    """
+    chunk = []
+    columns = None
+    query_id = None
+    for row_columns, query_idx, row in rows:
+        if row_columns is not columns:
+            if chunk:
+                records = make_records(chunk, columns, filter)
+                if len(records):
+                    yield records
+                chunk = []
+            columns = row_columns
+            query_id = None
+        if row[query_idx] != query_id:
+            query_id = row[query_idx]
+            if len(chunk) >= chunk_size:
+                records = make_records(chunk, columns, filter)
+                if len(records):
+                    yield records
+                chunk = []
+        chunk.append(row)
+
+    if chunk:
+        records = make_records(chunk, columns, filter)
+        if len(records):
+            yield records
+
+
+def join_chunks(chunks, columns):
+    """Returns one record array of the rows of all the chunks.
+
+    If there are no chunks, an empty record array of the given columns is
+    returned. A ValueError is raised if the chunks have different columns.
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return make_records([], columns)
+    names = chunks[0].dtype.names
+    if any(chunk.dtype.names != names for chunk in chunks):
+        raise ValueError("The fields of the columns change within the file.")
+    # the width of the text columns depends on the values in each chunk
+    arrays = [numpy.concatenate([chunk[name] for chunk in chunks])
+              for name in names]
+    return numpy.rec.fromarrays(arrays, names=list(names))
+
+
+def query_offsets(ids):
+    """Returns the query IDs of a column and the offsets of their rows.
+
+    See the query_offsets functions of the format specific modules.
+    """
+    if not len(ids):
+        return ids, numpy.zeros(1, int)
+    starts = numpy.flatnonzero(ids[1:] != ids[:-1]) + 1
+    offsets = numpy.concatenate(([0], starts, [len(ids)]))
+    return ids[offsets[:-1]], offsets
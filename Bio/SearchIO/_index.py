@@ -8,10 +8,13 @@
 
 """Custom indexing for Bio.SearchIO objects."""
 
+from collections import OrderedDict
+
 from Bio._py3k import StringIO
 from Bio._py3k import _bytes_to_string
 from Bio import bgzf
 from Bio.File import _IndexedSeqFileProxy, _open_for_random_access
+from Bio.SearchIO._model import Hit
 
 
 class SearchIndexer(_IndexedSeqFileProxy):
@@ -22,6 +25,10 @@ class SearchIndexer(_IndexedSeqFileProxy):
     """
 
     def __init__(self, filename, **kwargs):
+        if 'max_hits' in kwargs:
+            # the index needs each query as a single QueryResult
+            raise ValueError("The max_hits argument cannot be used when "
+                             "indexing, only with Bio.SearchIO.parse")
         self._handle = _open_for_random_access(filename)
         self._kwargs = kwargs
 
@@ -30,3 +37,55 @@ class SearchIndexer(_IndexedSeqFileProxy):
 
     def get(self, offset):
         return self._parse(StringIO(_bytes_to_string(self.get_raw(offset))))
+
+
+class _LazyHitDict(OrderedDict):
+    """Ordered dictionary of Hit objects parsed on first access (PRIVATE).
+
+    This is used as the hit dictionary of the QueryResult objects returned
+    by some of the indexers. The values start off as whatever the indexer
+    needs to find a hit in the raw query result (e.g. its offsets), and are
+    replaced by the Hit object returned by parse_hit(key, value) when the
+    hit is first accessed, so for example getting the first hit of a query
+    result does not parse all the others.
+    """
+
+    def __init__(self, parse_hit):
+        OrderedDict.__init__(self)
+        self._parse_hit = parse_hit
+
+    def __reduce__(self):
+        # copies and pickles get a plain dictionary of the (parsed) hits,
+        # as parse_hit is usually tied to the open index
+        return (OrderedDict, (list(self.iteritems()),))
+
+    def __getitem__(self, key):
+        value = OrderedDict.__getitem__(self, key)
+        if not isinstance(value, Hit):
+            value = self._parse_hit(key, value)
+            OrderedDict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def pop(self, key, *args):
+        if key in self:
+            self[key]
+        return OrderedDict.pop(self, key, *args)
+
+    def itervalues(self):
+        for key in list(self):
+            yield self[key]
+
+    def iteritems(self):
+        for key in list(self):
+            yield key, self[key]
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
@@ -689,7 +689,7 @@ class HSPFragment(_BaseHSP):
         self._hit_id = hit_id
         self._query_id = query_id
 
-        for seq_type in ('query', 'hit'):
+        for seq_type, seq in (('query', query), ('hit', hit)):
             # query or hit attributes default attributes
             setattr(self, '_%s_description' % seq_type, '<unknown description>')
             setattr(self, '_%s_features' % seq_type, [])
@@ -697,8 +697,8 @@ class HSPFragment(_BaseHSP):
             for attr in ('strand', 'frame', 'start', 'end'):
                 setattr(self, '%s_%s' % (seq_type, attr), None)
             # self.query or self.hit
-            if eval(seq_type):
-                setattr(self, seq_type, eval(seq_type))
+            if seq:
+                setattr(self, seq_type, seq)
             else:
                 setattr(self, seq_type, None)
 
@@ -21,6 +21,15 @@ from ._base import _BaseSearchObject
 from .hit import Hit
 
 
+def _hit_key_func(hit):
+    """Default hit key function, returns the hit ID (PRIVATE).
+
+    This is a module level function (not a lambda) so that QueryResult
+    objects can be pickled, e.g. to pass them between processes.
+    """
+    return hit.id
+
+
 class QueryResult(_BaseSearchObject):
 
     """Class representing search results from a single query.
@@ -186,7 +195,7 @@ class QueryResult(_BaseSearchObject):
     _NON_STICKY_ATTRS = ('_items', '__alt_hit_ids', )
 
     def __init__(self, hits=(), id=None,
-            hit_key_function=lambda hit: hit.id):
+            hit_key_function=_hit_key_func):
         """Initializes a QueryResult object.
 
         :param id: query sequence ID
@@ -347,7 +356,8 @@ class QueryResult(_BaseSearchObject):
         if isinstance(hit_key, slice):
             # should we return just a list of Hits instead of a full blown
             # QueryResult object if it's a slice?
-            hits = list(self.hits)[hit_key]
+            # (going via the keys, as the hits may be parsed on demand)
+            hits = [self._items[key] for key in list(self.hit_keys)[hit_key]]
             obj = self.__class__(hits, self.id, self._hit_key_function)
             self._transfer_attrs(obj)
             return obj
@@ -355,14 +365,8 @@ class QueryResult(_BaseSearchObject):
         # if key is an int, then retrieve the Hit at the int index
         elif isinstance(hit_key, int):
             length = len(self)
-            if 0 <= hit_key < length:
-                for idx, item in enumerate(self.iterhits()):
-                    if idx == hit_key:
-                        return item
-            elif -1 * length <= hit_key < 0:
-                for idx, item in enumerate(self.iterhits()):
-                    if length + hit_key == idx:
-                        return item
+            if -1 * length <= hit_key < length:
+                return self._items[list(self.hit_keys)[hit_key]]
             raise IndexError("list index out of range")
 
         # if key is a string, then do a regular dictionary retrieval
@@ -439,6 +443,16 @@ class QueryResult(_BaseSearchObject):
                 raise KeyError('%r'.format(key))
         return
 
+    def _set_hits(self, items, alt_hit_ids):
+        """Use the given hit dictionary and alternative hit IDs (PRIVATE).
+
+        This is used by indexers returning a QueryResult which only parses
+        its hits when they are accessed (see Bio.SearchIO._index), so the
+        hits are not checked here.
+        """
+        self._items = items
+        self.__alt_hit_ids = alt_hit_ids
+
     # properties #
     id = optionalcascade('_id', 'query_id', """QueryResult ID string""")
     description = optionalcascade('_description', 'query_description',
@@ -56,9 +56,9 @@ from __future__ import print_function
 
 from collections import OrderedDict
 
-from Bio._py3k import _is_int_or_long
+from Bio._py3k import _is_int_or_long, basestring
 
-from Bio.Seq import MutableSeq, reverse_complement
+from Bio.Seq import Seq, MutableSeq, reverse_complement
 
 
 class SeqFeature(object):
@@ -1306,7 +1306,34 @@ class CompoundLocation(object):
         return None
 
     def extract(self, parent_sequence):
-        """Extract feature sequence from the supplied parent sequence."""
+        """Extract feature sequence from the supplied parent sequence.
+
+        For a Seq (or MutableSeq) or string parent the sub-sequence of each
+        part is sliced from the underlying string and the pieces are joined
+        in one step, rather than building and adding a sequence object for
+        each part (which makes a copy per part, e.g. per exon):
+
+        >>> from Bio.Seq import Seq
+        >>> from Bio.Alphabet import generic_dna
+        >>> from Bio.SeqFeature import FeatureLocation
+        >>> seq = Seq("AAAACCCCGGGGTTTT", generic_dna)
+        >>> f = FeatureLocation(0, 2, strand=-1) + FeatureLocation(8, 10, strand=-1)
+        >>> f.extract(seq)
+        Seq('TTCC', DNAAlphabet())
+        >>> f.extract("AAAACCCCGGGGTTTT")
+        'TTCC'
+        """
+        if isinstance(parent_sequence, MutableSeq):
+            # This avoids complications with reverse complements
+            # (the MutableSeq reverse complement acts in situ)
+            parent_sequence = parent_sequence.toseq()
+        if type(parent_sequence) is Seq:
+            alphabet = parent_sequence.alphabet
+            return Seq(_extract_str(self, str(parent_sequence),
+                                    _seq_reverse_complement(alphabet)),
+                       alphabet)
+        if isinstance(parent_sequence, basestring):
+            return _extract_str(self, parent_sequence, reverse_complement)
         # This copes with mixed strand features & all on reverse:
         parts = [loc.extract(parent_sequence) for loc in self.parts]
         # We use addition rather than a join to avoid alphabet issues:
@@ -1316,6 +1343,50 @@ class CompoundLocation(object):
         return f_seq
 
 
+def _seq_reverse_complement(alphabet):
+    """Return a string reverse complement function for the alphabet (PRIVATE).
+
+    This respects the alphabet just like the Seq object's reverse_complement
+    method (e.g. raising an exception for proteins), but works on strings.
+    """
+    def rev_comp(sequence):
+        return str(Seq(sequence, alphabet).reverse_complement())
+    return rev_comp
+
+
+def _extract_str(location, parent_string, rev_comp=reverse_complement):
+    """Extract the sequence of a location from a parent string (PRIVATE).
+
+    Arguments:
+     - location - a FeatureLocation or CompoundLocation.
+     - parent_string - the parent sequence as a plain string.
+     - rev_comp - function used to reverse complement the reverse strand
+       parts as strings.
+
+    The sub-sequence of every part is sliced from the string, and they are
+    joined once at the end. Used by the extract methods, and by the
+    SeqRecord's extract_features method which converts the parent sequence
+    to a string only once for all the features.
+
+    >>> from Bio.SeqFeature import FeatureLocation
+    >>> f = FeatureLocation(0, 4, strand=+1) + FeatureLocation(6, 8, strand=-1)
+    >>> _extract_str(f, "ACGTTTAC")
+    'ACGTGT'
+    """
+    pieces = []
+    for loc in location.parts:
+        if loc.ref or loc.ref_db:
+            # TODO - Take a dictionary as an optional argument?
+            raise ValueError("Feature references another sequence.")
+        piece = parent_string[loc.nofuzzy_start:loc.nofuzzy_end]
+        if loc.strand == -1:
+            piece = rev_comp(piece)
+        pieces.append(piece)
+    if len(pieces) == 1:
+        return pieces[0]
+    return "".join(pieces)
+
+
 class AbstractPosition(object):
     """Abstract base class representing a position."""
 
@@ -13,9 +13,15 @@ You are expected to use this module via the Bio.SeqIO functions."""
 
 from __future__ import print_function
 
+import os
+from bisect import bisect_right
+
+from Bio._py3k import _bytes_to_string
+from Bio._py3k import open as _open
+
 from Bio.Alphabet import single_letter_alphabet
 from Bio.Seq import Seq
-from Bio.SeqRecord import SeqRecord
+from Bio.SeqRecord import SeqRecord, LightSeqRecord
 from Bio.SeqIO.Interfaces import SequentialSequenceWriter
 
 
@@ -72,6 +78,114 @@ def SimpleFastaParser(handle):
     assert False, "Should not reach this line"
 
 
+def BlockFastaParser(handle, block_size=1048576):
+    """Generator function to iterate over Fasta records (as string tuples).
+
+    This gives the same (title, sequence) tuples as the SimpleFastaParser,
+    but rather than reading the file line by line it reads large blocks
+    (block_size characters or bytes at a time), looks for the start of
+    each record with the find method, and removes the line breaks from
+    each sequence in bulk. This is much faster on large files, in
+    particular those with long sequences.
+
+    The handle can be opened in text or binary mode (in which case the
+    data is decoded into strings). Note any spaces or tabs within the
+    sequence are removed (not just those at the end of each line).
+
+    >>> with open("Fasta/dups.fasta", "rb") as handle:
+    ...     for values in BlockFastaParser(handle):
+    ...         print(values)
+    ...
+    ('alpha', 'ACGTA')
+    ('beta', 'CGTC')
+    ('gamma', 'CCGCC')
+    ('alpha (again - this is a duplicate entry to test the indexing code)', 'ACGTA')
+    ('delta', 'CGCGC')
+
+    """
+    data = handle.read(block_size)
+    if not data:
+        return  # Premature end of file, or just empty?
+    if isinstance(data, bytes):
+        start, marker, newline, empty = b">", b"\n>", b"\n", b""
+        whitespace = (b"\r", b" ", b"\t")
+        decode = _bytes_to_string
+    else:
+        start, marker, newline, empty = ">", "\n>", "\n", ""
+        whitespace = ("\r", " ", "\t")
+        decode = None
+
+    # Skip any text before the first record (e.g. blank lines, comments)
+    if not data.startswith(start):
+        while True:
+            index = data.find(marker)
+            if index != -1:
+                data = data[index + 1:]
+                break
+            more = handle.read(block_size)
+            if not more:
+                return
+            # Keep the last character in case this is a new line
+            data = data[-1:] + more
+
+    # The data now starts with the '>' of the first record
+    pending = []
+    pos = 0
+    while True:
+        index = data.find(marker, pos)
+        if index == -1:
+            more = handle.read(block_size)
+            if more:
+                # Keep the last character in case this is a new line
+                pending.append(data[pos:-1])
+                data = data[-1:] + more
+                pos = 0
+                continue
+            pending.append(data[pos:])
+            data = empty
+        else:
+            pending.append(data[pos:index])
+            pos = index + 1
+        if len(pending) == 1:
+            record = pending[0]
+        else:
+            record = empty.join(pending)
+        pending = []
+        index = record.find(newline)
+        if index == -1:
+            title, sequence = record[1:].rstrip(), empty
+        else:
+            title = record[1:index].rstrip()
+            sequence = record[index + 1:].replace(newline, empty)
+            for char in whitespace:
+                if char in sequence:
+                    sequence = sequence.replace(char, empty)
+        if decode:
+            title, sequence = decode(title), decode(sequence)
+        yield title, sequence
+        if not data:
+            return  # StopIteration
+
+
+def _fasta_records(parser, alphabet, title2ids):
+    """Turn (title, sequence) tuples into SeqRecord objects (PRIVATE)."""
+    if title2ids:
+        for title, sequence in parser:
+            id, name, descr = title2ids(title)
+            yield SeqRecord(Seq(sequence, alphabet),
+                            id=id, name=name, description=descr)
+    else:
+        for title, sequence in parser:
+            try:
+                first_word = title.split(None, 1)[0]
+            except IndexError:
+                assert not title, repr(title)
+                # Should we use SeqRecord default for no ID?
+                first_word = ""
+            yield SeqRecord(Seq(sequence, alphabet),
+                            id=first_word, name=first_word, description=title)
+
+
 def FastaIterator(handle, alphabet=single_letter_alphabet, title2ids=None):
     """Generator function to iterate over Fasta records (as SeqRecord objects).
 
@@ -113,21 +227,59 @@ def FastaIterator(handle, alphabet=single_letter_alphabet, title2ids=None):
     DELTA
 
     """
-    if title2ids:
-        for title, sequence in SimpleFastaParser(handle):
-            id, name, descr = title2ids(title)
-            yield SeqRecord(Seq(sequence, alphabet),
-                            id=id, name=name, description=descr)
-    else:
-        for title, sequence in SimpleFastaParser(handle):
-            try:
-                first_word = title.split(None, 1)[0]
-            except IndexError:
-                assert not title, repr(title)
-                # Should we use SeqRecord default for no ID?
-                first_word = ""
-            yield SeqRecord(Seq(sequence, alphabet),
-                            id=first_word, name=first_word, description=title)
+    return _fasta_records(SimpleFastaParser(handle), alphabet, title2ids)
+
+
+def BlockFastaIterator(handle, alphabet=single_letter_alphabet,
+                       title2ids=None, block_size=1048576):
+    """Generator function to iterate over Fasta records (as SeqRecord objects).
+
+    This is a faster alternative to the FastaIterator for large files,
+    using the BlockFastaParser to read the file in large blocks (which
+    may be opened in text or binary mode). The arguments are as for the
+    FastaIterator, plus the block_size in characters (or bytes).
+
+    >>> with open("Fasta/dups.fasta", "rb") as handle:
+    ...     for record in BlockFastaIterator(handle):
+    ...         print("%s %s" % (record.id, record.seq))
+    ...
+    alpha ACGTA
+    beta CGTC
+    gamma CCGCC
+    alpha ACGTA
+    delta CGCGC
+
+    """
+    return _fasta_records(BlockFastaParser(handle, block_size),
+                          alphabet, title2ids)
+
+
+def FastaLightIterator(handle):
+    """Iterate over Fasta records as LightSeqRecord objects.
+
+    This is used by Bio.SeqIO.parse(..., lightweight=True) for the "fasta"
+    format. Rather than building a full SeqRecord for each entry, this gives
+    minimal records holding the id (first word of the title line), the full
+    title line as the description, and the sequence as a string:
+
+    >>> with open("Fasta/dups.fasta") as handle:
+    ...     for record in FastaLightIterator(handle):
+    ...         print("%s %s" % (record.id, record.seq))
+    ...
+    alpha ACGTA
+    beta CGTC
+    gamma CCGCC
+    alpha ACGTA
+    delta CGCGC
+
+    """
+    for title, sequence in SimpleFastaParser(handle):
+        try:
+            first_word = title.split(None, 1)[0]
+        except IndexError:
+            assert not title, repr(title)
+            first_word = ""
+        yield LightSeqRecord(sequence, first_word, title)
 
 
 class FastaWriter(SequentialSequenceWriter):
@@ -210,6 +362,261 @@ class FastaWriter(SequentialSequenceWriter):
         else:
             self.handle.write(data + "\n")
 
+
+def _faidx_open(filename):
+    """Open a plain or BGZF compressed FASTA file for indexing (PRIVATE).
+
+    Returns a binary mode handle, and a boolean for if it is BGZF.
+    """
+    from Bio import bgzf  # Lazy import, only needed for faidx
+    handle = _open(filename, "rb")
+    magic = handle.read(4)
+    if magic == bgzf._bgzf_magic:
+        handle.close()
+        return bgzf.BgzfReader(filename, "rb"), True
+    elif magic[:2] == b"\x1f\x8b":
+        handle.close()
+        raise ValueError("Cannot index a plain gzip compressed file, "
+                         "use BGZF compression (e.g. bgzip) instead.")
+    handle.seek(0)
+    return handle, False
+
+
+def _faidx_entries(handle):
+    """Scan a FASTA file to build a faidx style index (PRIVATE).
+
+    Expects a binary mode handle, yields tuples of the record name (the
+    first word of the title line), sequence length, offset of the first
+    base, number of bases per line, and number of bytes per line.
+    """
+    name = None
+    position = 0
+    for line in handle:
+        if line[:1] == b">":
+            if name is not None:
+                yield name, length, offset, line_bases, line_width
+            try:
+                name = _bytes_to_string(line[1:].split(None, 1)[0])
+            except IndexError:
+                raise ValueError("Missing record name in FASTA title line")
+            offset = position + len(line)
+            length = line_bases = line_width = 0
+            short = False
+        elif name is None:
+            if line.strip():
+                raise ValueError("FASTA file should start with '>'")
+        else:
+            bases = len(line.rstrip(b"\r\n"))
+            if bases:
+                if short:
+                    raise ValueError("Different line length in sequence %r"
+                                     % name)
+                if not line_bases:
+                    line_bases = bases
+                    line_width = len(line)
+                elif bases != line_bases or len(line) != line_width:
+                    if bases > line_bases:
+                        raise ValueError("Different line length in "
+                                         "sequence %r" % name)
+                    # Only the last line can be shorter
+                    short = True
+                length += bases
+            else:
+                short = True
+        position += len(line)
+    if name is not None:
+        yield name, length, offset, line_bases, line_width
+
+
+def write_fai(filename, fai_filename=None, gzi_filename=None):
+    """Index a FASTA file, writing a samtools faidx compatible index.
+
+    Arguments:
+     - filename - FASTA file to index, either uncompressed or compressed
+       with BGZF (e.g. using bgzip).
+     - fai_filename - optional name for the index, default filename.fai
+     - gzi_filename - optional name for the BGZF block index written for
+       BGZF compressed files (default filename.gzi).
+
+    As with samtools faidx, every line of each sequence except the last
+    must have the same length. Returns the number of records indexed.
+    """
+    if fai_filename is None:
+        fai_filename = filename + ".fai"
+    handle, is_bgzf = _faidx_open(filename)
+    try:
+        # Scan the whole file first, so an invalid file leaves no index
+        entries = list(_faidx_entries(handle))
+    finally:
+        handle.close()
+    with open(fai_filename, "w") as out_handle:
+        for entry in entries:
+            out_handle.write("%s\t%i\t%i\t%i\t%i\n" % entry)
+    if is_bgzf:
+        from Bio import bgzf
+        if gzi_filename is None:
+            gzi_filename = filename + ".gzi"
+        with _open(filename, "rb") as handle:
+            offsets = bgzf.make_gzi(handle)
+        with _open(gzi_filename, "wb") as out_handle:
+            bgzf.write_gzi(out_handle, offsets)
+    return len(entries)
+
+
+class IndexedFastaReader(object):
+    """Random access to a FASTA file using a samtools faidx style index.
+
+    The FASTA file can be uncompressed or compressed with BGZF (e.g. using
+    bgzip). Using the index (an existing filename.fai file, or one built in
+    memory by scanning the file), the location of any base can be computed
+    from the line lengths, so only the relevant part of the file is read.
+    For BGZF files the GZI index (filename.gzi) is also used if present.
+
+    >>> from Bio.SeqIO.FastaIO import IndexedFastaReader
+    >>> fasta = IndexedFastaReader("GenBank/NC_005816.ffn")
+    >>> len(fasta)
+    10
+    >>> fasta.length("ref|NC_005816.1|:2925-3119")
+    195
+    >>> print(fasta.fetch("ref|NC_005816.1|:2925-3119", 0, 10))
+    GTGAACAAAC
+    >>> print(fasta.fetch_region("ref|NC_005816.1|:2925-3119:1-10"))
+    GTGAACAAAC
+    >>> fasta.close()
+
+    Note the fetch method uses zero based Python slice style coordinates,
+    while fetch_region takes a samtools style region string using one
+    based inclusive coordinates.
+    """
+
+    def __init__(self, filename, fai_filename=None, gzi_filename=None):
+        """Open a FASTA file, loading or building the index."""
+        if fai_filename is None:
+            fai_filename = filename + ".fai"
+        self._handle, is_bgzf = _faidx_open(filename)
+        self._index = {}
+        self._names = []
+        try:
+            if os.path.isfile(fai_filename):
+                with open(fai_filename) as handle:
+                    entries = [self._parse_fai_line(line) for line in handle
+                               if line.strip()]
+            else:
+                entries = list(_faidx_entries(self._handle))
+        except ValueError:
+            self._handle.close()
+            raise
+        for name, length, offset, line_bases, line_width in entries:
+            if name in self._index:
+                raise ValueError("Duplicate key '%s'" % name)
+            self._names.append(name)
+            self._index[name] = (length, offset, line_bases, line_width)
+        if is_bgzf:
+            from Bio import bgzf
+            if gzi_filename is None:
+                gzi_filename = filename + ".gzi"
+            if os.path.isfile(gzi_filename):
+                with _open(gzi_filename, "rb") as handle:
+                    offsets = bgzf.read_gzi(handle)
+            else:
+                with _open(filename, "rb") as handle:
+                    offsets = bgzf.make_gzi(handle)
+            self._block_starts = [0] + [b for b, d in offsets]
+            self._data_starts = [0] + [d for b, d in offsets]
+        else:
+            self._block_starts = self._data_starts = None
+
+    @staticmethod
+    def _parse_fai_line(line):
+        """Parse a line of a faidx index file (PRIVATE)."""
+        parts = line.rstrip("\r\n").split("\t")
+        if len(parts) != 5:
+            raise ValueError("Expected five columns in FASTA index, got: %r"
+                             % line)
+        return (parts[0],) + tuple(int(value) for value in parts[1:])
+
+    def _read(self, offset, size):
+        """Read bytes from an offset in the uncompressed file (PRIVATE)."""
+        if self._data_starts is None:
+            self._handle.seek(offset)
+        else:
+            from Bio import bgzf
+            i = bisect_right(self._data_starts, offset) - 1
+            self._handle.seek(bgzf.make_virtual_offset(
+                self._block_starts[i], offset - self._data_starts[i]))
+        return self._handle.read(size)
+
+    def __len__(self):
+        """Return the number of sequences in the index."""
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        """Iterate over the sequence names (in file order)."""
+        return iter(self._names)
+
+    def keys(self):
+        """Return a list of the sequence names (in file order)."""
+        return list(self._names)
+
+    def length(self, name):
+        """Return the length of the named sequence."""
+        return self._index[name][0]
+
+    def fetch(self, name, start=None, end=None):
+        """Return (part of) the named sequence as a string.
+
+        The start and end are interpreted as in Python slicing, so using
+        zero based counting, and the end is exclusive.
+        """
+        length, offset, line_bases, line_width = self._index[name]
+        start, end, step = slice(start, end).indices(length)
+        if start >= end:
+            return ""
+        first = offset + (start // line_bases) * line_width + start % line_bases
+        end -= 1
+        last = offset + (end // line_bases) * line_width + end % line_bases
+        data = _bytes_to_string(self._read(first, last + 1 - first))
+        return data.replace("\n", "").replace("\r", "")
+
+    def fetch_region(self, region):
+        """Return a region of a sequence, given a samtools style string.
+
+        The region is given as name, name:start or name:start-end using
+        one based inclusive coordinates, where the name may itself contain
+        colons.
+        """
+        if region in self._index:
+            return self.fetch(region)
+        try:
+            name, interval = region.rsplit(":", 1)
+            if "-" in interval:
+                start, end = interval.replace(",", "").split("-")
+                end = int(end)
+            else:
+                start, end = interval.replace(",", ""), None
+            start = int(start)
+        except ValueError:
+            raise ValueError("Could not parse region %r" % region)
+        if name not in self._index:
+            raise KeyError(name)
+        if start < 1 or (end is not None and end < start):
+            raise ValueError("Invalid region %r" % region)
+        return self.fetch(name, start - 1, end)
+
+    def close(self):
+        """Close the FASTA file handle."""
+        self._handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
 if __name__ == "__main__":
     from Bio._utils import run_doctest
     run_doctest(verbose=0)
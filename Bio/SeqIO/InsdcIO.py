@@ -44,6 +44,7 @@ from Bio import SeqFeature
 
 from Bio._py3k import _is_int_or_long
 from Bio._py3k import basestring
+from Bio._py3k import StringIO
 
 
 # NOTE
@@ -296,6 +297,26 @@ class _InsdcWriter(SequentialSequenceWriter):
                        "rpt_type", "rpt_unit_range", "tag_peptide",
                        "transl_except", "transl_table")
 
+    def write_record(self, record):
+        """Write a single record to the output file.
+
+        The record is formatted into an in memory buffer, which is then
+        written to the output handle in one go (rather than making many
+        small writes per feature and per line).
+        """
+        handle = self.handle
+        self.handle = StringIO()
+        try:
+            self._write_record(record)
+            text = self.handle.getvalue()
+        finally:
+            self.handle = handle
+        handle.write(text)
+
+    def _write_record(self, record):
+        """Format a single record, writing it to self.handle (PRIVATE)."""
+        raise NotImplementedError("This object should be subclassed")
+
     def _write_feature_qualifier(self, key, value=None, quote=None):
         if value is None:
             # Value-less entry like /pseudo
@@ -334,19 +355,21 @@ class _InsdcWriter(SequentialSequenceWriter):
 
     def _wrap_location(self, location):
         """Split a feature location into lines (break at commas)."""
-        # TODO - Rewrite this not to recurse!
         length = self.MAX_WIDTH - self.QUALIFIER_INDENT
         if len(location) <= length:
             return location
-        index = location[:length].rfind(",")
-        if index == -1:
-            # No good place to split (!)
-            warnings.warn("Couldn't split location:\n%s" % location,
-                          BiopythonWarning)
-            return location
-        return location[:index + 1] + "\n" + \
-            self.QUALIFIER_INDENT_STR + \
-            self._wrap_location(location[index + 1:])
+        lines = []
+        while len(location) > length:
+            index = location[:length].rfind(",")
+            if index == -1:
+                # No good place to split (!)
+                warnings.warn("Couldn't split location:\n%s" % location,
+                              BiopythonWarning)
+                break
+            lines.append(location[:index + 1])
+            location = location[index + 1:]
+        lines.append(location)
+        return ("\n" + self.QUALIFIER_INDENT_STR).join(lines)
 
     def _write_feature(self, feature, record_length):
         """Write a single SeqFeature object to features table."""
@@ -396,21 +419,20 @@ class _InsdcWriter(SequentialSequenceWriter):
         if len(text) <= max_len:
             return [text]
 
-        words = text.split()
-        text = ""
-        while words and len(text) + 1 + len(words[0]) <= max_len:
-            text += " " + words.pop(0)
-            text = text.strip()
-        # assert len(text) <= max_len
-        answer = [text]
-        while words:
-            text = words.pop(0)
-            while words and len(text) + 1 + len(words[0]) <= max_len:
-                text += " " + words.pop(0)
-                text = text.strip()
-            # assert len(text) <= max_len
-            answer.append(text)
-        assert not words
+        # Single pass over the words. Note if the first word is too long
+        # the first line is left blank (as in earlier releases).
+        answer = []
+        line = ""
+        for word in text.split():
+            if len(line) + 1 + len(word) <= max_len:
+                if line:
+                    line += " " + word
+                else:
+                    line = word
+            else:
+                answer.append(line)
+                line = word
+        answer.append(line)
         return answer
 
     def _split_contig(self, record, max_len):
@@ -793,16 +815,17 @@ class GenBankWriter(_InsdcWriter):
         # Catches sequence being None:
         data = self._get_seq_string(record).lower()
         seq_len = len(data)
-        self.handle.write("ORIGIN\n")
+        lines = ["ORIGIN\n"]
         for line_number in range(0, seq_len, self.LETTERS_PER_LINE):
-            self.handle.write(str(line_number + 1).rjust(self.SEQUENCE_INDENT))
-            for words in range(line_number,
+            words = [str(line_number + 1).rjust(self.SEQUENCE_INDENT)]
+            for index in range(line_number,
                                min(line_number + self.LETTERS_PER_LINE, seq_len), 10):
-                self.handle.write(" %s" % data[words:words + 10])
-            self.handle.write("\n")
+                words.append(data[index:index + 10])
+            lines.append(" ".join(words) + "\n")
+        self.handle.write("".join(lines))
 
-    def write_record(self, record):
-        """Write a single record to the output file."""
+    def _write_record(self, record):
+        """Format a single record, writing it to self.handle (PRIVATE)."""
         handle = self.handle
         self._write_the_first_line(record)
 
@@ -978,26 +1001,29 @@ class EmblWriter(_InsdcWriter):
         else:
             handle.write("SQ   \n")
 
+        lines = []
         for line_number in range(0, seq_len // self.LETTERS_PER_LINE):
-            handle.write("    ")  # Just four, not five
+            words = ["    "]  # Just four, not five
             for block in range(self.BLOCKS_PER_LINE):
                 index = self.LETTERS_PER_LINE * line_number + \
                     self.LETTERS_PER_BLOCK * block
-                handle.write((" %s" % data[index:index + self.LETTERS_PER_BLOCK]))
-            handle.write(str((line_number + 1) *
-                             self.LETTERS_PER_LINE).rjust(self.POSITION_PADDING))
-            handle.write("\n")
+                words.append(data[index:index + self.LETTERS_PER_BLOCK])
+            lines.append(" ".join(words) +
+                         str((line_number + 1) *
+                             self.LETTERS_PER_LINE).rjust(self.POSITION_PADDING) +
+                         "\n")
         if seq_len % self.LETTERS_PER_LINE:
             # Final (partial) line
             line_number = (seq_len // self.LETTERS_PER_LINE)
-            handle.write("    ")  # Just four, not five
+            words = ["    "]  # Just four, not five
             for block in range(self.BLOCKS_PER_LINE):
                 index = self.LETTERS_PER_LINE * line_number + \
                     self.LETTERS_PER_BLOCK * block
-                handle.write(
+                words.append(
                     (" %s" % data[index:index + self.LETTERS_PER_BLOCK]).ljust(11))
-            handle.write(str(seq_len).rjust(self.POSITION_PADDING))
-            handle.write("\n")
+            lines.append("".join(words) +
+                         str(seq_len).rjust(self.POSITION_PADDING) + "\n")
+        handle.write("".join(lines))
 
     def _write_single_line(self, tag, text):
         assert len(tag) == 2
@@ -1187,8 +1213,8 @@ class EmblWriter(_InsdcWriter):
             self._write_multi_line("CC", line)
         self.handle.write("XX\n")
 
-    def write_record(self, record):
-        """Write a single record to the output file."""
+    def _write_record(self, record):
+        """Format a single record, writing it to self.handle (PRIVATE)."""
         handle = self.handle
         self._write_the_first_lines(record)
 
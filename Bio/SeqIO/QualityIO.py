@@ -365,7 +365,7 @@ from __future__ import print_function
 
 from Bio.Alphabet import single_letter_alphabet
 from Bio.Seq import Seq, UnknownSeq
-from Bio.SeqRecord import SeqRecord
+from Bio.SeqRecord import SeqRecord, LightSeqRecord
 from Bio.SeqIO.Interfaces import SequentialSequenceWriter
 from math import log
 import warnings
@@ -1257,6 +1257,41 @@ def FastqIlluminaIterator(handle, alphabet=single_letter_alphabet, title2ids=Non
         yield record
 
 
+def FastqLightIterator(handle, offset=SANGER_SCORE_OFFSET):
+    """Iterate over FASTQ records as LightSeqRecord objects.
+
+    Arguments:
+     - handle - input file
+     - offset - ASCII offset of the quality scores, default 33 for
+       Sanger style FASTQ files (use 64 for Illumina 1.3+ FASTQ files).
+
+    This is used by Bio.SeqIO.parse(..., lightweight=True) for the "fastq",
+    "fastq-sanger" and "fastq-illumina" formats. Rather than building a full
+    SeqRecord for each read, this gives minimal records holding the id,
+    description and sequence as strings, plus the encoded quality string
+    which is only decoded if the qualities are used:
+
+    >>> with open("Quality/example.fastq") as handle:
+    ...     for record in FastqLightIterator(handle):
+    ...         print("%s %s" % (record.id, record.seq))
+    EAS54_6_R1_2_1_413_324 CCCTTCTTGTCTTCAGCGTTTCTCC
+    EAS54_6_R1_2_1_540_792 TTGGCAGGCCAAGGCCGATGGATCA
+    EAS54_6_R1_2_1_443_348 GTTGCTTCTGGCGTGGGTGGGGGGG
+
+    """
+    for title_line, seq_string, quality_string in FastqGeneralIterator(handle):
+        yield LightSeqRecord(seq_string, title_line.split(None, 1)[0],
+                             title_line, quality_string, offset)
+
+
+def FastqIlluminaLightIterator(handle):
+    """Iterate over Illumina 1.3+ FASTQ records as LightSeqRecord objects.
+
+    This is the FastqLightIterator using an ASCII offset of 64.
+    """
+    return FastqLightIterator(handle, SOLEXA_SCORE_OFFSET)
+
+
 def QualPhredIterator(handle, alphabet=single_letter_alphabet, title2ids=None):
     """For QUAL files which include PHRED quality scores, but no sequence.
 
@@ -193,6 +193,21 @@ Because this uses two bytes for each new line, the file is longer than
 the Unix equivalent with only one byte.
 
 
+Input - Asynchronous
+--------------------
+Under Python 3.6 or later, the Bio.SeqIO.aparse(...) function offers an
+asynchronous version of parse for use with asyncio, taking an asyncio
+StreamReader (or similar object with an awaitable read method) rather than
+a handle, for use with ``async for`` within a coroutine::
+
+    async for record in SeqIO.aparse(reader, "fastq"):
+        print(record.id)
+
+This works with the simple text formats such as "fasta", "fastq", "qual",
+"tab", "genbank", "embl" and "swiss", where the stream is read in chunks
+and any complete records are handed to the normal parser.
+
+
 Input - Alignments
 ------------------
 You can read in alignment files as alignment objects using Bio.AlignIO.
@@ -323,6 +338,9 @@ making up each alignment as SeqRecords.
 """
 
 from __future__ import print_function
+
+import sys
+
 from Bio._py3k import basestring
 
 # TODO
@@ -387,6 +405,10 @@ from . import TabIO
 from . import QualityIO  # FastQ and qual files
 from . import UniprotIO
 
+if sys.version_info >= (3, 6):
+    # Needs the async generator syntax
+    from ._async import aparse
+
 
 # Convention for format names is "mainname-subtype" in lower case.
 # Please use the same names as BioPerl or EMBOSS where possible.
@@ -426,6 +448,14 @@ _FormatToIterator = {"fasta": FastaIO.FastaIterator,
                      "abi-trim": AbiIO._AbiTrimIterator,
                      }
 
+# Formats supporting Bio.SeqIO.parse(..., lightweight=True), giving
+# LightSeqRecord objects rather than full SeqRecord objects:
+_FormatToLightIterator = {"fasta": FastaIO.FastaLightIterator,
+                          "fastq": QualityIO.FastqLightIterator,
+                          "fastq-sanger": QualityIO.FastqLightIterator,
+                          "fastq-illumina": QualityIO.FastqIlluminaLightIterator,
+                          }
+
 _FormatToWriter = {"fasta": FastaIO.FastaWriter,
                    "gb": InsdcIO.GenBankWriter,
                    "genbank": InsdcIO.GenBankWriter,
@@ -511,7 +541,7 @@ def write(sequences, handle, format):
     return count
 
 
-def parse(handle, format, alphabet=None):
+def parse(handle, format, alphabet=None, lightweight=False):
     r"""Turns a sequence file into an iterator returning SeqRecords.
 
         - handle   - handle to the file, or the filename as a string
@@ -520,6 +550,9 @@ def parse(handle, format, alphabet=None):
         - alphabet - optional Alphabet object, useful when the sequence type
           cannot be automatically inferred from the file itself
           (e.g. format="fasta" or "tab")
+        - lightweight - boolean, return minimal LightSeqRecord objects
+          rather than full SeqRecord objects (only for "fasta", "fastq",
+          "fastq-sanger" and "fastq-illumina").
 
     Typical usage, opening a file to read in, and looping over the record(s):
 
@@ -564,6 +597,20 @@ def parse(handle, format, alphabet=None):
 
     Use the Bio.SeqIO.read(...) function when you expect a single record
     only.
+
+    For simple formats like FASTA and FASTQ, you can ask for lightweight
+    records holding just the identifier, description, sequence (as a
+    string) and any qualities. This is much faster when filtering large
+    numbers of reads, and any record can be promoted to a full SeqRecord
+    on demand:
+
+    >>> for record in SeqIO.parse("Quality/example.fastq", "fastq",
+    ...                           lightweight=True):
+    ...     if min(record.qualities) >= 13:
+    ...         print("%s %s" % (record.id, record.seq))
+    ...         full_record = record.to_seqrecord()
+    EAS54_6_R1_2_1_413_324 CCCTTCTTGTCTTCAGCGTTTCTCC
+    EAS54_6_R1_2_1_443_348 GTTGCTTCTGGCGTGGGTGGGGGGG
     """
     # NOTE - The above docstring has some raw \n characters needed
     # for the StringIO example, hence the whole docstring is in raw
@@ -586,10 +633,19 @@ def parse(handle, format, alphabet=None):
     if alphabet is not None and not (isinstance(alphabet, Alphabet) or
                                      isinstance(alphabet, AlphabetEncoder)):
         raise ValueError("Invalid alphabet, %r" % alphabet)
+    if lightweight:
+        if format not in _FormatToLightIterator:
+            raise ValueError("Lightweight records are not supported for "
+                             "format '%s'" % format)
+        if alphabet is not None:
+            raise ValueError("An alphabet cannot be used with lightweight "
+                             "records, use it with their to_seqrecord method")
 
     with as_handle(handle, mode) as fp:
         # Map the file format to a sequence iterator:
-        if format in _FormatToIterator:
+        if lightweight:
+            i = _FormatToLightIterator[format](fp)
+        elif format in _FormatToIterator:
             iterator_generator = _FormatToIterator[format]
             if alphabet is None:
                 i = iterator_generator(fp)
@@ -0,0 +1,189 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Asynchronous parsing of sequence files for asyncio (PRIVATE).
+
+This module uses the async generator syntax, which requires Python 3.6
+or later. You are expected to use it via the Bio.SeqIO.aparse function.
+
+Data is read from the stream in chunks, each chunk is added to a buffer,
+and any complete records at the start of the buffer are handed to the
+normal (synchronous) Bio.SeqIO parser for that format. Each format
+therefore needs a function (or for FASTQ, a class whose instances are
+called like one) to find where the last complete record in the buffer
+ends, looking only at the text added since the last call.
+"""
+
+import codecs
+
+from Bio._py3k import StringIO
+
+
+def _fasta_boundary(text, start):
+    """Return the end of the last complete FASTA record in text (PRIVATE).
+
+    Any record is known to be complete once the next '>' line is seen.
+    The start argument is where to begin looking for a new boundary.
+    """
+    return text.rfind("\n>", max(0, start - 1)) + 1
+
+
+def _line_boundary(text, start):
+    """Return the end of the last complete line in text (PRIVATE)."""
+    return text.rfind("\n", start) + 1
+
+
+def _slash_boundary(text, start):
+    """Return the end of the last // terminated record in text (PRIVATE).
+
+    Used for GenBank, EMBL and SwissProt style records.
+    """
+    index = text.rfind("\n//", max(0, start - 2))
+    if index == -1:
+        return 0
+    return text.find("\n", index + 3) + 1
+
+
+class _FastqBoundary(object):
+    """Find the end of the last complete FASTQ record in text (PRIVATE).
+
+    This mirrors the logic of the FastqGeneralIterator, where the quality
+    may be split over several lines (and may start with '@'), so a record
+    is only known to be complete once the next title line is seen.
+
+    Unlike the boundary functions for the other formats, this must keep
+    track of the record being read between calls, so a new instance is
+    used for each stream. Each call carries on from the last complete line
+    already scanned, and assumes the caller then removes text[:end] from
+    the start of the buffer (as aparse does).
+    """
+
+    def __init__(self):
+        # Offset of the first line not yet scanned, and what it should be
+        # (None while skipping any text before the first record):
+        self._pos = 0
+        self._expect = None
+        self._seq_len = 0
+        self._qual_len = 0
+
+    def __call__(self, text, start):
+        # As the last line scanned ended before start, start is not needed
+        pos = self._pos
+        expect = self._expect
+        seq_len = self._seq_len
+        qual_len = self._qual_len
+        end = 0
+        while True:
+            line_end = text.find("\n", pos)
+            if line_end == -1:
+                # The last line may be incomplete
+                break
+            line = text[pos:line_end]
+            if expect is None:
+                if line.startswith("@"):
+                    expect = "seq"
+            elif expect == "seq":
+                # At least one line of sequence after the title
+                seq_len = len(line.rstrip())
+                expect = "seq or plus"
+            elif expect == "seq or plus":
+                if line.startswith("+"):
+                    expect = "qual"
+                else:
+                    seq_len += len(line.rstrip())
+            elif expect == "qual":
+                # At least one line of quality after the plus line
+                qual_len = len(line.rstrip())
+                expect = "qual or title"
+            elif line.startswith("@") and qual_len >= seq_len:
+                # The previous record is complete
+                end = pos
+                expect = "seq"
+            else:
+                qual_len += len(line.rstrip())
+            pos = line_end + 1
+        self._pos = pos - end
+        self._expect = expect
+        self._seq_len = seq_len
+        self._qual_len = qual_len
+        return end
+
+
+_FormatToBoundary = {"fasta": _fasta_boundary,
+                     "qual": _fasta_boundary,
+                     "tab": _line_boundary,
+                     "fastq": _FastqBoundary,
+                     "fastq-sanger": _FastqBoundary,
+                     "fastq-solexa": _FastqBoundary,
+                     "fastq-illumina": _FastqBoundary,
+                     "gb": _slash_boundary,
+                     "genbank": _slash_boundary,
+                     "embl": _slash_boundary,
+                     "imgt": _slash_boundary,
+                     "swiss": _slash_boundary,
+                     }
+
+
+async def aparse(stream, format, alphabet=None, lightweight=False,
+                 chunk_size=65536, encoding="utf-8"):
+    """Turn an asynchronous sequence stream into an async record iterator.
+
+    Arguments:
+     - stream - an asyncio.StreamReader, or any object with an awaitable
+       read(size) method returning bytes or strings (e.g. an async file
+       object as provided by third party libraries).
+     - format - lower case string describing the file format, one of
+       "fasta", "fastq" (and its variants), "qual", "tab", "genbank",
+       "embl", "imgt" or "swiss".
+     - alphabet, lightweight - as for Bio.SeqIO.parse.
+     - chunk_size - how much to read from the stream at a time.
+     - encoding - used to decode a stream giving bytes.
+
+    For example, within a coroutine::
+
+        async for record in SeqIO.aparse(reader, "fastq"):
+            ...
+
+    Reading from the stream only happens while the caller is asking for
+    records, and at most one chunk of parsed records is held in memory
+    at a time, so a slow consumer applies back-pressure to the stream.
+    Each complete block of records is parsed with the normal Bio.SeqIO
+    parser for the format.
+    """
+    from Bio import SeqIO  # Lazy to avoid circular imports
+    try:
+        boundary = _FormatToBoundary[format]
+    except KeyError:
+        raise ValueError("Format '%s' is not supported for asynchronous "
+                         "parsing" % format)
+    if isinstance(boundary, type):
+        # Keeps state between calls, so needs a new instance for each stream
+        boundary = boundary()
+    decoder = None
+    buffer = ""
+    while True:
+        data = await stream.read(chunk_size)
+        if isinstance(data, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)()
+            text = decoder.decode(data, final=not data)
+        else:
+            text = data
+        if not data:
+            # End of the stream, parse whatever is left
+            buffer += text
+            if buffer:
+                for record in SeqIO.parse(StringIO(buffer), format,
+                                          alphabet, lightweight):
+                    yield record
+            return
+        start = len(buffer)
+        buffer += text
+        end = boundary(buffer, start)
+        if end:
+            block = buffer[:end]
+            buffer = buffer[end:]
+            for record in SeqIO.parse(StringIO(block), format,
+                                      alphabet, lightweight):
+                yield record
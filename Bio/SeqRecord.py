@@ -1158,6 +1158,176 @@ class SeqRecord(object):
                 answer._per_letter_annotations[key] = value[::-1]
         return answer
 
+    def extract_features(self, feature_type=None, translate=False,
+                         table=None):
+        """Returns a list of the sequences of the record's features.
+
+        Arguments:
+         - feature_type - only features of this type (e.g. "CDS") are
+           extracted, default None means all the features.
+         - translate - boolean, translate each extracted sequence (taking
+           into account any codon_start qualifier on the feature).
+         - table - codon table to use when translating. The default (None)
+           uses the feature's transl_table qualifier if present, otherwise
+           the standard table.
+
+        This is equivalent to calling the extract method of each matching
+        feature on the record's sequence, but for a Seq or string the
+        sequence is converted into a string only once, and the parts of
+        each (compound) location are joined in a single step.
+
+        >>> from Bio import SeqIO
+        >>> record = SeqIO.read("GenBank/NC_005816.gb", "gb")
+        >>> proteins = record.extract_features("CDS", translate=True)
+        >>> len(proteins)
+        10
+        >>> print(proteins[0][:40])
+        MVTFETVMEIKILHKQGMSSRAIARELGISRNTVKRYLQA
+        >>> proteins[0][:-1] == record.features[3].qualifiers["translation"][0]
+        True
+
+        """
+        from Bio.Seq import Seq, MutableSeq  # Lazy to avoid circular imports
+        from Bio.SeqFeature import _extract_str, _seq_reverse_complement
+        features = [f for f in self.features
+                    if feature_type is None or f.type == feature_type]
+        parent = self.seq
+        if isinstance(parent, MutableSeq):
+            parent = parent.toseq()
+        if type(parent) is Seq:
+            data = str(parent)
+            alphabet = parent.alphabet
+            rev_comp = _seq_reverse_complement(alphabet)
+            answer = []
+            for f in features:
+                if f.location is None:
+                    raise ValueError("The feature's .location is None. Check "
+                                     "the sequence file for a valid location.")
+                answer.append(Seq(_extract_str(f.location, data, rev_comp),
+                                  alphabet))
+        else:
+            answer = [f.extract(parent) for f in features]
+        if translate:
+            for i, f in enumerate(features):
+                f_seq = answer[i]
+                offset = int(f.qualifiers.get("codon_start", [1])[0]) - 1
+                if offset:
+                    f_seq = f_seq[offset:]
+                if table is None:
+                    f_table = int(f.qualifiers.get("transl_table", [1])[0])
+                else:
+                    f_table = table
+                answer[i] = f_seq.translate(f_table)
+        return answer
+
+
+class LightSeqRecord(object):
+    """A minimal record holding an identifier, description and sequence.
+
+    This is used by Bio.SeqIO.parse(..., lightweight=True) for simple
+    formats like FASTA and FASTQ, where building a full SeqRecord (with
+    its Seq object, annotation dictionaries, features list etc) for every
+    read can be a large part of the cost of a streaming filter. It uses
+    slots and holds only:
+
+        - id          - Identifier (string)
+        - description - The full title line (string)
+        - seq         - The sequence as a plain string
+
+    Any FASTQ quality scores are kept as the encoded quality string, and
+    only decoded into a list of PHRED scores when the qualities property
+    is used.
+
+    >>> from Bio.SeqRecord import LightSeqRecord
+    >>> record = LightSeqRecord("ACGT", "read1", "read1 example",
+    ...                         quality_string="II5!")
+    >>> print("%s %s %i" % (record.id, record.seq, len(record)))
+    read1 ACGT 4
+    >>> record.qualities
+    [40, 40, 20, 0]
+
+    When you need the full object, promote it into a SeqRecord:
+
+    >>> full = record.to_seqrecord()
+    >>> print(full.format("fastq"))
+    @read1 example
+    ACGT
+    +
+    II5!
+    <BLANKLINE>
+    """
+
+    __slots__ = ("id", "description", "seq",
+                 "_quality_string", "_quality_offset")
+
+    def __init__(self, seq, id="<unknown id>",
+                 description="<unknown description>",
+                 quality_string=None, quality_offset=33):
+        """Create a LightSeqRecord.
+
+        Arguments:
+         - seq - The sequence as a string.
+         - id - Identifier (string).
+         - description - Description or title line (string).
+         - quality_string - Optional FASTQ style encoded quality string,
+           which must be the same length as the sequence.
+         - quality_offset - ASCII offset of the quality_string, default
+           33 as used in Sanger FASTQ (use 64 for Illumina 1.3+ FASTQ).
+
+        """
+        if quality_string is not None and len(quality_string) != len(seq):
+            raise ValueError("Lengths of sequence and quality values differs "
+                             "for %s (%i and %i)."
+                             % (id, len(seq), len(quality_string)))
+        self.id = id
+        self.description = description
+        self.seq = seq
+        self._quality_string = quality_string
+        self._quality_offset = quality_offset
+
+    @property
+    def name(self):
+        """The record name, which is the same as the identifier."""
+        return self.id
+
+    @property
+    def qualities(self):
+        """List of PHRED quality scores (integers), or None if no qualities."""
+        if self._quality_string is None:
+            return None
+        offset = self._quality_offset
+        qualities = [ord(letter) - offset for letter in self._quality_string]
+        if qualities and (min(qualities) < 0 or max(qualities) > 126 - offset):
+            raise ValueError("Invalid character in quality string")
+        return qualities
+
+    def __len__(self):
+        """Returns the length of the sequence."""
+        return len(self.seq)
+
+    def __repr__(self):
+        """A concise summary of the record for debugging (string)."""
+        return "%s(seq=%r, id=%r, description=%r)" % (
+            self.__class__.__name__, self.seq, self.id, self.description)
+
+    def to_seqrecord(self, alphabet=None):
+        """Returns a full SeqRecord object for this record.
+
+        The sequence is given the specified alphabet (default is the
+        single letter alphabet, as used by Bio.SeqIO for FASTA and FASTQ),
+        and any qualities are stored as the "phred_quality" letter
+        annotation.
+        """
+        from Bio.Seq import Seq  # Lazy to avoid circular imports
+        from Bio.Alphabet import single_letter_alphabet
+        if alphabet is None:
+            alphabet = single_letter_alphabet
+        record = SeqRecord(Seq(self.seq, alphabet), id=self.id, name=self.id,
+                           description=self.description)
+        if self._quality_string is not None:
+            record.letter_annotations["phred_quality"] = self.qualities
+        return record
+
 
 if __name__ == "__main__":
     from Bio._utils import run_doctest
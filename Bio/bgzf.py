@@ -227,11 +227,14 @@ NC_000932.1
 
 from __future__ import print_function
 
+import os
 import sys
 import zlib
 import struct
 
-from Bio._py3k import _as_bytes, _as_string
+from collections import deque, OrderedDict
+
+from Bio._py3k import _as_bytes, _as_string, basestring
 from Bio._py3k import open as _open
 
 
@@ -396,15 +399,69 @@ def BgzfBlocks(handle):
     data_start = 0
     while True:
         start_offset = handle.tell()
-        # This may raise StopIteration which is perfect here
-        block_length, data = _load_bgzf_block(handle)
+        try:
+            block_length, data = _load_bgzf_block(handle)
+        except StopIteration:
+            break
         data_len = len(data)
         yield start_offset, block_length, data_start, data_len
         data_start += data_len
 
 
+def read_gzi(handle):
+    """Read a GZI index (as used by bgzip and samtools), returns a list.
+
+    Expects a handle to the GZI file opened in binary mode. Returns a list
+    of (block start offset, data start offset) tuples, giving the start
+    of each BGZF block in the compressed file, and the start of its data
+    in the decompressed file. As in the GZI format itself, the first block
+    (at offset zero in both) is not included.
+    """
+    count = struct.unpack("<Q", handle.read(8))[0]
+    data = handle.read(16 * count)
+    if len(data) != 16 * count:
+        raise ValueError("Truncated GZI file, expected %i entries" % count)
+    values = struct.unpack("<%iQ" % (2 * count), data)
+    return list(zip(values[0::2], values[1::2]))
+
+
+def write_gzi(handle, offsets):
+    """Write a GZI index (as used by bgzip and samtools).
+
+    Expects a handle to the GZI file opened in binary mode, and a list of
+    (block start offset, data start offset) tuples as returned by the
+    read_gzi function.
+    """
+    handle.write(struct.pack("<Q", len(offsets)))
+    for block_start, data_start in offsets:
+        handle.write(struct.pack("<QQ", block_start, data_start))
+
+
+def make_gzi(handle):
+    """Scan a BGZF file to build a GZI index, returns a list.
+
+    Expects a BGZF compressed file opened in binary read mode using the
+    builtin open function (as for the BgzfBlocks function). Returns a list
+    of tuples as for the read_gzi function, omitting the first block and
+    any empty blocks (such as the EOF marker).
+    """
+    return [(block_start, data_start) for block_start, block_length,
+            data_start, data_length in BgzfBlocks(handle)
+            if block_start and data_length]
+
+
 def _load_bgzf_block(handle, text_mode=False):
     """Internal function to load the next BGZF function (PRIVATE)."""
+    return _inflate_bgzf_block(_read_bgzf_block(handle), text_mode)
+
+
+def _read_bgzf_block(handle):
+    """Internal function to read the next raw (compressed) BGZF block (PRIVATE).
+
+    Returns a tuple of the block size, the deflated data, the expected
+    CRC and the expected decompressed length, for use with the function
+    _inflate_bgzf_block. Raises StopIteration at the end of the file.
+    """
     magic = handle.read(4)
     if not magic:
         # End of file
@@ -431,10 +488,22 @@ def _load_bgzf_block(handle, text_mode=False):
     assert block_size is not None, "Missing BC, this isn't a BGZF file!"
     # Now comes the compressed data, CRC, and length of uncompressed data.
     deflate_size = block_size - 1 - extra_len - 19
-    d = zlib.decompressobj(-15)  # Negative window size means no headers
-    data = d.decompress(handle.read(deflate_size)) + d.flush()
+    deflated = handle.read(deflate_size)
     expected_crc = handle.read(4)
     expected_size = struct.unpack("<I", handle.read(4))[0]
+    return block_size, deflated, expected_crc, expected_size
+
+
+def _inflate_bgzf_block(raw_block, text_mode=False):
+    """Internal function to decompress a raw BGZF block (PRIVATE).
+
+    Takes a tuple from _read_bgzf_block, returns the block size and the
+    decompressed data. This does no I/O, so can be called from a thread
+    pool (zlib releases the GIL while decompressing).
+    """
+    block_size, deflated, expected_crc, expected_size = raw_block
+    d = zlib.decompressobj(-15)  # Negative window size means no headers
+    data = d.decompress(deflated) + d.flush()
     assert expected_size == len(data), \
         "Decompressed to %i, not %i" % (len(data), expected_size)
     # Should cope with a mix of Python platforms...
@@ -451,6 +520,132 @@ def _load_bgzf_block(handle, text_mode=False):
         return block_size, data
 
 
+def _compress_bgzf_block(block, compresslevel=6):
+    """Internal function to build a complete BGZF block from data (PRIVATE).
+
+    This does no I/O, so can be called from a thread pool (zlib releases
+    the GIL while compressing).
+    """
+    assert len(block) <= 65536
+    # Giving a negative window bits means no gzip/zlib headers,
+    # -15 used in samtools
+    c = zlib.compressobj(compresslevel,
+                         zlib.DEFLATED,
+                         -15,
+                         zlib.DEF_MEM_LEVEL,
+                         0)
+    compressed = c.compress(block) + c.flush()
+    del c
+    assert len(compressed) < 65536, \
+        "TODO - Didn't compress enough, try less data in this block"
+    bsize = struct.pack("<H", len(compressed) + 25)  # includes -1
+    crc = struct.pack("<I", zlib.crc32(block) & 0xffffffff)
+    uncompressed_length = struct.pack("<I", len(block))
+    # Fixed 16 bytes,
+    # gzip magic bytes (4) mod time (4),
+    # gzip flag (1), os (1), extra length which is six (2),
+    # sub field which is BC (2), sub field length of two (2),
+    # Variable data,
+    # 2 bytes: block length as BC sub field (2)
+    # X bytes: the data
+    # 8 bytes: crc (4), uncompressed data length (4)
+    return _bgzf_header + bsize + compressed + crc + uncompressed_length
+
+
+def _thread_pool(threads):
+    """Start a pool of worker threads for (de)compressing blocks (PRIVATE)."""
+    # Lazy import, as only needed with threads
+    from multiprocessing.pool import ThreadPool
+    return ThreadPool(threads)
+
+
+def _terminate_pool(handle):
+    """Stop any worker threads of a BGZF reader or writer (PRIVATE)."""
+    pool = getattr(handle, "_pool", None)
+    if pool is not None:
+        handle._pool = None
+        pool.terminate()
+
+
+class BgzfBlockCache(object):
+    """Least recently used (LRU) cache of decompressed BGZF blocks.
+
+    Each BgzfReader has its own cache by default, limited to max_cache
+    blocks. Instead you can give it a cache object, which can be limited
+    by the number of blocks and/or the total size of the decompressed
+    data held, and which can be shared between several readers:
+
+    >>> cache = BgzfBlockCache(max_blocks=1000, max_bytes=2**20)
+    >>> handle1 = BgzfReader("SamBam/ex1.bam", "rb", cache=cache)
+    >>> handle2 = BgzfReader("SamBam/ex1.bam", "rb", cache=cache)
+    >>> len(cache)
+    1
+    >>> cache.hits, cache.misses
+    (1, 1)
+    >>> handle1.close()
+    >>> handle2.close()
+
+    Here the second reader was able to use the first block of the file as
+    already decompressed by the first reader. Blocks are identified by the
+    full filename (or for handles, the handle object) and the block offset,
+    so don't share a cache between readers of a file which is changing.
+    The most recently used block is always kept, even if it on its own
+    exceeds the max_bytes budget.
+    """
+
+    def __init__(self, max_blocks=100, max_bytes=None):
+        """Initialize the cache, limited by block count and/or total size."""
+        if max_blocks is not None and max_blocks < 1:
+            raise ValueError("Use max_blocks with a minimum of 1")
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError("Use max_bytes with a minimum of 0")
+        self.max_blocks = max_blocks
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._blocks = OrderedDict()
+
+    def __len__(self):
+        """Return the number of blocks currently cached."""
+        return len(self._blocks)
+
+    def __contains__(self, key):
+        return key in self._blocks
+
+    def get(self, key):
+        """Return the cached value for this key (or None), marking it used."""
+        try:
+            value = self._blocks.pop(key)
+        except KeyError:
+            self.misses += 1
+            return None
+        # Re-inserting moves it to the end (most recently used)
+        self._blocks[key] = value
+        self.hits += 1
+        return value[0]
+
+    def add(self, key, value, size):
+        """Add a value to the cache, removing old entries if needed."""
+        blocks = self._blocks
+        if key in blocks:
+            self.size -= blocks.pop(key)[1]
+        blocks[key] = (value, size)
+        self.size += size
+        max_blocks = self.max_blocks
+        max_bytes = self.max_bytes
+        while len(blocks) > 1 and \
+                ((max_blocks is not None and len(blocks) > max_blocks) or
+                 (max_bytes is not None and self.size > max_bytes)):
+            # Remove the least recently used entry
+            self.size -= blocks.popitem(last=False)[1][1]
+
+    def clear(self):
+        """Remove all the cached blocks (the hit/miss counts are kept)."""
+        self._blocks.clear()
+        self.size = 0
+
+
 class BgzfReader(object):
     r"""BGZF reader, acts like a read only handle but seek/tell differ.
 
@@ -518,13 +713,25 @@ class BgzfReader(object):
     block can be up to 64kb, the default cache could take up to 6MB of
     RAM. The cache is not important for reading through the file in one
     pass, but is important for improving performance of random access.
+    Alternatively, give a BgzfBlockCache object as the cache argument to
+    limit the cache by size in bytes, or to share it between readers.
+    The least recently used blocks are removed first, and the cache
+    attribute records the number of hits and misses.
+
+    Set the threads argument to more than one to read ahead and decompress
+    the following BGZF blocks in parallel using a pool of threads (zlib
+    releases the GIL while decompressing). This helps when reading through
+    the file in one pass, rather than for random access.
     """
 
-    def __init__(self, filename=None, mode="r", fileobj=None, max_cache=100):
+    def __init__(self, filename=None, mode="r", fileobj=None, max_cache=100,
+                 threads=1, cache=None):
         # TODO - Assuming we can seek, check for 28 bytes EOF empty block
         # and if missing warn about possible truncation (as in samtools)?
         if max_cache < 1:
             raise ValueError("Use max_cache with a minimum of 1")
+        if threads < 1:
+            raise ValueError("Use threads with a minimum of 1")
         # Must open the BGZF file in binary mode, but we may want to
         # treat the contents as either text or binary (unicode or
         # bytes under Python 3)
@@ -543,7 +750,27 @@ class BgzfReader(object):
             self._newline = b"\n"
         self._handle = handle
         self.max_cache = max_cache
-        self._buffers = {}
+        if cache is None:
+            self.cache = BgzfBlockCache(max_cache)
+            self._private_cache = True
+        else:
+            self.cache = cache
+            self._private_cache = False
+        # Identify this file's blocks in a (possibly shared) cache
+        name = getattr(handle, "name", None)
+        if isinstance(name, basestring):
+            self._cache_key = (os.path.abspath(name), self._text)
+        else:
+            # Key on the handle object itself (not its id, which could be
+            # reused by another handle once this one is garbage collected)
+            self._cache_key = (handle, self._text)
+        self.threads = threads
+        # With threads, the pool is only started when first needed
+        self._pool = None
+        # Blocks being decompressed in the background, keyed on the
+        # start offset, plus the offset of the next block to read ahead:
+        self._ahead = {}
+        self._ahead_offset = None
         self._block_start_offset = None
         self._block_raw_length = None
         self._load_block(handle.tell())
@@ -557,34 +784,56 @@ class BgzfReader(object):
         if start_offset == self._block_start_offset:
             self._within_block_offset = 0
             return
-        elif start_offset in self._buffers:
+        cached = self.cache.get((self._cache_key, start_offset))
+        if cached is not None:
             # Already in cache
-            self._buffer, self._block_raw_length = self._buffers[start_offset]
+            self._buffer, self._block_raw_length = cached
             self._within_block_offset = 0
             self._block_start_offset = start_offset
             return
-        # Must hit the disk... first check cache limits,
-        while len(self._buffers) >= self.max_cache:
-            # TODO - Implemente LRU cache removal?
-            self._buffers.popitem()
-        # Now load the block
+        # Must hit the disk, load the block
         handle = self._handle
-        if start_offset is not None:
+        self._block_start_offset = start_offset
+        if start_offset in self._ahead:
+            # Already read and being decompressed in the background
+            block_size, self._buffer = self._ahead.pop(start_offset).get()
+        else:
+            # Any blocks being read ahead are from elsewhere in the file
+            self._ahead = {}
             handle.seek(start_offset)
-        self._block_start_offset = handle.tell()
-        try:
-            block_size, self._buffer = _load_bgzf_block(handle, self._text)
-        except StopIteration:
-            # EOF
-            block_size = 0
-            if self._text:
-                self._buffer = ""
-            else:
-                self._buffer = b""
+            try:
+                block_size, self._buffer = _load_bgzf_block(handle, self._text)
+            except StopIteration:
+                # EOF
+                block_size = 0
+                if self._text:
+                    self._buffer = ""
+                else:
+                    self._buffer = b""
+            self._ahead_offset = start_offset + block_size
+        if self.threads > 1 and block_size:
+            self._read_ahead()
         self._within_block_offset = 0
         self._block_raw_length = block_size
         # Finally save the block in our cache,
-        self._buffers[self._block_start_offset] = self._buffer, block_size
+        self.cache.add((self._cache_key, start_offset),
+                       (self._buffer, block_size), len(self._buffer))
+
+    def _read_ahead(self):
+        """Queue up the following blocks for decompression (PRIVATE)."""
+        handle = self._handle
+        if self._pool is None:
+            self._pool = _thread_pool(self.threads)
+        while len(self._ahead) < self.threads:
+            start_offset = self._ahead_offset
+            handle.seek(start_offset)
+            try:
+                raw_block = _read_bgzf_block(handle)
+            except StopIteration:
+                break
+            self._ahead[start_offset] = self._pool.apply_async(
+                _inflate_bgzf_block, (raw_block, self._text))
+            self._ahead_offset = start_offset + raw_block[0]
 
     def tell(self):
         """Returns a 64-bit unsigned BGZF virtual offset."""
@@ -699,7 +948,17 @@ class BgzfReader(object):
         self._handle.close()
         self._buffer = None
         self._block_start_offset = None
-        self._buffers = None
+        if self._private_cache:
+            self.cache.clear()
+        self._ahead = None
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __del__(self):
+        # Don't leave the worker threads running if never closed
+        _terminate_pool(self)
 
     def seekable(self):
         return True
@@ -718,8 +977,17 @@ class BgzfReader(object):
 
 
 class BgzfWriter(object):
+    """BGZF writer, acts like a write only handle but tell differs.
+
+    Set the threads argument to more than one to compress the BGZF blocks
+    in parallel using a pool of threads (zlib releases the GIL while
+    compressing). The blocks are still written to the file in order.
+    """
 
-    def __init__(self, filename=None, mode="w", fileobj=None, compresslevel=6):
+    def __init__(self, filename=None, mode="w", fileobj=None, compresslevel=6,
+                 threads=1):
+        if threads < 1:
+            raise ValueError("Use threads with a minimum of 1")
         if fileobj:
             assert filename is None
             handle = fileobj
@@ -734,41 +1002,29 @@ class BgzfWriter(object):
         self._handle = handle
         self._buffer = b""
         self.compresslevel = compresslevel
+        self.threads = threads
+        self._pending = deque()
+        # With threads, the pool is only started when first needed
+        self._pool = None
 
     def _write_block(self, block):
         # print("Saving %i bytes" % len(block))
-        start_offset = self._handle.tell()
-        assert len(block) <= 65536
-        # Giving a negative window bits means no gzip/zlib headers,
-        # -15 used in samtools
-        c = zlib.compressobj(self.compresslevel,
-                             zlib.DEFLATED,
-                             -15,
-                             zlib.DEF_MEM_LEVEL,
-                             0)
-        compressed = c.compress(block) + c.flush()
-        del c
-        assert len(compressed) < 65536, \
-            "TODO - Didn't compress enough, try less data in this block"
-        crc = zlib.crc32(block)
-        # Should cope with a mix of Python platforms...
-        if crc < 0:
-            crc = struct.pack("<i", crc)
-        else:
-            crc = struct.pack("<I", crc)
-        bsize = struct.pack("<H", len(compressed) + 25)  # includes -1
-        crc = struct.pack("<I", zlib.crc32(block) & 0xffffffff)
-        uncompressed_length = struct.pack("<I", len(block))
-        # Fixed 16 bytes,
-        # gzip magic bytes (4) mod time (4),
-        # gzip flag (1), os (1), extra length which is six (2),
-        # sub field which is BC (2), sub field length of two (2),
-        # Variable data,
-        # 2 bytes: block length as BC sub field (2)
-        # X bytes: the data
-        # 8 bytes: crc (4), uncompressed data length (4)
-        data = _bgzf_header + bsize + compressed + crc + uncompressed_length
-        self._handle.write(data)
+        if self.threads == 1:
+            self._handle.write(_compress_bgzf_block(block, self.compresslevel))
+            return
+        if self._pool is None:
+            self._pool = _thread_pool(self.threads)
+        # Compress in the background, but write the blocks in order.
+        # Limit the number queued to bound the memory used.
+        self._pending.append(self._pool.apply_async(_compress_bgzf_block,
+                                                    (block, self.compresslevel)))
+        while len(self._pending) > 2 * self.threads:
+            self._handle.write(self._pending.popleft().get())
+
+    def _write_pending(self):
+        """Wait for and write out any blocks being compressed (PRIVATE)."""
+        while self._pending:
+            self._handle.write(self._pending.popleft().get())
 
     def write(self, data):
         # TODO - Check bytes vs unicode
@@ -782,9 +1038,13 @@ class BgzfWriter(object):
         else:
             # print("Got %r, writing out some data..." % data)
             self._buffer += data
-            while len(self._buffer) >= 65536:
-                self._write_block(self._buffer[:65536])
-                self._buffer = self._buffer[65536:]
+            # Avoid re-slicing the whole buffer for each block
+            buffer = self._buffer
+            start = 0
+            while len(buffer) - start >= 65536:
+                self._write_block(buffer[start:start + 65536])
+                start += 65536
+            self._buffer = buffer[start:]
 
     def flush(self):
         while len(self._buffer) >= 65536:
@@ -792,6 +1052,7 @@ class BgzfWriter(object):
             self._buffer = self._buffer[65535:]
         self._write_block(self._buffer)
         self._buffer = b""
+        self._write_pending()
         self._handle.flush()
 
     def close(self):
@@ -804,12 +1065,26 @@ class BgzfWriter(object):
         """
         if self._buffer:
             self.flush()
+        self._write_pending()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
         self._handle.write(_bgzf_eof)
         self._handle.flush()
         self._handle.close()
 
+    def __del__(self):
+        # Don't leave the worker threads running if never closed
+        _terminate_pool(self)
+
     def tell(self):
-        """Returns a BGZF 64-bit virtual offset."""
+        """Returns a BGZF 64-bit virtual offset.
+
+        When using threads, this must wait for all the blocks currently
+        being compressed to be written.
+        """
+        self._write_pending()
         return make_virtual_offset(self._handle.tell(), len(self._buffer))
 
     def seekable(self):
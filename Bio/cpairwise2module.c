@@ -12,11 +12,22 @@
  */
 
 #include "Python.h"
+#include <limits.h>
+#include <math.h>
 
 
 #define _PRECISION 1000
 #define rint(x) (int)((x)*_PRECISION+0.5)
 
+/* Score of the cells next to a band, see _make_score_matrix_fast */
+#define _OUTSIDE_BAND (-HUGE_VAL)
+#define band_rint(x) (((x) == _OUTSIDE_BAND) ? INT_MIN : rint(x))
+
+#if PY_MAJOR_VERSION >= 3
+#define PyInt_FromLong PyLong_FromLong
+#define PyInt_AsLong PyLong_AsLong
+#endif
+
 /* Functions in this module. */
 
 static double calc_affine_penalty(int length, double open, double extend,
@@ -32,49 +43,216 @@ static double calc_affine_penalty(int length, double open, double extend,
     return penalty;
 }
 
+/* How the match (or mismatch) score of two residues is calculated. The
+ * match function is a Python callable, but for identity_match and
+ * dictionary_match objects we can work out the scores ourselves when the
+ * sequences are plain strings.
+ */
+#define MATCH_CALLBACK 0
+#define MATCH_IDENTITY 1
+#define MATCH_TABLE 2
+#define TABLE_INT 4
+
+typedef struct {
+    int mode;
+    double match, mismatch;       /* for MATCH_IDENTITY */
+    double *table;                /* 256 x 256 scores for MATCH_TABLE */
+    unsigned char *defined;       /* which entries of the table are set,
+                                     plus TABLE_INT for integer scores */
+    int all_int;                  /* have all the scores been integers? */
+} MatchScorer;
+
+static int _is_int(PyObject *py_value)
+{
+    /* Is this a Python integer (as opposed to e.g. a float)? */
+#if PY_MAJOR_VERSION >= 3
+    return PyLong_Check(py_value);
+#else
+    return PyInt_Check(py_value) || PyLong_Check(py_value);
+#endif
+}
+
+static int _get_residue(PyObject *py_residue)
+{
+    /* Return the single byte residue, or -1 if this is not a string of
+       length one (or is not ASCII). */
+#if PY_MAJOR_VERSION >= 3
+    if(PyUnicode_Check(py_residue) && PyUnicode_GET_LENGTH(py_residue) == 1) {
+        Py_UCS4 c = PyUnicode_READ_CHAR(py_residue, 0);
+        if(c < 128)
+            return (int)c;
+    }
+#else
+    if(PyString_Check(py_residue) && PyString_GET_SIZE(py_residue) == 1)
+        return (unsigned char)PyString_AS_STRING(py_residue)[0];
+    if(PyUnicode_Check(py_residue) && PyUnicode_GET_SIZE(py_residue) == 1) {
+        Py_UNICODE c = PyUnicode_AS_UNICODE(py_residue)[0];
+        if(c < 128)
+            return (int)c;
+    }
+#endif
+    return -1;
+}
+
+static int _fill_match_table(MatchScorer *scorer, PyObject *py_score_dict,
+                             int symmetric)
+{
+    /* Copy a dictionary of scores (as used by dictionary_match, e.g. from
+       Bio.SubsMat.MatrixInfo) into the lookup table. Returns 0 if this is
+       not possible, e.g. if a score is not a number. As in dictionary_match,
+       for a symmetric matrix a missing (a, b) entry is taken from (b, a).
+       Keys which are not pairs of single characters can never be used
+       with string sequences, and are skipped. */
+    Py_ssize_t pos;
+    PyObject *py_key, *py_value;
+    int pass, a, b;
+    double score;
+
+    scorer->table = malloc(256 * 256 * sizeof(*scorer->table));
+    scorer->defined = calloc(256 * 256, sizeof(*scorer->defined));
+    if(!scorer->table || !scorer->defined)
+        return 0;
+    for(pass = 0; pass < (symmetric ? 2 : 1); pass++) {
+        pos = 0;
+        while(PyDict_Next(py_score_dict, &pos, &py_key, &py_value)) {
+            if(!PyTuple_Check(py_key) || PyTuple_GET_SIZE(py_key) != 2)
+                continue;
+            a = _get_residue(PyTuple_GET_ITEM(py_key, 0));
+            b = _get_residue(PyTuple_GET_ITEM(py_key, 1));
+            if(a < 0 || b < 0)
+                continue;
+            score = PyFloat_AsDouble(py_value);
+            if(score == -1.0 && PyErr_Occurred()) {
+                PyErr_Clear();
+                return 0;
+            }
+            if(pass == 0) {
+                scorer->table[a * 256 + b] = score;
+                scorer->defined[a * 256 + b] = 1;
+                if(_is_int(py_value))
+                    scorer->defined[a * 256 + b] |= TABLE_INT;
+            }
+            else if(!scorer->defined[b * 256 + a]) {
+                /* Only used when (b, a) is not in the dictionary. */
+                scorer->table[b * 256 + a] = score;
+                scorer->defined[b * 256 + a] = 2;
+                if(_is_int(py_value))
+                    scorer->defined[b * 256 + a] |= TABLE_INT;
+            }
+        }
+    }
+    return 1;
+}
+
+static void _init_match_scorer(MatchScorer *scorer, PyObject *py_match_fn,
+                               int use_sequence_cstring)
+{
+    PyObject *py_match=NULL, *py_mismatch=NULL;
+    PyObject *py_score_dict=NULL, *py_symmetric=NULL;
+    int symmetric;
+
+    scorer->mode = MATCH_CALLBACK;
+    scorer->match = scorer->mismatch = 0;
+    scorer->table = NULL;
+    scorer->defined = NULL;
+    scorer->all_int = 1;
+    if(!use_sequence_cstring)
+        return;
+
+    /* Check to see if py_match_fn is an identity_match. If so, pull out
+       the match and mismatch member variables. */
+    if((py_match = PyObject_GetAttrString(py_match_fn, "match")) &&
+       (py_mismatch = PyObject_GetAttrString(py_match_fn, "mismatch"))) {
+        scorer->match = PyFloat_AsDouble(py_match);
+        scorer->mismatch = PyFloat_AsDouble(py_mismatch);
+        if(!PyErr_Occurred()) {
+            scorer->mode = MATCH_IDENTITY;
+            scorer->all_int = _is_int(py_match) && _is_int(py_mismatch);
+        }
+    }
+    /* Or a dictionary_match, with a score_dict member variable. */
+    else if((PyErr_Clear(), 1) &&
+            (py_score_dict = PyObject_GetAttrString(py_match_fn, "score_dict")) &&
+            PyDict_Check(py_score_dict) &&
+            (py_symmetric = PyObject_GetAttrString(py_match_fn, "symmetric")) &&
+            (symmetric = PyObject_IsTrue(py_symmetric)) != -1) {
+        if(_fill_match_table(scorer, py_score_dict, symmetric))
+            scorer->mode = MATCH_TABLE;
+    }
+    if(PyErr_Occurred())
+        PyErr_Clear();
+    Py_XDECREF(py_match);
+    Py_XDECREF(py_mismatch);
+    Py_XDECREF(py_score_dict);
+    Py_XDECREF(py_symmetric);
+}
+
+static void _free_match_scorer(MatchScorer *scorer)
+{
+    if(scorer->table)
+        free(scorer->table);
+    if(scorer->defined)
+        free(scorer->defined);
+}
+
 static double _get_match_score(PyObject *py_sequenceA, PyObject *py_sequenceB,
                                PyObject *py_match_fn, int i, int j,
                                char *sequenceA, char *sequenceB,
-                               int use_sequence_cstring,
-                               double match, double mismatch,
-                               int use_match_mismatch_scores)
+                               MatchScorer *scorer)
 {
     PyObject *py_A=NULL, *py_B=NULL;
-    PyObject *py_arglist=NULL, *py_result=NULL;
-    double score = 0;
+    PyObject *py_result=NULL;
+    double score = -1.0;  /* with an exception set, on error */
+    int offset;
 
-    if(use_sequence_cstring && use_match_mismatch_scores) {
-        score = (sequenceA[i] == sequenceB[j]) ? match : mismatch;
-        return score;
+    if(scorer->mode == MATCH_IDENTITY)
+        return (sequenceA[i] == sequenceB[j]) ? scorer->match : scorer->mismatch;
+    if(scorer->mode == MATCH_TABLE) {
+        offset = (unsigned char)sequenceA[i] * 256 + (unsigned char)sequenceB[j];
+        if(scorer->defined[offset]) {
+            if(!(scorer->defined[offset] & TABLE_INT))
+                scorer->all_int = 0;
+            return scorer->table[offset];
+        }
+        /* Not in the dictionary, let the match function raise the error */
     }
     /* Calculate the match score. */
     if(!(py_A = PySequence_GetItem(py_sequenceA, i)))
         goto _get_match_score_cleanup;
     if(!(py_B = PySequence_GetItem(py_sequenceB, j)))
         goto _get_match_score_cleanup;
-    if(!(py_arglist = Py_BuildValue("(OO)", py_A, py_B)))
-        goto _get_match_score_cleanup;
-
-    if(!(py_result = PyEval_CallObject(py_match_fn, py_arglist)))
+    if(!(py_result = PyObject_CallFunctionObjArgs(py_match_fn, py_A, py_B,
+                                                  NULL)))
         goto _get_match_score_cleanup;
     score = PyFloat_AsDouble(py_result);
+    if(!_is_int(py_result))
+        scorer->all_int = 0;
 
  _get_match_score_cleanup:
-    if(py_A) {
-        Py_DECREF(py_A);
-    }
-    if(py_B) {
-        Py_DECREF(py_B);
-    }
-    if(py_arglist) {
-        Py_DECREF(py_arglist);
-    }
-    if(py_result) {
-        Py_DECREF(py_result);
-    }
+    Py_XDECREF(py_A);
+    Py_XDECREF(py_B);
+    Py_XDECREF(py_result);
     return score;
 }
 
+static int _call_gap_fn(PyObject *py_gap_fn, int index, int length,
+                        double *penalty, int *all_int)
+{
+    /* Call a gap penalty function, returns 0 on error. If all_int is
+       given, it is cleared unless the penalty is an integer. */
+    PyObject *py_result;
+
+    if(!(py_result = PyObject_CallFunction(py_gap_fn, "ii", index, length)))
+        return 0;
+    *penalty = PyFloat_AsDouble(py_result);
+    if(all_int && !_is_int(py_result))
+        *all_int = 0;
+    Py_DECREF(py_result);
+    if(*penalty == -1.0 && PyErr_Occurred())
+        return 0;
+    return 1;
+}
+
 #if PY_MAJOR_VERSION >= 3
 static PyObject* _create_bytes_object(PyObject* o)
 {
@@ -94,6 +272,118 @@ static PyObject* _create_bytes_object(PyObject* o)
 }
 #endif
 
+/* Get C strings for the two sequences if possible (the common case), with
+ * new references to the objects holding them in py_bytesA and py_bytesB
+ * (or NULL). Returns 1 if the C strings can be used.
+ */
+static int _get_sequence_cstring(PyObject *py_sequence, PyObject **py_bytes,
+                                 char **sequence)
+{
+    *py_bytes = NULL;
+    *sequence = NULL;
+#if PY_MAJOR_VERSION < 3
+    if(PyString_Check(py_sequence)) {
+        *sequence = PyString_AS_STRING(py_sequence);
+        return 1;
+    }
+    return 0;
+#else
+    if(!PyUnicode_Check(py_sequence))
+        return 0;
+    *py_bytes = _create_bytes_object(py_sequence);
+    if(*py_bytes) {
+        *sequence = PyBytes_AS_STRING(*py_bytes);
+        return 1;
+    }
+    return 0;
+#endif
+}
+
+static int _get_sequence_cstrings(PyObject *py_sequenceA,
+                                  PyObject *py_sequenceB,
+                                  PyObject **py_bytesA, PyObject **py_bytesB,
+                                  char **sequenceA, char **sequenceB)
+{
+    *py_bytesB = NULL;
+    *sequenceB = NULL;
+    if(!_get_sequence_cstring(py_sequenceA, py_bytesA, sequenceA))
+        return 0;
+    if(_get_sequence_cstring(py_sequenceB, py_bytesB, sequenceB))
+        return 1;
+    Py_XDECREF(*py_bytesA);
+    *py_bytesA = NULL;
+    *sequenceA = NULL;
+    return 0;
+}
+
+/* Save the score and traceback matrices into real python objects, as
+ * lists of lists. On the edges of the matrix (row or column is 0), the
+ * traceback entries are None. If score_only is set, the traceback is an
+ * empty list. If as_int is set, the scores are Python integers rather
+ * than floats.
+ */
+static PyObject *_matrices_to_lists(double *score_matrix,
+                                    unsigned char *trace_matrix,
+                                    int lenA, int lenB, int score_only,
+                                    int lowest, int highest, int as_int)
+{
+    /* Only the cells with lowest <= col - row <= highest have been
+       calculated, the others are None. */
+    int row, col;
+    PyObject *py_score_matrix=NULL, *py_trace_matrix=NULL;
+    PyObject *py_retval=NULL;
+
+    if(!(py_score_matrix = PyList_New(lenA+1)))
+        goto _cleanup_matrices_to_lists;
+    if(!(py_trace_matrix = PyList_New(score_only ? 0 : lenA+1)))
+        goto _cleanup_matrices_to_lists;
+
+    for(row=0; row<=lenA; row++) {
+        PyObject *py_score_row, *py_trace_row=NULL;
+        if(!(py_score_row = PyList_New(lenB+1)))
+            goto _cleanup_matrices_to_lists;
+        PyList_SET_ITEM(py_score_matrix, row, py_score_row);
+        if(!score_only){
+            /* The traceback is a bit field, so one byte per cell (with zero
+               on the edges and outside of a band) in a bytearray. */
+            if(!(py_trace_row = PyByteArray_FromStringAndSize(
+                     (char *)trace_matrix + row*(lenB+1), lenB+1)))
+                goto _cleanup_matrices_to_lists;
+            PyList_SET_ITEM(py_trace_matrix, row, py_trace_row);
+        }
+
+        for(col=0; col<=lenB; col++) {
+            PyObject *py_score;
+            int offset = row*(lenB+1) + col;
+
+            if(col - row < lowest || col - row > highest) {
+                Py_INCREF(Py_None);
+                PyList_SET_ITEM(py_score_row, col, Py_None);
+                continue;
+            }
+
+            /* Set py_score_matrix[row][col] to the score. */
+            if(!as_int)
+                py_score = PyFloat_FromDouble(score_matrix[offset]);
+#if PY_MAJOR_VERSION < 3
+            else if(fabs(score_matrix[offset]) <= LONG_MAX)
+                py_score = PyInt_FromLong((long)score_matrix[offset]);
+#endif
+            else
+                py_score = PyLong_FromDouble(score_matrix[offset]);
+            if(!py_score)
+                goto _cleanup_matrices_to_lists;
+            PyList_SET_ITEM(py_score_row, col, py_score);
+        }
+    }
+    py_retval = Py_BuildValue("(OO)", py_score_matrix, py_trace_matrix);
+
+ _cleanup_matrices_to_lists:
+    Py_XDECREF(py_score_matrix);
+    Py_XDECREF(py_trace_matrix);
+    return py_retval;
+}
+
 /* This function is a more-or-less straightforward port of the
  * equivalent function in pairwise2. Please see there for algorithm
  * documentation.
@@ -104,95 +394,49 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
     int i;
     int row, col;
     PyObject *py_sequenceA, *py_sequenceB, *py_match_fn;
-#if PY_MAJOR_VERSION >= 3
-    PyObject *py_bytesA, *py_bytesB;
-#endif
+    PyObject *py_bytesA=NULL, *py_bytesB=NULL;
     char *sequenceA=NULL, *sequenceB=NULL;
     int use_sequence_cstring;
     double open_A, extend_A, open_B, extend_B;
     int penalize_extend_when_opening, penalize_end_gaps_A, penalize_end_gaps_B;
     int align_globally, score_only;
+    PyObject *py_band = Py_None;
 
-    PyObject *py_match=NULL, *py_mismatch=NULL;
+    MatchScorer scorer;
     double first_A_gap, first_B_gap;
-    double match, mismatch;
     double score;
-    int use_match_mismatch_scores;
     int lenA, lenB;
+    int lowest, highest;
     double *score_matrix = NULL;
     unsigned char *trace_matrix = NULL;
-    PyObject *py_score_matrix=NULL, *py_trace_matrix=NULL;
 
     double *col_cache_score = NULL;
     PyObject *py_retval = NULL;
 
-    if(!PyArg_ParseTuple(args, "OOOddddi(ii)ii", &py_sequenceA, &py_sequenceB,
-                         &py_match_fn, &open_A, &extend_A, &open_B, &extend_B,
-                         &penalize_extend_when_opening,
+    if(!PyArg_ParseTuple(args, "OOOddddi(ii)ii|O", &py_sequenceA,
+                         &py_sequenceB, &py_match_fn, &open_A, &extend_A,
+                         &open_B, &extend_B, &penalize_extend_when_opening,
                          &penalize_end_gaps_A, &penalize_end_gaps_B,
-                         &align_globally, &score_only))
+                         &align_globally, &score_only, &py_band))
         return NULL;
     if(!PySequence_Check(py_sequenceA) || !PySequence_Check(py_sequenceB)) {
         PyErr_SetString(PyExc_TypeError,
                         "py_sequenceA and py_sequenceB should be sequences.");
         return NULL;
     }
-
-    /* Optimize for the common case. Check to see if py_sequenceA and
-       py_sequenceB are strings.  If they are, use the c string
-       representation. */
-#if PY_MAJOR_VERSION < 3
-    use_sequence_cstring = 0;
-    if(PyString_Check(py_sequenceA) && PyString_Check(py_sequenceB)) {
-        sequenceA = PyString_AS_STRING(py_sequenceA);
-        sequenceB = PyString_AS_STRING(py_sequenceB);
-        use_sequence_cstring = 1;
-    }
-#else
-    py_bytesA = _create_bytes_object(py_sequenceA);
-    py_bytesB = _create_bytes_object(py_sequenceB);
-    if (py_bytesA && py_bytesB) {
-        sequenceA = PyBytes_AS_STRING(py_bytesA);
-        sequenceB = PyBytes_AS_STRING(py_bytesB);
-        use_sequence_cstring = 1;
-    }
-    else {
-        Py_XDECREF(py_bytesA);
-        Py_XDECREF(py_bytesB);
-        use_sequence_cstring = 0;
-    }
-#endif
-
     if(!PyCallable_Check(py_match_fn)) {
         PyErr_SetString(PyExc_TypeError, "py_match_fn must be callable.");
         return NULL;
     }
-    /* Optimize for the common case. Check to see if py_match_fn is
-       an identity_match. If so, pull out the match and mismatch
-       member variables and calculate the scores myself. */
-    match = mismatch = 0;
-    use_match_mismatch_scores = 0;
-    if(!(py_match = PyObject_GetAttrString(py_match_fn, "match")))
-        goto cleanup_after_py_match_fn;
-    match = PyFloat_AsDouble(py_match);
-    if(match==-1.0 && PyErr_Occurred())
-        goto cleanup_after_py_match_fn;
-    if(!(py_mismatch = PyObject_GetAttrString(py_match_fn, "mismatch")))
-        goto cleanup_after_py_match_fn;
-    mismatch = PyFloat_AsDouble(py_mismatch);
-    if(mismatch==-1.0 && PyErr_Occurred())
-        goto cleanup_after_py_match_fn;
-    use_match_mismatch_scores = 1;
-
- cleanup_after_py_match_fn:
-    if(PyErr_Occurred())
-        PyErr_Clear();
-    if(py_match) {
-        Py_DECREF(py_match);
-    }
-    if(py_mismatch) {
-        Py_DECREF(py_mismatch);
-    }
+
+    /* Optimize for the common case. Check to see if py_sequenceA and
+       py_sequenceB are strings.  If they are, use the c string
+       representation, and try to avoid calling the match function. */
+    use_sequence_cstring = _get_sequence_cstrings(py_sequenceA, py_sequenceB,
+                                                  &py_bytesA, &py_bytesB,
+                                                  &sequenceA, &sequenceB);
+    _init_match_scorer(&scorer, py_match_fn, use_sequence_cstring);
+
     /* Cache some commonly used gap penalties */
     first_A_gap = calc_affine_penalty(1, open_A, extend_A,
                                       penalize_extend_when_opening);
@@ -202,32 +446,35 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
     /* Allocate matrices for storing the results and initialize first row and col. */
     lenA = PySequence_Length(py_sequenceA);
     lenB = PySequence_Length(py_sequenceB);
+    /* Only the cells with lowest <= col - row <= highest are calculated,
+       see _band_limits in pairwise2. */
+    if(py_band == Py_None) {
+        lowest = -lenA;
+        highest = lenB;
+    }
+    else {
+        long band = PyInt_AsLong(py_band);
+        if(band == -1 && PyErr_Occurred())
+            goto _cleanup_make_score_matrix_fast;
+        lowest = ((lenB < lenA) ? lenB - lenA : 0) - (int)band;
+        highest = ((lenB > lenA) ? lenB - lenA : 0) + (int)band;
+    }
     score_matrix = malloc((lenA+1)*(lenB+1)*sizeof(*score_matrix));
     if(!score_matrix) {
         PyErr_SetString(PyExc_MemoryError, "Out of memory");
         goto _cleanup_make_score_matrix_fast;
     }
-    for(i=0; i<(lenB+1); i++)
-        score_matrix[i] = 0;
-    for(i=0; i<(lenA+1)*(lenB+1); i += (lenB+1))
-        score_matrix[i] = 0;
     /* If we only want the score, we don't need the trace matrix. */
     if (!score_only){
-        trace_matrix = malloc((lenA+1)*(lenB+1)*sizeof(*trace_matrix));
+        trace_matrix = calloc((lenA+1)*(lenB+1), sizeof(*trace_matrix));
         if(!trace_matrix) {
             PyErr_SetString(PyExc_MemoryError, "Out of memory");
             goto _cleanup_make_score_matrix_fast;
         }
-        for(i=0; i<(lenB+1); i++)
-            trace_matrix[i] = 0;
-        for(i=0; i<(lenA+1)*(lenB+1); i += (lenB+1))
-            trace_matrix[i] = 0;
-        }
-    else
-        trace_matrix = malloc(1);
+    }
 
     /* Initialize the first row and col of the score matrix. */
-    for(i=0; i<=lenA; i++) {
+    for(i=0; i<=lenA && i<=-lowest; i++) {
         if(penalize_end_gaps_B)
             score = calc_affine_penalty(i, open_B, extend_B,
                                         penalize_extend_when_opening);
@@ -235,7 +482,7 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
             score = 0;
         score_matrix[i*(lenB+1)] = score;
     }
-    for(i=0; i<=lenB; i++) {
+    for(i=0; i<=lenB && i<=highest; i++) {
         if(penalize_end_gaps_A)
             score = calc_affine_penalty(i, open_A, extend_A,
                                         penalize_extend_when_opening);
@@ -246,7 +493,10 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
 
     /* Now initialize the col cache. */
     col_cache_score = malloc((lenB+1)*sizeof(*col_cache_score));
-    memset((void *)col_cache_score, 0, (lenB+1)*sizeof(*col_cache_score));
+    if(!col_cache_score) {
+        PyErr_SetString(PyExc_MemoryError, "Out of memory");
+        goto _cleanup_make_score_matrix_fast;
+    }
     for(i=0; i<=lenB; i++) {
         col_cache_score[i] = calc_affine_penalty(i, (2*open_B), extend_B,
                              penalize_extend_when_opening);
@@ -256,7 +506,19 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
     for(row=1; row<=lenA; row++) {
         double row_cache_score = calc_affine_penalty(row, (2*open_A), extend_A,
                                  penalize_extend_when_opening);
-        for(col=1; col<=lenB; col++) {
+        int first_col = (row + lowest > 1) ? row + lowest : 1;
+        int last_col = (row + highest < lenB) ? row + highest : lenB;
+        /* Within a band, the neighbours just outside of it must never be
+           used, so give them an impossibly bad score. */
+        if(row + lowest > 0) {
+            score_matrix[row*(lenB+1)+first_col-1] = _OUTSIDE_BAND;
+            row_cache_score = _OUTSIDE_BAND;
+        }
+        if(row - 1 + highest < lenB) {
+            score_matrix[(row-1)*(lenB+1)+row+highest] = _OUTSIDE_BAND;
+            col_cache_score[row+highest] = _OUTSIDE_BAND;
+        }
+        for(col=first_col; col<=last_col; col++) {
             double match_score, nogap_score;
             double row_open, row_extend, col_open, col_extend, best_score;
             int best_score_rint, row_score_rint, col_score_rint;
@@ -265,10 +527,7 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
             /* Calculate the best score. */
             match_score = _get_match_score(py_sequenceA, py_sequenceB,
                                            py_match_fn, row-1, col-1,
-                                           sequenceA, sequenceB,
-                                           use_sequence_cstring,
-                                           match, mismatch,
-                                           use_match_mismatch_scores);
+                                           sequenceA, sequenceB, &scorer);
             if(match_score==-1.0 && PyErr_Occurred())
                 goto _cleanup_make_score_matrix_fast;
             nogap_score = score_matrix[(row-1)*(lenB+1)+col-1] + match_score;
@@ -303,17 +562,17 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
                 score_matrix[row*(lenB+1)+col] = best_score;
 
             if (!score_only) {
-                row_score_rint = rint(row_cache_score);
-                col_score_rint = rint(col_cache_score[col]);
+                row_score_rint = band_rint(row_cache_score);
+                col_score_rint = band_rint(col_cache_score[col]);
                 row_trace_score = 0;
                 col_trace_score = 0;
-                if (rint(row_open) == row_score_rint)
+                if (band_rint(row_open) == row_score_rint)
                     row_trace_score = row_trace_score|1;
-                if (rint(row_extend) == row_score_rint)
+                if (band_rint(row_extend) == row_score_rint)
                     row_trace_score = row_trace_score|8;
-                if (rint(col_open) == col_score_rint)
+                if (band_rint(col_open) == col_score_rint)
                     col_trace_score = col_trace_score|4;
-                if (rint(col_extend) == col_score_rint)
+                if (band_rint(col_extend) == col_score_rint)
                     col_trace_score = col_trace_score|16;
 
                 trace_score = 0;
@@ -329,76 +588,1293 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
         }
     }
 
-    /* Save the score and traceback matrices into real python objects. */
-    if(!(py_score_matrix = PyList_New(lenA+1)))
-        goto _cleanup_make_score_matrix_fast;
-    if(!score_only){
-        if(!(py_trace_matrix = PyList_New(lenA+1)))
-            goto _cleanup_make_score_matrix_fast;
+    py_retval = _matrices_to_lists(score_matrix, trace_matrix, lenA, lenB,
+                                   score_only, lowest, highest, 0);
+
+ _cleanup_make_score_matrix_fast:
+    _free_match_scorer(&scorer);
+    if(score_matrix)
+        free(score_matrix);
+    if(trace_matrix)
+        free(trace_matrix);
+    if(col_cache_score)
+        free(col_cache_score);
+    Py_XDECREF(py_bytesA);
+    Py_XDECREF(py_bytesB);
+
+    return py_retval;
+}
+
+/* Port of _make_score_matrix_generic in pairwise2, for arbitrary match and
+ * gap penalty functions. The gap penalties are looked up once for each
+ * position and length, rather than once for every cell they are used in.
+ */
+static PyObject *cpairwise2__make_score_matrix_generic(PyObject *self,
+                                                       PyObject *args)
+{
+    int i, x;
+    int row, col;
+    PyObject *py_sequenceA, *py_sequenceB, *py_match_fn;
+    PyObject *py_gap_A_fn, *py_gap_B_fn;
+    PyObject *py_bytesA=NULL, *py_bytesB=NULL;
+    char *sequenceA=NULL, *sequenceB=NULL;
+    int use_sequence_cstring;
+    int penalize_end_gaps_A, penalize_end_gaps_B;
+    int align_globally, score_only;
+
+    MatchScorer scorer;
+    double score;
+    int lenA, lenB;
+    double *score_matrix = NULL;
+    unsigned char *trace_matrix = NULL;
+    /* gap_A_penalty[length] for the current row, and
+       gap_B_penalty[col*(lenA+1)+length] for each column. */
+    double *gap_A_penalty = NULL, *gap_B_penalty = NULL;
+    PyObject *py_retval = NULL;
+
+    if(!PyArg_ParseTuple(args, "OOOOO(ii)ii", &py_sequenceA, &py_sequenceB,
+                         &py_match_fn, &py_gap_A_fn, &py_gap_B_fn,
+                         &penalize_end_gaps_A, &penalize_end_gaps_B,
+                         &align_globally, &score_only))
+        return NULL;
+    if(!PySequence_Check(py_sequenceA) || !PySequence_Check(py_sequenceB)) {
+        PyErr_SetString(PyExc_TypeError,
+                        "py_sequenceA and py_sequenceB should be sequences.");
+        return NULL;
     }
-    else
-        py_trace_matrix = PyList_New(1);
 
-    for(row=0; row<=lenA; row++) {
-        PyObject *py_score_row, *py_trace_row;
-        if(!(py_score_row = PyList_New(lenB+1)))
-            goto _cleanup_make_score_matrix_fast;
-        PyList_SET_ITEM(py_score_matrix, row, py_score_row);
-        if(!score_only){
-            if(!(py_trace_row = PyList_New(lenB+1)))
-                goto _cleanup_make_score_matrix_fast;
-            PyList_SET_ITEM(py_trace_matrix, row, py_trace_row);
+    use_sequence_cstring = _get_sequence_cstrings(py_sequenceA, py_sequenceB,
+                                                  &py_bytesA, &py_bytesB,
+                                                  &sequenceA, &sequenceB);
+    _init_match_scorer(&scorer, py_match_fn, use_sequence_cstring);
+
+    lenA = PySequence_Length(py_sequenceA);
+    lenB = PySequence_Length(py_sequenceB);
+    score_matrix = malloc((lenA+1)*(lenB+1)*sizeof(*score_matrix));
+    gap_A_penalty = malloc((lenB+1)*sizeof(*gap_A_penalty));
+    gap_B_penalty = malloc((lenB+1)*(lenA+1)*sizeof(*gap_B_penalty));
+    if(!score_only)
+        trace_matrix = calloc((lenA+1)*(lenB+1), sizeof(*trace_matrix));
+    if(!score_matrix || !gap_A_penalty || !gap_B_penalty ||
+       (!score_only && !trace_matrix)) {
+        PyErr_SetString(PyExc_MemoryError, "Out of memory");
+        goto _cleanup_make_score_matrix_generic;
+    }
+
+    /* Initialize first row and column with gap scores. This is like opening
+       up i gaps at the beginning of sequence A or B. */
+    for(i=0; i<=lenA; i++) {
+        score = 0;
+        if(penalize_end_gaps_B && !_call_gap_fn(py_gap_B_fn, 0, i, &score,
+                                                  &scorer.all_int))
+            goto _cleanup_make_score_matrix_generic;
+        score_matrix[i*(lenB+1)] = score;
+    }
+    for(i=0; i<=lenB; i++) {
+        score = 0;
+        if(penalize_end_gaps_A && !_call_gap_fn(py_gap_A_fn, 0, i, &score,
+                                                  &scorer.all_int))
+            goto _cleanup_make_score_matrix_generic;
+        score_matrix[i] = score;
+    }
+
+    /* The penalties for gaps in sequence B, for every column and length. */
+    for(col=1; col<=lenB; col++) {
+        if(!penalize_end_gaps_B && col==lenB)
+            continue;
+        for(i=1; i<=lenA; i++) {
+            if(!_call_gap_fn(py_gap_B_fn, col, i,
+                             &gap_B_penalty[col*(lenA+1)+i], &scorer.all_int))
+                goto _cleanup_make_score_matrix_generic;
         }
+    }
 
-        for(col=0; col<=lenB; col++) {
-            PyObject *py_score, *py_trace;
-            int offset = row*(lenB+1) + col;
+    for(row=1; row<=lenA; row++) {
+        double *score_row = score_matrix + row*(lenB+1);
+        int end_row_A = (!penalize_end_gaps_A && row==lenA);
 
-            /* Set py_score_matrix[row][col] to the score. */
-            if(!(py_score = PyFloat_FromDouble(score_matrix[offset])))
-                goto _cleanup_make_score_matrix_fast;
-            PyList_SET_ITEM(py_score_row, col, py_score);
+        /* The penalties for gaps in sequence A, for this row. */
+        if(!end_row_A) {
+            for(i=1; i<=lenB; i++) {
+                if(!_call_gap_fn(py_gap_A_fn, row, i, &gap_A_penalty[i],
+                                 &scorer.all_int))
+                    goto _cleanup_make_score_matrix_generic;
+            }
+        }
+        for(col=1; col<=lenB; col++) {
+            double match_score, nogap_score;
+            double row_open, row_extend, col_open, col_extend, best_score;
+            int best_score_rint;
+            unsigned char trace_score;
 
-            if(score_only)
-                continue;
-            /* Set py_trace_matrix[row][col] to a list of indexes.  On
-               the edges of the matrix (row or column is 0), the
-               matrix should be [None]. */
-            if(!row || !col) {
-                if(!(py_trace = Py_BuildValue("B", 1)))
-                    goto _cleanup_make_score_matrix_fast;
-                Py_INCREF(Py_None);
-                PyList_SET_ITEM(py_trace_row, col, Py_None);
+            match_score = _get_match_score(py_sequenceA, py_sequenceB,
+                                           py_match_fn, row-1, col-1,
+                                           sequenceA, sequenceB, &scorer);
+            if(match_score==-1.0 && PyErr_Occurred())
+                goto _cleanup_make_score_matrix_generic;
+            nogap_score = score_matrix[(row-1)*(lenB+1)+col-1] + match_score;
+
+            /* Try to find a better score by opening gaps in sequenceA,
+               from each column in the row. */
+            if(end_row_A) {
+                row_open = score_row[col-1];
+                row_extend = score_row[0];
+                for(x=1; x<col; x++)
+                    if(score_row[x] > row_extend)
+                        row_extend = score_row[x];
+            }
+            else {
+                row_open = score_row[col-1] + gap_A_penalty[1];
+                row_extend = score_row[0] + gap_A_penalty[col];
+                for(x=1; x<col; x++)
+                    if(score_row[x] + gap_A_penalty[col-x] > row_extend)
+                        row_extend = score_row[x] + gap_A_penalty[col-x];
+            }
+
+            /* Try to find a better score by opening gaps in sequenceB. */
+            if(!penalize_end_gaps_B && col==lenB) {
+                col_open = score_matrix[(row-1)*(lenB+1)+col];
+                col_extend = score_matrix[col];
+                for(x=1; x<row; x++)
+                    if(score_matrix[x*(lenB+1)+col] > col_extend)
+                        col_extend = score_matrix[x*(lenB+1)+col];
             }
             else {
-                if(!(py_trace = Py_BuildValue("B", trace_matrix[offset])))
-                    goto _cleanup_make_score_matrix_fast;
-                PyList_SET_ITEM(py_trace_row, col, py_trace);
+                double *gap_B_col = gap_B_penalty + col*(lenA+1);
+                col_open = score_matrix[(row-1)*(lenB+1)+col] + gap_B_col[1];
+                col_extend = score_matrix[col] + gap_B_col[row];
+                for(x=1; x<row; x++)
+                    if(score_matrix[x*(lenB+1)+col] + gap_B_col[row-x] > col_extend)
+                        col_extend = score_matrix[x*(lenB+1)+col] + gap_B_col[row-x];
+            }
+
+            best_score = nogap_score;
+            if(row_open > best_score)
+                best_score = row_open;
+            if(row_extend > best_score)
+                best_score = row_extend;
+            if(col_open > best_score)
+                best_score = col_open;
+            if(col_extend > best_score)
+                best_score = col_extend;
+            if(!align_globally && best_score < 0)
+                score_row[col] = 0;
+            else
+                score_row[col] = best_score;
 
+            /* The backtrace is encoded binary. See _make_score_matrix_fast
+               for details. */
+            if(!score_only) {
+                trace_score = 0;
+                best_score_rint = rint(best_score);
+                if(rint(nogap_score) == best_score_rint)
+                    trace_score += 2;
+                if(rint(row_open) == best_score_rint)
+                    trace_score += 1;
+                if(rint(row_extend) == best_score_rint)
+                    trace_score += 8;
+                if(rint(col_open) == best_score_rint)
+                    trace_score += 4;
+                if(rint(col_extend) == best_score_rint)
+                    trace_score += 16;
+                trace_matrix[row*(lenB+1)+col] = trace_score;
             }
         }
     }
-    py_retval = Py_BuildValue("(OO)", py_score_matrix, py_trace_matrix);
 
- _cleanup_make_score_matrix_fast:
+    /* As in the Python implementation, the scores are integers if the
+       match and gap functions only gave integers. */
+    py_retval = _matrices_to_lists(score_matrix, trace_matrix, lenA, lenB,
+                                   score_only, -lenA, lenB, scorer.all_int);
+
+ _cleanup_make_score_matrix_generic:
+    _free_match_scorer(&scorer);
     if(score_matrix)
         free(score_matrix);
     if(trace_matrix)
         free(trace_matrix);
-    if(col_cache_score)
-        free(col_cache_score);
-    if(py_score_matrix){
-        Py_DECREF(py_score_matrix);
-    }
-    if(py_trace_matrix){
-        Py_DECREF(py_trace_matrix);
-    }
+    if(gap_A_penalty)
+        free(gap_A_penalty);
+    if(gap_B_penalty)
+        free(gap_B_penalty);
+    Py_XDECREF(py_bytesA);
+    Py_XDECREF(py_bytesB);
 
-#if PY_MAJOR_VERSION >= 3
-    if (py_bytesA != NULL && py_bytesA != py_sequenceA) Py_DECREF(py_bytesA);
-    if (py_bytesB != NULL && py_bytesB != py_sequenceB) Py_DECREF(py_bytesB);
-#endif
+    return py_retval;
+}
+
+/* Port of _score_only_fast in pairwise2. This is _make_score_matrix_fast,
+ * keeping only the last row of the score matrix. If sequenceB is the longer
+ * sequence, the transposed matrix is calculated, so the memory needed is
+ * linear in the length of the shorter sequence.
+ */
+static PyObject *cpairwise2__score_only_fast(PyObject *self, PyObject *args)
+{
+    int i;
+    int row, col;
+    PyObject *py_sequenceA, *py_sequenceB, *py_match_fn;
+    PyObject *py_bytesA=NULL, *py_bytesB=NULL;
+    char *sequenceA=NULL, *sequenceB=NULL;
+    int use_sequence_cstring;
+    double open_A, extend_A, open_B, extend_B, x;
+    int penalize_extend_when_opening, penalize_end_gaps_A, penalize_end_gaps_B;
+    int align_globally, transposed;
+
+    MatchScorer scorer;
+    double first_A_gap, first_B_gap;
+    double score, best_score;
+    int lenA, lenB, nrows, ncols;
+    double *last_row = NULL, *this_row = NULL, *swap_row;
+    double *col_cache_score = NULL;
+    PyObject *py_retval = NULL;
+
+    if(!PyArg_ParseTuple(args, "OOOddddi(ii)i", &py_sequenceA, &py_sequenceB,
+                         &py_match_fn, &open_A, &extend_A, &open_B, &extend_B,
+                         &penalize_extend_when_opening,
+                         &penalize_end_gaps_A, &penalize_end_gaps_B,
+                         &align_globally))
+        return NULL;
+    if(!PySequence_Check(py_sequenceA) || !PySequence_Check(py_sequenceB)) {
+        PyErr_SetString(PyExc_TypeError,
+                        "py_sequenceA and py_sequenceB should be sequences.");
+        return NULL;
+    }
+
+    use_sequence_cstring = _get_sequence_cstrings(py_sequenceA, py_sequenceB,
+                                                  &py_bytesA, &py_bytesB,
+                                                  &sequenceA, &sequenceB);
+    _init_match_scorer(&scorer, py_match_fn, use_sequence_cstring);
+
+    lenA = PySequence_Length(py_sequenceA);
+    lenB = PySequence_Length(py_sequenceB);
+    /* The rows go along sequenceA, unless the matrix is transposed, when
+       the gap penalties for the two sequences swap places as well. */
+    transposed = lenB > lenA;
+    if(transposed) {
+        nrows = lenB;
+        ncols = lenA;
+        x = open_A; open_A = open_B; open_B = x;
+        x = extend_A; extend_A = extend_B; extend_B = x;
+        i = penalize_end_gaps_A;
+        penalize_end_gaps_A = penalize_end_gaps_B;
+        penalize_end_gaps_B = i;
+    }
+    else {
+        nrows = lenA;
+        ncols = lenB;
+    }
+    first_A_gap = calc_affine_penalty(1, open_A, extend_A,
+                                      penalize_extend_when_opening);
+    first_B_gap = calc_affine_penalty(1, open_B, extend_B,
+                                      penalize_extend_when_opening);
+
+    last_row = malloc((ncols+1)*sizeof(*last_row));
+    this_row = malloc((ncols+1)*sizeof(*this_row));
+    col_cache_score = malloc((ncols+1)*sizeof(*col_cache_score));
+    if(!last_row || !this_row || !col_cache_score) {
+        PyErr_SetString(PyExc_MemoryError, "Out of memory");
+        goto _cleanup_score_only_fast;
+    }
+
+    /* Initialize the first row, and the col cache. */
+    best_score = 0;
+    for(i=0; i<=ncols; i++) {
+        if(penalize_end_gaps_A)
+            last_row[i] = calc_affine_penalty(i, open_A, extend_A,
+                                              penalize_extend_when_opening);
+        else
+            last_row[i] = 0;
+        if(!i || last_row[i] > best_score)
+            best_score = last_row[i];
+        col_cache_score[i] = calc_affine_penalty(i, (2*open_B), extend_B,
+                             penalize_extend_when_opening);
+    }
+
+    for(row=1; row<=nrows; row++) {
+        double row_cache_score = calc_affine_penalty(row, (2*open_A), extend_A,
+                                 penalize_extend_when_opening);
+        if(penalize_end_gaps_B)
+            this_row[0] = calc_affine_penalty(row, open_B, extend_B,
+                                              penalize_extend_when_opening);
+        else
+            this_row[0] = 0;
+        if(!align_globally && this_row[0] > best_score)
+            best_score = this_row[0];
+        for(col=1; col<=ncols; col++) {
+            double match_score, nogap_score;
+            double row_open, row_extend, col_open, col_extend;
+
+            if(transposed)
+                match_score = _get_match_score(py_sequenceA, py_sequenceB,
+                                               py_match_fn, col-1, row-1,
+                                               sequenceA, sequenceB, &scorer);
+            else
+                match_score = _get_match_score(py_sequenceA, py_sequenceB,
+                                               py_match_fn, row-1, col-1,
+                                               sequenceA, sequenceB, &scorer);
+            if(match_score==-1.0 && PyErr_Occurred())
+                goto _cleanup_score_only_fast;
+            nogap_score = last_row[col-1] + match_score;
+
+            if (!penalize_end_gaps_A && row==nrows) {
+                row_open = this_row[col-1];
+                row_extend = row_cache_score;
+            }
+            else {
+                row_open = this_row[col-1] + first_A_gap;
+                row_extend = row_cache_score + extend_A;
+            }
+            row_cache_score = (row_open > row_extend) ? row_open : row_extend;
+
+            if (!penalize_end_gaps_B && col==ncols){
+                col_open = last_row[col];
+                col_extend = col_cache_score[col];
+            }
+            else {
+                col_open = last_row[col] + first_B_gap;
+                col_extend = col_cache_score[col] + extend_B;
+            }
+            col_cache_score[col] = (col_open > col_extend) ? col_open : col_extend;
+
+            score = (row_cache_score > col_cache_score[col]) ? row_cache_score : col_cache_score[col];
+            if(nogap_score > score)
+                score = nogap_score;
+            if(!align_globally && score < 0)
+                score = 0;
+            this_row[col] = score;
+            if(!align_globally && score > best_score)
+                best_score = score;
+        }
+        swap_row = last_row;
+        last_row = this_row;
+        this_row = swap_row;
+    }
+    if(align_globally)
+        best_score = last_row[ncols];
+    py_retval = PyFloat_FromDouble(best_score);
+
+ _cleanup_score_only_fast:
+    _free_match_scorer(&scorer);
+    if(last_row)
+        free(last_row);
+    if(this_row)
+        free(this_row);
+    if(col_cache_score)
+        free(col_cache_score);
+    Py_XDECREF(py_bytesA);
+    Py_XDECREF(py_bytesB);
+
+    return py_retval;
+}
+
+/* Score only alignment of a target against a query profile, used by
+   align_many in pairwise2. The profile has a row of len(query) match
+   scores for each ASCII character, or NaN where the score is unknown.
+   The rows of the score matrix go along the target, so this calculates
+   the same as _score_only_fast with the query as sequenceA. Returns None
+   if the target is not a string, or has a residue without scores, so that
+   the caller can fall back to _score_only_fast. */
+static PyObject *cpairwise2__score_profile(PyObject *self, PyObject *args)
+{
+    int i;
+    int row, col;
+    PyObject *py_profile, *py_target;
+    PyObject *py_bytes=NULL;
+    char *target=NULL;
+    double *profile, *match_row;
+    double open_A, extend_A, open_B, extend_B, x;
+    int penalize_extend_when_opening, penalize_end_gaps_A, penalize_end_gaps_B;
+    int align_globally;
+
+    double first_A_gap, first_B_gap;
+    double score, best_score;
+    int nrows, ncols;
+    double *last_row = NULL, *this_row = NULL, *swap_row;
+    double *col_cache_score = NULL;
+    PyObject *py_retval = NULL;
+
+    if(!PyArg_ParseTuple(args, "OOddddi(ii)i", &py_profile, &py_target,
+                         &open_A, &extend_A, &open_B, &extend_B,
+                         &penalize_extend_when_opening,
+                         &penalize_end_gaps_A, &penalize_end_gaps_B,
+                         &align_globally))
+        return NULL;
+    if(!PyBytes_Check(py_profile)) {
+        PyErr_SetString(PyExc_TypeError, "profile should be a bytes string.");
+        return NULL;
+    }
+    profile = (double *)PyBytes_AS_STRING(py_profile);
+    ncols = (int)(PyBytes_GET_SIZE(py_profile) / (128 * sizeof(double)));
+
+    if(!_get_sequence_cstring(py_target, &py_bytes, &target)) {
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+    nrows = (int)strlen(target);
+    if(nrows != PySequence_Length(py_target)) {
+        /* Embedded null character */
+        Py_INCREF(Py_None);
+        py_retval = Py_None;
+        goto _cleanup_score_profile;
+    }
+    for(row=0; row<nrows; row++) {
+        unsigned char c = (unsigned char)target[row];
+        if(c >= 128 || (ncols && Py_IS_NAN(profile[c*ncols]))) {
+            Py_INCREF(Py_None);
+            py_retval = Py_None;
+            goto _cleanup_score_profile;
+        }
+    }
+
+    /* The target is sequenceB, so swap the gap penalties as in the
+       transposed case of _score_only_fast. */
+    x = open_A; open_A = open_B; open_B = x;
+    x = extend_A; extend_A = extend_B; extend_B = x;
+    i = penalize_end_gaps_A;
+    penalize_end_gaps_A = penalize_end_gaps_B;
+    penalize_end_gaps_B = i;
+    first_A_gap = calc_affine_penalty(1, open_A, extend_A,
+                                      penalize_extend_when_opening);
+    first_B_gap = calc_affine_penalty(1, open_B, extend_B,
+                                      penalize_extend_when_opening);
+
+    last_row = malloc((ncols+1)*sizeof(*last_row));
+    this_row = malloc((ncols+1)*sizeof(*this_row));
+    col_cache_score = malloc((ncols+1)*sizeof(*col_cache_score));
+    if(!last_row || !this_row || !col_cache_score) {
+        PyErr_SetString(PyExc_MemoryError, "Out of memory");
+        goto _cleanup_score_profile;
+    }
+
+    best_score = 0;
+    for(i=0; i<=ncols; i++) {
+        if(penalize_end_gaps_A)
+            last_row[i] = calc_affine_penalty(i, open_A, extend_A,
+                                              penalize_extend_when_opening);
+        else
+            last_row[i] = 0;
+        if(!i || last_row[i] > best_score)
+            best_score = last_row[i];
+        col_cache_score[i] = calc_affine_penalty(i, (2*open_B), extend_B,
+                             penalize_extend_when_opening);
+    }
+
+    for(row=1; row<=nrows; row++) {
+        double row_cache_score = calc_affine_penalty(row, (2*open_A), extend_A,
+                                 penalize_extend_when_opening);
+        match_row = profile + ((unsigned char)target[row-1]) * ncols;
+        if(penalize_end_gaps_B)
+            this_row[0] = calc_affine_penalty(row, open_B, extend_B,
+                                              penalize_extend_when_opening);
+        else
+            this_row[0] = 0;
+        if(!align_globally && this_row[0] > best_score)
+            best_score = this_row[0];
+        for(col=1; col<=ncols; col++) {
+            double nogap_score;
+            double row_open, row_extend, col_open, col_extend;
+
+            nogap_score = last_row[col-1] + match_row[col-1];
+
+            if (!penalize_end_gaps_A && row==nrows) {
+                row_open = this_row[col-1];
+                row_extend = row_cache_score;
+            }
+            else {
+                row_open = this_row[col-1] + first_A_gap;
+                row_extend = row_cache_score + extend_A;
+            }
+            row_cache_score = (row_open > row_extend) ? row_open : row_extend;
+
+            if (!penalize_end_gaps_B && col==ncols){
+                col_open = last_row[col];
+                col_extend = col_cache_score[col];
+            }
+            else {
+                col_open = last_row[col] + first_B_gap;
+                col_extend = col_cache_score[col] + extend_B;
+            }
+            col_cache_score[col] = (col_open > col_extend) ? col_open : col_extend;
+
+            score = (row_cache_score > col_cache_score[col]) ? row_cache_score : col_cache_score[col];
+            if(nogap_score > score)
+                score = nogap_score;
+            if(!align_globally && score < 0)
+                score = 0;
+            this_row[col] = score;
+            if(!align_globally && score > best_score)
+                best_score = score;
+        }
+        swap_row = last_row;
+        last_row = this_row;
+        this_row = swap_row;
+    }
+    if(align_globally)
+        best_score = last_row[ncols];
+    py_retval = PyFloat_FromDouble(best_score);
+
+ _cleanup_score_profile:
+    if(last_row)
+        free(last_row);
+    if(this_row)
+        free(this_row);
+    if(col_cache_score)
+        free(col_cache_score);
+    Py_XDECREF(py_bytes);
+
+    return py_retval;
+}
+
+static PyObject *_list_from_doubles(double *values, int n)
+{
+    int i;
+    PyObject *py_list, *py_value;
+
+    if(!(py_list = PyList_New(n)))
+        return NULL;
+    for(i=0; i<n; i++) {
+        if(!(py_value = PyFloat_FromDouble(values[i]))) {
+            Py_DECREF(py_list);
+            return NULL;
+        }
+        PyList_SET_ITEM(py_list, i, py_value);
+    }
+    return py_list;
+}
+
+/* Port of _linear_pass in pairwise2, see there for the details. */
+static PyObject *cpairwise2__linear_pass(PyObject *self, PyObject *args)
+{
+    int i;
+    int row, col;
+    PyObject *py_sequenceA, *py_sequenceB, *py_match_fn;
+    PyObject *py_bytesA=NULL, *py_bytesB=NULL;
+    char *sequenceA=NULL, *sequenceB=NULL;
+    int use_sequence_cstring;
+    double open_A, extend_A, open_B, extend_B;
+    int penalize_extend_when_opening, free_start_gap_A, free_start_gap_B;
+    int open_start_gap_B, align_globally;
+
+    MatchScorer scorer;
+    double first_A_gap, first_B_gap;
+    double score, diagonal_score, gap_A_score, best_score;
+    int best_row = 0, best_col = 0;
+    int lenA, lenB;
+    double *score_row = NULL, *gap_B_row = NULL, *score_col = NULL;
+    PyObject *py_score_row = NULL, *py_gap_B_row = NULL, *py_score_col = NULL;
+    PyObject *py_retval = NULL;
+
+    if(!PyArg_ParseTuple(args, "OOOddddi(ii)ii", &py_sequenceA, &py_sequenceB,
+                         &py_match_fn, &open_A, &extend_A, &open_B, &extend_B,
+                         &penalize_extend_when_opening,
+                         &free_start_gap_A, &free_start_gap_B,
+                         &open_start_gap_B, &align_globally))
+        return NULL;
+    if(!PySequence_Check(py_sequenceA) || !PySequence_Check(py_sequenceB)) {
+        PyErr_SetString(PyExc_TypeError,
+                        "py_sequenceA and py_sequenceB should be sequences.");
+        return NULL;
+    }
+
+    use_sequence_cstring = _get_sequence_cstrings(py_sequenceA, py_sequenceB,
+                                                  &py_bytesA, &py_bytesB,
+                                                  &sequenceA, &sequenceB);
+    _init_match_scorer(&scorer, py_match_fn, use_sequence_cstring);
+
+    first_A_gap = calc_affine_penalty(1, open_A, extend_A,
+                                      penalize_extend_when_opening);
+    first_B_gap = calc_affine_penalty(1, open_B, extend_B,
+                                      penalize_extend_when_opening);
+    lenA = PySequence_Length(py_sequenceA);
+    lenB = PySequence_Length(py_sequenceB);
+    score_row = malloc((lenB+1)*sizeof(*score_row));
+    gap_B_row = malloc((lenB+1)*sizeof(*gap_B_row));
+    score_col = malloc((lenA+1)*sizeof(*score_col));
+    if(!score_row || !gap_B_row || !score_col) {
+        PyErr_SetString(PyExc_MemoryError, "Out of memory");
+        goto _cleanup_linear_pass;
+    }
+
+    best_score = 0;
+    for(i=0; i<=lenB; i++) {
+        if(free_start_gap_A)
+            score_row[i] = 0;
+        else
+            score_row[i] = calc_affine_penalty(i, open_A, extend_A,
+                                               penalize_extend_when_opening);
+        gap_B_row[i] = -HUGE_VAL;
+        if(!i || score_row[i] > best_score) {
+            best_score = score_row[i];
+            best_col = i;
+        }
+    }
+    score_col[0] = score_row[lenB];
+
+    for(row=1; row<=lenA; row++) {
+        if(free_start_gap_B)
+            score = 0;
+        else if(open_start_gap_B)
+            score = calc_affine_penalty(row, open_B, extend_B,
+                                        penalize_extend_when_opening);
+        else
+            score = extend_B * row;
+        diagonal_score = score_row[0];
+        score_row[0] = gap_B_row[0] = score;
+        if(score > best_score) {
+            best_score = score;
+            best_row = row;
+            best_col = 0;
+        }
+        gap_A_score = -HUGE_VAL;
+        for(col=1; col<=lenB; col++) {
+            double match_score, nogap_score;
+
+            match_score = _get_match_score(py_sequenceA, py_sequenceB,
+                                           py_match_fn, row-1, col-1,
+                                           sequenceA, sequenceB, &scorer);
+            if(match_score==-1.0 && PyErr_Occurred())
+                goto _cleanup_linear_pass;
+            nogap_score = diagonal_score + match_score;
+            if(score + first_A_gap > gap_A_score + extend_A)
+                gap_A_score = score + first_A_gap;
+            else
+                gap_A_score += extend_A;
+            diagonal_score = score_row[col];
+            if(diagonal_score + first_B_gap > gap_B_row[col] + extend_B)
+                gap_B_row[col] = diagonal_score + first_B_gap;
+            else
+                gap_B_row[col] += extend_B;
+            score = nogap_score;
+            if(gap_A_score > score)
+                score = gap_A_score;
+            if(gap_B_row[col] > score)
+                score = gap_B_row[col];
+            if(!align_globally && score < 0)
+                score = 0;
+            score_row[col] = score;
+            if(score > best_score) {
+                best_score = score;
+                best_row = row;
+                best_col = col;
+            }
+        }
+        score_col[row] = score_row[lenB];
+    }
+
+    if(!(py_score_row = _list_from_doubles(score_row, lenB+1)))
+        goto _cleanup_linear_pass;
+    if(!(py_gap_B_row = _list_from_doubles(gap_B_row, lenB+1)))
+        goto _cleanup_linear_pass;
+    if(!(py_score_col = _list_from_doubles(score_col, lenA+1)))
+        goto _cleanup_linear_pass;
+    py_retval = Py_BuildValue("(OOOd(ii))", py_score_row, py_gap_B_row,
+                              py_score_col, best_score, best_row, best_col);
+
+ _cleanup_linear_pass:
+    _free_match_scorer(&scorer);
+    if(score_row)
+        free(score_row);
+    if(gap_B_row)
+        free(gap_B_row);
+    if(score_col)
+        free(score_col);
+    Py_XDECREF(py_score_row);
+    Py_XDECREF(py_gap_B_row);
+    Py_XDECREF(py_score_col);
+    Py_XDECREF(py_bytesA);
+    Py_XDECREF(py_bytesB);
+
+    return py_retval;
+}
+
+/* Port of _find_start in pairwise2, returning the best score and a list of
+ * the (score, (row, col)) starting points within tolerance of it.
+ */
+static PyObject *cpairwise2__find_start(PyObject *self, PyObject *args)
+{
+    PyObject *py_score_matrix, *py_row, *py_score;
+    PyObject *py_best_score=NULL, *py_starts=NULL, *py_start;
+    PyObject *py_retval=NULL;
+    int align_globally;
+    double tolerance = 0, score, best_score = 0;
+    int tolerance_rint;
+    Py_ssize_t nrows, ncols, row, col;
+
+    if(!PyArg_ParseTuple(args, "Oi|d", &py_score_matrix, &align_globally,
+                         &tolerance))
+        return NULL;
+    if(!PyList_Check(py_score_matrix) || !PyList_GET_SIZE(py_score_matrix)) {
+        PyErr_SetString(PyExc_TypeError,
+                        "score_matrix should be a list of lists.");
+        return NULL;
+    }
+    nrows = PyList_GET_SIZE(py_score_matrix);
+    for(row=0; row<nrows; row++) {
+        if(!PyList_Check(PyList_GET_ITEM(py_score_matrix, row))) {
+            PyErr_SetString(PyExc_TypeError,
+                            "score_matrix should be a list of lists.");
+            return NULL;
+        }
+    }
+    ncols = PyList_GET_SIZE(PyList_GET_ITEM(py_score_matrix, 0));
+    if(!(py_starts = PyList_New(0)))
+        return NULL;
+
+    if(align_globally) {
+        py_row = PyList_GET_ITEM(py_score_matrix, nrows-1);
+        if(PyList_GET_SIZE(py_row) != ncols) {
+            PyErr_SetString(PyExc_ValueError, "score_matrix is not square.");
+            goto _cleanup_find_start;
+        }
+        py_best_score = PyList_GET_ITEM(py_row, ncols-1);
+        Py_INCREF(py_best_score);
+        if(!(py_start = Py_BuildValue("(O(nn))", py_best_score,
+                                      nrows-1, ncols-1)))
+            goto _cleanup_find_start;
+        if(PyList_Append(py_starts, py_start) < 0) {
+            Py_DECREF(py_start);
+            goto _cleanup_find_start;
+        }
+        Py_DECREF(py_start);
+    }
+    else {
+        /* Find the (first) highest score */
+        for(row=0; row<nrows; row++) {
+            py_row = PyList_GET_ITEM(py_score_matrix, row);
+            if(PyList_GET_SIZE(py_row) != ncols) {
+                PyErr_SetString(PyExc_ValueError,
+                                "score_matrix is not square.");
+                goto _cleanup_find_start;
+            }
+            for(col=0; col<ncols; col++) {
+                py_score = PyList_GET_ITEM(py_row, col);
+                if(py_score == Py_None)  /* outside of a band */
+                    continue;
+                score = PyFloat_AsDouble(py_score);
+                if(score == -1.0 && PyErr_Occurred())
+                    goto _cleanup_find_start;
+                if(!py_best_score || score > best_score) {
+                    py_best_score = py_score;
+                    best_score = score;
+                }
+            }
+        }
+        Py_INCREF(py_best_score);
+        /* Now find all the positions within some tolerance of it. */
+        tolerance_rint = rint(tolerance);
+        for(row=0; row<nrows; row++) {
+            py_row = PyList_GET_ITEM(py_score_matrix, row);
+            for(col=0; col<ncols; col++) {
+                py_score = PyList_GET_ITEM(py_row, col);
+                if(py_score == Py_None)
+                    continue;
+                score = PyFloat_AsDouble(py_score);
+                if(rint(fabs(score - best_score)) > tolerance_rint)
+                    continue;
+                if(!(py_start = Py_BuildValue("(O(nn))", py_score, row, col)))
+                    goto _cleanup_find_start;
+                if(PyList_Append(py_starts, py_start) < 0) {
+                    Py_DECREF(py_start);
+                    goto _cleanup_find_start;
+                }
+                Py_DECREF(py_start);
+            }
+        }
+    }
+    py_retval = Py_BuildValue("(OO)", py_best_score, py_starts);
+
+ _cleanup_find_start:
+    Py_XDECREF(py_best_score);
+    Py_XDECREF(py_starts);
+    return py_retval;
+}
+
+/* State of a partial traceback, i.e. an entry in the in_process stack of
+ * _recover_alignments in pairwise2. The aligned sequences are built up
+ * backwards, and the buffers are owned by the state.
+ */
+typedef struct {
+    char *ali_seqA, *ali_seqB;
+    Py_ssize_t lenA, lenB;
+    Py_ssize_t end;
+    int end_is_none;
+    int row, col, col_gap, trace;
+} TraceState;
+
+typedef struct {
+    TraceState *items;
+    Py_ssize_t size, allocated;
+    Py_ssize_t capacity;      /* size of the sequence buffers */
+} TraceStack;
+
+static int _stack_push(TraceStack *stack, TraceState *state,
+                       Py_ssize_t lenA, Py_ssize_t lenB,
+                       int row, int col, int col_gap, int trace)
+{
+    /* Push a copy of the first lenA and lenB letters of the state. */
+    TraceState *new_state;
+
+    if(stack->size == stack->allocated) {
+        Py_ssize_t allocated = stack->allocated ? 2 * stack->allocated : 16;
+        TraceState *items = realloc(stack->items,
+                                    allocated * sizeof(*items));
+        if(!items)
+            return 0;
+        stack->items = items;
+        stack->allocated = allocated;
+    }
+    new_state = &stack->items[stack->size];
+    new_state->ali_seqA = malloc(stack->capacity);
+    new_state->ali_seqB = malloc(stack->capacity);
+    if(!new_state->ali_seqA || !new_state->ali_seqB) {
+        if(new_state->ali_seqA)
+            free(new_state->ali_seqA);
+        if(new_state->ali_seqB)
+            free(new_state->ali_seqB);
+        return 0;
+    }
+    memcpy(new_state->ali_seqA, state->ali_seqA, lenA);
+    memcpy(new_state->ali_seqB, state->ali_seqB, lenB);
+    new_state->lenA = lenA;
+    new_state->lenB = lenB;
+    new_state->end = state->end;
+    new_state->end_is_none = state->end_is_none;
+    new_state->row = row;
+    new_state->col = col;
+    new_state->col_gap = col_gap;
+    new_state->trace = trace;
+    stack->size++;
+    return 1;
+}
+
+static void _free_stack(TraceStack *stack)
+{
+    Py_ssize_t i;
+    for(i=0; i<stack->size; i++) {
+        free(stack->items[i].ali_seqA);
+        free(stack->items[i].ali_seqB);
+    }
+    if(stack->items)
+        free(stack->items);
+}
+
+static int _trace_at(PyObject *py_trace_matrix, int row, int col)
+{
+    /* The traceback entry, from a bytearray or a list with None (on the
+       edges) as 0. Returns -1 on error. */
+    PyObject *py_trace_row = PyList_GET_ITEM(py_trace_matrix, row);
+    PyObject *py_trace;
+    long trace;
+
+    if(PyByteArray_Check(py_trace_row))
+        return (unsigned char)PyByteArray_AS_STRING(py_trace_row)[col];
+    py_trace = PyList_GET_ITEM(py_trace_row, col);
+    if(py_trace == Py_None)
+        return 0;
+    trace = PyInt_AsLong(py_trace);
+    if(trace == -1 && PyErr_Occurred())
+        return -1;
+    return (int)trace;
+}
+
+static int _set_trace(PyObject *py_trace_matrix, int row, int col, int trace)
+{
+    /* Set the traceback entry in a bytearray or list row. Returns 0 on
+       error. */
+    PyObject *py_trace_row = PyList_GET_ITEM(py_trace_matrix, row);
+    PyObject *py_trace;
+
+    if(PyByteArray_Check(py_trace_row)) {
+        PyByteArray_AS_STRING(py_trace_row)[col] = (char)trace;
+        return 1;
+    }
+    if(!(py_trace = PyInt_FromLong(trace)))
+        return 0;
+    return PyList_SetItem(py_trace_row, col, py_trace) == 0;
+}
+
+#define SCORE_AT(row, col) PyFloat_AsDouble(PyList_GET_ITEM( \
+    PyList_GET_ITEM(py_score_matrix, (row)), (col)))
+
+static PyObject *_string_from_reversed(char *buffer, Py_ssize_t length)
+{
+    /* Reverse the buffer in place, and return it as a string. */
+    Py_ssize_t i;
+    char c;
+
+    for(i=0; i<length/2; i++) {
+        c = buffer[i];
+        buffer[i] = buffer[length-1-i];
+        buffer[length-1-i] = c;
+    }
+#if PY_MAJOR_VERSION >= 3
+    return PyUnicode_DecodeASCII(buffer, length, NULL);
+#else
+    return PyString_FromStringAndSize(buffer, length);
+#endif
+}
+
+/* Port of _recover_alignments in pairwise2 for string sequences, see there
+ * for the details. Returns the list of (unclean) tracebacks, or None if the
+ * sequences or gap character are not (ASCII) strings, in which case the
+ * Python implementation should be used.
+ */
+static PyObject *cpairwise2__recover_alignments(PyObject *self, PyObject *args)
+{
+    PyObject *py_sequenceA, *py_sequenceB, *py_starts;
+    PyObject *py_score_matrix, *py_trace_matrix, *py_gap_char;
+    PyObject *py_gap_A_fn, *py_gap_B_fn;
+    int align_globally, one_alignment_only;
+    Py_ssize_t max_alignments, max_paths;
+
+    PyObject *py_bytesA=NULL, *py_bytesB=NULL;
+    char *sequenceA, *sequenceB;
+    char gap_char;
+    int gap_residue;
+    PyObject *py_tracebacks=NULL, *py_retval=NULL;
+    PyObject *py_score=NULL;
+    TraceStack stack = {NULL, 0, 0, 0};
+    TraceState state = {NULL, NULL, 0, 0, 0, 1, 0, 0, 0, 0};
+    Py_ssize_t lenA, lenB, i, begin = 0, paths = 0;
+    Py_ssize_t n_starts;
+    char *valid=NULL;
+    int row, col, trace, dead_end, done = 0;
+
+    if(!PyArg_ParseTuple(args, "OOOOOiOiOOnn", &py_sequenceA, &py_sequenceB,
+                         &py_starts, &py_score_matrix, &py_trace_matrix,
+                         &align_globally, &py_gap_char, &one_alignment_only,
+                         &py_gap_A_fn, &py_gap_B_fn, &max_alignments,
+                         &max_paths))
+        return NULL;
+
+    /* Check we can deal with these sequences, else return None. */
+    gap_residue = _get_residue(py_gap_char);
+    if(gap_residue < 0 || !PyList_Check(py_starts) ||
+       !_get_sequence_cstrings(py_sequenceA, py_sequenceB,
+                               &py_bytesA, &py_bytesB,
+                               &sequenceA, &sequenceB)) {
+        Py_INCREF(Py_None);
+        py_retval = Py_None;
+        goto _cleanup_recover_alignments;
+    }
+    gap_char = (char)gap_residue;
+    lenA = PySequence_Length(py_sequenceA);
+    lenB = PySequence_Length(py_sequenceB);
+    if(!PyList_Check(py_score_matrix) || !PyList_Check(py_trace_matrix) ||
+       PyList_GET_SIZE(py_score_matrix) != lenA+1 ||
+       PyList_GET_SIZE(py_trace_matrix) != lenA+1) {
+        Py_INCREF(Py_None);
+        py_retval = Py_None;
+        goto _cleanup_recover_alignments;
+    }
+    for(i=0; i<=lenA; i++) {
+        PyObject *py_score_row = PyList_GET_ITEM(py_score_matrix, i);
+        PyObject *py_trace_row = PyList_GET_ITEM(py_trace_matrix, i);
+        if(!PyList_Check(py_score_row) ||
+           (!PyList_Check(py_trace_row) && !PyByteArray_Check(py_trace_row)) ||
+           PyList_GET_SIZE(py_score_row) != lenB+1 ||
+           Py_SIZE(py_trace_row) != lenB+1) {
+            Py_INCREF(Py_None);
+            py_retval = Py_None;
+            goto _cleanup_recover_alignments;
+        }
+    }
+
+    stack.capacity = lenA + lenB + 1;
+    state.ali_seqA = malloc(stack.capacity);
+    state.ali_seqB = malloc(stack.capacity);
+    if(!state.ali_seqA || !state.ali_seqB) {
+        PyErr_SetString(PyExc_MemoryError, "Out of memory");
+        goto _cleanup_recover_alignments;
+    }
+    if(!(py_tracebacks = PyList_New(0)))
+        goto _cleanup_recover_alignments;
+
+    n_starts = PyList_GET_SIZE(py_starts);
+    if(!(valid = malloc(n_starts + 1))) {
+        PyErr_SetString(PyExc_MemoryError, "Out of memory");
+        goto _cleanup_recover_alignments;
+    }
+    /* Check all the starting points first, as a local start changes the
+       traceback matrix. */
+    for(i=0; i<n_starts; i++) {
+        double score;
+        valid[i] = 1;
+        if(align_globally)
+            continue;
+        if(!PyArg_ParseTuple(PyList_GET_ITEM(py_starts, i), "O(ii)",
+                             &py_score, &row, &col))
+            goto _cleanup_recover_alignments;
+        score = PyFloat_AsDouble(py_score);
+        if(score == -1.0 && PyErr_Occurred())
+            goto _cleanup_recover_alignments;
+        /* Local alignments should start with a positive score! */
+        if(score <= 0) {
+            valid[i] = 0;
+            continue;
+        }
+        /* Local alignments should not end with a gap!: */
+        if((trace = _trace_at(py_trace_matrix, row, col)) < 0)
+            goto _cleanup_recover_alignments;
+        if((trace - trace % 2) % 4 == 2) {
+            if(!_set_trace(py_trace_matrix, row, col, 2))
+                goto _cleanup_recover_alignments;
+        }
+        /* If not, don't start here! */
+        else
+            valid[i] = 0;
+    }
+    /* All the starting points have the best score (within tolerance), the
+       one reported is from the last of them. */
+    if(n_starts && !PyArg_ParseTuple(PyList_GET_ITEM(py_starts, n_starts-1),
+                                     "O(ii)", &py_score, &row, &col))
+        goto _cleanup_recover_alignments;
+
+    /* The last starting point is followed first */
+    for(i=n_starts-1; i>=0 && !done; i--) {
+        PyObject *py_start_score;
+        if(!valid[i])
+            continue;
+        if(!PyArg_ParseTuple(PyList_GET_ITEM(py_starts, i), "O(ii)",
+                             &py_start_score, &row, &col))
+            goto _cleanup_recover_alignments;
+        state.lenA = state.lenB = 0;
+        if(align_globally) {
+            state.end_is_none = 1;
+        }
+        else {
+            Py_ssize_t col_distance, row_distance, j;
+            state.end = -((lenA - row > lenB - col) ? lenA - row : lenB - col);
+            state.end_is_none = !state.end;
+            col_distance = lenB - col;
+            row_distance = lenA - row;
+            /* Add the gap(s) and the rest of the sequences, backwards */
+            for(j=0; j<col_distance-row_distance; j++)
+                state.ali_seqA[state.lenA++] = gap_char;
+            for(j=lenA-1; row && j>=row; j--)
+                state.ali_seqA[state.lenA++] = sequenceA[j];
+            for(j=0; j<row_distance-col_distance; j++)
+                state.ali_seqB[state.lenB++] = gap_char;
+            for(j=lenB-1; col && j>=col; j--)
+                state.ali_seqB[state.lenB++] = sequenceB[j];
+        }
+        if((trace = _trace_at(py_trace_matrix, row, col)) < 0)
+            goto _cleanup_recover_alignments;
+        if(!_stack_push(&stack, &state, state.lenA, state.lenB,
+                        row, col, 0, trace)) {
+            PyErr_SetString(PyExc_MemoryError, "Out of memory");
+            goto _cleanup_recover_alignments;
+        }
+
+        while(stack.size) {
+            int col_gap;
+            if(paths >= max_paths) {
+                done = 1;
+                break;
+            }
+            paths++;
+            dead_end = 0;
+            /* Pop the last state, its buffers replace the current ones */
+            {
+                TraceState *top = &stack.items[--stack.size];
+                char *bufferA = state.ali_seqA, *bufferB = state.ali_seqB;
+                state = *top;
+                top->ali_seqA = bufferA;
+                top->ali_seqB = bufferB;
+                free(top->ali_seqA);
+                free(top->ali_seqB);
+            }
+            row = state.row;
+            col = state.col;
+            col_gap = state.col_gap;
+            trace = state.trace;
+
+            while((row > 0 || col > 0) && !dead_end) {
+                /* Remember where we were, to continue from here if there is
+                   another path to follow. */
+                Py_ssize_t cache_lenA = state.lenA, cache_lenB = state.lenB;
+                int cache_row = row, cache_col = col, cache_col_gap = col_gap;
+
+                /* If trace is empty we have reached at least one border of the
+                   matrix or the end of a local aligment. Just add the rest of
+                   the sequence(s) and fill with gaps if neccessary. */
+                if(!trace) {
+                    if(col && col_gap)
+                        dead_end = 1;
+                    else {
+                        /* This is _finish_backtrace */
+                        Py_ssize_t j;
+                        for(j=row-1; j>=0; j--)
+                            state.ali_seqA[state.lenA++] = sequenceA[j];
+                        for(j=col-1; j>=0; j--)
+                            state.ali_seqB[state.lenB++] = sequenceB[j];
+                        if(row > col)
+                            while(state.lenB < state.lenA)
+                                state.ali_seqB[state.lenB++] = gap_char;
+                        else if(col > row)
+                            while(state.lenA < state.lenB)
+                                state.ali_seqA[state.lenA++] = gap_char;
+                    }
+                    break;
+                }
+                else if(trace % 2 == 1) {  /* = row open = open gap in seqA */
+                    trace -= 1;
+                    if(col_gap)
+                        dead_end = 1;
+                    else {
+                        col -= 1;
+                        state.ali_seqA[state.lenA++] = gap_char;
+                        state.ali_seqB[state.lenB++] = sequenceB[col];
+                        col_gap = 0;
+                    }
+                }
+                else if(trace % 4 == 2) {
+                    /* = match/mismatch of seqA with seqB */
+                    trace -= 2;
+                    row -= 1;
+                    col -= 1;
+                    state.ali_seqA[state.lenA++] = sequenceA[row];
+                    state.ali_seqB[state.lenB++] = sequenceB[col];
+                    col_gap = 0;
+                }
+                else if(trace % 8 == 4) {  /* = col open = open gap in seqB */
+                    trace -= 4;
+                    row -= 1;
+                    state.ali_seqA[state.lenA++] = sequenceA[row];
+                    state.ali_seqB[state.lenB++] = gap_char;
+                    col_gap = 1;
+                }
+                else if(trace == 8 || trace == 24 || trace == 16) {
+                    /* = row extend = extend gap in seqA, or
+                       = col extend = extend gap in seqB.
+                       We need to find the starting point(s) of the
+                       extended gap, this is _find_gap_open */
+                    int in_row = (trace != 16);
+                    int n, target, index, next_trace, target_rint;
+                    double penalty, target_score;
+                    PyObject *py_gap_fn;
+
+                    if(in_row) {
+                        trace -= 8;
+                        if(col_gap)
+                            dead_end = 1;
+                        col_gap = 0;
+                        target = col;
+                        index = row;
+                        py_gap_fn = py_gap_A_fn;
+                    }
+                    else {
+                        trace -= 16;
+                        col_gap = 1;
+                        target = row;
+                        index = col;
+                        py_gap_fn = py_gap_B_fn;
+                    }
+                    if(!dead_end) {
+                        target_score = SCORE_AT(row, col);
+                        target_rint = rint(target_score);
+                        for(n=0; n<target; n++) {
+                            if(in_row) {
+                                col -= 1;
+                                state.ali_seqA[state.lenA++] = gap_char;
+                                state.ali_seqB[state.lenB++] = sequenceB[col];
+                            }
+                            else {
+                                row -= 1;
+                                state.ali_seqA[state.lenA++] = sequenceA[row];
+                                state.ali_seqB[state.lenB++] = gap_char;
+                            }
+                            if(PyList_GET_ITEM(PyList_GET_ITEM(py_score_matrix,
+                                               row), col) == Py_None) {
+                                /* The gap cannot start outside of the band */
+                                dead_end = 1;
+                                break;
+                            }
+                            if(!_call_gap_fn(py_gap_fn, index, n+1, &penalty,
+                                             NULL))
+                                goto _cleanup_recover_alignments;
+                            next_trace = _trace_at(py_trace_matrix, row, col);
+                            if(next_trace < 0)
+                                goto _cleanup_recover_alignments;
+                            if(rint(SCORE_AT(row, col) + penalty) ==
+                               target_rint && n > 0) {
+                                if(!next_trace)
+                                    break;
+                                if(!_stack_push(&stack, &state, state.lenA,
+                                                state.lenB, row, col, col_gap,
+                                                next_trace)) {
+                                    PyErr_SetString(PyExc_MemoryError,
+                                                    "Out of memory");
+                                    goto _cleanup_recover_alignments;
+                                }
+                            }
+                            if(!next_trace)
+                                dead_end = 1;
+                        }
+                    }
+                }
+
+                if(trace) {  /* There is another path to follow... */
+                    if(!_stack_push(&stack, &state, cache_lenA, cache_lenB,
+                                    cache_row, cache_col, cache_col_gap,
+                                    trace)) {
+                        PyErr_SetString(PyExc_MemoryError, "Out of memory");
+                        goto _cleanup_recover_alignments;
+                    }
+                }
+                if((trace = _trace_at(py_trace_matrix, row, col)) < 0)
+                    goto _cleanup_recover_alignments;
+                if(!align_globally && !dead_end && SCORE_AT(row, col) <= 0) {
+                    begin = (row > col) ? row : col;
+                    trace = 0;
+                }
+            }
+            if(PyErr_Occurred())
+                goto _cleanup_recover_alignments;
+            if(!dead_end) {
+                PyObject *py_seqA, *py_seqB, *py_traceback;
+                py_seqA = _string_from_reversed(state.ali_seqA, state.lenA);
+                py_seqB = _string_from_reversed(state.ali_seqB, state.lenB);
+                if(!py_seqA || !py_seqB) {
+                    Py_XDECREF(py_seqA);
+                    Py_XDECREF(py_seqB);
+                    goto _cleanup_recover_alignments;
+                }
+                if(state.end_is_none)
+                    py_traceback = Py_BuildValue("(NNOnO)", py_seqA, py_seqB,
+                                                 py_score, begin, Py_None);
+                else
+                    py_traceback = Py_BuildValue("(NNOnn)", py_seqA, py_seqB,
+                                                 py_score, begin, state.end);
+                if(!py_traceback)
+                    goto _cleanup_recover_alignments;
+                if(PyList_Append(py_tracebacks, py_traceback) < 0) {
+                    Py_DECREF(py_traceback);
+                    goto _cleanup_recover_alignments;
+                }
+                Py_DECREF(py_traceback);
+                if(one_alignment_only ||
+                   PyList_GET_SIZE(py_tracebacks) >= max_alignments) {
+                    done = 1;
+                    break;
+                }
+            }
+        }
+    }
+    Py_INCREF(py_tracebacks);
+    py_retval = py_tracebacks;
 
+ _cleanup_recover_alignments:
+    _free_stack(&stack);
+    if(valid)
+        free(valid);
+    if(state.ali_seqA)
+        free(state.ali_seqA);
+    if(state.ali_seqB)
+        free(state.ali_seqB);
+    Py_XDECREF(py_tracebacks);
+    Py_XDECREF(py_bytesA);
+    Py_XDECREF(py_bytesB);
     return py_retval;
 }
 
@@ -427,6 +1903,16 @@ static PyObject *cpairwise2_rint(PyObject *self, PyObject *args,
 static PyMethodDef cpairwise2Methods[] = {
     {"_make_score_matrix_fast",
      (PyCFunction)cpairwise2__make_score_matrix_fast, METH_VARARGS, ""},
+    {"_make_score_matrix_generic",
+     (PyCFunction)cpairwise2__make_score_matrix_generic, METH_VARARGS, ""},
+    {"_score_only_fast",
+     (PyCFunction)cpairwise2__score_only_fast, METH_VARARGS, ""},
+    {"_linear_pass", (PyCFunction)cpairwise2__linear_pass, METH_VARARGS, ""},
+    {"_score_profile",
+     (PyCFunction)cpairwise2__score_profile, METH_VARARGS, ""},
+    {"_find_start", (PyCFunction)cpairwise2__find_start, METH_VARARGS, ""},
+    {"_recover_alignments",
+     (PyCFunction)cpairwise2__recover_alignments, METH_VARARGS, ""},
     {"rint", (PyCFunction)cpairwise2_rint, METH_VARARGS|METH_KEYWORDS, ""},
     {NULL, NULL, 0, NULL}
 };
@@ -90,11 +90,35 @@ All alignment functions have the following arguments:
 
 - ``score_only``: boolean (default: False).
   Only get the best score, don't recover any alignments. The return value of
-  the function is the score. Faster and uses less memory.
+  the function is the score. Faster and uses less memory (for affine gap
+  penalties, only one row of the score matrix is kept).
 
 - ``one_alignment_only``: boolean (default: False).
   Only recover one alignment.
 
+- ``linear_memory``: boolean (default: False).
+  Return one best alignment, found with the divide and conquer algorithm of
+  Hirschberg (as extended to affine gap penalties by Myers and Miller). This
+  takes about twice as long, but needs memory proportional to the length of
+  the sequences rather than their product, so long sequences can be aligned.
+  Only for affine gap penalties; for local alignments ``penalize_end_gaps``
+  is ignored.
+
+- ``band``: integer (default: None).
+  Only fill in the cells of the score matrix within this many diagonals of
+  the diagonals through its start and end corners (i.e. allow an alignment to
+  drift at most this far from the direct path). This is much faster for
+  similar sequences, e.g. reads against a reference amplicon, but alignments
+  with more gaps than the band allows (or for local alignments, away from
+  these diagonals) are not found. Only for affine gap penalties.
+
+- ``widen_band``: boolean (default: False).
+  Repeatedly double the ``band`` while the best alignment found touches its
+  edge (and so a better alignment might lie outside of it). This is a
+  heuristic, which does not guarantee finding the optimal score: a better
+  alignment may lie outside of the band even if the best one inside it does
+  not touch the edge. Only for global alignments.
+
 The other parameters of the alignment function depend on the function called.
 Some examples:
 
@@ -211,6 +235,14 @@ Some examples:
   Self-defined match functions must take the two residues to be compared and
   return a score.
 
+To align one query against many targets (e.g. a database search), use the
+``align_many`` function, which takes the name of the alignment function and
+by default returns an array of the scores:
+
+    >>> scores = pairwise2.align_many("globalxx", "ACCGT", ["ACG", "CCGA"])
+    >>> print(list(scores))
+    [3.0, 3.0]
+
 To see a description of the parameters for a function, please look at
 the docstring for the function via the help function, e.g.
 type ``help(pairwise2.align.localds``) at the Python prompt.
@@ -219,11 +251,17 @@ type ``help(pairwise2.align.localds``) at the Python prompt.
 from __future__ import print_function
 
 import warnings
+from array import array
 
 from Bio import BiopythonWarning
 
 
 MAX_ALIGNMENTS = 1000   # maximum alignments recovered in traceback
+MAX_TRACEBACK_PATHS = 100000  # maximum paths (incl. dead ends) followed
+
+# Score of the cells next to a band, lower than any alignment (but finite,
+# so that it still works with rint)
+_OUTSIDE_BAND = -1e300
 
 
 class align(object):
@@ -369,6 +407,9 @@ alignment occurs.
                 ('force_generic', 0),
                 ('score_only', 0),
                 ('one_alignment_only', 0),
+                ('linear_memory', 0),
+                ('band', None),
+                ('widen_band', 0),
             ]
             for name, default in default_params:
                 keywds[name] = keywds.get(name, default)
@@ -392,10 +433,167 @@ alignment occurs.
 align = align()
 
 
+def align_many(function, query, targets, *args, **keywds):
+    """Align one query sequence against each of many target sequences.
+
+    function is the name of one of the alignment functions of align, for
+    example "localds" or "globalxx", and the remaining arguments are given
+    as for that function, without the second sequence.  The arguments are
+    checked once, and for the usual match and affine gap functions the
+    match scores of the query against every residue are calculated once
+    and shared by all the targets (a query profile).
+
+    By default, only the scores are calculated (in linear memory), and
+    these are returned as an array of floats in the order of the targets,
+    using NaN if the query or the target is empty.  Use score_only=False to
+    get a tuple of the scores and a list with the alignments of each target.
+
+    Use processes to split the targets over a pool of worker processes
+    (default 1, meaning no pool; None means the number of CPUs).  This
+    needs the arguments and sequences to be picklable, and on platforms
+    without fork, the calling script must be protected by an
+    ``if __name__ == "__main__":`` test.
+
+    >>> from Bio import pairwise2
+    >>> from Bio.SubsMat.MatrixInfo import blosum62
+    >>> scores = pairwise2.align_many("localds", "KEVLA",
+    ...                               ["EVL", "KEVLA", "WWW"],
+    ...                               blosum62, -10, -1)
+    >>> print(list(scores))
+    [13.0, 22.0, 0.0]
+    """
+    score_only = keywds.pop("score_only", True)
+    processes = keywds.pop("processes", 1)
+    # Check the arguments once, with the query standing in for the target
+    keywds = getattr(align, function).decode(query, query, *args, **keywds)
+    keywds["score_only"] = score_only
+
+    if processes == 1:
+        jobs = [targets]
+    else:
+        from multiprocessing import Pool, cpu_count
+        if processes is None:
+            processes = cpu_count()
+        targets = list(targets)
+        # Several chunks per process to balance uneven target lengths
+        chunk_size = max(1, len(targets) // (4 * processes))
+        jobs = [targets[i:i + chunk_size]
+                for i in range(0, len(targets), chunk_size)]
+        if len(jobs) == 1:
+            processes = 1
+
+    if processes == 1:
+        results = [_align_many_job((keywds, chunk)) for chunk in jobs]
+    else:
+        pool = Pool(processes)
+        try:
+            results = pool.map(_align_many_job,
+                               [(keywds, chunk) for chunk in jobs])
+        except BaseException:
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+
+    scores = array("d")
+    for chunk_scores, chunk_alignments in results:
+        scores.extend(chunk_scores)
+    if score_only:
+        return scores
+    alignments = []
+    for chunk_scores, chunk_alignments in results:
+        alignments.extend(chunk_alignments)
+    return scores, alignments
+
+
+def _align_many_job(args):
+    """Align the query against a chunk of targets for align_many (PRIVATE).
+
+    This is a top level function so that it can be used by worker
+    processes. Returns a list of scores and a list of the alignments of
+    each target (or None if only the scores are wanted).
+    """
+    keywds, targets = args
+    keywds = keywds.copy()
+    query = keywds["sequenceA"]
+    score_only = keywds["score_only"]
+    match_fn = keywds["match_fn"]
+    gap_A_fn, gap_B_fn = keywds["gap_A_fn"], keywds["gap_B_fn"]
+    profile = None
+    if score_only and _c_score_profile is not None and query \
+       and not keywds["force_generic"] and keywds["band"] is None \
+       and not isinstance(query, list) \
+       and isinstance(gap_A_fn, affine_penalty) \
+       and isinstance(gap_B_fn, affine_penalty) \
+       and isinstance(match_fn, (identity_match, dictionary_match)):
+        profile = _make_query_profile(str(query), match_fn)
+        profile_args = (gap_A_fn.open, gap_A_fn.extend,
+                        gap_B_fn.open, gap_B_fn.extend,
+                        keywds["penalize_extend_when_opening"],
+                        keywds["penalize_end_gaps"],
+                        keywds["align_globally"])
+
+    nan = float("nan")
+    scores = []
+    alignments = None if score_only else []
+    for target in targets:
+        if not query or not target:
+            scores.append(nan)
+            if not score_only:
+                alignments.append([])
+            continue
+        if profile is not None and not isinstance(target, list):
+            score = _c_score_profile(profile, str(target), *profile_args)
+            if score is not None:
+                scores.append(score)
+                continue
+        keywds["sequenceB"] = target
+        result = _align(**keywds)
+        if score_only:
+            scores.append(result)
+            continue
+        if not result:
+            # e.g. a local alignment with nothing scoring above zero
+            keywds["score_only"] = True
+            result = _align(**keywds)
+            keywds["score_only"] = False
+            scores.append(result)
+            alignments.append([])
+        else:
+            scores.append(result[0][2])
+            alignments.append(result)
+    return scores, alignments
+
+
+def _make_query_profile(query, match_fn):
+    """Return the match scores of a query against all ASCII residues (PRIVATE).
+
+    The scores are packed as C doubles in a bytes string, with a row of
+    len(query) scores for each of the 128 ASCII characters.  Where the
+    match function raises a KeyError (i.e. a residue missing from the
+    substitution matrix), the row is filled with NaN.
+    """
+    nan = float("nan")
+    profile = array("d")
+    for code in range(128):
+        residue = chr(code)
+        try:
+            profile.extend([match_fn(charA, residue) for charA in query])
+        except KeyError:
+            profile.extend([nan] * len(query))
+    try:
+        return profile.tobytes()
+    except AttributeError:
+        # Python 2
+        return profile.tostring()
+
+
 def _align(sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
            penalize_extend_when_opening, penalize_end_gaps,
            align_globally, gap_char, force_generic, score_only,
-           one_alignment_only):
+           one_alignment_only, linear_memory, band, widen_band):
     """Return a list of alignments between two sequences or its score"""
     if not sequenceA or not sequenceB:
         return []
@@ -406,20 +604,63 @@ def _align(sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
         raise TypeError('both sequences must be of the same type, either ' +
                         'string/sequence object or list. Gap character must ' +
                         'fit the sequence type (string or list)')
+    if band is not None and band < 0:
+        raise ValueError("band should be a non-negative integer")
+    if band is not None and widen_band and not align_globally:
+        # The best local alignment can be far from the diagonals of the
+        # band, without the best one within the band touching its edge
+        raise ValueError("widen_band is only for global alignments")
 
     if not isinstance(sequenceA, list):
         sequenceA = str(sequenceA)
     if not isinstance(sequenceB, list):
         sequenceB = str(sequenceB)
 
+    if band is not None and widen_band:
+        # Double the band until the (first) best alignment found does not
+        # touch its edge, or the band covers the whole matrix.
+        while band < max(len(sequenceA), len(sequenceB)):
+            lowest, highest = _band_limits(len(sequenceA), len(sequenceB),
+                                           band)
+            alignments = _align(
+                sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
+                penalize_extend_when_opening, penalize_end_gaps,
+                align_globally, gap_char, force_generic, False,
+                one_alignment_only, linear_memory, band, False)
+            if not [alignment for alignment in alignments
+                    if _at_band_edge(alignment, lowest, highest, gap_char)]:
+                if not score_only:
+                    return alignments
+                break
+            band = 2 * band or 1
+
     if (not force_generic) and isinstance(gap_A_fn, affine_penalty) \
        and isinstance(gap_B_fn, affine_penalty):
         open_A, extend_A = gap_A_fn.open, gap_A_fn.extend
         open_B, extend_B = gap_B_fn.open, gap_B_fn.extend
+        # These only need memory for one row of the score matrix.
+        if score_only and band is None:
+            return _score_only_fast(
+                sequenceA, sequenceB, match_fn, open_A, extend_A, open_B,
+                extend_B, penalize_extend_when_opening, penalize_end_gaps,
+                align_globally)
+        if linear_memory and band is not None:
+            raise ValueError("linear_memory cannot be combined with a band")
+        if linear_memory:
+            return _align_linear(
+                sequenceA, sequenceB, match_fn, open_A, extend_A, open_B,
+                extend_B, penalize_extend_when_opening, penalize_end_gaps,
+                align_globally, gap_char)
         x = _make_score_matrix_fast(
             sequenceA, sequenceB, match_fn, open_A, extend_A, open_B,
             extend_B, penalize_extend_when_opening, penalize_end_gaps,
-            align_globally, score_only)
+            align_globally, score_only, band)
+    elif linear_memory and not score_only:
+        raise ValueError("linear_memory needs affine gap penalties (and "
+                         "not force_generic)")
+    elif band is not None:
+        raise ValueError("band needs affine gap penalties (and not "
+                         "force_generic)")
     else:
         x = _make_score_matrix_generic(
             sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
@@ -429,28 +670,42 @@ def _align(sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
     # print("SCORE %s" % print_matrix(score_matrix))
     # print("TRACEBACK %s" % print_matrix(trace_matrix))
 
-    # Look for the proper starting point. Get a list of all possible
-    # starting points.
-    starts = _find_start(score_matrix, align_globally)
-    # Find the highest score.
-    best_score = max([x[0] for x in starts])
+    # Look for the proper starting point(s), i.e. the highest score and
+    # all the positions within some tolerance of it.
+    best_score, starts = _find_start(score_matrix, align_globally)
 
     # If they only want the score, then return it.
     if score_only:
         return best_score
 
-    tolerance = 0  # XXX do anything with this?
-    # Now find all the positions within some tolerance of the best
-    # score.
-    starts = [(score, pos) for score, pos in starts
-              if rint(abs(score - best_score)) <= rint(tolerance)]
-
     # Recover the alignments and return them.
     return _recover_alignments(sequenceA, sequenceB, starts, score_matrix,
                                trace_matrix, align_globally, gap_char,
                                one_alignment_only, gap_A_fn, gap_B_fn)
 
 
+def _at_band_edge(alignment, lowest, highest, gap_char):
+    """Return True if the path of an alignment touches the edge of a band.
+
+    lowest and highest are the diagonals (col - row) at the edges of the
+    band, as given by _band_limits.
+    """
+    seqA, seqB, score, begin, end = alignment
+    gap_char = gap_char[0]  # for lists of residues
+    row = begin - seqA[:begin].count(gap_char)
+    col = begin - seqB[:begin].count(gap_char)
+    if col - row in (lowest, highest):
+        return True
+    for residueA, residueB in zip(seqA[begin:end], seqB[begin:end]):
+        if residueA != gap_char:
+            row += 1
+        if residueB != gap_char:
+            col += 1
+        if col - row in (lowest, highest):
+            return True
+    return False
+
+
 def _make_score_matrix_generic(sequenceA, sequenceB, match_fn, gap_A_fn,
                                gap_B_fn, penalize_end_gaps, align_globally,
                                score_only):
@@ -468,7 +723,8 @@ def _make_score_matrix_generic(sequenceA, sequenceB, match_fn, gap_A_fn,
     for i in range(lenA + 1):
         score_matrix.append([None] * (lenB + 1))
         if not score_only:
-            trace_matrix.append([None] * (lenB + 1))
+            # The traceback is a bit field, so one byte per cell is enough
+            trace_matrix.append(bytearray(lenB + 1))
 
     # Initialize first row and column with gap scores. This is like opening up
     # i gaps at the beginning of sequence A or B.
@@ -548,10 +804,29 @@ def _make_score_matrix_generic(sequenceA, sequenceB, match_fn, gap_A_fn,
     return score_matrix, trace_matrix
 
 
+def _band_limits(lenA, lenB, band):
+    """Return the lowest and highest diagonal (col - row) within a band.
+
+    The band includes the diagonals through both corners of the matrix
+    (i.e. the start and end of a global alignment), widened by band
+    diagonals on either side. If band is None, all the diagonals.
+    """
+    if band is None:
+        return -lenA, lenB
+    return min(0, lenB - lenA) - band, max(0, lenB - lenA) + band
+
+
 def _make_score_matrix_fast(sequenceA, sequenceB, match_fn, open_A, extend_A,
                             open_B, extend_B, penalize_extend_when_opening,
-                            penalize_end_gaps, align_globally, score_only):
-    """Generate a score and traceback matrix according to Gotoh"""
+                            penalize_end_gaps, align_globally, score_only,
+                            band=None):
+    """Generate a score and traceback matrix according to Gotoh.
+
+    If band is given, only the cells within that many diagonals of the
+    diagonals through the two corners of the matrix are calculated (see
+    _band_limits), and the other cells are None in the score matrix and
+    zero in the traceback matrix.
+    """
     # This is an implementation of the Needleman-Wunsch dynamic programming
     # algorithm as modified by Gotoh, implementing affine gap penalties.
     # In short, we have three matrices, holding scores for alignments ending
@@ -574,18 +849,22 @@ def _make_score_matrix_fast(sequenceA, sequenceB, match_fn, open_A, extend_A,
     for i in range(lenA + 1):
         score_matrix.append([None] * (lenB + 1))
         if not score_only:
-            trace_matrix.append([None] * (lenB + 1))
+            # The traceback is a bit field, so one byte per cell is enough
+            trace_matrix.append(bytearray(lenB + 1))
+
+    # The cells to calculate are those with lowest <= col - row <= highest.
+    lowest, highest = _band_limits(lenA, lenB, band)
 
     # Initialize first row and column with gap scores. This is like opening up
     # i gaps at the beginning of sequence A or B.
-    for i in range(lenA + 1):
+    for i in range(min(lenA, -lowest) + 1):
         if penalize_end_gaps[1]:  # [1]:gap in sequence B
             score = calc_affine_penalty(i, open_B, extend_B,
                                         penalize_extend_when_opening)
         else:
             score = 0
         score_matrix[i][0] = score
-    for i in range(lenB + 1):
+    for i in range(min(lenB, highest) + 1):
         if penalize_end_gaps[0]:  # [0]:gap in sequence A
             score = calc_affine_penalty(i, open_A, extend_A,
                                         penalize_extend_when_opening)
@@ -603,10 +882,22 @@ def _make_score_matrix_fast(sequenceA, sequenceB, match_fn, open_A, extend_A,
     # The row 'matrix' is calculated on the fly. Here we only need the actual
     # score.
     # Now, filling up the score and traceback matrices:
+    outside_band = []
     for row in range(1, lenA + 1):
         row_score = calc_affine_penalty(row, 2 * open_A, extend_A,
                                         penalize_extend_when_opening)
-        for col in range(1, lenB + 1):
+        first_col = max(1, row + lowest)
+        last_col = min(lenB, row + highest)
+        # Within a band, the neighbours just outside of it must never be
+        # used, so (for now) give them an impossibly bad score.
+        if row + lowest > 0:
+            score_matrix[row][first_col - 1] = row_score = _OUTSIDE_BAND
+            outside_band.append((row, first_col - 1))
+        if row - 1 + highest < lenB:
+            score_matrix[row - 1][row + highest] = _OUTSIDE_BAND
+            col_score[row + highest] = _OUTSIDE_BAND
+            outside_band.append((row - 1, row + highest))
+        for col in range(first_col, last_col + 1):
             # Calculate the score that would occur by extending the
             # alignment without gaps.
             nogap_score = score_matrix[row - 1][col - 1] + \
@@ -673,37 +964,398 @@ def _make_score_matrix_fast(sequenceA, sequenceB, match_fn, open_A, extend_A,
                     trace_score += col_trace_score
                 trace_matrix[row][col] = trace_score
 
+    for row, col in outside_band:
+        score_matrix[row][col] = None
     return score_matrix, trace_matrix
 
 
+def _score_only_fast(sequenceA, sequenceB, match_fn, open_A, extend_A, open_B,
+                     extend_B, penalize_extend_when_opening,
+                     penalize_end_gaps, align_globally):
+    """Return the best score of _make_score_matrix_fast in linear space.
+
+    Only the last row of the score matrix is kept. If sequenceB is the
+    longer sequence, the transposed matrix is calculated instead, which
+    gives the same score using less memory.
+    """
+    if len(sequenceB) > len(sequenceA):
+        def transposed_match_fn(charB, charA):
+            return match_fn(charA, charB)
+        return _score_only_fast(sequenceB, sequenceA, transposed_match_fn,
+                                open_B, extend_B, open_A, extend_A,
+                                penalize_extend_when_opening,
+                                penalize_end_gaps[::-1], align_globally)
+
+    first_A_gap = calc_affine_penalty(1, open_A, extend_A,
+                                      penalize_extend_when_opening)
+    first_B_gap = calc_affine_penalty(1, open_B, extend_B,
+                                      penalize_extend_when_opening)
+    lenA, lenB = len(sequenceA), len(sequenceB)
+
+    # The first row of the score matrix, and the col 'matrix' as in
+    # _make_score_matrix_fast.
+    if penalize_end_gaps[0]:
+        last_row = [calc_affine_penalty(i, open_A, extend_A,
+                                        penalize_extend_when_opening)
+                    for i in range(lenB + 1)]
+    else:
+        last_row = [0] * (lenB + 1)
+    best_score = max(last_row)
+    col_score = [0]
+    for i in range(1, lenB + 1):
+        col_score.append(calc_affine_penalty(i, 2 * open_B, extend_B,
+                                             penalize_extend_when_opening))
+
+    for row in range(1, lenA + 1):
+        if penalize_end_gaps[1]:
+            score = calc_affine_penalty(row, open_B, extend_B,
+                                        penalize_extend_when_opening)
+        else:
+            score = 0
+        this_row = [score]
+        row_score = calc_affine_penalty(row, 2 * open_A, extend_A,
+                                        penalize_extend_when_opening)
+        charA = sequenceA[row - 1]
+        for col in range(1, lenB + 1):
+            nogap_score = last_row[col - 1] + match_fn(charA,
+                                                       sequenceB[col - 1])
+            if not penalize_end_gaps[0] and row == lenA:
+                row_open = this_row[col - 1]
+                row_extend = row_score
+            else:
+                row_open = this_row[col - 1] + first_A_gap
+                row_extend = row_score + extend_A
+            row_score = max(row_open, row_extend)
+            if not penalize_end_gaps[1] and col == lenB:
+                col_open = last_row[col]
+                col_extend = col_score[col]
+            else:
+                col_open = last_row[col] + first_B_gap
+                col_extend = col_score[col] + extend_B
+            col_score[col] = max(col_open, col_extend)
+            score = max(nogap_score, col_score[col], row_score)
+            if not align_globally and score < 0:
+                score = 0
+            this_row.append(score)
+        if not align_globally:
+            best_score = max(best_score, max(this_row))
+        last_row = this_row
+
+    if align_globally:
+        return last_row[-1]
+    return best_score
+
+
+def _linear_pass(sequenceA, sequenceB, match_fn, open_A, extend_A, open_B,
+                 extend_B, penalize_extend_when_opening, free_start_gaps,
+                 open_start_gap_B, align_globally):
+    """Fill in the score matrix according to Gotoh, keeping only one row.
+
+    This is used by _align_linear. Unlike _make_score_matrix_fast, gaps at
+    the end of the sequences are always penalized, while free_start_gaps
+    (a pair of booleans for sequence A and B) says if gaps at the start are
+    free. If open_start_gap_B is false, a gap in sequence B at the start
+    only costs the extension penalties, as it continues an earlier gap.
+
+    Returns the last row of the score matrix, the last row of the scores
+    for alignments ending with a gap in sequence B, the last column of the
+    score matrix, and the best score in the matrix with its (first) position
+    (row, col).
+    """
+    first_A_gap = calc_affine_penalty(1, open_A, extend_A,
+                                      penalize_extend_when_opening)
+    first_B_gap = calc_affine_penalty(1, open_B, extend_B,
+                                      penalize_extend_when_opening)
+    lenA, lenB = len(sequenceA), len(sequenceB)
+    no_score = float("-inf")
+
+    if free_start_gaps[0]:
+        score_row = [0] * (lenB + 1)
+    else:
+        score_row = [calc_affine_penalty(i, open_A, extend_A,
+                                         penalize_extend_when_opening)
+                     for i in range(lenB + 1)]
+    gap_B_row = [no_score] * (lenB + 1)
+    score_col = [score_row[-1]]
+    best_score = max(score_row)
+    best_pos = (0, score_row.index(best_score))
+
+    for row in range(1, lenA + 1):
+        if free_start_gaps[1]:
+            score = 0
+        elif open_start_gap_B:
+            score = calc_affine_penalty(row, open_B, extend_B,
+                                        penalize_extend_when_opening)
+        else:
+            score = extend_B * row
+        diagonal_score, score_row[0], gap_B_row[0] = score_row[0], score, score
+        gap_A_score = no_score
+        charA = sequenceA[row - 1]
+        for col in range(1, lenB + 1):
+            nogap_score = diagonal_score + match_fn(charA, sequenceB[col - 1])
+            gap_A_score = max(score + first_A_gap, gap_A_score + extend_A)
+            diagonal_score = score_row[col]
+            gap_B_row[col] = max(diagonal_score + first_B_gap,
+                                 gap_B_row[col] + extend_B)
+            score = max(nogap_score, gap_A_score, gap_B_row[col])
+            if not align_globally and score < 0:
+                score = 0
+            score_row[col] = score
+        score_col.append(score_row[-1])
+        row_best = max(score_row)
+        if row_best > best_score:
+            best_score = row_best
+            best_pos = (row, score_row.index(row_best))
+    return score_row, gap_B_row, score_col, best_score, best_pos
+
+
+def _align_linear(sequenceA, sequenceB, match_fn, open_A, extend_A, open_B,
+                  extend_B, penalize_extend_when_opening, penalize_end_gaps,
+                  align_globally, gap_char):
+    """Return one best alignment, using memory linear in the sequence length.
+
+    The aligned region is located with _linear_pass, and then aligned with
+    the divide and conquer algorithm of Hirschberg, as extended to affine
+    gap penalties by Myers and Miller (CABIOS 1988, 4:11-17).
+    """
+    lenA, lenB = len(sequenceA), len(sequenceB)
+    gap_args = (open_A, extend_A, open_B, extend_B,
+                penalize_extend_when_opening)
+    if align_globally:
+        # The alignment may start and end with free gaps in one of the
+        # sequences, so find where the penalized part of it starts and ends.
+        score_row, gap_B_row, score_col, best_score, best_pos = _linear_pass(
+            sequenceA, sequenceB, match_fn,
+            open_A, extend_A, open_B, extend_B, penalize_extend_when_opening,
+            (not penalize_end_gaps[0], not penalize_end_gaps[1]), True, True)
+        best_score, end_row, end_col = score_row[-1], lenA, lenB
+        if not penalize_end_gaps[0]:
+            score = max(score_row)
+            if score > best_score:
+                best_score, end_col = score, score_row.index(score)
+        if not penalize_end_gaps[1]:
+            score = max(score_col)
+            if score > best_score:
+                best_score, end_row = score, score_col.index(score)
+                end_col = lenB
+        start_row, start_col = 0, 0
+        if not (penalize_end_gaps[0] and penalize_end_gaps[1]):
+            # Now the same backwards, from the end of the penalized part.
+            score_row, gap_B_row, score_col, score, pos = _linear_pass(
+                sequenceA[end_row - 1::-1] if end_row else sequenceA[0:0],
+                sequenceB[end_col - 1::-1] if end_col else sequenceB[0:0],
+                match_fn, open_A, extend_A, open_B, extend_B,
+                penalize_extend_when_opening, (False, False), True, True)
+            score = score_row[-1]
+            if not penalize_end_gaps[0]:
+                if max(score_row) > score:
+                    score = max(score_row)
+                    start_col = end_col - score_row.index(score)
+            if not penalize_end_gaps[1]:
+                if max(score_col) > score:
+                    score = max(score_col)
+                    start_row, start_col = end_row - score_col.index(score), 0
+    else:
+        score_row, gap_B_row, score_col, best_score, best_pos = _linear_pass(
+            sequenceA, sequenceB, match_fn,
+            open_A, extend_A, open_B, extend_B, penalize_extend_when_opening,
+            (True, True), True, False)
+        # Local alignments should start with a positive score!
+        if best_score <= 0:
+            return []
+        end_row, end_col = best_pos
+        # The start is where the best score is reached going backwards.
+        score_row, gap_B_row, score_col, score, pos = _linear_pass(
+            sequenceA[end_row - 1::-1], sequenceB[end_col - 1::-1], match_fn,
+            open_A, extend_A, open_B, extend_B, penalize_extend_when_opening,
+            (False, False), True, True)
+        start_row, start_col = end_row - pos[0], end_col - pos[1]
+
+    pieces = []
+    _hirschberg(sequenceA[start_row:end_row], sequenceB[start_col:end_col],
+                match_fn, gap_args, gap_char, True, True, pieces)
+    if align_globally:
+        # Free end gaps, before and after the aligned part
+        pieces.insert(0, (sequenceA[:start_row], gap_char * start_row))
+        pieces.insert(0, (gap_char * start_col, sequenceB[:start_col]))
+        pieces.append((sequenceA[end_row:], gap_char * (lenA - end_row)))
+        pieces.append((gap_char * (lenB - end_col), sequenceB[end_col:]))
+        begin = 0
+    else:
+        # The rest of the sequences, as in _finish_backtrace
+        begin = max(start_row, start_col)
+        pieces.insert(0, (gap_char * (begin - start_row) +
+                          sequenceA[:start_row],
+                          gap_char * (begin - start_col) +
+                          sequenceB[:start_col]))
+        rest = max(lenA - end_row, lenB - end_col)
+        pieces.append((sequenceA[end_row:] +
+                       gap_char * (rest - lenA + end_row),
+                       sequenceB[end_col:] +
+                       gap_char * (rest - lenB + end_col)))
+    if isinstance(sequenceA, list):
+        ali_seqA = [x for piece, _ in pieces for x in piece]
+        ali_seqB = [x for _, piece in pieces for x in piece]
+    else:
+        ali_seqA = "".join(piece for piece, _ in pieces)
+        ali_seqB = "".join(piece for _, piece in pieces)
+    end = len(ali_seqA)
+    if not align_globally:
+        end -= max(lenA - end_row, lenB - end_col)
+    return _clean_alignments([(ali_seqA, ali_seqB, best_score, begin, end)])
+
+
+def _hirschberg(sequenceA, sequenceB, match_fn, gap_args, gap_char,
+                open_start_gap_B, open_end_gap_B, pieces):
+    """Align two sequences globally in linear space (PRIVATE).
+
+    Appends pairs of aligned pieces of sequenceA and sequenceB to the list
+    pieces. If open_start_gap_B (open_end_gap_B) is false, a gap in
+    sequenceB at the start (end) continues a gap outside of this part of the
+    alignment, so it is not penalized for opening.
+    """
+    open_A, extend_A, open_B, extend_B, penalize_extend_when_opening = \
+        gap_args
+    lenA, lenB = len(sequenceA), len(sequenceB)
+    if not lenB:
+        pieces.append((sequenceA, gap_char * lenA))
+        return
+    if not lenA:
+        pieces.append((gap_char * lenB, sequenceB))
+        return
+    if lenA == 1:
+        # Align the residue with one in sequenceB, or with a gap.
+        best_score = None
+        for col in range(lenB):
+            score = (calc_affine_penalty(col, open_A, extend_A,
+                                         penalize_extend_when_opening) +
+                     match_fn(sequenceA[0], sequenceB[col]) +
+                     calc_affine_penalty(lenB - col - 1, open_A, extend_A,
+                                         penalize_extend_when_opening))
+            if best_score is None or score > best_score:
+                best_score, best_col = score, col
+        if open_start_gap_B and open_end_gap_B:
+            score = calc_affine_penalty(1, open_B, extend_B,
+                                        penalize_extend_when_opening)
+        else:
+            score = extend_B
+        score += calc_affine_penalty(lenB, open_A, extend_A,
+                                     penalize_extend_when_opening)
+        if score > best_score:
+            if open_start_gap_B:
+                pieces.append((gap_char * lenB, sequenceB))
+                pieces.append((sequenceA, gap_char))
+            else:
+                pieces.append((sequenceA, gap_char))
+                pieces.append((gap_char * lenB, sequenceB))
+        else:
+            pieces.append((gap_char * best_col, sequenceB[:best_col]))
+            pieces.append((sequenceA, sequenceB[best_col:best_col + 1]))
+            pieces.append((gap_char * (lenB - best_col - 1),
+                           sequenceB[best_col + 1:]))
+        return
+
+    # Find where the best alignment crosses the middle row, from the scores
+    # of the first half, and (backwards) of the second half of sequenceA.
+    middle = lenA // 2
+    score_row, gap_B_row = _linear_pass(
+        sequenceA[:middle], sequenceB, match_fn, open_A, extend_A, open_B,
+        extend_B, penalize_extend_when_opening, (False, False),
+        open_start_gap_B, True)[:2]
+    back_score_row, back_gap_B_row = _linear_pass(
+        sequenceA[middle:][::-1], sequenceB[::-1], match_fn, open_A,
+        extend_A, open_B, extend_B, penalize_extend_when_opening,
+        (False, False), open_end_gap_B, True)[:2]
+    # A gap in sequenceB across the middle row was opened in both halves.
+    open_B_only = calc_affine_penalty(1, open_B, extend_B,
+                                      penalize_extend_when_opening) - extend_B
+    best_score = None
+    for col in range(lenB + 1):
+        score = score_row[col] + back_score_row[lenB - col]
+        if best_score is None or score > best_score:
+            best_score, best_col, gap_B = score, col, False
+        score = gap_B_row[col] + back_gap_B_row[lenB - col] - open_B_only
+        if score > best_score:
+            best_score, best_col, gap_B = score, col, True
+
+    if gap_B:
+        _hirschberg(sequenceA[:middle - 1], sequenceB[:best_col], match_fn,
+                    gap_args, gap_char, open_start_gap_B, False, pieces)
+        pieces.append((sequenceA[middle - 1:middle + 1], gap_char * 2))
+        _hirschberg(sequenceA[middle + 1:], sequenceB[best_col:], match_fn,
+                    gap_args, gap_char, False, open_end_gap_B, pieces)
+    else:
+        _hirschberg(sequenceA[:middle], sequenceB[:best_col], match_fn,
+                    gap_args, gap_char, open_start_gap_B, True, pieces)
+        _hirschberg(sequenceA[middle:], sequenceB[best_col:], match_fn,
+                    gap_args, gap_char, True, open_end_gap_B, pieces)
+
+
 def _recover_alignments(sequenceA, sequenceB, starts, score_matrix,
                         trace_matrix, align_globally, gap_char,
                         one_alignment_only, gap_A_fn, gap_B_fn):
     """Do the backtracing and return a list of alignments"""
+    if _c_recover_alignments is not None:
+        # The C version handles string sequences, returning None otherwise
+        tracebacks = _c_recover_alignments(
+            sequenceA, sequenceB, starts, score_matrix, trace_matrix,
+            align_globally, gap_char, one_alignment_only, gap_A_fn, gap_B_fn,
+            MAX_ALIGNMENTS, MAX_TRACEBACK_PATHS)
+        if tracebacks is not None:
+            return _clean_alignments(tracebacks)
+    tracebacks = []
+    for traceback in _iter_tracebacks(sequenceA, sequenceB, starts,
+                                      score_matrix, trace_matrix,
+                                      align_globally, gap_char, gap_A_fn,
+                                      gap_B_fn):
+        tracebacks.append(traceback)
+        if one_alignment_only or len(tracebacks) >= MAX_ALIGNMENTS:
+            break
+    return _clean_alignments(tracebacks)
+
+
+def _iter_tracebacks(sequenceA, sequenceB, starts, score_matrix, trace_matrix,
+                     align_globally, gap_char, gap_A_fn, gap_B_fn):
+    """Follow the traceback matrix, yielding the alignments found.
+
+    The alignments may include duplicates, and still need cleaning up by
+    _clean_alignments. The starting points are only followed when needed,
+    and at most MAX_TRACEBACK_PATHS paths (including those which turn out
+    to be dead ends) are tried, so a few alignments can be taken quickly
+    even if there are very many equally good ones.
+    """
     # Recover the alignments by following the traceback matrix.  This
     # is a recursive procedure, but it's implemented here iteratively
     # with a stack.
     lenA, lenB = len(sequenceA), len(sequenceB)
-    ali_seqA, ali_seqB = sequenceA[0:0], sequenceB[0:0]
-    tracebacks = []
-    in_process = []
-
-    for start in starts:
-        score, (row, col) = start
-        begin = 0
-        if align_globally:
-            end = None
-        else:
+    if not starts:
+        return
+    # All the starting points have the best score (within tolerance), the
+    # one reported is from the last of them
+    score = starts[-1][0]
+    if not align_globally:
+        local_starts = []
+        for start in starts:
+            start_score, (row, col) = start
             # Local alignments should start with a positive score!
-            if score <= 0:
+            if start_score <= 0:
                 continue
             # Local alignments should not end with a gap!:
             trace = trace_matrix[row][col]
             if (trace - trace % 2) % 4 == 2:  # Trace contains 'nogap', fine!
                 trace_matrix[row][col] = 2
+                local_starts.append(start)
             # If not, don't start here!
-            else:
-                continue
+        starts = local_starts
+    begin = 0
+    paths = 0
+    # The last starting point is followed first
+    for start in starts[::-1]:
+        row, col = start[1]
+        ali_seqA, ali_seqB = sequenceA[0:0], sequenceB[0:0]
+        if align_globally:
+            end = None
+        else:
             end = -max(lenA - row, lenB - col)
             if not end:
                 end = None
@@ -713,107 +1365,115 @@ def _recover_alignments(sequenceA, sequenceB, starts, score_matrix,
                         sequenceA[lenA - 1:row - 1:-1])
             ali_seqB = ((row_distance - col_distance) * gap_char +
                         sequenceB[lenB - 1:col - 1:-1])
-        in_process += [(ali_seqA, ali_seqB, end, row, col, False,
-                        trace_matrix[row][col])]
-    while in_process and len(tracebacks) < MAX_ALIGNMENTS:
-        # Although we allow a gap in seqB to be followed by a gap in seqA,
-        # we don't want to allow it the other way round, since this would
-        # give redundant alignments of type: A-  vs.  -A
-        #                                    -B       B-
-        # Thus we need to keep track if a gap in seqA was opened (col_gap)
-        # and stop the backtrace (dead_end) if a gap in seqB follows.
-        dead_end = False
-        ali_seqA, ali_seqB, end, row, col, col_gap, trace = in_process.pop()
-
-        while (row > 0 or col > 0) and not dead_end:
-            cache = (ali_seqA[:], ali_seqB[:], end, row, col, col_gap)
-
-            # If trace is empty we have reached at least one border of the
-            # matrix or the end of a local aligment. Just add the rest of
-            # the sequence(s) and fill with gaps if neccessary.
-            if not trace:
-                if col and col_gap:
-                    dead_end = True
-                else:
-                    ali_seqA, ali_seqB = _finish_backtrace(
-                        sequenceA, sequenceB, ali_seqA, ali_seqB,
-                        row, col, gap_char)
-                break
-            elif trace % 2 == 1:  # = row open = open gap in seqA
-                trace -= 1
-                if col_gap:
-                    dead_end = True
-                else:
+        in_process = [(ali_seqA, ali_seqB, end, row, col, False,
+                       trace_matrix[row][col])]
+        while in_process and paths < MAX_TRACEBACK_PATHS:
+            # Although we allow a gap in seqB to be followed by a gap in
+            # seqA, we don't want to allow it the other way round, since
+            # this would give redundant alignments of type: A-  vs.  -A
+            #                                               -B       B-
+            # Thus we need to keep track if a gap in seqA was opened
+            # (col_gap) and stop the backtrace (dead_end) if a gap in seqB
+            # follows.
+            dead_end = False
+            paths += 1
+            ali_seqA, ali_seqB, end, row, col, col_gap, trace = \
+                in_process.pop()
+            while (row > 0 or col > 0) and not dead_end:
+                cache = (ali_seqA[:], ali_seqB[:], end, row, col, col_gap)
+
+                # If trace is empty we have reached at least one border of
+                # the matrix or the end of a local aligment. Just add the
+                # rest of the sequence(s) and fill with gaps if neccessary.
+                if not trace:
+                    if col and col_gap:
+                        dead_end = True
+                    else:
+                        ali_seqA, ali_seqB = _finish_backtrace(
+                            sequenceA, sequenceB, ali_seqA, ali_seqB,
+                            row, col, gap_char)
+                    break
+                elif trace % 2 == 1:  # = row open = open gap in seqA
+                    trace -= 1
+                    if col_gap:
+                        dead_end = True
+                    else:
+                        col -= 1
+                        ali_seqA += gap_char
+                        ali_seqB += sequenceB[col]
+                        col_gap = False
+                elif trace % 4 == 2:  # = match/mismatch of seqA with seqB
+                    trace -= 2
+                    row -= 1
                     col -= 1
-                    ali_seqA += gap_char
+                    ali_seqA += sequenceA[row]
                     ali_seqB += sequenceB[col]
                     col_gap = False
-            elif trace % 4 == 2:  # = match/mismatch of seqA with seqB
-                trace -= 2
-                row -= 1
-                col -= 1
-                ali_seqA += sequenceA[row]
-                ali_seqB += sequenceB[col]
-                col_gap = False
-            elif trace % 8 == 4:  # = col open = open gap in seqB
-                trace -= 4
-                row -= 1
-                ali_seqA += sequenceA[row]
-                ali_seqB += gap_char
-                col_gap = True
-            elif trace in (8, 24):  # = row extend = extend gap in seqA
-                trace -= 8
-                if col_gap:
-                    dead_end = True
-                else:
-                    col_gap = False
-                    # We need to find the starting point of the extended gap
+                elif trace % 8 == 4:  # = col open = open gap in seqB
+                    trace -= 4
+                    row -= 1
+                    ali_seqA += sequenceA[row]
+                    ali_seqB += gap_char
+                    col_gap = True
+                elif trace in (8, 24):  # = row extend = extend gap in seqA
+                    trace -= 8
+                    if col_gap:
+                        dead_end = True
+                    else:
+                        col_gap = False
+                        # We need to find the starting point of the extended
+                        # gap
+                        x = _find_gap_open(sequenceA, sequenceB, ali_seqA,
+                                           ali_seqB, end, row, col, col_gap,
+                                           gap_char, score_matrix,
+                                           trace_matrix, in_process,
+                                           gap_A_fn, col, row, 'col')
+                        ali_seqA, ali_seqB, row, col, in_process, dead_end = x
+                elif trace == 16:  # = col extend = extend gap in seqB
+                    trace -= 16
+                    col_gap = True
                     x = _find_gap_open(sequenceA, sequenceB, ali_seqA,
                                        ali_seqB, end, row, col, col_gap,
                                        gap_char, score_matrix, trace_matrix,
-                                       in_process, gap_A_fn, col, row, 'col')
+                                       in_process, gap_B_fn, row, col, 'row')
                     ali_seqA, ali_seqB, row, col, in_process, dead_end = x
-            elif trace == 16:  # = col extend = extend gap in seqB
-                trace -= 16
-                col_gap = True
-                x = _find_gap_open(sequenceA, sequenceB, ali_seqA, ali_seqB,
-                                   end, row, col, col_gap, gap_char,
-                                   score_matrix, trace_matrix, in_process,
-                                   gap_B_fn, row, col, 'row')
-                ali_seqA, ali_seqB, row, col, in_process, dead_end = x
-
-            if trace:  # There is another path to follow...
-                cache += (trace,)
-                in_process.append(cache)
-            trace = trace_matrix[row][col]
-            if not align_globally and score_matrix[row][col] <= 0:
-                begin = max(row, col)
-                trace = 0
-        if not dead_end:
-            tracebacks.append((ali_seqA[::-1], ali_seqB[::-1], score, begin,
-                               end))
-            if one_alignment_only:
-                break
-    return _clean_alignments(tracebacks)
+
+                if trace:  # There is another path to follow...
+                    cache += (trace,)
+                    in_process.append(cache)
+                trace = trace_matrix[row][col]
+                if not align_globally and not dead_end and \
+                   score_matrix[row][col] <= 0:
+                    begin = max(row, col)
+                    trace = 0
+            if not dead_end:
+                yield (ali_seqA[::-1], ali_seqB[::-1], score, begin, end)
 
 
-def _find_start(score_matrix, align_globally):
-    """Return a list of starting points (score, (row, col)).
+def _find_start(score_matrix, align_globally, tolerance=0):
+    """Return the best score and a list of starting points (score, (row, col)).
 
-    Indicating every possible place to start the tracebacks.
+    The starting points are every possible place to start the tracebacks,
+    i.e. all the positions with a score within some tolerance of the best.
     """
     nrows, ncols = len(score_matrix), len(score_matrix[0])
     # In this implementation of the global algorithm, the start will always be
     # the bottom right corner of the matrix.
     if align_globally:
-        starts = [(score_matrix[-1][-1], (nrows - 1, ncols - 1))]
-    else:
-        starts = []
-        for row in range(nrows):
-            for col in range(ncols):
-                score = score_matrix[row][col]
+        best_score = score_matrix[-1][-1]
+        return best_score, [(best_score, (nrows - 1, ncols - 1))]
+    # Cells outside of a band are None
+    best_score = max([max([score for score in row if score is not None])
+                      for row in score_matrix])
+    starts = []
+    for row in range(nrows):
+        for col in range(ncols):
+            score = score_matrix[row][col]
+            if score is None:
+                continue
+            if rint(abs(score - best_score)) <= rint(tolerance):
                 starts.append((score, (row, col)))
-    return starts
+    return best_score, starts
 
 
 def _clean_alignments(alignments):
@@ -821,8 +1481,14 @@ def _clean_alignments(alignments):
     # Remove duplicates, make sure begin and end are set correctly, remove
     # empty alignments.
     unique_alignments = []
+    seen = set()
     for align in alignments:
-        if align not in unique_alignments:
+        if isinstance(align[0], list):
+            key = (tuple(align[0]), tuple(align[1])) + tuple(align[2:])
+        else:
+            key = align
+        if key not in seen:
+            seen.add(key)
             unique_alignments.append(align)
     i = 0
     while i < len(unique_alignments):
@@ -870,6 +1536,10 @@ def _find_gap_open(sequenceA, sequenceB, ali_seqA, ali_seqB, end, row, col,
             row -= 1
             ali_seqA += sequenceA[row]
             ali_seqB += gap_char
+        if score_matrix[row][col] is None:
+            # The gap cannot have started outside of the band
+            dead_end = True
+            break
         actual_score = score_matrix[row][col] + gap_fn(index, n + 1)
         if rint(actual_score) == rint(target_score) and n > 0:
             if not trace_matrix[row][col]:
@@ -992,6 +1662,12 @@ def format_alignment(align1, align2, score, begin, end):
 # flag for when using flake8:
 try:
     from .cpairwise2 import rint, _make_score_matrix_fast  # noqa
+    from .cpairwise2 import _make_score_matrix_generic, _find_start  # noqa
+    from .cpairwise2 import _score_only_fast, _linear_pass  # noqa
+    from .cpairwise2 import _recover_alignments as _c_recover_alignments
+    from .cpairwise2 import _score_profile as _c_score_profile
 except ImportError:
+    _c_recover_alignments = None
+    _c_score_profile = None
     warnings.warn('Import of C module failed. Falling back to pure Python ' +
                   'implementation. This may be slooow...', BiopythonWarning)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""Small script to compare the timing of the BLAST XML parsers.
+
+Usage::
+
+    python blast_xml_performance.py example.xml [more files...]
+
+This is intended for large files (e.g. several GB of BLAST XML output from
+an annotation pipeline), comparing the Bio.SearchIO "blast-xml" parser
+against Bio.Blast.NCBIXML. The SearchIO parser only holds one query result
+(one <Iteration> element) in memory at a time, so the peak memory use (as
+reported on Unix) should not grow with the size of the file.
+"""
+from __future__ import print_function
+
+import sys
+import time
+import warnings
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+from Bio import BiopythonExperimentalWarning
+from Bio.Blast import NCBIXML
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", BiopythonExperimentalWarning)
+    from Bio import SearchIO
+
+
+def report(name, num_queries, num_hits, num_hsps, elapsed_time):
+    print(name)
+    print("\tDid %i queries (%i hits, %i HSPs) in %0.2f seconds"
+          % (num_queries, num_hits, num_hsps, elapsed_time))
+    if resource is not None:
+        # Kilobytes on Linux, bytes on Mac OS X
+        print("\tPeak memory use so far %i"
+              % resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def time_searchio(filename):
+    start_time = time.time()
+    num_queries = num_hits = num_hsps = 0
+    for qresult in SearchIO.parse(filename, "blast-xml"):
+        num_queries += 1
+        for hit in qresult:
+            num_hits += 1
+            num_hsps += len(hit)
+    report("SearchIO blast-xml", num_queries, num_hits, num_hsps,
+           time.time() - start_time)
+
+
+def time_ncbixml(filename):
+    start_time = time.time()
+    num_queries = num_hits = num_hsps = 0
+    with open(filename) as handle:
+        for record in NCBIXML.parse(handle):
+            num_queries += 1
+            for alignment in record.alignments:
+                num_hits += 1
+                num_hsps += len(alignment.hsps)
+    report("NCBIXML", num_queries, num_hits, num_hsps,
+           time.time() - start_time)
+
+
+if len(sys.argv) < 2:
+    sys.exit(__doc__)
+
+for filename in sys.argv[1:]:
+    print(filename)
+    time_searchio(filename)
+    time_ncbixml(filename)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""Small script to compare the timing of the FASTA parsers in Bio.SeqIO.
+
+Usage::
+
+    python fasta_parser_performance.py example.fasta [more files...]
+
+This is intended for large files (e.g. several GB of reads, or whole
+genome assemblies), comparing the line based SimpleFastaParser and
+FastaIterator against the BlockFastaParser and BlockFastaIterator.
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from Bio.SeqIO.FastaIO import SimpleFastaParser, BlockFastaParser
+from Bio.SeqIO.FastaIO import FastaIterator, BlockFastaIterator
+
+
+def time_parser(name, parser, filename, mode="r"):
+    start_time = time.time()
+    num_records = 0
+    num_letters = 0
+    with open(filename, mode) as handle:
+        for title, seq in parser(handle):
+            num_records += 1
+            num_letters += len(seq)
+    elapsed_time = time.time() - start_time
+    print("%s (mode %r)" % (name, mode))
+    print("\tDid %i records (%i letters) in %0.2f seconds"
+          % (num_records, num_letters, elapsed_time))
+
+
+def time_iterator(name, iterator, filename, mode="r"):
+    start_time = time.time()
+    num_records = 0
+    num_letters = 0
+    with open(filename, mode) as handle:
+        for record in iterator(handle):
+            num_records += 1
+            num_letters += len(record)
+    elapsed_time = time.time() - start_time
+    print("%s (mode %r)" % (name, mode))
+    print("\tDid %i records (%i letters) in %0.2f seconds"
+          % (num_records, num_letters, elapsed_time))
+
+
+if len(sys.argv) < 2:
+    sys.exit(__doc__)
+
+for filename in sys.argv[1:]:
+    print(filename)
+    time_parser("SimpleFastaParser", SimpleFastaParser, filename)
+    time_parser("BlockFastaParser", BlockFastaParser, filename)
+    time_parser("BlockFastaParser", BlockFastaParser, filename, "rb")
+    time_iterator("FastaIterator", FastaIterator, filename)
+    time_iterator("BlockFastaIterator", BlockFastaIterator, filename, "rb")
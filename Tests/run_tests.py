@@ -146,9 +146,13 @@ DOCTEST_MODULES = [
 if is_numpy():
     DOCTEST_MODULES.extend([
         "Bio.Affy.CelFile",
+        "Bio.Align.ArrayAlign",
+        "Bio.Align.LocalScores",
         "Bio.MaxEntropy",
         "Bio.PDB.Polypeptide",
         "Bio.PDB.Selection",
+        "Bio.SearchIO.BlastIO.blast_tab_columns",
+        "Bio.SearchIO.HmmerIO.hmmer3_domtab_columns",
         "Bio.SeqIO.PdbIO",
         "Bio.Statistics.lowess",
         "Bio.SVDSuperimposer",
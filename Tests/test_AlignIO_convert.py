@@ -4,6 +4,9 @@
 # as part of this package.
 
 """Unit tests for Bio.SeqIO.convert(...) function."""
+import os
+import shutil
+import tempfile
 import unittest
 from Bio._py3k import StringIO
 
@@ -69,6 +72,62 @@ for filename, in_format, alphabet in tests:
                 funct(filename, in_format, out_format, alphabet))
     del funct
 
+
+class ConvertManyTests(unittest.TestCase):
+    """Tests for the Bio.AlignIO.convert_many(...) function."""
+
+    in_files = ["Clustalw/hedgehog.aln", "Clustalw/opuntia.aln",
+                "Clustalw/cw02.aln", "Clustalw/protein.aln"]
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="BioAlignIO_convert_")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def check(self, out_format, processes):
+        out_files = [os.path.join(self.temp_dir, "%i.out" % i)
+                     for i in range(len(self.in_files))]
+        counts = AlignIO.convert_many(self.in_files, "clustal",
+                                      out_files, out_format,
+                                      processes=processes)
+        self.assertEqual([1] * len(self.in_files), counts)
+        for in_file, out_file in zip(self.in_files, out_files):
+            handle = StringIO()
+            AlignIO.convert(in_file, "clustal", handle, out_format)
+            with open(out_file) as out_handle:
+                self.assertEqual(handle.getvalue(), out_handle.read())
+
+    def test_serial(self):
+        """Convert several Clustal files in this process."""
+        self.check("stockholm", 1)
+
+    def test_pool(self):
+        """Convert several Clustal files using a pool of processes."""
+        self.check("phylip-relaxed", 2)
+
+    def test_bad_arguments(self):
+        """Check convert_many argument errors."""
+        out_files = [os.path.join(self.temp_dir, "out")]
+        self.assertRaises(ValueError, AlignIO.convert_many,
+                          self.in_files, "clustal", out_files, "fasta")
+        self.assertRaises(ValueError, AlignIO.convert_many,
+                          self.in_files[:1], "clustal", out_files, "fasta-m10")
+        self.assertRaises(ValueError, AlignIO.convert_many,
+                          self.in_files[:1], "Clustal", out_files, "fasta")
+        with open(self.in_files[0]) as handle:
+            self.assertRaises(TypeError, AlignIO.convert_many,
+                              [handle], "clustal", out_files, "fasta")
+
+    def test_failure(self):
+        """A failed conversion in a worker process raises an exception."""
+        out_files = [os.path.join(self.temp_dir, "%i.out" % i)
+                     for i in range(2)]
+        self.assertRaises(ValueError, AlignIO.convert_many,
+                          ["Clustalw/opuntia.aln", "Stockholm/simple.sth"],
+                          "clustal", out_files, "fasta", processes=2)
+
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
     unittest.main(testRunner=runner)
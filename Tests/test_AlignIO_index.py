@@ -0,0 +1,254 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for Bio.AlignIO.index and Bio.AlignIO.index_db."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from Bio import AlignIO
+from Bio import bgzf
+from Bio.Alphabet import generic_protein
+from Bio.AlignIO.StockholmIO import StockholmIterator
+
+
+class IndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="BioAlignIO_index_")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def compare(self, old, new):
+        self.assertEqual(len(old), len(new))
+        self.assertEqual(old.get_alignment_length(),
+                         new.get_alignment_length())
+        for r1, r2 in zip(old, new):
+            self.assertEqual(r1.id, r2.id)
+            self.assertEqual(str(r1.seq), str(r2.seq))
+            self.assertEqual(r1.annotations, r2.annotations)
+            self.assertEqual(r1.letter_annotations, r2.letter_annotations)
+
+    def check(self, filename, format, keys, **kwargs):
+        alignments = list(AlignIO.parse(filename, format,
+                                        kwargs.get("seq_count")))
+        self.assertEqual(len(keys), len(alignments))
+
+        index = AlignIO.index(filename, format, **kwargs)
+        self.assertEqual(len(keys), len(index))
+        self.assertEqual(sorted(keys), sorted(index))
+        for key, alignment in zip(keys, alignments):
+            self.assertTrue(key in index)
+            self.compare(alignment, index[key])
+            raw = index.get_raw(key)
+            self.compare(alignment, AlignIO.read(
+                self.temp_file(raw), format))
+        self.assertFalse("missing" in index)
+        self.assertRaises(KeyError, index.__getitem__, "missing")
+        self.assertEqual(None, index.get("missing"))
+        index.close()
+
+        # Now an SQLite index in a file, which we reload
+        index_filename = os.path.join(self.temp_dir, "index.idx")
+        index = AlignIO.index_db(index_filename, filename, format, **kwargs)
+        self.assertEqual(len(keys), len(index))
+        index.close()
+        index = AlignIO.index_db(index_filename)
+        self.assertEqual(len(keys), len(index))
+        self.assertEqual(sorted(keys), sorted(index))
+        plain_index = AlignIO.index(filename, format, **kwargs)
+        for key, alignment in zip(keys, alignments):
+            self.assertTrue(key in index)
+            self.compare(alignment, index[key])
+            self.assertEqual(plain_index.get_raw(key), index.get_raw(key))
+        self.assertRaises(KeyError, index.__getitem__, "missing")
+        plain_index.close()
+        index.close()
+        os.remove(index_filename)
+
+    def temp_file(self, data):
+        filename = os.path.join(self.temp_dir, "raw")
+        with open(filename, "wb") as handle:
+            handle.write(data)
+        return filename
+
+    def test_stockholm(self):
+        """Index Stockholm files."""
+        self.check("Stockholm/simple.sth", "stockholm", ["0"])
+        self.check("Stockholm/funny.sth", "stockholm", ["PF00571"])
+        self.check("Stockholm/pfam_families.sth", "stockholm",
+                   ["PF99991.2", "PF99992.1", "DemoC"])
+
+    def concatenate(self, filenames):
+        data = []
+        for filename in filenames:
+            with open(filename, "rb") as handle:
+                data.append(handle.read())
+            if not data[-1].endswith(b"\n"):
+                data.append(b"\n")
+        filename = os.path.join(self.temp_dir, "concatenated")
+        with open(filename, "wb") as handle:
+            handle.write(b"".join(data))
+        return filename
+
+    def test_clustal(self):
+        """Index Clustal files."""
+        filenames = ["Clustalw/cw02.aln", "Clustalw/opuntia.aln",
+                     "Clustalw/promals3d.aln"]
+        for filename in filenames:
+            self.check(filename, "clustal", ["0"])
+        self.check(self.concatenate(filenames), "clustal", ["0", "1", "2"])
+
+    def test_phylip(self):
+        """Index PHYLIP files."""
+        self.check("Phylip/bootstrap3.phy", "phylip", ["0", "1", "2"])
+        self.check("Phylip/interlaced2.phy", "phylip", ["0"])
+        filenames = ["Phylip/reference_dna.phy", "Phylip/interlaced.phy",
+                     "Phylip/horses.phy"]
+        self.check(self.concatenate(filenames), "phylip", ["0", "1", "2"])
+        filenames = ["Phylip/sequential.phy", "Phylip/sequential2.phy"]
+        self.check(self.concatenate(filenames), "phylip-sequential",
+                   ["0", "1"])
+        self.check("ExtendedPhylip/primates.phyx", "phylip-relaxed", ["0"])
+        index = AlignIO.index("Phylip/bootstrap3.phy", "phylip", seq_count=3)
+        self.assertEqual(3, len(index["1"]))
+        index.close()
+
+    def test_nexus(self):
+        """Index Nexus files."""
+        filenames = ["Nexus/test_Nexus_input.nex", "Nexus/codonposset.nex"]
+        for filename in filenames:
+            self.check(filename, "nexus", ["0"])
+        index = AlignIO.index(self.concatenate(filenames), "nexus")
+        self.assertEqual(2, len(index))
+        for key, filename in zip(["0", "1"], filenames):
+            self.compare(AlignIO.read(filename, "nexus"), index[key])
+        index.close()
+
+    def test_fasta(self):
+        """Index FASTA files of alignments."""
+        self.check("GFF/multi.fna", "fasta", ["0"])
+        self.check("GFF/multi.fna", "fasta", ["0"], seq_count=3)
+        filename = self.concatenate(["GFF/multi.fna"] * 3)
+        self.check(filename, "fasta", ["0", "1", "2"], seq_count=3)
+        self.check(filename, "fasta", ["0"])
+        index = AlignIO.index(filename, "fasta", seq_count=3)
+        self.assertEqual(["test1", "test2", "test3"],
+                         [record.id for record in index["2"]])
+        index.close()
+
+    def test_key_function(self):
+        """Index Stockholm file with a key function."""
+        self.check("Stockholm/pfam_families.sth", "stockholm",
+                   ["PF99991", "PF99992", "DemoC"],
+                   key_function=lambda key: key.split(".")[0])
+
+    def test_alphabet(self):
+        """Index Stockholm file with an alphabet."""
+        index = AlignIO.index("Stockholm/pfam_families.sth", "stockholm",
+                              alphabet=generic_protein)
+        self.assertEqual(generic_protein, index["DemoC"][0].seq.alphabet)
+        index.close()
+
+    def test_bgzf(self):
+        """Index a BGZF compressed Stockholm file."""
+        with open("Stockholm/pfam_families.sth", "rb") as handle:
+            data = handle.read()
+        filename = os.path.join(self.temp_dir, "pfam_families.sth.bgz")
+        handle = bgzf.BgzfWriter(filename, "wb")
+        # Use small blocks so the families span several blocks
+        for start in range(0, len(data), 100):
+            handle.write(data[start:start + 100])
+            handle.flush()
+        handle.close()
+        index = AlignIO.index(filename, "stockholm")
+        self.assertEqual(3, len(index))
+        self.assertEqual(["SEQF_DROME/1-8", "SEQG_CAEEL/2-10"],
+                         [r.id for r in index["DemoC"]])
+        self.assertEqual(data[:data.index(b"# STOCKHOLM", 1)],
+                         index.get_raw("PF99991.2"))
+        index.close()
+
+    def test_multiple_files(self):
+        """Index two Stockholm files with index_db."""
+        index = AlignIO.index_db(":memory:", ["Stockholm/funny.sth",
+                                              "Stockholm/pfam_families.sth"],
+                                 "stockholm")
+        self.assertEqual(4, len(index))
+        self.assertEqual(6, len(index["PF00571"]))
+        self.assertEqual(3, len(index["PF99991.2"]))
+        index.close()
+
+    def test_duplicates(self):
+        """Index a Stockholm file with duplicate accessions."""
+        self.assertRaises(ValueError, AlignIO.index,
+                          "Stockholm/pfam_families.sth", "stockholm",
+                          key_function=lambda key: "same")
+        self.assertRaises(ValueError, AlignIO.index_db, ":memory:",
+                          ["Stockholm/pfam_families.sth"] * 2, "stockholm")
+
+    def test_unsupported(self):
+        """Index a file in an unsupported format."""
+        self.assertRaises(ValueError, AlignIO.index,
+                          "Emboss/needle.txt", "emboss")
+        self.assertRaises(ValueError, AlignIO.index_db, ":memory:",
+                          "Emboss/needle.txt", "emboss")
+
+
+class StockholmLetterAnnotations(unittest.TestCase):
+
+    def test_skip(self):
+        """Skip the GR lines when parsing a Stockholm file."""
+        with open("Stockholm/pfam_families.sth") as handle:
+            full = list(StockholmIterator(handle))
+        with open("Stockholm/pfam_families.sth") as handle:
+            quick = list(StockholmIterator(handle, letter_annotations=False))
+        self.assertEqual(len(full), len(quick))
+        for old, new in zip(full, quick):
+            self.assertEqual(old.format("fasta"), new.format("fasta"))
+            for r1, r2 in zip(old, new):
+                self.assertEqual(r1.annotations, r2.annotations)
+                self.assertEqual({}, r2.letter_annotations)
+        self.assertEqual("CCCHHHHHHHHHHCCEEEEC",
+                         full[0][0].letter_annotations["secondary_structure"])
+
+    def test_keyword(self):
+        """Skip the GR lines via Bio.AlignIO.parse, index and index_db."""
+        filename = "Stockholm/pfam_families.sth"
+        full = list(AlignIO.parse(filename, "stockholm"))
+        self.assertEqual("CCCHHHHHHHHHHCCEEEEC",
+                         full[0][0].letter_annotations["secondary_structure"])
+        quick = list(AlignIO.parse(filename, "stockholm",
+                                   letter_annotations=False))
+        self.assertEqual([{}] * len(quick[0]),
+                         [r.letter_annotations for r in quick[0]])
+        families = AlignIO.index(filename, "stockholm",
+                                 letter_annotations=False)
+        self.assertEqual({}, families["PF99991.2"][0].letter_annotations)
+        families.close()
+        families = AlignIO.index_db(":memory:", filename, "stockholm",
+                                    letter_annotations=False)
+        self.assertEqual({}, families["PF99991.2"][0].letter_annotations)
+        families.close()
+
+    def test_bad_keyword(self):
+        """Check unexpected format specific keyword arguments."""
+        self.assertRaises(TypeError, list,
+                          AlignIO.parse("Stockholm/pfam_families.sth",
+                                        "stockholm", bad_keyword=False))
+        self.assertRaises(TypeError, list,
+                          AlignIO.parse("Clustalw/protein.aln", "clustal",
+                                        alphabet=generic_protein,
+                                        letter_annotations=False))
+        self.assertRaises(TypeError, AlignIO.read,
+                          "Fasta/f002", "fasta",
+                          letter_annotations=False)
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
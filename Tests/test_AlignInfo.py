@@ -143,6 +143,49 @@ X  0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0
                                                1.290, 1.290, 0.80, 0.610, 0.390, 0.470, 0.040], places=2)
         self.assertAlmostEqual(ic, 7.546, places=3)
 
+    def test_weights(self):
+        # example from the replacement_dictionary docstring
+        alpha = Gapped(unambiguous_dna, "-")
+        records = [SeqRecord(Seq("GTATC", alpha), id="ID001"),
+                   SeqRecord(Seq("AT--C", alpha), id="ID002"),
+                   SeqRecord(Seq("CTGTC", alpha), id="ID003")]
+        for record, weight in zip(records, [0.5, 0.8, 1.0]):
+            record.annotations["weight"] = weight
+        s = SummaryInfo(MultipleSeqAlignment(records, alpha))
+        rep_dict = s.replacement_dictionary()
+        self.assertEqual(16, len(rep_dict))
+        self.assertAlmostEqual(rep_dict[("G", "A")], 0.4)
+        self.assertAlmostEqual(rep_dict[("G", "C")], 0.5)
+        self.assertAlmostEqual(rep_dict[("A", "C")], 0.8)
+        self.assertAlmostEqual(rep_dict[("T", "T")], 0.4 + 0.5 + 0.8 + 0.5)
+        self.assertAlmostEqual(rep_dict[("A", "G")], 0.5)
+        self.assertAlmostEqual(rep_dict[("C", "C")], 0.4 + 0.5 + 0.8)
+        self.assertEqual(rep_dict[("C", "A")], 0)
+        m = s.pos_specific_score_matrix()
+        self.assertAlmostEqual(m[0]["A"], 0.8)
+        self.assertAlmostEqual(m[2]["A"], 0.5)
+        self.assertAlmostEqual(m[2]["G"], 1.0)
+        self.assertAlmostEqual(m[4]["C"], 2.3)
+        self.assertEqual(str(s.dumb_consensus(ambiguous="N")), "NTNTC")
+        self.assertEqual(str(s.gap_consensus(ambiguous="N")), "NTNNC")
+
+    def test_array_alignment(self):
+        try:
+            from Bio.Align.ArrayAlign import ArrayAlignment
+        except ImportError:
+            # Needs NumPy
+            return
+        alignment = AlignIO.read("Clustalw/hedgehog.aln", "clustal",
+                                 alphabet=Gapped(generic_protein, "-"))
+        s1 = SummaryInfo(alignment)
+        s2 = SummaryInfo(ArrayAlignment(alignment))
+        self.assertEqual(str(s1.dumb_consensus()), str(s2.dumb_consensus()))
+        self.assertEqual(str(s1.gap_consensus()), str(s2.gap_consensus()))
+        self.assertEqual(str(s1.pos_specific_score_matrix()),
+                         str(s2.pos_specific_score_matrix()))
+        self.assertEqual(s1.replacement_dictionary(),
+                         s2.replacement_dictionary())
+
 
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
@@ -0,0 +1,109 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the NumPy backed Bio.Align.ArrayAlign module."""
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.Align.ArrayAlign.")
+
+from Bio import AlignIO
+from Bio.Align import MultipleSeqAlignment
+from Bio.Align.ArrayAlign import ArrayAlignment
+from Bio.Alphabet import generic_dna
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+
+class ArrayAlignmentTests(unittest.TestCase):
+
+    def setUp(self):
+        self.align = MultipleSeqAlignment(
+            [SeqRecord(Seq("AAAACGT", generic_dna), id="Alpha",
+                       description="first",
+                       letter_annotations={"q": [1, 2, 3, 4, 5, 6, 7]}),
+             SeqRecord(Seq("AAA-CGT", generic_dna), id="Beta",
+                       letter_annotations={"q": [7, 6, 5, 4, 3, 2, 1]}),
+             SeqRecord(Seq("AAAAGGT", generic_dna), id="Gamma",
+                       letter_annotations={"q": [0, 0, 0, 0, 0, 0, 0]})],
+            annotations={"tool": "demo"})
+        self.array_align = ArrayAlignment(self.align)
+
+    def compare(self, old, new):
+        self.assertEqual(len(old), len(new))
+        self.assertEqual(old.get_alignment_length(),
+                         new.get_alignment_length())
+        self.assertEqual(str(old), str(new))
+        for r1, r2 in zip(old, new):
+            self.assertEqual(r1.id, r2.id)
+            self.assertEqual(r1.description, r2.description)
+            self.assertEqual(str(r1.seq), str(r2.seq))
+            self.assertEqual(r1.letter_annotations, r2.letter_annotations)
+
+    def test_conversion(self):
+        """Convert to and from a MultipleSeqAlignment."""
+        self.compare(self.align, self.array_align)
+        new = self.array_align.to_alignment()
+        self.assertTrue(isinstance(new, MultipleSeqAlignment))
+        self.compare(self.align, new)
+        self.assertEqual({"tool": "demo"}, new.annotations)
+        self.assertEqual(self.align.format("fasta"),
+                         self.array_align.format("fasta"))
+
+    def test_indexing(self):
+        """Indexing and slicing as for a MultipleSeqAlignment."""
+        align = self.align
+        array_align = self.array_align
+        self.assertEqual(align[1, 3], array_align[1, 3])
+        self.assertEqual(align[:, 4], array_align[:, 4])
+        self.assertEqual(align[1:3, 4], array_align[1:3, 4])
+        self.assertEqual(str(align[2].seq), str(array_align[2].seq))
+        self.assertEqual(str(align[-1, 2:5].seq), str(array_align[-1, 2:5].seq))
+        self.assertEqual(align[-1, 2:5].letter_annotations,
+                         array_align[-1, 2:5].letter_annotations)
+        for index in [slice(None, None, 2), slice(1, None),
+                      (slice(None), slice(2, 6)), (slice(0, 2), slice(None, None, -1))]:
+            self.compare(align[index], array_align[index])
+        # NumPy integers work as indices too
+        two, four = numpy.int64(2), numpy.intp(4)
+        self.assertEqual(str(align[2].seq), str(array_align[two].seq))
+        self.assertEqual(align[1, 4], array_align[numpy.int32(1), four])
+        self.assertEqual(align[:, 4], array_align[:, four])
+        self.assertEqual(str(align[2, 1:3].seq), str(array_align[two, 1:3].seq))
+
+    def test_views(self):
+        """Sub-alignments share the array."""
+        sub_align = self.array_align[1:, 2:5]
+        self.assertEqual((2, 3), sub_align.array.shape)
+        self.assertTrue(numpy.may_share_memory(sub_align.array,
+                                               self.array_align.array))
+        sub_align.array[0, 0] = ord("N")
+        self.assertEqual("AAN-CGT", str(self.array_align[1].seq))
+
+    def test_large_file(self):
+        """Convert an alignment with more than 20 rows."""
+        align = AlignIO.read("Clustalw/hedgehog.aln", "clustal")
+        self.compare(align, ArrayAlignment(align))
+        self.compare(align[:, 10:60], ArrayAlignment(align)[:, 10:60])
+
+    def test_unequal_lengths(self):
+        """Rows of different lengths are rejected."""
+        records = [SeqRecord(Seq("ACGT"), id="A"), SeqRecord(Seq("ACG"), id="B")]
+        self.assertRaises(ValueError, ArrayAlignment, records)
+
+    def test_empty(self):
+        """Empty alignment."""
+        array_align = ArrayAlignment([])
+        self.assertEqual(0, len(array_align))
+        self.assertEqual(0, array_align.get_alignment_length())
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
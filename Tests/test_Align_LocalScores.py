@@ -0,0 +1,107 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the NumPy based Bio.Align.LocalScores module."""
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.Align.LocalScores.")
+
+from Bio import pairwise2
+from Bio.Align.LocalScores import local_scores, align_hits
+from Bio.Seq import Seq
+from Bio.SubsMat.MatrixInfo import blosum62
+
+
+class LocalScoresTests(unittest.TestCase):
+
+    query = "KEVLAHHWQRST"
+    targets = ["EVLWWH", "PPPP", "", "KEVLA", "HHWQRKEVLAHH", "W",
+               "RSTKEVLAAAAHHWQRST", "GGGGKEVLAHHWQRSTGGGG"]
+
+    def check(self, match, open, extend, penalize_extend_when_opening,
+              batch_size=64):
+        scores, query_ends, target_ends = local_scores(
+            self.query, self.targets, match, open, extend,
+            penalize_extend_when_opening, batch_size)
+        self.assertEqual(len(self.targets), len(scores))
+        if isinstance(match, dict):
+            match = pairwise2.dictionary_match(match)
+        gap_fn = pairwise2.affine_penalty(open, extend,
+                                          penalize_extend_when_opening)
+        for target, score, query_end, target_end in zip(
+                self.targets, scores, query_ends, target_ends):
+            if not target:
+                self.assertTrue(numpy.isnan(score))
+                continue
+            expected = pairwise2.align.localcc(
+                self.query, target, match, gap_fn, gap_fn,
+                penalize_extend_when_opening=penalize_extend_when_opening,
+                score_only=True)
+            self.assertAlmostEqual(expected, score)
+            if score:
+                # The best alignment ends here, so the prefixes score the same
+                self.assertAlmostEqual(score, pairwise2.align.localcc(
+                    self.query[:query_end], target[:target_end], match,
+                    gap_fn, gap_fn,
+                    penalize_extend_when_opening=penalize_extend_when_opening,
+                    score_only=True))
+            else:
+                self.assertEqual((0, 0), (query_end, target_end))
+
+    def test_substitution_matrix(self):
+        """Scores with a substitution matrix, as pairwise2.align.localds."""
+        self.check(blosum62, -10, -1, False)
+        self.check(blosum62, -3, -1, True)
+        self.check(blosum62, -2, -2, False, batch_size=3)
+
+    def test_match_function(self):
+        """Scores with a match function and non-integer gap scores."""
+        self.check(pairwise2.identity_match(2, -1), -2, -1, False)
+        self.check(pairwise2.identity_match(2, -1), -1.5, -0.5, False)
+        self.check(pairwise2.identity_match(1.5, -1), -1, -0.5, True, 1)
+
+    def test_ends(self):
+        """Check the end coordinates of the best alignment."""
+        scores, query_ends, target_ends = local_scores(
+            "KEVLAHHW", ["EVLWWH", Seq("PPPP"), "KEVLA"], blosum62, -10, -1)
+        self.assertEqual([16.0, 0.0, 22.0], list(scores))
+        self.assertEqual([7, 0, 5], list(query_ends))
+        self.assertEqual([6, 0, 5], list(target_ends))
+        scores, query_ends, target_ends = local_scores(
+            "", ["ACGT"], pairwise2.identity_match(), -1, -1)
+        self.assertTrue(numpy.isnan(scores[0]))
+
+    def test_errors(self):
+        """Bad gap penalties and residues raise an exception."""
+        self.assertRaises(ValueError, local_scores, "KEVLA", ["EVL"],
+                          blosum62, -1, -2)
+        self.assertRaises(ValueError, local_scores, "KEVLA", ["EVL"],
+                          blosum62, 1, 0)
+        self.assertRaises(KeyError, local_scores, "KEVLA", ["EVL", "EVl"],
+                          blosum62, -10, -1)
+        self.assertRaises(ValueError, local_scores, "ACGT", [u"AC\xe9"],
+                          pairwise2.identity_match(), -1, -1)
+
+    def test_align_hits(self):
+        """Align only the targets scoring at least the threshold."""
+        hits = list(align_hits(self.query, self.targets, blosum62, -10, -1,
+                               threshold=40))
+        self.assertEqual([6, 7], [index for index, alignments in hits])
+        for index, alignments in hits:
+            self.assertEqual(alignments, pairwise2.align.localds(
+                self.query, self.targets[index], blosum62, -10, -1))
+        hits = list(align_hits(self.query, self.targets, blosum62, -10, -1,
+                               threshold=1000))
+        self.assertEqual([], hits)
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
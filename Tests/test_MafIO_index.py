@@ -261,6 +261,27 @@ if sqlite3:
             for i in range(6):
                 self.assertTrue(compare_record(recs[i], fetched_recs[i]))
 
+        def test_cache(self):
+            first = self.idx._get_record(34)
+            self.assertTrue(first is self.idx._get_record(34))
+
+            idx = MafIndex("MAF/ucsc_mm9_chr10.mafindex",
+                           "MAF/ucsc_mm9_chr10.maf", "mm9.chr10", max_cache=2)
+            for offset in (34, 734, 3361, 34):
+                idx._get_record(offset)
+            self.assertEqual(list(idx._cache), [3361, 34])
+
+            idx = MafIndex("MAF/ucsc_mm9_chr10.mafindex",
+                           "MAF/ucsc_mm9_chr10.maf", "mm9.chr10", max_cache=0)
+            self.assertFalse(idx._get_record(34) is idx._get_record(34))
+            self.assertEqual(len(idx._cache), 0)
+
+        def test_invalid_cache(self):
+            self.assertRaises(ValueError, MafIndex,
+                              "MAF/ucsc_mm9_chr10.mafindex",
+                              "MAF/ucsc_mm9_chr10.maf", "mm9.chr10",
+                              max_cache=-1)
+
     class TestSearchGoodMAF(unittest.TestCase):
         """Test index searching on a properly-formatted MAF"""
 
@@ -349,6 +370,62 @@ if sqlite3:
                     3012076, 16160203, 16379004, 15860456,
                     3012441, 15860899, 16379447, 16160646, 180525]))
 
+        def test_merged_search(self):
+            starts = (3018161, 3009319, 3014742)
+            ends = (3018644, 3012566, 3015028)
+            merged = [[rec.annotations["start"] for rec in x]
+                      for x in self.idx.search(starts, ends)]
+
+            separate = []
+            for exonstart, exonend in zip(starts, ends):
+                for x in self.idx.search((exonstart,), (exonend,)):
+                    block_starts = [rec.annotations["start"] for rec in x]
+                    if block_starts not in separate:
+                        separate.append(block_starts)
+
+            # still in exon order, as when searching for each exon in turn
+            self.assertEqual(merged, separate)
+
+        def test_many_exons(self):
+            # more exons than SQLite allows terms in a single expression
+            starts = [3009000 + 10 * i for i in range(1500)]
+            ends = [start + 5 for start in starts]
+            merged = [[rec.annotations["start"] for rec in x]
+                      for x in self.idx.search(starts, ends)]
+
+            separate = []
+            for exonstart, exonend in zip(starts, ends):
+                for x in self.idx.search((exonstart,), (exonend,)):
+                    block_starts = [rec.annotations["start"] for rec in x]
+                    if block_starts not in separate:
+                        separate.append(block_starts)
+
+            self.assertEqual(len(merged), 48)
+            self.assertEqual(merged, separate)
+
+    class TestSpliceSmallMAF(unittest.TestCase):
+        """Test in silico splicing across the edges of alignment bundles"""
+
+        def setUp(self):
+            self.idx = MafIndex("MAF/ucsc_mm9_chr10.mafindex",
+                                "MAF/ucsc_mm9_chr10.maf", "mm9.chr10")
+
+        def test_plus_strand(self):
+            result = self.idx.get_spliced((3009309, 3009390), (3009339, 3009400), 1)
+            self.assertEqual([x.id for x in result],
+                             ["mm9.chr10", "oryCun1.scaffold_133159"])
+            self.assertEqual(str(result[0].seq),
+                             "NNNNNNNNNNTCATAGGTATTTATTTTTAACC--CCCATACA")
+            self.assertEqual(str(result[1].seq),
+                             "----------TCACAGATATTTACTATTAACCTTCTTATTCA")
+
+        def test_minus_strand(self):
+            result = self.idx.get_spliced((3009309, 3009390), (3009339, 3009400), -1)
+            self.assertEqual(str(result[0].seq),
+                             "TGTATGGG--GGTTAAAAATAAATACCTATGANNNNNNNNNN")
+            self.assertEqual(str(result[1].seq),
+                             "TGAATAAGAAGGTTAATAGTAAATATCTGTGA----------")
+
     class TestSearchBadMAF(unittest.TestCase):
         """Test index searching on an incorrectly-formatted MAF"""
 
@@ -0,0 +1,148 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the columnar BLAST tab reader in Bio.SearchIO.BlastIO."""
+
+import os
+import unittest
+import warnings
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SearchIO.BlastIO.blast_tab_columns.")
+
+from Bio import BiopythonExperimentalWarning
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', BiopythonExperimentalWarning)
+    from Bio.SearchIO import parse
+    from Bio.SearchIO.BlastIO.blast_tab import _LONG_SHORT_MAP as all_fields
+    from Bio.SearchIO.BlastIO.blast_tab_columns import parse_columns, \
+        read_columns, query_offsets
+
+# test case files are in the Blast directory
+TEST_DIR = 'Blast'
+FMT = 'blast-tab'
+
+
+def get_file(filename):
+    """Returns the path of a test file."""
+    return os.path.join(TEST_DIR, filename)
+
+
+class BlastTabColumnsCases(unittest.TestCase):
+
+    def check(self, filename, **kwargs):
+        """Compare the columns with the parsed query results."""
+        tab_file = get_file(filename)
+        records = read_columns(tab_file, **kwargs)
+        # query results without hits have no rows
+        qresults = [qresult for qresult in parse(tab_file, FMT, **kwargs)
+                    if qresult]
+        query_ids, offsets = query_offsets(records)
+        self.assertEqual(len(qresults), len(query_ids))
+        self.assertEqual(len(qresults) + 1, len(offsets))
+        self.assertEqual(len(records), offsets[-1])
+        for qresult, start, end in zip(qresults, offsets[:-1], offsets[1:]):
+            hsps = qresult.hsps
+            self.assertEqual(len(hsps), end - start)
+            rows = records[start:end]
+            if 'evalue' in records.dtype.names:
+                self.assertEqual([hsp.evalue for hsp in hsps],
+                                 rows.evalue.tolist())
+            if 'sseqid' in records.dtype.names:
+                self.assertEqual([hsp.hit_id for hsp in hsps],
+                                 rows.sseqid.tolist())
+            if 'qstart' in records.dtype.names:
+                # the coordinates are as in the file
+                self.assertEqual([hsp.query_start + 1 for hsp in hsps],
+                                 numpy.minimum(rows.qstart,
+                                               rows.qend).tolist())
+        return records
+
+    def test_tab_2226_tblastn_001(self):
+        "Test reading TBLASTN 2.2.26+ tabular output (tab_2226_tblastn_001)"
+        records = self.check('tab_2226_tblastn_001.txt')
+        self.assertEqual(12, len(records))
+        self.assertEqual(numpy.float64, records.dtype['bitscore'])
+        self.assertEqual(numpy.int64, records.dtype['qstart'])
+        self.assertEqual('gi|11464971:4-101', records.qseqid[3])
+        self.assertEqual(95.92, records.pident[3])
+        self.assertEqual(199.0, records.bitscore[3])
+
+    def test_tab_2226_tblastn_002(self):
+        "Test reading TBLASTN 2.2.26+ tabular output (tab_2226_tblastn_002)"
+        records = read_columns(get_file('tab_2226_tblastn_002.txt'))
+        self.assertEqual(0, len(records))
+        self.assertEqual(('qseqid', 'sseqid', 'pident'),
+                         records.dtype.names[:3])
+        query_ids, offsets = query_offsets(records)
+        self.assertEqual(0, len(query_ids))
+        self.assertEqual([0], offsets.tolist())
+
+    def test_tab_2226_tblastn_commented(self):
+        "Test reading commented TBLASTN 2.2.26+ tabular output"
+        for filename in ('tab_2226_tblastn_005.txt',
+                         'tab_2226_tblastn_007.txt',
+                         'tab_2226_tblastn_010.txt',
+                         'tab_2226_tblastn_011.txt'):
+            self.check(filename, comments=True)
+
+    def test_tab_2226_tblastn_custom_fields(self):
+        "Test reading TBLASTN 2.2.26+ tabular output with custom fields"
+        records = self.check('tab_2226_tblastn_009.txt',
+                             fields=('qseqid', 'sseqid'))
+        self.assertEqual(('qseqid', 'sseqid'), records.dtype.names)
+        records = self.check('tab_2226_tblastn_013.txt', fields="qseq std sseq")
+        self.assertEqual('qseq', records.dtype.names[0])
+        self.assertEqual('sseq', records.dtype.names[-1])
+
+    def test_tab_2228_tblastx_001(self):
+        "Test reading TBLASTX 2.2.28+ tabular output (tab_2228_tblastx_001)"
+        records = self.check('tab_2228_tblastx_001.txt',
+                             fields=list(all_fields.values()), comments=True)
+        self.assertEqual(243, len(records))
+        # lists are kept as text
+        self.assertEqual(numpy.int64, records.dtype['qframe'])
+        self.assertTrue(records.dtype['sallseqid'].kind in 'SU')
+
+    def test_filter(self):
+        "Test filtering the rows while reading"
+        tab_file = get_file('tab_2226_tblastn_001.txt')
+        records = read_columns(tab_file, filter=lambda r: r.evalue < 1e-60)
+        self.assertEqual([199.0, 202.0, 202.0, 202.0],
+                         records.bitscore.tolist())
+        query_ids, offsets = query_offsets(records)
+        self.assertEqual(['gi|11464971:4-101'], query_ids.tolist())
+        self.assertEqual([0, 4], offsets.tolist())
+        records = read_columns(tab_file, filter=lambda r: r.evalue < 0)
+        self.assertEqual(0, len(records))
+
+    def test_chunks(self):
+        "Test the chunks hold whole queries"
+        tab_file = get_file('tab_2226_tblastn_001.txt')
+        chunks = list(parse_columns(tab_file, chunk_size=1))
+        self.assertEqual([3, 9], [len(chunk) for chunk in chunks])
+        chunks = list(parse_columns(tab_file, chunk_size=1000))
+        self.assertEqual([12], [len(chunk) for chunk in chunks])
+        self.assertEqual(read_columns(tab_file).tolist(),
+                         read_columns(tab_file, chunk_size=2).tolist())
+
+    def test_bad_fields(self):
+        "Test errors for the wrong fields"
+        tab_file = get_file('tab_2226_tblastn_001.txt')
+        # wrong number of columns
+        self.assertRaises(ValueError, read_columns, tab_file,
+                          fields=('qseqid', 'sseqid'))
+        # no hit ID column
+        self.assertRaises(ValueError, read_columns, tab_file,
+                          fields=('qseqid', 'evalue'))
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
@@ -17,6 +17,7 @@ from Bio import BiopythonExperimentalWarning
 with warnings.catch_warnings():
     warnings.simplefilter('ignore', BiopythonExperimentalWarning)
     from Bio.SearchIO import parse
+    from Bio.SearchIO.BlastIO.blast_xml import BlastXmlParser
 
 # test case files are in the Blast directory
 TEST_DIR = 'Blast'
@@ -3182,6 +3183,19 @@ class BlastXmlSpecialCases(unittest.TestCase):
         self.assertEqual('gnl|BL_ORD_ID|17', hit2.id)
         self.assertEqual('gi|347972582|ref|XM_309352.4| Anopheles gambiae str. PEST AGAP011294-PA (DEFI_ANOGA) mRNA, complete cds', hit2.description)
 
+    def test_xml_2226_blastp_001_one_query_in_memory(self):
+        xml_file = get_file('xml_2226_blastp_001.xml')
+        with open(xml_file) as handle:
+            parser = BlastXmlParser(handle)
+            counter = 0
+            for qresult in parser:
+                counter += 1
+                # parsed Iteration elements are dropped from the tree, the
+                # rest of this small file has already been read into it
+                self.assertEqual(3 - counter, len(parser._iterations_elem))
+        self.assertEqual(3, counter)
+        self.assertEqual(0, len(parser._iterations_elem))
+
 
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
@@ -5,9 +5,18 @@
 
 """Tests for SearchIO blast-xml indexing."""
 
+import pickle
+import time
 import unittest
+import warnings
+from collections import OrderedDict
+from copy import deepcopy
 
-from search_tests_common import CheckRaw, CheckIndex
+from search_tests_common import CheckRaw, CheckIndex, compare_search_obj
+
+from Bio import BiopythonParserWarning
+from Bio import SearchIO
+from Bio.SearchIO._model import Hit
 
 
 class BlastXmlRawCases(CheckRaw):
@@ -761,6 +770,73 @@ class BlastXmlIndexCases(CheckIndex):
         filename = 'Blast/xml_2226_tblastn_004.xml'
         self.check_index(filename, self.fmt)
 
+    def test_blastxml_2226_blastn_006(self):
+        """Test blast-xml indexing, BLAST 2.2.26+, hits with the same ID"""
+        filename = 'Blast/xml_2226_blastn_006.xml'
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', BiopythonParserWarning)
+            self.check_index(filename, self.fmt)
+
+
+class BlastXmlLazyHitCases(unittest.TestCase):
+
+    def test_lazy_hits(self):
+        """Test blast-xml indexing only parses the hits accessed"""
+        filename = 'Blast/xml_2226_blastp_004.xml'
+        parsed = next(SearchIO.parse(filename, 'blast-xml'))
+        indexed = SearchIO.index(filename, 'blast-xml')
+        qresult = indexed[parsed.id]
+        self.assertEqual(parsed.hit_keys, qresult.hit_keys)
+        self.assertEqual(5, len(qresult))
+        self.assertEqual(parsed[2].id, qresult[2].id)
+        self.assertEqual(parsed[-1].id, qresult[-1].id)
+        # only the hits accessed so far have been parsed (including the
+        # first, which gives the query ID checked by the index)
+        parsed_hits = [isinstance(hit, Hit) for hit in
+                       dict.values(qresult._items)]
+        self.assertEqual([True, False, True, False, True],
+                         parsed_hits)
+        self.assertTrue(compare_search_obj(parsed, qresult))
+        self.assertTrue(all(isinstance(hit, Hit) for hit in
+                            dict.values(qresult._items)))
+        indexed.close()
+
+    def test_top_hit_speed(self):
+        """Test getting the top hit from a blast-xml index is quick"""
+        filename = 'Blast/xml_2212L_blastp_001.xml'
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', BiopythonParserWarning)
+            indexed = SearchIO.index(filename, 'blast-xml')
+            key = list(indexed)[0]
+            # best of three, to reduce the noise
+            full = lazy = None
+            for i in range(3):
+                start = time.time()
+                parsed = next(SearchIO.parse(filename, 'blast-xml'))
+                full = min(full or 1e9, time.time() - start)
+                start = time.time()
+                hit = indexed[key][0]
+                lazy = min(lazy or 1e9, time.time() - start)
+        self.assertEqual(212, len(parsed))
+        self.assertEqual(parsed[0].id, hit.id)
+        # reading the raw record used to take much longer than a full parse
+        self.assertTrue(lazy < full, "%0.3fs for the top hit, but %0.3fs to "
+                        "parse all the hits" % (lazy, full))
+        indexed.close()
+
+    def test_copy_and_pickle(self):
+        """Test copying and pickling blast-xml indexed query results"""
+        filename = 'Blast/xml_2226_blastp_004.xml'
+        parsed = next(SearchIO.parse(filename, 'blast-xml'))
+        indexed = SearchIO.index(filename, 'blast-xml')
+        for copier in (deepcopy, lambda obj: pickle.loads(pickle.dumps(obj))):
+            qresult = copier(indexed[parsed.id])
+            self.assertEqual(OrderedDict, type(qresult._items))
+            self.assertTrue(compare_search_obj(parsed, qresult))
+        indexed.close()
+        # the copies work without the index
+        self.assertTrue(compare_search_obj(parsed, qresult))
+
 
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
@@ -646,6 +646,32 @@ class HmmersearchCases(unittest.TestCase):
         self.assertEqual(318, hsp.env_end)
         self.assertEqual(0.95, hsp.acc_avg)
 
+
+class MaxHitsCases(unittest.TestCase):
+
+    fmt = 'hmmscan3-domtab'
+
+    def test_30_hmmscan_001_max_hits(self):
+        """Test parsing hmmscan3-domtab with max_hits (domtab_30_hmmscan_001)"""
+
+        tab_file = get_file('domtab_30_hmmscan_001.out')
+        qresults = list(parse(tab_file, self.fmt))
+        for max_hits, counts in ((1, [1, 1, 1, 1, 1, 1, 1, 1, 1, 1]),
+                                 (2, [1, 2, 2, 2, 2, 1])):
+            parts = list(parse(tab_file, self.fmt, max_hits=max_hits))
+            self.assertEqual(counts, [len(part) for part in parts])
+            # joining the consecutive parts of each query gives the full hits
+            idx = 0
+            for qresult in qresults:
+                hits = []
+                while idx < len(parts) and parts[idx].id == qresult.id:
+                    self.assertEqual(qresult.description, parts[idx].description)
+                    hits.extend(hit.id for hit in parts[idx])
+                    idx += 1
+                self.assertEqual([hit.id for hit in qresult], hits)
+            self.assertEqual(len(parts), idx)
+
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
     unittest.main(testRunner=runner)
@@ -0,0 +1,121 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the columnar HMMER domain table reader in Bio.SearchIO.HmmerIO."""
+
+import os
+import unittest
+import warnings
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SearchIO.HmmerIO.hmmer3_domtab_columns.")
+
+from Bio import BiopythonExperimentalWarning
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', BiopythonExperimentalWarning)
+    from Bio.SearchIO import parse
+    from Bio.SearchIO.HmmerIO.hmmer3_domtab_columns import parse_columns, \
+        read_columns, query_offsets
+
+# test case files are in the Hmmer directory
+TEST_DIR = 'Hmmer'
+
+
+def get_file(filename):
+    """Returns the path of a test file."""
+    return os.path.join(TEST_DIR, filename)
+
+
+class DomtabColumnsCases(unittest.TestCase):
+
+    def check(self, filename, fmt):
+        """Compare the columns with the parsed query results."""
+        tab_file = get_file(filename)
+        records = read_columns(tab_file)
+        qresults = list(parse(tab_file, fmt))
+        query_ids, offsets = query_offsets(records)
+        self.assertEqual([qresult.id for qresult in qresults],
+                         query_ids.tolist())
+        self.assertEqual(len(qresults) + 1, len(offsets))
+        self.assertEqual(len(records), offsets[-1])
+        for qresult, start, end in zip(qresults, offsets[:-1], offsets[1:]):
+            hsps = qresult.hsps
+            self.assertEqual(len(hsps), end - start)
+            rows = records[start:end]
+            self.assertEqual([hsp.hit_id for hsp in hsps],
+                             rows.target_name.tolist())
+            self.assertEqual([hsp.evalue for hsp in hsps],
+                             rows.domain_evalue.tolist())
+            self.assertEqual([hsp.bitscore for hsp in hsps],
+                             rows.domain_bitscore.tolist())
+            # the coordinates are as in the file
+            self.assertEqual([hsp.env_start + 1 for hsp in hsps],
+                             rows.env_from.tolist())
+            self.assertEqual([qresult.seq_len] * len(hsps),
+                             rows.query_len.tolist())
+        return records
+
+    def test_domtab_30_hmmscan_001(self):
+        "Test reading hmmscan 3.0 domain table (domtab_30_hmmscan_001)"
+        records = self.check('domtab_30_hmmscan_001.out', 'hmmscan3-domtab')
+        self.assertEqual(13, len(records))
+        self.assertEqual(numpy.int64, records.dtype['hmm_from'])
+        self.assertEqual(numpy.float64, records.dtype['domain_evalue_cond'])
+        self.assertEqual('Xpo1', records.target_name[3])
+        self.assertEqual('PF08389.7', records.target_accession[3])
+        self.assertEqual(116.1, records.domain_bitscore[3])
+        self.assertEqual(0.98, records.acc_avg[3])
+        self.assertEqual('Exportin 1-like protein', records.description[3])
+
+    def test_domtab_30_hmmscan_002(self):
+        "Test reading hmmscan 3.0 domain table without hits"
+        records = read_columns(get_file('domtab_30_hmmscan_002.out'))
+        self.assertEqual(0, len(records))
+        self.assertEqual(('target_name', 'target_accession', 'target_len'),
+                         records.dtype.names[:3])
+        query_ids, offsets = query_offsets(records)
+        self.assertEqual(0, len(query_ids))
+        self.assertEqual([0], offsets.tolist())
+
+    def test_domtab_hmmscan_hmmsearch(self):
+        "Test reading hmmscan and hmmsearch domain tables"
+        for filename, fmt in (('domtab_30_hmmscan_003.out', 'hmmscan3-domtab'),
+                              ('domtab_30_hmmscan_004.out', 'hmmscan3-domtab'),
+                              ('domtab_31b1_hmmscan_001.out', 'hmmscan3-domtab'),
+                              ('domtab_30_hmmsearch_001.out', 'hmmsearch3-domtab'),
+                              ('domtab_31b1_hmmsearch_001.out', 'hmmsearch3-domtab')):
+            self.check(filename, fmt)
+
+    def test_filter(self):
+        "Test filtering the rows while reading"
+        tab_file = get_file('domtab_30_hmmscan_001.out')
+        records = read_columns(tab_file,
+                               filter=lambda r: r.domain_evalue < 1e-10)
+        self.assertEqual(['Globin', 'Xpo1', 'Pou', 'Homeobox'],
+                         records.target_name.tolist())
+        query_ids, offsets = query_offsets(records)
+        self.assertEqual(3, len(query_ids))
+        self.assertEqual([0, 1, 2, 4], offsets.tolist())
+        records = read_columns(tab_file, filter=lambda r: r.domain_evalue < 0)
+        self.assertEqual(0, len(records))
+
+    def test_chunks(self):
+        "Test the chunks hold whole queries"
+        tab_file = get_file('domtab_30_hmmscan_001.out')
+        chunks = list(parse_columns(tab_file, chunk_size=1))
+        self.assertEqual([1, 2, 4, 6], [len(chunk) for chunk in chunks])
+        chunks = list(parse_columns(tab_file, chunk_size=3))
+        self.assertEqual([3, 4, 6], [len(chunk) for chunk in chunks])
+        self.assertEqual(read_columns(tab_file).tolist(),
+                         read_columns(tab_file, chunk_size=2).tolist())
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
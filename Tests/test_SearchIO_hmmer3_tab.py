@@ -16,7 +16,7 @@ import warnings
 
 with warnings.catch_warnings():
     warnings.simplefilter('ignore', BiopythonExperimentalWarning)
-    from Bio.SearchIO import parse
+    from Bio.SearchIO import parse, read, index, index_db, to_dict
 
 # test case files are in the Blast directory
 TEST_DIR = 'Hmmer'
@@ -496,6 +496,43 @@ class HmmsearchCases(unittest.TestCase):
         self.assertEqual(0.0, hsp.bias)
 
 
+class MaxHitsCases(unittest.TestCase):
+
+    def test_30_hmmscan_001_max_hits(self):
+        """Test parsing hmmer3-tab with max_hits (tab_30_hmmscan_001)"""
+
+        tab_file = get_file('tab_30_hmmscan_001.out')
+        qresults = list(parse(tab_file, FMT))
+        for max_hits, counts in ((1, [1, 1, 1, 1, 1, 1, 1, 1, 1, 1]),
+                                 (2, [1, 2, 2, 2, 2, 1])):
+            parts = list(parse(tab_file, FMT, max_hits=max_hits))
+            self.assertEqual(counts, [len(part) for part in parts])
+            # joining the consecutive parts of each query gives the full hits
+            idx = 0
+            for qresult in qresults:
+                hits = []
+                while idx < len(parts) and parts[idx].id == qresult.id:
+                    self.assertEqual(qresult.description, parts[idx].description)
+                    hits.extend(hit.id for hit in parts[idx])
+                    idx += 1
+                self.assertEqual([hit.id for hit in qresult], hits)
+            self.assertEqual(len(parts), idx)
+
+    def test_max_hits_restrictions(self):
+        """Test max_hits is rejected where a query must be one QueryResult"""
+        tab_file = get_file('tab_30_hmmscan_001.out')
+        for max_hits in (0, -1):
+            self.assertRaises(ValueError, list,
+                              parse(tab_file, FMT, max_hits=max_hits))
+        self.assertRaises(ValueError, index, tab_file, FMT, max_hits=1)
+        self.assertRaises(ValueError, index_db, ':memory:', [tab_file], FMT,
+                          max_hits=1)
+        self.assertRaises(ValueError, read,
+                          get_file('tab_30_hmmscan_004.out'), FMT, max_hits=1)
+        self.assertRaises(ValueError, to_dict,
+                          parse(tab_file, FMT, max_hits=1))
+
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
     unittest.main(testRunner=runner)
@@ -2346,6 +2346,30 @@ class PhmmerCases(unittest.TestCase):
                 hsp.aln_annotation['PP'])
 
 
+class MaxHitsCases(unittest.TestCase):
+
+    def test_30_hmmscan_001_max_hits(self):
+        """Test parsing hmmer3-text with max_hits (text_30_hmmscan_001)"""
+
+        txt_file = get_file('text_30_hmmscan_001.out')
+        qresults = list(parse(txt_file, FMT))
+        for max_hits, counts in ((1, [0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]),
+                                 (2, [0, 1, 2, 2, 2, 2, 1])):
+            parts = list(parse(txt_file, FMT, max_hits=max_hits))
+            self.assertEqual(counts, [len(part) for part in parts])
+            # joining the consecutive parts of each query gives the full hits
+            idx = 0
+            for qresult in qresults:
+                hits = []
+                while idx < len(parts) and parts[idx].id == qresult.id:
+                    self.assertEqual(qresult.description, parts[idx].description)
+                    hits.extend(hit.id for hit in parts[idx])
+                    idx += 1
+                self.assertEqual([hit.id for hit in qresult], hits)
+            self.assertEqual(len(parts), idx)
+        self.assertRaises(ValueError, list, parse(txt_file, FMT, max_hits=0))
+
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
     unittest.main(testRunner=runner)
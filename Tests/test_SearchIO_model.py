@@ -11,6 +11,7 @@ to all formats.
 
 """
 
+import pickle
 import unittest
 from copy import deepcopy
 
@@ -99,6 +100,13 @@ class QueryResultCases(unittest.TestCase):
         self.assertEqual("QueryResult(id='query1', 3 hits)",
                 repr(self.qresult))
 
+    def test_pickle(self):
+        """Test pickling QueryResult"""
+        qresult = pickle.loads(pickle.dumps(self.qresult,
+                                            pickle.HIGHEST_PROTOCOL))
+        self.assertTrue(compare_search_obj(self.qresult, qresult))
+        self.assertEqual(1102, qresult.seq_len)
+
     def test_iter(self):
         """Test QueryResult.__iter__"""
         # iteration should return hits contained
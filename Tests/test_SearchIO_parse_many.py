@@ -0,0 +1,168 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for parsing many files with Bio.SearchIO.parse_many."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from Bio import BiopythonExperimentalWarning
+
+import warnings
+
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', BiopythonExperimentalWarning)
+    from Bio import SearchIO
+
+from search_tests_common import compare_search_obj
+
+
+class ParseManyCases(unittest.TestCase):
+
+    in_files = [os.path.join('Blast', 'xml_2226_blastp_001.xml'),
+                os.path.join('Blast', 'mirna.xml'),
+                os.path.join('Blast', 'xml_2226_blastp_004.xml')]
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="BioSearchIO_parse_many_")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def check(self, processes):
+        qresults = list(SearchIO.parse_many(self.in_files, 'blast-xml',
+                                            processes=processes))
+        expected = []
+        for in_file in self.in_files:
+            expected.extend(SearchIO.parse(in_file, 'blast-xml'))
+        self.assertEqual(len(expected), len(qresults))
+        for qresult, exp in zip(qresults, expected):
+            self.assertTrue(compare_search_obj(exp, qresult))
+
+    def test_serial(self):
+        """Parse several BLAST XML files in this process"""
+        self.check(1)
+
+    def test_pool(self):
+        """Parse several BLAST XML files using a pool of processes"""
+        self.check(2)
+
+    def write_shards(self, in_file, fmt, count):
+        """Splits the hits of each query over several files."""
+        qresults = list(SearchIO.parse(in_file, fmt))
+        shards = []
+        for idx in range(count):
+            shard = os.path.join(self.temp_dir, "%i.out" % idx)
+            SearchIO.write([qresult[idx::count] for qresult in qresults],
+                           shard, fmt)
+            shards.append(shard)
+        return qresults, shards
+
+    def test_merge(self):
+        """Merge the query results of a search split by hits"""
+        qresults, shards = self.write_shards(
+            os.path.join('Blast', 'tab_2226_tblastn_001.txt'), 'blast-tab', 3)
+        for processes in (1, 2):
+            merged = list(SearchIO.parse_many(shards, 'blast-tab', merge=True,
+                                              processes=processes))
+            self.assertEqual([qresult.id for qresult in qresults],
+                             [qresult.id for qresult in merged])
+            for qresult, merged_qresult in zip(qresults, merged):
+                self.assertEqual(sorted(qresult.hit_keys),
+                                 sorted(merged_qresult.hit_keys))
+                self.assertEqual(len(qresult.hsps), len(merged_qresult.hsps))
+                for hit in qresult:
+                    self.assertEqual(
+                        [hsp.evalue for hsp in hit],
+                        [hsp.evalue for hsp in merged_qresult[hit.id]])
+        # without merging, each file has each query
+        self.assertEqual(6, len(list(SearchIO.parse_many(shards, 'blast-tab'))))
+
+    def test_merge_duplicate_hits(self):
+        """Merge the HSPs of hits found in several files"""
+        in_file = os.path.join('Hmmer', 'text_30_hmmscan_001.out')
+        qresult = list(SearchIO.parse_many([in_file] * 2, 'hmmer3-text',
+                                           merge=True))[-1]
+        expected = list(SearchIO.parse(in_file, 'hmmer3-text'))[-1]
+        self.assertEqual(expected.hit_keys, qresult.hit_keys)
+        self.assertEqual(2 * len(expected.hsps), len(qresult.hsps))
+
+    def test_merge_alternative_ids(self):
+        """Merge the HSPs of hits found under another of their IDs"""
+        in_file = os.path.join('Blast', 'xml_2222_blastp_001.xml')
+        with open(in_file) as handle:
+            data = handle.read()
+        # the second file lists the fourth hit under its alternative ID
+        old_id = 'gi|225441155|ref|XP_002267788.1|'
+        new_id = 'gi|157356804|emb|CAO63006.1|'
+        old_desc = 'PREDICTED: hypothetical protein [Vitis vinifera]'
+        new_desc = 'unnamed protein product [Vitis vinifera]'
+        old_hit = '<Hit_id>%s</Hit_id>\n          <Hit_def>%s &gt;%s %s</Hit_def>'
+        self.assertEqual(1, data.count(old_hit % (old_id, old_desc,
+                                                  new_id, new_desc)))
+        swapped = os.path.join(self.temp_dir, 'swapped.xml')
+        with open(swapped, 'w') as handle:
+            handle.write(data.replace(
+                old_hit % (old_id, old_desc, new_id, new_desc),
+                old_hit % (new_id, new_desc, old_id, old_desc)))
+        qresult = list(SearchIO.parse_many([in_file, swapped], 'blast-xml',
+                                           merge=True))[0]
+        expected = next(SearchIO.parse(in_file, 'blast-xml'))
+        self.assertEqual(expected.hit_keys, qresult.hit_keys)
+        self.assertEqual(2 * len(expected.hsps), len(qresult.hsps))
+        hit = qresult[new_id]
+        self.assertEqual(old_id, hit.id)
+        self.assertEqual(2, len(hit))
+        for hsp in hit:
+            self.assertEqual(old_id, hsp.hit_id)
+            self.assertEqual(old_desc, hsp.hit_description)
+
+    def test_sort(self):
+        """Sort the hits of merged query results"""
+        qresults, shards = self.write_shards(
+            os.path.join('Blast', 'tab_2226_tblastn_001.txt'), 'blast-tab', 2)
+        for qresult in SearchIO.parse_many(shards, 'blast-tab', merge=True,
+                                           sort='evalue'):
+            evalues = [min(hsp.evalue for hsp in hit) for hit in qresult]
+            self.assertEqual(sorted(evalues), evalues)
+        for qresult in SearchIO.parse_many(shards, 'blast-tab', merge=True,
+                                           sort='bitscore'):
+            bitscores = [max(hsp.bitscore for hsp in hit) for hit in qresult]
+            self.assertEqual(sorted(bitscores, reverse=True), bitscores)
+        # HMMER hits have their own values (for the full sequence), which
+        # here give another order than the values of the best domains
+        qresult = list(SearchIO.parse(
+            os.path.join('Hmmer', 'tab_30_hmmscan_001.out'), 'hmmer3-tab'))[-1]
+        in_file = os.path.join(self.temp_dir, 'reversed.out')
+        SearchIO.write(qresult[::-1], in_file, 'hmmer3-tab')
+        for sort in ('evalue', 'bitscore'):
+            sorted_qresult = list(SearchIO.parse_many([in_file], 'hmmer3-tab',
+                                                      sort=sort))[0]
+            self.assertEqual(['Pou', 'Homeobox', 'HTH_31', 'Homeobox_KN',
+                              'DUF521'], sorted_qresult.hit_keys)
+
+    def test_bad_arguments(self):
+        """Check parse_many argument errors"""
+        self.assertRaises(ValueError, list,
+                          SearchIO.parse_many(self.in_files, 'Blast-xml'))
+        self.assertRaises(ValueError, list,
+                          SearchIO.parse_many(self.in_files, 'blast-xml',
+                                              sort='score'))
+        with open(self.in_files[0]) as handle:
+            self.assertRaises(TypeError, list,
+                              SearchIO.parse_many([handle], 'blast-xml'))
+
+    def test_failure(self):
+        """A parsing error in a worker process raises an exception"""
+        self.assertRaises(SyntaxError, list, SearchIO.parse_many(
+            [self.in_files[0], os.path.join('Blast', 'tab_2226_tblastn_001.txt')],
+            'blast-xml', processes=2))
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
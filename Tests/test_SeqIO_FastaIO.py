@@ -6,11 +6,17 @@
 
 from __future__ import print_function
 
+import os
+import shutil
+import tempfile
 import unittest
 from Bio._py3k import StringIO
 
 from Bio import SeqIO
-from Bio.SeqIO.FastaIO import FastaIterator
+from Bio import bgzf
+from Bio.SeqIO.FastaIO import FastaIterator, SimpleFastaParser
+from Bio.SeqIO.FastaIO import BlockFastaParser, BlockFastaIterator
+from Bio.SeqIO.FastaIO import IndexedFastaReader, write_fai
 from Bio.Alphabet import generic_nucleotide, generic_dna
 
 
@@ -118,6 +124,148 @@ class TitleFunctions(unittest.TestCase):
         self.assertEqual("", record.description)
 
 
+class BlockParser(unittest.TestCase):
+    """Compare the BlockFastaParser to the SimpleFastaParser."""
+
+    def check_file(self, filename):
+        with open(filename) as handle:
+            expected = list(SimpleFastaParser(handle))
+        for block_size in (1, 2, 5, 1048576):
+            with open(filename) as handle:
+                self.assertEqual(expected,
+                                 list(BlockFastaParser(handle, block_size)))
+            with open(filename, "rb") as handle:
+                self.assertEqual(expected,
+                                 list(BlockFastaParser(handle, block_size)))
+
+    def test_files(self):
+        """Checking block parsing of FASTA files."""
+        for filename in single_nucleic_files + multi_dna_files + \
+                single_amino_files + multi_amino_files:
+            self.check_file(filename)
+
+    def test_preamble_and_blanks(self):
+        """Checking block parsing with leading text and blank lines."""
+        data = "comment > here\n\n>one first\r\nAC GT\r\n\r\nTT\n>two\n>\nG\n"
+        expected = list(SimpleFastaParser(StringIO(data)))
+        self.assertEqual(expected, [("one first", "ACGTTT"), ("two", ""),
+                                    ("", "G")])
+        for block_size in (1, 3, 1048576):
+            self.assertEqual(expected,
+                             list(BlockFastaParser(StringIO(data), block_size)))
+        self.assertEqual([], list(BlockFastaParser(StringIO("no records\n"))))
+        self.assertEqual([], list(BlockFastaParser(StringIO(""))))
+
+    def test_iterator(self):
+        """Checking block parsing into SeqRecord objects."""
+        filename = "Quality/example.fasta"
+        default = list(SeqIO.parse(filename, "fasta", generic_dna))
+        with open(filename, "rb") as handle:
+            records = list(BlockFastaIterator(handle, generic_dna,
+                                              block_size=10))
+        self.assertEqual(len(default), len(records))
+        for old, new in zip(default, records):
+            self.assertEqual(old.id, new.id)
+            self.assertEqual(old.name, new.name)
+            self.assertEqual(old.description, new.description)
+            self.assertEqual(str(old.seq), str(new.seq))
+            self.assertEqual(old.seq.alphabet, new.seq.alphabet)
+
+
+class Faidx(unittest.TestCase):
+    """Check the samtools faidx style indexed FASTA support."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="biopython_faidx_")
+        self.expected = list(SeqIO.parse("GenBank/NC_005816.ffn", "fasta"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def check_fetch(self, fasta):
+        self.assertEqual([r.id for r in self.expected], fasta.keys())
+        for record in self.expected:
+            seq = str(record.seq)
+            self.assertEqual(len(seq), fasta.length(record.id))
+            self.assertEqual(seq, fasta.fetch(record.id))
+            for start, end in [(0, 1), (5, 80), (69, 71), (70, 140),
+                               (100, 1000), (-10, None), (50, 50)]:
+                self.assertEqual(seq[start:end],
+                                 fasta.fetch(record.id, start, end))
+            self.assertEqual(seq[69:142],
+                             fasta.fetch_region("%s:70-142" % record.id))
+            self.assertEqual(seq[99:],
+                             fasta.fetch_region("%s:1,00" % record.id))
+
+    def test_write_fai(self):
+        """Checking writing a FASTA index matches samtools faidx."""
+        fai = os.path.join(self.temp_dir, "example.fai")
+        self.assertEqual(10, write_fai("GenBank/NC_005816.ffn", fai))
+        with open(fai) as handle:
+            new = handle.read()
+        with open("GenBank/NC_005816.ffn.fai") as handle:
+            old = handle.read()
+        self.assertEqual(old, new)
+
+    def test_fetch(self):
+        """Checking fetching from an indexed FASTA file."""
+        with IndexedFastaReader("GenBank/NC_005816.ffn") as fasta:
+            self.check_fetch(fasta)
+        # Index built in memory
+        fai = os.path.join(self.temp_dir, "missing.fai")
+        with IndexedFastaReader("GenBank/NC_005816.ffn", fai) as fasta:
+            self.check_fetch(fasta)
+
+    def test_fetch_bgzf(self):
+        """Checking fetching from an indexed BGZF compressed FASTA file."""
+        filename = os.path.join(self.temp_dir, "example.fasta.bgz")
+        with open("GenBank/NC_005816.ffn", "rb") as handle:
+            lines = handle.readlines()
+        # Use lots of small BGZF blocks, so regions will span blocks
+        with bgzf.BgzfWriter(filename, "wb") as handle:
+            for i, line in enumerate(lines):
+                handle.write(line)
+                if i % 3 == 0:
+                    handle.flush()
+        # Without the index files,
+        with IndexedFastaReader(filename) as fasta:
+            self.check_fetch(fasta)
+        self.assertEqual(10, write_fai(filename))
+        with open(filename + ".fai") as handle:
+            new = handle.read()
+        with open("GenBank/NC_005816.ffn.fai") as handle:
+            old = handle.read()
+        self.assertEqual(old, new)
+        with open(filename + ".gzi", "rb") as handle:
+            offsets = bgzf.read_gzi(handle)
+        self.assertEqual(len(lines) // 3 + 1, len(offsets))
+        with open(filename, "rb") as handle:
+            self.assertEqual(offsets, bgzf.make_gzi(handle))
+        # With the index files,
+        with IndexedFastaReader(filename) as fasta:
+            self.check_fetch(fasta)
+
+    def test_bad_regions(self):
+        """Checking invalid regions."""
+        with IndexedFastaReader("GenBank/NC_005816.ffn") as fasta:
+            self.assertRaises(KeyError, fasta.fetch, "missing")
+            self.assertRaises(KeyError, fasta.fetch_region, "missing:1-10")
+            name = fasta.keys()[0]
+            self.assertRaises(ValueError, fasta.fetch_region, name + ":0-10")
+            self.assertRaises(ValueError, fasta.fetch_region, name + ":10-5")
+            self.assertRaises(ValueError, fasta.fetch_region, name + ":X-10")
+
+    def test_bad_line_lengths(self):
+        """Checking FASTA files with inconsistent line lengths."""
+        filename = os.path.join(self.temp_dir, "bad.fasta")
+        with open(filename, "w") as handle:
+            handle.write(">one\nACGT\nAC\nACGT\n")
+        self.assertRaises(ValueError, write_fai, filename)
+        with open(filename, "w") as handle:
+            handle.write(">one\nACGT\nACGTA\n")
+        self.assertRaises(ValueError, IndexedFastaReader, filename)
+
+
 single_nucleic_files = ['Fasta/lupine.nu', 'Fasta/elderberry.nu',
                         'Fasta/phlox.nu', 'Fasta/centaurea.nu',
                         'Fasta/wisteria.nu', 'Fasta/sweetpea.nu',
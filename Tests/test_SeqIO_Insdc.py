@@ -66,6 +66,32 @@ class TestEmbl(unittest.TestCase):
         self.assertIn(' /one=1\n', gbk)
         self.assertIn(' /text="blah"\n', gbk)
 
+    def test_writing_buffered(self):
+        class CountingHandle(StringIO):
+            writes = 0
+
+            def write(self, text):
+                self.writes += 1
+                return StringIO.write(self, text)
+
+        exons = [FeatureLocation(i, i + 5, strand=-1) for i in range(0, 500, 10)]
+        f = SeqFeature(sum(exons[1:], exons[0]), type="CDS",
+                       qualifiers={"note": " ".join(["word"] * 40)})
+        record = SeqRecord(Seq("ACGT" * 200, generic_dna), "dummy",
+                           description=" ".join(["A long description"] * 10),
+                           features=[f])
+        for fmt in ("gb", "embl", "imgt"):
+            handle = CountingHandle()
+            self.assertEqual(2, SeqIO.write([record, record], handle, fmt))
+            self.assertEqual(2, handle.writes)
+            handle.seek(0)
+            for new in SeqIO.parse(handle, fmt):
+                self.assertEqual(str(record.seq), str(new.seq))
+                self.assertEqual(record.description, new.description)
+                self.assertEqual(str(f.location), str(new.features[0].location))
+                self.assertEqual(f.qualifiers["note"],
+                                 new.features[0].qualifiers["note"][0])
+
 
 class TestEmblRewrite(unittest.TestCase):
 
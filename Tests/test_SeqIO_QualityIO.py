@@ -453,6 +453,51 @@ class TestReadWrite(unittest.TestCase):
         self.assertEqual(data, handle.getvalue())
 
 
+class TestLightweight(unittest.TestCase):
+    """Test parsing FASTQ files as lightweight records."""
+
+    def check_file(self, filename, fmt):
+        full = list(SeqIO.parse(filename, fmt))
+        light = list(SeqIO.parse(filename, fmt, lightweight=True))
+        self.assertEqual(len(full), len(light))
+        for old, new in zip(full, light):
+            self.assertEqual(old.id, new.id)
+            self.assertEqual(old.name, new.name)
+            self.assertEqual(old.description, new.description)
+            self.assertEqual(str(old.seq), new.seq)
+            self.assertEqual(len(old), len(new))
+            self.assertEqual(old.letter_annotations["phred_quality"],
+                             new.qualities)
+            promoted = new.to_seqrecord()
+            self.assertEqual(old.format(fmt), promoted.format(fmt))
+
+    def test_sanger(self):
+        """Compare lightweight and full records for Sanger FASTQ."""
+        self.check_file("Quality/example.fastq", "fastq")
+        self.check_file("Quality/sanger_93.fastq", "fastq-sanger")
+
+    def test_illumina(self):
+        """Compare lightweight and full records for Illumina FASTQ."""
+        self.check_file("Quality/illumina_faked.fastq", "fastq-illumina")
+
+    def test_bad_quality(self):
+        """Check invalid qualities are caught when decoded."""
+        records = SeqIO.parse(StringIO("@id\nACGT\n+\nAA A\n"), "fastq",
+                              lightweight=True)
+        record = next(records)
+        self.assertEqual("ACGT", record.seq)
+        self.assertRaises(ValueError, getattr, record, "qualities")
+
+    def test_unsupported(self):
+        """Check lightweight records are refused for other formats."""
+        with self.assertRaises(ValueError):
+            list(SeqIO.parse("Quality/solexa_faked.fastq", "fastq-solexa",
+                             lightweight=True))
+        with self.assertRaises(ValueError):
+            list(SeqIO.parse("Quality/example.fastq", "fastq", generic_dna,
+                             lightweight=True))
+
+
 class TestWriteRead(unittest.TestCase):
     """Test can write and read back files."""
     def test_generated(self):
@@ -0,0 +1,155 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the asynchronous Bio.SeqIO.aparse function."""
+
+import sys
+import unittest
+
+from Bio import MissingPythonDependencyError
+
+if sys.version_info < (3, 6):
+    raise MissingPythonDependencyError("Bio.SeqIO.aparse needs Python 3.6 "
+                                       "or later.")
+
+import asyncio
+
+from Bio import SeqIO
+
+
+class TestAsyncParse(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def aparse(self, data, format, **kwargs):
+        """Feed data to a StreamReader, and collect the records via aparse."""
+        stream = asyncio.StreamReader(loop=self.loop)
+        stream.feed_data(data)
+        stream.feed_eof()
+        # Drive the async generator without needing the async syntax here
+        iterator = SeqIO.aparse(stream, format, **kwargs)
+        records = []
+        while True:
+            try:
+                records.append(self.loop.run_until_complete(
+                    iterator.__anext__()))
+            except StopAsyncIteration:
+                return records
+
+    def check(self, filename, format, chunk_sizes=(1, 7, 100, 65536)):
+        with open(filename, "rb") as handle:
+            data = handle.read()
+        expected = list(SeqIO.parse(filename, format))
+        self.assertTrue(expected)
+        for chunk_size in chunk_sizes:
+            records = self.aparse(data, format, chunk_size=chunk_size)
+            self.assertEqual(len(expected), len(records))
+            for old, new in zip(expected, records):
+                self.assertEqual(old.id, new.id)
+                self.assertEqual(old.description, new.description)
+                self.assertEqual(str(old.seq), str(new.seq))
+                self.assertEqual(old.letter_annotations,
+                                 new.letter_annotations)
+                self.assertEqual(len(old.features), len(new.features))
+
+    def test_fasta(self):
+        """Asynchronous parsing of FASTA files."""
+        self.check("Fasta/f002", "fasta")
+        self.check("Fasta/fa01", "fasta")
+        self.check("GenBank/NC_005816.faa", "fasta")
+
+    def test_fastq(self):
+        """Asynchronous parsing of FASTQ files."""
+        self.check("Quality/example.fastq", "fastq")
+        self.check("Quality/example_dos.fastq", "fastq")
+        self.check("Quality/tricky.fastq", "fastq")
+        self.check("Quality/illumina_faked.fastq", "fastq-illumina")
+        self.check("Quality/solexa_faked.fastq", "fastq-solexa")
+
+    def test_fastq_multiline(self):
+        """Asynchronous parsing of long multi-line FASTQ records."""
+        data = "".join(["@long\n", "ACGT\n" * 500, "+\n", "@III\n" * 500,
+                        "@short\nAC\n+\n@I\n", "@last\nA\n+\nI\n"]).encode()
+        for chunk_size in (1, 7, 100, 65536):
+            records = self.aparse(data, "fastq", chunk_size=chunk_size)
+            self.assertEqual(["long", "short", "last"],
+                             [r.id for r in records])
+            self.assertEqual(2000, len(records[0]))
+            self.assertEqual([31, 40, 40, 40],
+                             records[0].letter_annotations[
+                                 "phred_quality"][:4])
+
+    def test_qual(self):
+        """Asynchronous parsing of QUAL files."""
+        self.check("Quality/example.qual", "qual")
+
+    def test_tab(self):
+        """Asynchronous parsing of tab files."""
+        self.check("GenBank/NC_005816.tsv", "tab")
+
+    def test_genbank(self):
+        """Asynchronous parsing of GenBank files."""
+        self.check("GenBank/cor6_6.gb", "gb", (1, 100, 65536))
+        self.check("GenBank/NC_005816.gb", "gb", (100, 65536))
+
+    def test_embl(self):
+        """Asynchronous parsing of EMBL files."""
+        self.check("EMBL/epo_prt_selection.embl", "embl", (100, 65536))
+
+    def test_swiss(self):
+        """Asynchronous parsing of SwissProt files."""
+        self.check("SwissProt/multi_ex.txt", "swiss", (100, 65536))
+
+    def test_text_stream(self):
+        """Asynchronous parsing of a stream giving strings."""
+
+        class TextStream(object):
+            def __init__(self, text, loop):
+                self.text = text
+                self.loop = loop
+
+            def read(self, size):
+                future = self.loop.create_future()
+                future.set_result(self.text[:size])
+                self.text = self.text[size:]
+                return future
+
+        with open("Quality/example.fastq") as handle:
+            stream = TextStream(handle.read(), self.loop)
+        iterator = SeqIO.aparse(stream, "fastq", chunk_size=10)
+        ids = []
+        while True:
+            try:
+                ids.append(self.loop.run_until_complete(
+                    iterator.__anext__()).id)
+            except StopAsyncIteration:
+                break
+        self.assertEqual(ids, [r.id for r in
+                               SeqIO.parse("Quality/example.fastq", "fastq")])
+
+    def test_lightweight(self):
+        """Asynchronous parsing with lightweight records."""
+        with open("Quality/example.fastq", "rb") as handle:
+            data = handle.read()
+        records = self.aparse(data, "fastq", lightweight=True, chunk_size=50)
+        self.assertEqual(3, len(records))
+        self.assertEqual("EAS54_6_R1_2_1_413_324", records[0].id)
+        self.assertEqual(25, len(records[0].qualities))
+
+    def test_empty(self):
+        """Asynchronous parsing of an empty stream."""
+        self.assertEqual([], self.aparse(b"", "fasta"))
+
+    def test_unsupported(self):
+        """Asynchronous parsing of an unsupported format."""
+        self.assertRaises(ValueError, self.aparse, b"", "sff")
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
@@ -1093,6 +1093,26 @@ class NC_000932(unittest.TestCase):
             else:
                 self.assertEqual(str(pro), str(r.seq))
 
+    def test_extract_features(self):
+        """Checking SeqRecord extract_features vs SeqFeature extract."""
+        gb_record = SeqIO.read(self.gb_filename, "genbank")
+        cds_features = [f for f in gb_record.features if f.type == "CDS"]
+        cds_seqs = gb_record.extract_features("CDS")
+        self.assertEqual(len(cds_features), len(cds_seqs))
+        for f, nuc in zip(cds_features, cds_seqs):
+            self.assertTrue(isinstance(nuc, Seq))
+            self.assertEqual(str(nuc), str(f.extract(gb_record.seq)))
+            self.assertEqual(str(nuc), str(f.extract(str(gb_record.seq))))
+        all_seqs = gb_record.extract_features()
+        self.assertEqual(len(gb_record.features), len(all_seqs))
+        fasta = list(SeqIO.parse(self.faa_filename, "fasta"))
+        proteins = gb_record.extract_features("CDS", translate=True,
+                                              table=self.table)
+        for r, pro in zip(fasta, proteins):
+            if r.id in self.skip_trans_test:
+                continue
+            self.assertEqual(str(pro).rstrip("*")[1:], str(r.seq)[1:])
+
 
 class NC_005816(NC_000932):
     basename = "NC_005816"
@@ -9,8 +9,11 @@ See also the doctests in bgzf.py which are called via run_tests.py
 """
 
 import unittest
+import gc
 import gzip
 import os
+import threading
+from io import BytesIO
 from random import shuffle
 
 from Bio._py3k import _as_bytes, _as_string
@@ -41,6 +44,11 @@ if _have_bug17666():
                                        "http://bugs.python.org/issue17666 for details")
 
 
+class _NamelessHandle(BytesIO):
+    """Binary in memory handle, without a filename."""
+    mode = "rb"
+
+
 class BgzfTests(unittest.TestCase):
     def setUp(self):
         self.temp_file = "temp.bgzf"
@@ -51,12 +59,12 @@ class BgzfTests(unittest.TestCase):
         if os.path.isfile(self.temp_file):
             os.remove(self.temp_file)
 
-    def rewrite(self, compressed_input_file, output_file):
+    def rewrite(self, compressed_input_file, output_file, threads=1):
         h = gzip.open(compressed_input_file, "rb")
         data = h.read()
         h.close()
 
-        with bgzf.BgzfWriter(output_file, "wb") as h:
+        with bgzf.BgzfWriter(output_file, "wb", threads=threads) as h:
             h.write(data)
             self.assertFalse(h.seekable())
             self.assertFalse(h.isatty())
@@ -113,7 +121,7 @@ class BgzfTests(unittest.TestCase):
         self.assertEqual(len(old), len(new))
         self.assertEqual(old, new)
 
-    def check_by_line(self, old_file, new_file, old_gzip=False):
+    def check_by_line(self, old_file, new_file, old_gzip=False, threads=1):
         for mode in ["r", "rb"]:
             if old_gzip:
                 h = gzip.open(old_file, mode)
@@ -129,7 +137,8 @@ class BgzfTests(unittest.TestCase):
             h.close()
 
             for cache in [1, 10]:
-                h = bgzf.BgzfReader(new_file, mode, max_cache=cache)
+                h = bgzf.BgzfReader(new_file, mode, max_cache=cache,
+                                    threads=threads)
                 if "b" in mode:
                     new = b"".join(line for line in h)
                 else:
@@ -360,6 +369,140 @@ class BgzfTests(unittest.TestCase):
         self.rewrite("Blast/wnts.xml.bgz", temp_file)
         self.check_blocks("Blast/wnts.xml.bgz", temp_file)
 
+    def test_threads_bam_ex1(self):
+        """Reproduce BGZF compression for BAM file using threads"""
+        temp_file = self.temp_file
+        self.rewrite("SamBam/ex1.bam", temp_file, threads=3)
+        self.check_blocks("SamBam/ex1.bam", temp_file)
+
+    def test_threads_example_wnts_xml(self):
+        """Reproduce BGZF compression for wnts.xml BLAST file using threads"""
+        temp_file = self.temp_file
+        self.rewrite("Blast/wnts.xml.bgz", temp_file, threads=2)
+        self.check_blocks("Blast/wnts.xml.bgz", temp_file)
+
+    def test_threads_iter(self):
+        """Check iteration over BGZF files using threads"""
+        self.check_by_line("SamBam/ex1.bam", "SamBam/ex1.bam", True, threads=3)
+        self.check_by_line("GenBank/NC_000932.gb", "GenBank/NC_000932.gb.bgz",
+                           threads=2)
+
+    def test_threads_seek(self):
+        """Check random access to SamBam/ex1.bam using threads"""
+        h = open("SamBam/ex1.bam", "rb")
+        blocks = list(bgzf.BgzfBlocks(h))
+        h.close()
+        with bgzf.BgzfReader("SamBam/ex1.bam", "rb") as h:
+            expected = [h.read(data_len) for start, raw_len, data_start, data_len in blocks]
+        with bgzf.BgzfReader("SamBam/ex1.bam", "rb", threads=3) as h:
+            for i in [3, 4, 0, 1, 6, 2, 5]:
+                h.seek(bgzf.make_virtual_offset(blocks[i][0], 0))
+                self.assertEqual(expected[i], h.read(blocks[i][3]))
+                # Carry on into the next block (which may be read ahead)
+                if i + 1 < len(blocks):
+                    h.seek(bgzf.make_virtual_offset(blocks[i][0], 0))
+                    self.assertEqual(expected[i] + expected[i + 1][:100],
+                                     h.read(blocks[i][3] + 100))
+
+    def test_threads_write_tell(self):
+        """Check offset works during BGZF writing using threads"""
+        temp_file = self.temp_file
+        h = bgzf.BgzfWriter(temp_file, "w", threads=2)
+        offsets = []
+        for i in range(10):
+            h.write("Magic%i" % i + "X" * 30000)
+            offsets.append(h.tell())
+        h.close()
+        with bgzf.BgzfReader(temp_file, "r", threads=2) as h:
+            for i, offset in enumerate(offsets[:-1]):
+                h.seek(offset)
+                self.assertEqual("Magic%i" % (i + 1), h.read(6))
+
+    def test_threads_not_closed(self):
+        """Check readers and writers not closed stop their threads"""
+        before = threading.active_count()
+        h = bgzf.BgzfReader("SamBam/ex1.bam", "rb", threads=3)
+        h.read(100)
+        self.assertTrue(threading.active_count() > before)
+        del h
+        gc.collect()
+        self.assertEqual(before, threading.active_count())
+        handle = open(self.temp_file, "wb")
+        h = bgzf.BgzfWriter(fileobj=handle, threads=2)
+        h.write(b"X" * 100000)
+        self.assertTrue(threading.active_count() > before)
+        del h
+        gc.collect()
+        handle.close()
+        self.assertEqual(before, threading.active_count())
+
+    def test_cache_lru(self):
+        """Check the BGZF block cache removes the least recently used"""
+        cache = bgzf.BgzfBlockCache(max_blocks=3)
+        for key in "ABC":
+            cache.add(key, key.lower(), 10)
+        self.assertEqual("a", cache.get("A"))
+        cache.add("D", "d", 10)
+        self.assertNotIn("B", cache)
+        self.assertEqual(3, len(cache))
+        self.assertEqual(30, cache.size)
+        self.assertEqual(None, cache.get("B"))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        # Now limit by size in bytes,
+        cache = bgzf.BgzfBlockCache(max_blocks=None, max_bytes=100)
+        for key in "ABCDE":
+            cache.add(key, key.lower(), 30)
+        self.assertEqual(["C", "D", "E"], [k for k in "ABCDE" if k in cache])
+        self.assertEqual(90, cache.size)
+        # Always keep the most recent block, even if too big
+        cache.add("F", "f", 1000)
+        self.assertEqual(1, len(cache))
+        self.assertEqual("f", cache.get("F"))
+
+    def test_cache_random(self):
+        """Check random access to SamBam/ex1.bam with a byte limited cache"""
+        h = open("SamBam/ex1.bam", "rb")
+        blocks = list(bgzf.BgzfBlocks(h))
+        h.close()
+        with bgzf.BgzfReader("SamBam/ex1.bam", "rb") as h:
+            expected = [h.read(data_len) for start, raw_len, data_start, data_len in blocks]
+        # Room for two full blocks only
+        cache = bgzf.BgzfBlockCache(max_blocks=None, max_bytes=2 * 65536)
+        h = bgzf.BgzfReader("SamBam/ex1.bam", "rb", cache=cache)
+        for i in [1, 2, 1, 3, 1, 2]:
+            h.seek(bgzf.make_virtual_offset(blocks[i][0], 0))
+            self.assertEqual(expected[i], h.read(blocks[i][3]))
+            self.assertTrue(cache.size <= 2 * 65536)
+        # Block 1 is always recent, but block 2 was removed by block 3
+        self.assertEqual(2, cache.hits)
+        # Share the cache with a second reader
+        h2 = bgzf.BgzfReader("SamBam/ex1.bam", "rb", cache=cache)
+        h2.seek(bgzf.make_virtual_offset(blocks[2][0], 0))
+        self.assertEqual(expected[2], h2.read(blocks[2][3]))
+        self.assertEqual(3, cache.hits)
+        h.close()
+        h2.close()
+
+    def test_cache_handles(self):
+        """Check a shared cache never mixes up the blocks of handles"""
+        filenames = ["GenBank/cor6_6.gb.bgz", "Quality/example.fastq.bgz"]
+        raw = []
+        expected = []
+        for filename in filenames:
+            with open(filename, "rb") as h:
+                raw.append(h.read())
+            with bgzf.BgzfReader(filename, "rb") as h:
+                expected.append(h.read(100))
+        cache = bgzf.BgzfBlockCache(max_blocks=10)
+        # Handles without a filename are identified by the handle object,
+        # and the id of a discarded handle is often reused for a new one
+        for i in range(20):
+            h = bgzf.BgzfReader(fileobj=_NamelessHandle(raw[i % 2]),
+                                mode="rb", cache=cache)
+            self.assertEqual(expected[i % 2], h.read(100))
+            h.close()
+            del h
+
     def test_write_tell(self):
         """Check offset works during BGZF writing"""
         temp_file = self.temp_file
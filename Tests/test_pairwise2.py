@@ -465,6 +465,26 @@ ATAT
   Score=3
 """)
 
+    def test_match_dictionary_missing_key(self):
+        """Missing residue pairs raise a KeyError."""
+        self.assertRaises(KeyError, pairwise2.align.localds,
+                          "ATCT", "ATT", self.match_dict, -1, 0)
+        self.assertRaises(KeyError, pairwise2.align.globalds,
+                          "ATCT", "ATT", self.match_dict, -1, 0,
+                          score_only=True)
+
+    def test_match_dictionary_asymmetric(self):
+        """Score dictionary which is not symmetric."""
+        match_fn = pairwise2.dictionary_match(
+            {("A", "A"): 2, ("T", "T"): 2, ("A", "T"): -1, ("T", "A"): 1},
+            symmetric=0)
+        score = pairwise2.align.globalcs("AAT", "AAA", match_fn, -5, -5,
+                                         score_only=True)
+        self.assertEqual(score, 5)
+        score = pairwise2.align.globalcs("AAA", "AAT", match_fn, -5, -5,
+                                         score_only=True)
+        self.assertEqual(score, 3)
+
 
 class TestPairwiseOneCharacter(unittest.TestCase):
 
@@ -585,6 +605,326 @@ AAAABBBAAAACCCCCCCCCCCCCCAAAABBBAAAA
 """)
 
 
+class TestPairwiseGeneric(unittest.TestCase):
+    """The generic and the fast score matrices should agree."""
+
+    def test_generic_vs_fast(self):
+        """Same results with ``force_generic`` for affine gap penalties."""
+        pairs = [("GAACT", "GAT"), ("ACCCCCGT", "ACG"),
+                 ("KEVLAHHW", "EVLWWH")]
+        for seqA, seqB in pairs:
+            for align in (pairwise2.align.globalds, pairwise2.align.localds):
+                for penalize_end_gaps in (True, False):
+                    fast = align(seqA, seqB, blosum62, -5, -1,
+                                 penalize_end_gaps=penalize_end_gaps)
+                    generic = align(seqA, seqB, blosum62, -5, -1,
+                                    penalize_end_gaps=penalize_end_gaps,
+                                    force_generic=True)
+                    self.assertEqual(sorted(fast), sorted(generic))
+
+    def test_lists(self):
+        """Lists of residues give the same alignments as strings."""
+        for seqA, seqB in [("GAACT", "GAT"), ("ACCGT", "ACG")]:
+            for align in (pairwise2.align.globalms, pairwise2.align.localms):
+                aligns = align(seqA, seqB, 2, -1, -1, -0.5)
+                list_aligns = align(list(seqA), list(seqB), 2, -1, -1, -0.5,
+                                    gap_char=["-"])
+                self.assertEqual(
+                    [("".join(a), "".join(b), score, begin, end)
+                     for a, b, score, begin, end in list_aligns],
+                    aligns)
+
+    def test_integer_scores(self):
+        """Integer match and gap scores give integer alignment scores."""
+        def gap_function(x, y):
+            return -2 if y else 0
+
+        alignments = pairwise2.align.globalmc("ACCGT", "ACG", 1, 0,
+                                              gap_function, gap_function)
+        self.assertTrue(alignments)
+        for alignment in alignments:
+            self.assertTrue(isinstance(alignment[2], int))
+        self.assertTrue(pairwise2.format_alignment(
+            *alignments[0]).endswith("  Score=0\n"))
+        for align in (pairwise2.align.globalxx, pairwise2.align.localxx):
+            score = align("ACCGT", "ACG", force_generic=True, score_only=True)
+            self.assertEqual(3, score)
+            self.assertTrue(isinstance(score, int))
+        match_dict = {("A", "A"): 2, ("A", "C"): -1, ("C", "C"): 1.5}
+        score = pairwise2.align.globalds("AA", "AA", match_dict, -1, -1,
+                                         force_generic=True, score_only=True)
+        self.assertTrue(isinstance(score, int))
+        score = pairwise2.align.globalds("AC", "AC", match_dict, -1, -1,
+                                         force_generic=True, score_only=True)
+        self.assertEqual(3.5, score)
+        self.assertTrue(isinstance(score, float))
+        alignments = pairwise2.align.globalmc("ACCGT", "ACG", 1, 0,
+                                              lambda x, y: -0.5 * y,
+                                              gap_function)
+        self.assertTrue(isinstance(alignments[0][2], float))
+
+    def test_find_start(self):
+        """``_find_start`` returns the best score and starting points."""
+        score_matrix = [[0.0, 0.0, 0.0], [0.0, 2.0, 1.0], [0.0, 1.0, 2.0]]
+        self.assertEqual(pairwise2._find_start(score_matrix, True),
+                         (2.0, [(2.0, (2, 2))]))
+        self.assertEqual(pairwise2._find_start(score_matrix, False),
+                         (2.0, [(2.0, (1, 1)), (2.0, (2, 2))]))
+        self.assertEqual(pairwise2._find_start(score_matrix, False, 1),
+                         (2.0, [(2.0, (1, 1)), (1.0, (1, 2)),
+                                (1.0, (2, 1)), (2.0, (2, 2))]))
+
+
+class TestLinearMemory(unittest.TestCase):
+    """Score only and alignments in linear space."""
+
+    def test_score_only(self):
+        """Score only gives the score of the best alignments."""
+        for seqA, seqB in [("GAACT", "GAT"), ("GAT", "GAACT"),
+                           ("KEVLAHHW", "EVLWWH"), ("A", "ACCGT")]:
+            for align in (pairwise2.align.globalds, pairwise2.align.localds):
+                for penalize_end_gaps in (True, False, (True, False)):
+                    aligns = align(seqA, seqB, blosum62, -5, -1,
+                                   penalize_end_gaps=penalize_end_gaps)
+                    score = align(seqA, seqB, blosum62, -5, -1,
+                                  penalize_end_gaps=penalize_end_gaps,
+                                  score_only=True)
+                    self.assertEqual(score, aligns[0][2])
+
+    def test_global(self):
+        """One of the best global alignments, in linear space."""
+        seqA, seqB = "TTGACCATGGCGACAGT", "TGACTAGGCGCAT"
+        for penalize_end_gaps in (True, False, (False, True)):
+            aligns = pairwise2.align.globalms(
+                seqA, seqB, 2, -1, -3, -1,
+                penalize_end_gaps=penalize_end_gaps)
+            linear = pairwise2.align.globalms(
+                seqA, seqB, 2, -1, -3, -1, linear_memory=True,
+                penalize_end_gaps=penalize_end_gaps)
+            self.assertEqual(len(linear), 1)
+            self.assertTrue(linear[0] in aligns)
+
+    def test_local(self):
+        """One of the best local alignments, in linear space."""
+        aligns = pairwise2.align.localds("TTKEVLAHHWT", "GEVLWWHG",
+                                         blosum62, -5, -1)
+        linear = pairwise2.align.localds("TTKEVLAHHWT", "GEVLWWHG",
+                                         blosum62, -5, -1, linear_memory=True)
+        self.assertEqual(len(linear), 1)
+        self.assertTrue(linear[0] in aligns)
+        self.assertEqual(pairwise2.format_alignment(*linear[0]), """\
+TTKEVLAHHWT--
+   |||||||
+--GEVL---WWHG
+  Score=17
+""")
+        self.assertEqual(pairwise2.align.localxx("AAA", "CC",
+                                                 linear_memory=True), [])
+
+    def test_long_gap(self):
+        """Gaps across the middle of the sequence."""
+        seqA = "ACGTTGCA" + "T" * 15 + "GGATCCAA"
+        seqB = "ACGTTGCAGGATCCAA"
+        for open_B in (-5, -20):
+            aligns = pairwise2.align.globalmd(seqA, seqB, 2, -1, -5, -1,
+                                              open_B, -0.5)
+            linear = pairwise2.align.globalmd(seqA, seqB, 2, -1, -5, -1,
+                                              open_B, -0.5,
+                                              linear_memory=True)
+            self.assertTrue(linear[0] in aligns)
+            self.assertEqual(linear[0][1], "ACGTTGCA" + "-" * 15 + "GGATCCAA")
+
+    def test_lists(self):
+        """Lists of residues, in linear space."""
+        linear = pairwise2.align.globalms(["Gly", "Ala", "Ala", "Thr"],
+                                          ["Gly", "Thr"], 2, -1, -1, -0.5,
+                                          gap_char=["-"], linear_memory=True)
+        self.assertEqual(linear, [(["Gly", "Ala", "Ala", "Thr"],
+                                   ["Gly", "-", "-", "Thr"], 2.5, 0, 4)])
+
+    def test_gap_function(self):
+        """Only for affine gap penalties."""
+        def gap_function(x, y):
+            return -2 * y
+        self.assertRaises(ValueError, pairwise2.align.globalmc, "ACCGT",
+                          "ACG", 1, 0, gap_function, gap_function,
+                          linear_memory=True)
+        self.assertRaises(ValueError, pairwise2.align.globalxx, "ACCGT",
+                          "ACG", force_generic=True, linear_memory=True)
+
+
+class TestBand(unittest.TestCase):
+    """Alignments within a band of diagonals."""
+
+    seqA = "ACGTACGTAC" + "GGG" + "TTGCATTGCA"
+    seqB = "ACGTACGTAC" + "TTGCATTGCA" + "CCC"
+
+    def test_wide_band(self):
+        """A band covering the whole matrix gives the usual alignments."""
+        for align in (pairwise2.align.globalms, pairwise2.align.localms):
+            for penalize_end_gaps in (True, False):
+                aligns = align(self.seqA, self.seqB, 2, -1, -2, -0.5,
+                               penalize_end_gaps=penalize_end_gaps)
+                banded = align(self.seqA, self.seqB, 2, -1, -2, -0.5,
+                               penalize_end_gaps=penalize_end_gaps, band=30)
+                self.assertEqual(aligns, banded)
+
+    def test_narrow_band(self):
+        """Alignments only use the diagonals within the band."""
+        aligns = pairwise2.align.globalms(self.seqA, self.seqB, 2, -1,
+                                          -2, -0.5)
+        self.assertEqual(len(aligns), 1)
+        self.assertEqual(aligns[0][2], 34)
+        banded = pairwise2.align.globalms(self.seqA, self.seqB, 2, -1,
+                                          -2, -0.5, band=2)
+        self.assertEqual(len(banded), 4)
+        for seqA, seqB, score, begin, end in banded:
+            self.assertEqual(score, 25)
+            self.assertTrue("---" not in seqA and "---" not in seqB)
+        self.assertEqual(pairwise2.align.globalms(
+            self.seqA, self.seqB, 2, -1, -2, -0.5, band=2, score_only=True),
+            25)
+        # A band of zero still allows for the difference in length
+        self.assertEqual(pairwise2.align.globalxx("ACCGT", "ACG", band=0),
+                         [("ACCGT", "A-CG-", 3.0, 0, 5),
+                          ("ACCGT", "AC-G-", 3.0, 0, 5)])
+
+    def test_widen_band(self):
+        """Widen the band while the alignment touches its edge."""
+        aligns = pairwise2.align.globalms(self.seqA, self.seqB, 2, -1,
+                                          -2, -0.5)
+        for band in (0, 1, 2):
+            self.assertEqual(aligns, pairwise2.align.globalms(
+                self.seqA, self.seqB, 2, -1, -2, -0.5, band=band,
+                widen_band=True))
+            self.assertEqual(34, pairwise2.align.globalms(
+                self.seqA, self.seqB, 2, -1, -2, -0.5, band=band,
+                widen_band=True, score_only=True))
+
+    def test_errors(self):
+        """Bands need affine gap penalties."""
+        def gap_function(x, y):
+            return -2 * y
+        self.assertRaises(ValueError, pairwise2.align.globalmc, "ACCGT",
+                          "ACG", 1, 0, gap_function, gap_function, band=2)
+        self.assertRaises(ValueError, pairwise2.align.globalxx, "ACCGT",
+                          "ACG", linear_memory=True, band=2)
+        self.assertRaises(ValueError, pairwise2.align.globalxx, "ACCGT",
+                          "ACG", band=-1)
+        # the optimum of a local alignment can be off the diagonals of the
+        # band, without the best alignment found touching its edge
+        self.assertRaises(ValueError, pairwise2.align.localms,
+                          "TTCCTCATGCAATTC", "AAAACCATGTCCGTAATGTA",
+                          1, 0, -1, -1, band=0, widen_band=True)
+
+
+class TestAlignMany(unittest.TestCase):
+    """One query against many targets."""
+
+    targets = ["EVLWWH", "KEVLAHHW", "", "WWW", "HAAKEVLA", "lower", "X" * 40]
+
+    def check_scores(self, scores, function, query, *args, **keywds):
+        align = getattr(pairwise2.align, function)
+        self.assertEqual(len(scores), len(self.targets))
+        for score, target in zip(scores, self.targets):
+            if not target:
+                self.assertTrue(score != score)  # NaN
+                continue
+            self.assertEqual(score, align(query, target, *args,
+                                          score_only=True, **keywds))
+
+    def test_scores(self):
+        """Scores are the same as aligning each target."""
+        for function in ("localds", "globalds"):
+            scores = pairwise2.align_many(function, "KEVLAHHW",
+                                          self.targets[:5], blosum62, -5, -1)
+            self.targets, targets = self.targets[:5], self.targets
+            try:
+                self.check_scores(scores, function, "KEVLAHHW",
+                                  blosum62, -5, -1)
+            finally:
+                self.targets = targets
+        for keywds in ({}, {"penalize_end_gaps": False},
+                       {"penalize_extend_when_opening": True}):
+            scores = pairwise2.align_many("globalmd", "kevlaHHW",
+                                          iter(self.targets), 2, -1,
+                                          -3, -1, -2, -0.5, **keywds)
+            self.check_scores(scores, "globalmd", "kevlaHHW",
+                              2, -1, -3, -1, -2, -0.5, **keywds)
+
+    def test_alignments(self):
+        """Alignments of each target."""
+        scores, alignments = pairwise2.align_many(
+            "localms", "KEVLAHHW", self.targets, 2, -1, -3, -1,
+            score_only=False)
+        self.check_scores(scores, "localms", "KEVLAHHW", 2, -1, -3, -1)
+        for target, aligns in zip(self.targets, alignments):
+            self.assertEqual(aligns, pairwise2.align.localms(
+                "KEVLAHHW", target, 2, -1, -3, -1))
+
+    def test_generic(self):
+        """Targets as lists, and gap functions."""
+        def gap_function(x, y):
+            return -2 * y
+        scores = pairwise2.align_many("globalxc", ["K", "E", "V"],
+                                      [["E", "V"], ["K", "V"], []],
+                                      gap_function, gap_function,
+                                      gap_char=["-"])
+        self.assertEqual(list(scores)[:2], [0.0, 0.0])
+        self.assertTrue(scores[2] != scores[2])
+
+    def test_processes(self):
+        """Split the targets over worker processes."""
+        # Not the empty target, as NaN != NaN
+        targets = (self.targets[:2] + self.targets[3:5]) * 5
+        scores = pairwise2.align_many("localds", "KEVLAHHW", targets,
+                                      blosum62, -5, -1)
+        self.assertEqual(pairwise2.align_many("localds", "KEVLAHHW",
+                                              targets, blosum62, -5, -1,
+                                              processes=2), scores)
+
+    def test_missing_residue(self):
+        """A residue missing from the substitution matrix."""
+        self.assertRaises(KeyError, pairwise2.align_many, "localds",
+                          "KEVLA", ["EVL", "EVL*"], blosum62, -5, -1)
+        self.assertRaises(TypeError, pairwise2.align_many, "localds",
+                          "KEVLA", ["EVL"], blosum62, -5)
+
+
+class TestTraceback(unittest.TestCase):
+    """Following the traceback is bounded."""
+
+    def tearDown(self):
+        pairwise2.MAX_TRACEBACK_PATHS = 100000
+
+    def test_max_traceback_paths(self):
+        """At most ``MAX_TRACEBACK_PATHS`` paths are followed."""
+        self.assertEqual(len(pairwise2.align.globalxx("AAAAAA", "AAA")), 20)
+        pairwise2.MAX_TRACEBACK_PATHS = 3
+        self.assertEqual(pairwise2.align.globalxx("AAAAAA", "AAA"),
+                         [("AAAAAA", "---AAA", 3.0, 0, 6),
+                          ("AAAAAA", "--A-AA", 3.0, 0, 6),
+                          ("AAAAAA", "-A--AA", 3.0, 0, 6)])
+        pairwise2.MAX_TRACEBACK_PATHS = 0
+        self.assertEqual(pairwise2.align.globalxx("AAAAAA", "AAA"), [])
+
+    def test_one_alignment_only(self):
+        """Only the first of very many optimal alignments is followed."""
+        alignments = pairwise2.align.localxx("A" * 100, "A" * 100,
+                                             one_alignment_only=True)
+        self.assertEqual(alignments, [("A" * 100, "A" * 100, 100.0, 0, 100)])
+
+    def test_traceback_matrix(self):
+        """The traceback matrix has one byte per cell."""
+        score_matrix, trace_matrix = pairwise2._make_score_matrix_fast(
+            "GAACT", "GAT", pairwise2.identity_match(1, 0), -1, -1, -1, -1,
+            False, (True, True), True, False)
+        self.assertEqual(len(trace_matrix), 6)
+        for row in trace_matrix:
+            self.assertEqual(bytearray, type(row))
+            self.assertEqual(len(row), 4)
+
+
 class TestOtherFunctions(unittest.TestCase):
     """Test remaining non-tested private methods."""
 
@@ -602,6 +942,11 @@ class TestOtherFunctions(unittest.TestCase):
         ]
         result = pairwise2._clean_alignments(alns)
         self.assertEqual(expected, result)
+        list_alns = [(list(a), list(b), score, begin, end)
+                     for a, b, score, begin, end in alns]
+        self.assertEqual(pairwise2._clean_alignments(list_alns),
+                         [(list(a), list(b), score, begin, end)
+                          for a, b, score, begin, end in expected])
 
     def test_print_matrix(self):
         """``print_matrix`` prints nested lists as nice matrices."""
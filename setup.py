@@ -266,6 +266,14 @@ class build_py_biopython(build_py):
             self.packages.extend(NUMPY_PACKAGES)
         build_py.run(self)
 
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+        if sys.version_info < (3, 6):
+            # This uses the async generator syntax of Python 3.6, so would
+            # give a SyntaxError when byte-compiled on older versions
+            modules = [m for m in modules if m[:2] != ("Bio.SeqIO", "_async")]
+        return modules
+
 
 class build_ext_biopython(build_ext):
     def run(self):